@@ -0,0 +1,4 @@
+"""Performance benchmarks for weather-command.
+
+Run with `python -m benchmarks`, see `python -m benchmarks --help` for the options.
+"""
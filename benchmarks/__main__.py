@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import os
+import tempfile
+from contextlib import ExitStack
+from pathlib import Path
+from typing import List, Optional
+
+from rich.console import Console
+from rich.markup import escape
+from rich.table import Table
+from typer import BadParameter, Option, run
+
+from benchmarks import _harness
+from benchmarks._harness import Benchmark, Result
+
+DEFAULT_OUTPUT = Path("benchmark-results.json")
+
+console = Console()
+
+
+def main(
+    output: Path = Option(
+        DEFAULT_OUTPUT, "--output", "-o", dir_okay=False, help="Where to save the results as JSON."
+    ),
+    group: Optional[List[str]] = Option(
+        None,
+        "--group",
+        "-g",
+        help="Only run this group of benchmarks, 'parse', 'render', 'show', or 'summarize'. Can be given more than once.",
+    ),
+    filter: Optional[str] = Option(
+        None, "--filter", "-k", help="Only run benchmarks with this text in their name."
+    ),
+    rounds: int = Option(5, "--rounds", "-r", min=1, help="How many times to time each benchmark."),
+    min_round_time: float = Option(
+        _harness.MIN_ROUND_TIME,
+        "--min-round-time",
+        min=0,
+        help="The shortest time, in seconds, each round runs for.",
+    ),
+    compare: Optional[Path] = Option(
+        None,
+        "--compare",
+        "-c",
+        exists=True,
+        dir_okay=False,
+        help="A results file from an earlier run to compare against.",
+    ),
+) -> None:
+    from benchmarks.suite import GROUPS, collect
+
+    groups = tuple(group) if group else GROUPS
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        raise BadParameter(f"unknown group {', '.join(sorted(unknown))}", param_hint="--group")
+
+    baseline = {x.name: x for x in _harness.load(compare)} if compare else {}
+
+    # Keep the benchmarks from using, or filling, the real caches.
+    os.environ.setdefault("OPEN_WEATHER_API_KEY", "benchmark")
+    os.environ["WEATHER_COMMAND_RATE_LIMITS"] = "none"
+    with tempfile.TemporaryDirectory() as cache_dir, ExitStack() as stack:
+        os.environ["WEATHER_COMMAND_CACHE_DIR"] = cache_dir
+        benchmarks = [x for x in collect(stack, groups) if filter is None or filter in x.name]
+        results = list(
+            _harness.run_all(
+                benchmarks, rounds=rounds, min_round_time=min_round_time, progress=_progress
+            )
+        )
+
+    _harness.save(results, output)
+    console.print(_results_table(results, baseline))
+    console.print(f"Results saved to {output}")
+
+
+def _progress(benchmark: Benchmark) -> None:
+    console.print(f"Running {escape(benchmark.name)}", style="dim")
+
+
+def _format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def _results_table(results: list[Result], baseline: dict[str, Result]) -> Table:
+    table = Table(title="Benchmarks", header_style="bold")
+    table.add_column("Name", no_wrap=True)
+    table.add_column("Median", justify="right")
+    table.add_column("Min", justify="right")
+    table.add_column("Stdev", justify="right")
+    table.add_column("Loops", justify="right")
+    if baseline:
+        table.add_column("Baseline", justify="right")
+        table.add_column("Change", justify="right")
+
+    for result in results:
+        row = [
+            escape(result.name),
+            _format_time(result.median),
+            _format_time(result.min),
+            _format_time(result.stdev),
+            str(result.loops),
+        ]
+        if baseline:
+            old = baseline.get(result.name)
+            if old is None:
+                row.extend(["", ""])
+            else:
+                change = result.median / old.median - 1
+                style = "green" if change < 0 else "red"
+                row.extend([_format_time(old.median), f"[{style}]{change:+.1%}[/{style}]"])
+        table.add_row(*row)
+
+    return table
+
+
+if __name__ == "__main__":
+    run(main)
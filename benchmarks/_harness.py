@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+import platform
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+# Each round runs the benchmark enough times to take at least this long so very fast benchmarks
+# aren't dominated by timer resolution.
+MIN_ROUND_TIME = 0.05
+
+RESULTS_VERSION = 1
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    name: str
+    group: str
+    func: Callable[[], Any]
+    params: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class Result:
+    name: str
+    group: str
+    params: dict[str, Any]
+    rounds: int
+    loops: int
+    min: float
+    median: float
+    mean: float
+    stdev: float
+
+
+def run(benchmark: Benchmark, *, rounds: int, min_round_time: float = MIN_ROUND_TIME) -> Result:
+    """Times a benchmark, returning the time per call in seconds.
+
+    The benchmark is run once to warm up, then the number of loops per round is doubled until a
+    round takes at least min_round_time.
+    """
+    benchmark.func()
+
+    loops = 1
+    while True:
+        elapsed = _time_round(benchmark.func, loops)
+        if elapsed >= min_round_time:
+            break
+        loops *= 2
+
+    times = [elapsed / loops]
+    times.extend(_time_round(benchmark.func, loops) / loops for _ in range(rounds - 1))
+
+    return Result(
+        name=benchmark.name,
+        group=benchmark.group,
+        params=benchmark.params,
+        rounds=len(times),
+        loops=loops,
+        min=min(times),
+        median=statistics.median(times),
+        mean=statistics.mean(times),
+        stdev=statistics.stdev(times) if len(times) > 1 else 0.0,
+    )
+
+
+def run_all(
+    benchmarks: list[Benchmark],
+    *,
+    rounds: int,
+    min_round_time: float = MIN_ROUND_TIME,
+    progress: Callable[[Benchmark], None] | None = None,
+) -> Iterator[Result]:
+    for benchmark in benchmarks:
+        if progress is not None:
+            progress(benchmark)
+        yield run(benchmark, rounds=rounds, min_round_time=min_round_time)
+
+
+def save(results: list[Result], path: Path) -> None:
+    path.write_text(
+        json.dumps(
+            {
+                "version": RESULTS_VERSION,
+                "created": datetime.now(timezone.utc).isoformat(),
+                "machine": _machine(),
+                "benchmarks": [asdict(x) for x in results],
+            },
+            indent=2,
+        )
+    )
+
+
+def load(path: Path) -> list[Result]:
+    data = json.loads(path.read_text())
+    if data.get("version") != RESULTS_VERSION:
+        raise ValueError(f"{path} isn't a version {RESULTS_VERSION} results file")
+
+    return [Result(**x) for x in data["benchmarks"]]
+
+
+def _machine() -> dict[str, Any]:
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "weather_command": _package_version(),
+    }
+
+
+def _package_version() -> str | None:
+    try:
+        from importlib.metadata import PackageNotFoundError, version
+    except ImportError:  # Python 3.7
+        return None
+
+    try:
+        return version("weather-command")
+    except PackageNotFoundError:
+        return None
+
+
+def _time_round(func: Callable[[], Any], loops: int) -> float:
+    start = time.perf_counter()
+    for _ in range(loops):
+        func()
+    return time.perf_counter() - start
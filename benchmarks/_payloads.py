@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+from typing import Any
+
+START = 1632848400
+TIMEZONE_OFFSET = -14400
+
+# Hours and days in each payload size. "standard" is what OpenWeather returns.
+SIZES = {"small": (12, 2), "standard": (48, 8), "large": (192, 32)}
+
+# Locations and days of hourly history in each size summarized.
+HISTORY_SIZES = {"small": (10, 7), "standard": (100, 30)}
+
+
+def location() -> list[dict[str, Any]]:
+    return [{"display_name": "Greensboro, NC", "lat": 36.1056, "lon": -79.7569}]
+
+
+def current_weather() -> dict[str, Any]:
+    return {
+        "coord": {"lon": -79.792, "lat": 36.0726},
+        "weather": [
+            {"id": 211, "main": "Thunderstorm", "description": "thunderstorm", "icon": "11d"},
+            {"id": 701, "main": "Mist", "description": "mist", "icon": "50d"},
+            {"id": 500, "main": "Rain", "description": "light rain", "icon": "10d"},
+        ],
+        "base": "stations",
+        "main": {
+            "temp": 296.92,
+            "feels_like": 297.42,
+            "temp_min": 295.27,
+            "temp_max": 298.64,
+            "pressure": 1009,
+            "humidity": 79,
+        },
+        "visibility": 4828,
+        "wind": {"speed": 0.45, "deg": 275, "gust": 3.58},
+        "rain": {"1h": 0.55},
+        "clouds": {"all": 90},
+        "dt": START,
+        "sys": {
+            "type": 2,
+            "id": 2003175,
+            "country": "US",
+            "sunrise": START - 20000,
+            "sunset": START + 20000,
+        },
+        "timezone": TIMEZONE_OFFSET,
+        "id": 4469146,
+        "name": "Greensboro",
+        "cod": 200,
+    }
+
+
+def history_rows(
+    locations: int, days: int
+) -> list[tuple[int, int, float, int, float, float | None]]:
+    """Hourly rows as read from the history, with the occasional missing value."""
+    return [
+        (
+            location,
+            START + hour * 3600,
+            15 + location % 10 + (hour % 24) / 4,
+            40 + (location + hour) % 50,
+            (hour * 7 % 30) / 3,
+            None if hour % 5 else (hour % 13) / 10,
+        )
+        for location in range(locations)
+        for hour in range(days * 24)
+    ]
+
+
+def one_call(hours: int, days: int) -> dict[str, Any]:
+    """A one call response with the given number of hourly and daily forecasts.
+
+    The values vary from entry to entry so the renderers can't benefit from repeated strings.
+    """
+    return {
+        "lat": 36.1056,
+        "lon": -79.7569,
+        "timezone": "America/New_York",
+        "timezone_offset": TIMEZONE_OFFSET,
+        "current": {
+            "dt": START,
+            "sunrise": START - 20000,
+            "sunset": START + 20000,
+            "temp": 19.74,
+            "feels_like": 19.75,
+            "pressure": 1015,
+            "humidity": 76,
+            "dew_point": 15.39,
+            "uvi": 0,
+            "clouds": 6,
+            "visibility": 10000,
+            "wind_speed": 1.03,
+            "wind_deg": 209,
+            "wind_gust": 1.07,
+            "weather": [_condition(0)],
+        },
+        "minutely": [{"dt": START + i * 60, "precipitation": 0} for i in range(61)],
+        "hourly": [_hour(i) for i in range(hours)],
+        "daily": [_day(i) for i in range(days)],
+    }
+
+
+def _condition(i: int) -> dict[str, Any]:
+    if i % 3:
+        return {"id": 500, "main": "Rain", "description": "light rain", "icon": "10d"}
+
+    return {"id": 800, "main": "Clear", "description": "clear sky", "icon": "01d"}
+
+
+def _hour(i: int) -> dict[str, Any]:
+    hour = {
+        "dt": START + i * 3600,
+        "temp": 15 + (i % 24) * 0.5,
+        "feels_like": 14.5 + (i % 24) * 0.5,
+        "pressure": 1010 + i % 10,
+        "humidity": 50 + i % 40,
+        "dew_point": 10 + (i % 7) * 0.3,
+        "uvi": (i % 12) * 0.5,
+        "clouds": i % 100,
+        "visibility": 10000,
+        "wind_speed": 1 + (i % 9) * 0.4,
+        "wind_deg": (i * 15) % 360,
+        "wind_gust": 2 + (i % 9) * 0.5,
+        "weather": [_condition(i)],
+        "pop": (i % 10) / 10,
+    }
+    if i % 3:
+        hour["rain"] = {"1h": 0.1 + (i % 5) * 0.2}
+
+    return hour
+
+
+def _day(i: int) -> dict[str, Any]:
+    dt = START + i * 86400
+    day = {
+        "dt": dt,
+        "sunrise": dt - 20000,
+        "sunset": dt + 20000,
+        "moonrise": dt + 39000,
+        "moonset": dt + 4000,
+        "moon_phase": (i % 30) / 30,
+        "temp": {
+            "day": 25 + i % 5,
+            "min": 14 + i % 4,
+            "max": 29 + i % 3,
+            "night": 19 + i % 2,
+            "eve": 21 + i % 3,
+            "morn": 15 + i % 4,
+        },
+        "feels_like": {"day": 25 + i % 5, "night": 19, "eve": 21, "morn": 15},
+        "pressure": 1010 + i % 10,
+        "humidity": 35 + i % 50,
+        "dew_point": 12.3,
+        "wind_speed": 2 + (i % 6) * 0.5,
+        "wind_deg": (i * 40) % 360,
+        "wind_gust": 6 + i % 4,
+        "weather": [_condition(i)],
+        "clouds": (i * 13) % 100,
+        "pop": (i % 10) / 10,
+        "uvi": 5 + (i % 4) * 0.5,
+    }
+    if i % 3:
+        day["rain"] = 1 + (i % 4) * 0.7
+
+    return day
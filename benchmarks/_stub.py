@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import gzip
+import json
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Iterator
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks import _payloads
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    server: StubServer
+
+    def do_GET(self) -> None:  # noqa: N802
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/search":
+            body: Any = _payloads.location()
+        elif url.path == "/data/2.5/weather":
+            body = _payloads.current_weather()
+        elif url.path == "/data/2.5/onecall":
+            body = dict(self.server.one_call)
+            for part in ",".join(query.get("exclude", [])).split(","):
+                body.pop(part, None)
+        else:
+            self.send_error(404)
+            return
+
+        content = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            content = gzip.compress(content, compresslevel=6)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    """A local stand in for OpenWeather and the geocoding service."""
+
+    daemon_threads = True
+
+    def __init__(self, hours: int, days: int) -> None:
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.one_call = _payloads.one_call(hours, days)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+@contextmanager
+def stub_upstream(hours: int, days: int) -> Iterator[StubServer]:
+    """Runs a stub server and points weather-command at it instead of the real services."""
+    server = StubServer(hours, days)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with patch("weather_command._builder.WEATHER_BASE_URL", f"{server.url}/data/2.5"), patch(
+            "weather_command._location.LOCATION_BASE_URL",
+            f"{server.url}/search?format=json&limit=1",
+        ):
+            yield server
+    finally:
+        server.shutdown()
+        server.server_close()
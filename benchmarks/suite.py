@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import json
+from contextlib import ExitStack
+from functools import partial
+from typing import Any, Callable
+
+from rich.console import Console
+
+from benchmarks import _payloads
+from benchmarks._harness import Benchmark
+from benchmarks._stub import stub_upstream
+from weather_command import _builder
+from weather_command._columns import get_history_columns, summarize_daily
+from weather_command.models.location import Location
+from weather_command.models.records import OneCallRecord, OneCallTempRecord
+from weather_command.models.weather import CurrentWeather, OneCallWeather
+
+GROUPS = ("parse", "render", "show", "summarize")
+WIDTHS = (80, 120, 200)
+
+# The width used for the full runs, where rendering isn't what is being compared.
+SHOW_WIDTH = 120
+
+
+class _NullFile:
+    def write(self, text: str) -> int:
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+def collect(stack: ExitStack, groups: tuple[str, ...] = GROUPS) -> list[Benchmark]:
+    """The benchmarks in the groups. Anything they need, like the stub server, is added to stack."""
+    benchmarks: list[Benchmark] = []
+    if "parse" in groups:
+        benchmarks.extend(parse_benchmarks())
+    if "render" in groups:
+        benchmarks.extend(render_benchmarks())
+    if "show" in groups:
+        hours, days = _payloads.SIZES["standard"]
+        stack.enter_context(stub_upstream(hours, days))
+        benchmarks.extend(show_benchmarks())
+    if "summarize" in groups:
+        benchmarks.extend(summarize_benchmarks())
+
+    return benchmarks
+
+
+def parse_benchmarks() -> list[Benchmark]:
+    current = _payloads.current_weather()
+    benchmarks = [
+        Benchmark("parse/current_model", "parse", partial(_model, CurrentWeather, current))
+    ]
+
+    for size, (hours, days) in _payloads.SIZES.items():
+        one_call = _payloads.one_call(hours, days)
+        body = json.dumps(one_call).encode()
+        params = {"size": size, "hours": hours, "days": days, "bytes": len(body)}
+        benchmarks.extend(
+            [
+                Benchmark(
+                    f"parse/one_call_model[{size}]",
+                    "parse",
+                    partial(_model, OneCallWeather, one_call),
+                    params,
+                ),
+                Benchmark(
+                    f"parse/one_call_record[{size}]",
+                    "parse",
+                    partial(OneCallRecord.decode, one_call),
+                    params,
+                ),
+                Benchmark(
+                    f"parse/one_call_temp_record[{size}]",
+                    "parse",
+                    partial(OneCallTempRecord.decode, one_call),
+                    params,
+                ),
+                Benchmark(
+                    f"parse/one_call_bytes[{size}]",
+                    "parse",
+                    partial(_decode_bytes, body),
+                    params,
+                ),
+            ]
+        )
+
+    return benchmarks
+
+
+def render_benchmarks(widths: tuple[int, ...] = WIDTHS) -> list[Benchmark]:
+    location = Location(**_payloads.location()[0])
+    current = CurrentWeather(**_payloads.current_weather())
+    hours, days = _payloads.SIZES["standard"]
+    one_call = OneCallRecord.decode(_payloads.one_call(hours, days))
+
+    renderers: dict[str, Callable[[], Any]] = {
+        "current_weather_all": lambda: _builder._current_weather_all(current, "metric", False),
+        "hourly_all": lambda: _builder._hourly_all(one_call, "metric", False, location),
+        "daily_all": lambda: _builder._daily_all(one_call, "metric", False, location),
+    }
+
+    return [
+        Benchmark(
+            f"render/{name}[{width}]",
+            "render",
+            partial(_render, _console(width), renderer),
+            {"width": width},
+        )
+        for name, renderer in renderers.items()
+        for width in widths
+    ]
+
+
+def show_benchmarks() -> list[Benchmark]:
+    """Full runs against the stub server. Weather is always requested, but after the first run the
+    location comes from the geocoding cache as it would for someone checking the same city.
+    """
+    shows = {
+        "current": _builder.show_current,
+        "hourly": _builder.show_hourly,
+        "daily": _builder.show_daily,
+        "all": _builder.show_all,
+    }
+
+    return [
+        Benchmark(
+            f"show/{name}{'_temp_only' if temp_only else ''}",
+            "show",
+            partial(
+                show,
+                _console(SHOW_WIDTH),
+                "city",
+                "greensboro",
+                state_code="nc",
+                temp_only=temp_only,
+                no_cache=True,
+            ),
+            {"width": SHOW_WIDTH, "temp_only": temp_only},
+        )
+        for name, show in shows.items()
+        for temp_only in (False, True)
+    ]
+
+
+def summarize_benchmarks() -> list[Benchmark]:
+    """Loading rows read from the history into columns and summarizing them by location and day."""
+    benchmarks = []
+    for size, (locations, days) in _payloads.HISTORY_SIZES.items():
+        rows = _payloads.history_rows(locations, days)
+        columns = get_history_columns(rows)
+        offsets = {x: _payloads.TIMEZONE_OFFSET for x in range(locations)}
+        params = {"size": size, "locations": locations, "days": days, "rows": len(rows)}
+        benchmarks.extend(
+            [
+                Benchmark(
+                    f"summarize/columns[{size}]",
+                    "summarize",
+                    partial(get_history_columns, rows),
+                    params,
+                ),
+                Benchmark(
+                    f"summarize/daily[{size}]",
+                    "summarize",
+                    partial(summarize_daily, columns, offsets),
+                    params,
+                ),
+            ]
+        )
+
+    return benchmarks
+
+
+def _console(width: int) -> Console:
+    return Console(
+        file=_NullFile(),  # type: ignore[arg-type]
+        width=width,
+        force_terminal=True,
+        color_system="truecolor",
+    )
+
+
+def _decode_bytes(body: bytes) -> OneCallRecord:
+    return OneCallRecord.decode(json.loads(body))
+
+
+def _model(model: Callable[..., Any], data: dict[str, Any]) -> Any:
+    return model(**data)
+
+
+def _render(console: Console, renderer: Callable[[], Any]) -> None:
+    console.print(renderer())
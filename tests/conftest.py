@@ -3,6 +3,7 @@ import pytest
 from rich.console import Console
 from typer.testing import CliRunner
 
+from weather_command import _history, _weather
 from weather_command.models.location import Location
 from weather_command.models.weather import CurrentWeather, OneCallWeather
 
@@ -14,6 +15,51 @@ def env_vars(monkeypatch):
     monkeypatch.delenv("OPEN_WEATHER_API_KEY", raising=False)
 
 
+@pytest.fixture(autouse=True)
+def cache_dir(monkeypatch, tmp_path):
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv("WEATHER_COMMAND_CACHE_DIR", str(cache_dir))
+    yield cache_dir
+
+
+@pytest.fixture(autouse=True)
+def postal_index(monkeypatch, tmp_path):
+    postal_index = tmp_path / "postal.idx"
+    monkeypatch.setenv("WEATHER_COMMAND_POSTAL_INDEX", str(postal_index))
+    yield postal_index
+
+
+@pytest.fixture(autouse=True)
+def city_index(monkeypatch, tmp_path):
+    city_index = tmp_path / "cities.sqlite"
+    monkeypatch.setenv("WEATHER_COMMAND_CITY_INDEX", str(city_index))
+    yield city_index
+
+
+@pytest.fixture(autouse=True)
+def history_file(monkeypatch, tmp_path):
+    history_file = tmp_path / "history.sqlite"
+    monkeypatch.setenv("WEATHER_COMMAND_HISTORY_FILE", str(history_file))
+    monkeypatch.delenv("WEATHER_COMMAND_HISTORY", raising=False)
+    yield history_file
+    _history.reset()
+
+
+@pytest.fixture(autouse=True)
+def last_weather_response(monkeypatch):
+    monkeypatch.setattr(_weather, "_last_response", None)
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limits(monkeypatch):
+    monkeypatch.setenv("WEATHER_COMMAND_RATE_LIMITS", "none")
+
+
+@pytest.fixture(autouse=True)
+def no_retry_backoff(monkeypatch):
+    monkeypatch.setenv("WEATHER_COMMAND_HTTP_BACKOFF", "0")
+
+
 @pytest.fixture
 def test_console():
     return Console()
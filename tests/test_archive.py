@@ -0,0 +1,247 @@
+import asyncio
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from weather_command import _http
+from weather_command._archive import (
+    ARCHIVE_FILE,
+    Archive,
+    NotRecorded,
+    get_archive,
+    request_key,
+    use_archive,
+)
+from weather_command._config import LOCATION_BASE_URL
+from weather_command.main import app
+
+URL = "https://api.openweathermap.org/data/2.5/weather?q=greensboro&appid=key&units=metric"
+
+
+@pytest.fixture(autouse=True)
+def reset_archive():
+    _http.close()
+    yield
+    use_archive(None)
+    _http.close()
+
+
+def record(directory, response):
+    use_archive(Archive(directory, replay=False))
+    with patch("httpx.Client.get", return_value=response):
+        _http.get(URL)
+
+
+def test_request_key_ignores_api_key_and_order():
+    first = httpx.Request("GET", "https://example.com/a?b=2&appid=one&a=1")
+    second = httpx.Request("GET", "https://example.com/a?a=1&b=2&appid=two")
+
+    assert request_key(first) == request_key(second) == "GET https://example.com/a?a=1&b=2"
+
+
+def test_record_and_replay(tmp_path, mock_current_weather_response):
+    record(tmp_path, mock_current_weather_response)
+    assert (tmp_path / ARCHIVE_FILE).exists()
+
+    use_archive(Archive(tmp_path, replay=True))
+    with patch("httpx.Client.get") as mock:
+        response = _http.get(URL.replace("appid=key", "appid=other"))
+
+    mock.assert_not_called()
+    assert response.status_code == 200
+    assert response.json() == mock_current_weather_response.json()
+    assert response.headers["content-type"] == "application/json"
+
+
+def test_replay_not_recorded(tmp_path):
+    use_archive(Archive(tmp_path, replay=True))
+
+    with pytest.raises(NotRecorded):
+        _http.get(URL)
+
+
+def test_replay_stream(tmp_path, mock_one_call_weather_response):
+    record(tmp_path, mock_one_call_weather_response)
+
+    use_archive(Archive(tmp_path, replay=True))
+    with _http.stream(URL) as response:
+        body = b"".join(response.iter_bytes())
+
+    assert body == mock_one_call_weather_response.content
+
+
+def test_replay_async(tmp_path, mock_current_weather_response):
+    record(tmp_path, mock_current_weather_response)
+
+    async def get():
+        async with _http.new_async_client() as client:
+            return await _http.async_get(client, URL)
+
+    use_archive(Archive(tmp_path, replay=True))
+    with patch("httpx.AsyncClient.get") as mock:
+        response = asyncio.run(get())
+
+    mock.assert_not_called()
+    assert response.json() == mock_current_weather_response.json()
+
+
+def test_record_async(tmp_path, mock_current_weather_response):
+    async def mock_get(url, **kwargs):
+        return mock_current_weather_response
+
+    async def get():
+        async with _http.new_async_client() as client:
+            return await _http.async_get(client, URL)
+
+    use_archive(Archive(tmp_path, replay=False))
+    with patch("httpx.AsyncClient.get", side_effect=mock_get):
+        asyncio.run(get())
+
+    response, _ = Archive(tmp_path, replay=True).lookup(httpx.Request("GET", URL))
+    assert response.json() == mock_current_weather_response.json()
+
+
+def test_replay_latency(tmp_path, mock_current_weather_response):
+    record(tmp_path, mock_current_weather_response)
+
+    use_archive(Archive(tmp_path, replay=True, latency=0.2))
+    start = time.perf_counter()
+    _http.get(URL)
+
+    assert time.perf_counter() - start >= 0.2
+
+
+def test_replay_recorded_latency(tmp_path, mock_current_weather_response):
+    def slow_get(*args, **kwargs):
+        time.sleep(0.2)
+        return mock_current_weather_response
+
+    use_archive(Archive(tmp_path, replay=False))
+    with patch("httpx.Client.get", side_effect=slow_get):
+        _http.get(URL)
+
+    _, delay = Archive(tmp_path, replay=True, recorded_latency=True).lookup(
+        httpx.Request("GET", URL)
+    )
+
+    assert delay >= 0.2
+
+
+def test_record_hedged_latency(tmp_path, mock_current_weather_response, monkeypatch):
+    monkeypatch.setenv("WEATHER_COMMAND_HTTP_HEDGE_AFTER", "0.01")
+    release = threading.Event()
+    slow_recorded = threading.Event()
+    slow = httpx.Response(200, request=httpx.Request("GET", URL), content=b"{}")
+    calls = []
+
+    def mock_get(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(5)
+            time.sleep(0.2)
+            return slow
+        return mock_current_weather_response
+
+    record_response = _http._record_response
+    retry_delay = _http._retry_delay
+
+    def mock_record_response(host, response, elapsed):
+        record_response(host, response, elapsed)
+        if response is slow:
+            slow_recorded.set()
+
+    def mock_retry_delay(*args):
+        # Lets the slower request finish before the faster one is recorded.
+        release.set()
+        slow_recorded.wait(5)
+        return retry_delay(*args)
+
+    use_archive(Archive(tmp_path, replay=False))
+    with patch("httpx.Client.get", side_effect=mock_get), patch.object(
+        _http, "_record_response", mock_record_response
+    ), patch.object(_http, "_retry_delay", mock_retry_delay):
+        _http.get(URL)
+
+    _, delay = Archive(tmp_path, replay=True, recorded_latency=True).lookup(
+        httpx.Request("GET", URL)
+    )
+
+    assert len(calls) == 2
+    assert delay < 0.2
+
+
+def test_use_archive_cache_dir(tmp_path):
+    use_archive(Archive(tmp_path, replay=False))
+    assert os.environ["WEATHER_COMMAND_CACHE_DIR"] == str(tmp_path / "cache")
+
+    use_archive(Archive(tmp_path, replay=True))
+    assert not os.environ["WEATHER_COMMAND_CACHE_DIR"].startswith(str(tmp_path))
+
+
+def test_main_record_and_replay(
+    tmp_path,
+    test_runner,
+    mock_one_call_weather_response,
+    mock_location_response,
+):
+    def mock_get(url, **kwargs):
+        if LOCATION_BASE_URL in url:
+            return mock_location_response
+        return mock_one_call_weather_response
+
+    args = ["city", "Greensboro", "-f", "daily", "--terminal_width", 180]
+    with patch("httpx.Client.get", side_effect=mock_get):
+        recorded = test_runner.invoke(app, ["--record", str(tmp_path), *args])
+
+    assert recorded.exit_code == 0
+    assert get_archive() is not None
+
+    use_archive(None)
+    _http.close()
+    with patch("httpx.Client.get") as mock:
+        replayed = test_runner.invoke(app, ["--replay", str(tmp_path), *args])
+
+    mock.assert_not_called()
+    assert replayed.exit_code == 0
+    assert replayed.stdout == recorded.stdout
+
+
+def test_main_replay_not_recorded(tmp_path, test_runner):
+    result = test_runner.invoke(app, ["--replay", str(tmp_path), "city", "Greensboro"])
+
+    assert result.exit_code == 1
+    assert "NotRecorded" in result.stdout
+
+
+@pytest.mark.parametrize("latency", ["0.5", "recorded"])
+def test_main_replay_latency(latency, tmp_path, test_runner):
+    with patch("weather_command._archive.use_archive") as mock:
+        test_runner.invoke(
+            app,
+            ["--replay", str(tmp_path), "--replay-latency", latency, "city", "Greensboro"],
+        )
+
+    archive = mock.call_args[0][0]
+    assert archive.replay
+    assert archive.recorded_latency == (latency == "recorded")
+    assert archive.latency == (None if latency == "recorded" else 0.5)
+
+
+@pytest.mark.parametrize("latency", ["-1", "slow"])
+def test_main_replay_latency_invalid(latency, tmp_path, test_runner):
+    result = test_runner.invoke(app, ["--replay", str(tmp_path), "--replay-latency", latency])
+
+    assert result.exit_code == 2
+
+
+def test_main_record_and_replay_together(tmp_path, test_runner):
+    result = test_runner.invoke(
+        app, ["--record", str(tmp_path), "--replay", str(tmp_path), "city", "Greensboro"]
+    )
+
+    assert result.exit_code != 0
+    assert get_archive() is None
@@ -0,0 +1,157 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from httpx import HTTPStatusError, Request, Response
+
+from weather_command import _batch
+from weather_command._batch import BatchLocation, BatchResult, get_batch_weather
+from weather_command._config import LOCATION_BASE_URL
+
+
+@pytest.fixture
+def mock_async_get(
+    mock_current_weather_response, mock_one_call_weather_response, mock_location_response
+):
+    async def mock_get(url, **kwargs):
+        if LOCATION_BASE_URL in url:
+            return mock_location_response
+        if "/onecall" in url:
+            return mock_one_call_weather_response
+        return mock_current_weather_response
+
+    return mock_get
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("Greensboro", BatchLocation("city", "Greensboro", "VA", "US")),
+        ("Greensboro,NC", BatchLocation("city", "Greensboro", "NC", "US")),
+        ("Greensboro, NC, CA", BatchLocation("city", "Greensboro", "NC", "CA")),
+        ("Greensboro,,CA", BatchLocation("city", "Greensboro", "VA", "CA")),
+    ],
+)
+def test_parse_batch_location(value, expected):
+    assert (
+        _batch.parse_batch_location(value, "city", state_code="VA", country_code="US") == expected
+    )
+
+
+def test_batch_location_name():
+    assert BatchLocation("zip", "27405", None, "US").name == "27405, US"
+
+
+@pytest.mark.parametrize("forecast_type", ["current", "daily", "hourly"])
+def test_get_batch_weather(forecast_type, mock_async_get):
+    locations = [BatchLocation("city", f"City{i}") for i in range(5)]
+    with patch("httpx.AsyncClient.get", side_effect=mock_async_get):
+        results = asyncio.run(get_batch_weather(locations, forecast_type=forecast_type))
+
+    assert [x.batch_location for x in results] == locations
+    assert all(isinstance(x, BatchResult) for x in results)
+
+    if forecast_type == "current":
+        assert all(x.location is None for x in results)
+    else:
+        assert all(x.location.display_name == "Greensboro, NC" for x in results)
+
+
+def test_get_batch_weather_concurrency(mock_current_weather_response):
+    in_flight = 0
+    max_in_flight = 0
+
+    async def mock_get(url, **kwargs):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(in_flight, max_in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return mock_current_weather_response
+
+    locations = [BatchLocation("city", f"City{i}") for i in range(10)]
+    with patch("httpx.AsyncClient.get", side_effect=mock_get):
+        results = asyncio.run(get_batch_weather(locations, concurrency=3))
+
+    assert len(results) == 10
+    assert max_in_flight == 3
+
+
+def test_get_batch_weather_error(mock_current_weather_response):
+    async def mock_get(url, **kwargs):
+        if "Bad" in url:
+            return Response(404, request=Request("get", url=url))
+        return mock_current_weather_response
+
+    locations = [BatchLocation("city", "Good"), BatchLocation("city", "Bad")]
+    with patch("httpx.AsyncClient.get", side_effect=mock_get):
+        results = asyncio.run(get_batch_weather(locations))
+
+    assert isinstance(results[0], BatchResult)
+    assert isinstance(results[1], HTTPStatusError)
+
+
+def test_get_batch_weather_uses_cache(mock_async_get):
+    locations = [BatchLocation("zip", "27405")]
+    with patch("httpx.AsyncClient.get", side_effect=mock_async_get) as mock_get:
+        asyncio.run(get_batch_weather(locations, forecast_type="daily"))
+        asyncio.run(get_batch_weather(locations, forecast_type="daily"))
+
+    assert mock_get.call_count == 2
+
+
+@pytest.mark.parametrize("forecast_type", ["current", "daily", "hourly"])
+@pytest.mark.parametrize("temp_only", [True, False])
+def test_show_batch(forecast_type, temp_only, mock_async_get, test_console, capfd):
+    locations = [BatchLocation("city", "Greensboro"), BatchLocation("city", "Raleigh")]
+    with patch("httpx.AsyncClient.get", side_effect=mock_async_get):
+        _batch.show_batch(
+            test_console,
+            locations,
+            forecast_type=forecast_type,
+            temp_only=temp_only,
+            terminal_width=180,
+        )
+
+    out, _ = capfd.readouterr()
+    assert "Greensboro" in out
+    assert "Location" in out
+
+
+@pytest.mark.parametrize("forecast_type", ["current", "daily", "hourly"])
+@pytest.mark.parametrize("temp_only", [True, False])
+def test_batch_table(
+    forecast_type,
+    temp_only,
+    mock_current_weather,
+    mock_one_call_weather,
+    mock_location,
+):
+    if forecast_type == "current":
+        results = [BatchResult(BatchLocation("city", "Greensboro"), None, mock_current_weather)]
+        expected_rows = 1
+    else:
+        results = [
+            BatchResult(BatchLocation("city", "Greensboro"), mock_location, mock_one_call_weather)
+        ] * 2
+        expected_rows = len(getattr(mock_one_call_weather, forecast_type)) * 2
+
+    table = _batch._batch_table(results, forecast_type, "metric", False, temp_only)
+
+    assert table.row_count == expected_rows
+    assert table.columns[0].header.startswith("Location")
+
+
+def test_show_batch_error(mock_current_weather_response, test_console, capfd):
+    async def mock_get(url, **kwargs):
+        if "Bad" in url:
+            return Response(404, request=Request("get", url=url))
+        return mock_current_weather_response
+
+    locations = [BatchLocation("city", "Good"), BatchLocation("city", "Bad")]
+    with patch("httpx.AsyncClient.get", side_effect=mock_get):
+        _batch.show_batch(test_console, locations, terminal_width=180)
+
+    out, _ = capfd.readouterr()
+    assert "Unable to get weather data for Bad: location not found" in out
+    assert "Greensboro" in out
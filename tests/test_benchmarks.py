@@ -0,0 +1,65 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+
+
+def run_benchmarks(*args):
+    return subprocess.run(
+        [sys.executable, "-m", "benchmarks", "--rounds", "1", "--min-round-time", "0", *args],
+        cwd=ROOT,
+        env={**os.environ, "COLUMNS": "200"},
+        capture_output=True,
+        text=True,
+    )
+
+
+def test_benchmarks(tmp_path):
+    output = tmp_path / "results.json"
+    result = run_benchmarks("--output", str(output))
+
+    assert result.returncode == 0, result.stderr
+    results = json.loads(output.read_text())
+    names = {x["name"] for x in results["benchmarks"]}
+    assert {x["group"] for x in results["benchmarks"]} == {"parse", "render", "show", "summarize"}
+    assert "parse/one_call_record[large]" in names
+    assert "render/hourly_all[80]" in names
+    assert "show/all" in names
+    assert "summarize/daily[standard]" in names
+    assert all(x["median"] > 0 for x in results["benchmarks"])
+    assert "python" in results["machine"]
+
+
+def test_benchmarks_compare(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    output = tmp_path / "results.json"
+    run_benchmarks("--group", "parse", "--filter", "current", "--output", str(baseline))
+
+    result = run_benchmarks(
+        "--group",
+        "parse",
+        "--filter",
+        "current",
+        "--output",
+        str(output),
+        "--compare",
+        str(baseline),
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert "Baseline" in result.stdout
+    assert [x["name"] for x in json.loads(output.read_text())["benchmarks"]] == [
+        "parse/current_model"
+    ]
+
+
+@pytest.mark.parametrize("args", [["--group", "bad"], ["--rounds", "0"]])
+def test_benchmarks_bad_options(args, tmp_path):
+    result = run_benchmarks(*args, "--output", str(tmp_path / "results.json"))
+
+    assert result.returncode == 2
@@ -1,9 +1,12 @@
 from os import getenv
+from unittest.mock import patch
 
 import pytest
+from httpx import ConnectError, Request, Response
 
-from weather_command import _builder
-from weather_command._config import WEATHER_BASE_URL
+from weather_command import _builder, _columns
+from weather_command._config import LOCATION_BASE_URL, WEATHER_BASE_URL
+from weather_command.models.records import OneCallRecord, OneCallTempRecord
 from weather_command.models.weather import PrecipAmount, Wind
 
 UNITS = ("metric", "imperial")
@@ -114,12 +117,49 @@ def test_hourly_temp_only(mock_one_call_weather, mock_location, units, am_pm):
     assert table.row_count == len(mock_one_call_weather.hourly)
 
 
+@pytest.mark.parametrize("units", UNITS)
+@pytest.mark.parametrize("am_pm", [False, True])
+@pytest.mark.parametrize("wind", [0.0, 1.2])
+def test_one_call_current_all(mock_one_call_weather_dict, mock_location, units, am_pm, wind):
+    mock_one_call_weather_dict["current"]["wind_speed"] = wind
+    weather = OneCallRecord.decode(mock_one_call_weather_dict)
+
+    table = _builder._one_call_current_all(
+        weather=weather, units=units, am_pm=am_pm, location=mock_location
+    )
+    assert len(table.columns) == 12
+    assert table.row_count == 1
+
+
+@pytest.mark.parametrize("units", UNITS)
+@pytest.mark.parametrize("am_pm", [False, True])
+def test_temp_only_projected(mock_one_call_weather_dict, mock_location, units, am_pm):
+    weather = OneCallRecord.decode(mock_one_call_weather_dict)
+    temp_weather = OneCallTempRecord.decode(mock_one_call_weather_dict)
+
+    assert list(_builder.daily_temp_only_rows(temp_weather, am_pm)) == list(
+        _builder.daily_temp_only_rows(weather, am_pm)
+    )
+    assert list(_builder.hourly_temp_only_rows(temp_weather, am_pm)) == list(
+        _builder.hourly_temp_only_rows(weather, am_pm)
+    )
+    table = _builder._one_call_current_temp(temp_weather, units, mock_location)
+    assert table.row_count == 1
+
+
+@pytest.mark.parametrize("units", UNITS)
+def test_one_call_current_temp(mock_one_call_weather, mock_location, units):
+    table = _builder._one_call_current_temp(mock_one_call_weather, units, mock_location)
+    assert len(table.columns) == 2
+    assert table.row_count == 1
+
+
 @pytest.mark.parametrize("how, city_zip", [("city", "Greensboro"), ("zip", "27405")])
 @pytest.mark.parametrize("units", ["metric", "imperial"])
 @pytest.mark.parametrize("state_code", ["NC", None])
 @pytest.mark.parametrize("country_code", ["US", None])
 def test_build_url_current(how, city_zip, units, state_code, country_code):
-    got = _builder._build_url(
+    got = _builder.build_url(
         forecast_type="current",
         how=how,
         city_zip=city_zip,
@@ -155,7 +195,7 @@ def test_build_url_current(how, city_zip, units, state_code, country_code):
 def test_build_url_one_one_call(units, forecast_type):
     lon = 0.123
     lat = 789.1
-    got = _builder._build_url(forecast_type=forecast_type, units=units, lon=lon, lat=lat)
+    got = _builder.build_url(forecast_type=forecast_type, units=units, lon=lon, lat=lat)
 
     assert got.startswith(WEATHER_BASE_URL)
 
@@ -165,18 +205,38 @@ def test_build_url_one_one_call(units, forecast_type):
     assert f"&appid={getenv('OPEN_WEATHER_API_KEY')}" in got
 
 
+@pytest.mark.parametrize(
+    "forecast_type, expected",
+    [
+        ("daily", "&exclude=current,minutely,hourly,alerts"),
+        ("hourly", "&exclude=current,minutely,daily,alerts"),
+        ("all", "&exclude=minutely,alerts"),
+    ],
+)
+def test_build_url_one_call_exclude(forecast_type, expected):
+    got = _builder.build_url(forecast_type=forecast_type, units="metric", lon=0.1, lat=0.2)
+
+    assert expected in got
+
+
+def test_build_url_one_call_no_exclude():
+    got = _builder.build_url(forecast_type="onecall", units="metric", lon=0.1, lat=0.2)
+
+    assert "exclude" not in got
+
+
 def test_hpa_to_in():
-    assert _builder._hpa_to_in(1000) == 29.53
+    assert _columns.hpa_to_in(1000) == 29.53
 
 
 def test_kph_to_mph():
     # Rounding to account for imprecision in floating point numbers. As long as this is accurate to
     # 2 digits that is good enough.
-    assert round(_builder._kph_to_mph(1), 2) == 0.62
+    assert round(_columns.kph_to_mph(1), 2) == 0.62
 
 
 def test_mm_to_in():
-    assert _builder._mm_to_in(1) == 0.04
+    assert _columns.mm_to_in(1) == 0.04
 
 
 @pytest.mark.parametrize(
@@ -190,3 +250,113 @@ def test_get_units(units, expected):
 def test_get_units_error():
     with pytest.raises(ValueError):
         _builder._get_units("bad")
+
+
+def test_watch_renders_changes(test_console):
+    updates = iter([None, 2, RuntimeError("stop")])
+    rendered = []
+
+    def get_if_changed():
+        update = next(updates)
+        if isinstance(update, Exception):
+            raise KeyboardInterrupt
+        return update
+
+    def render(weather):
+        rendered.append(weather)
+        return str(weather)
+
+    with patch("time.sleep"):
+        _builder._watch(test_console, 1, render, get_if_changed, 5)
+
+    assert rendered == [1, 2]
+
+
+def test_watch_keeps_last_weather_on_error(test_console):
+    calls = []
+
+    def get_if_changed():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ConnectError("failed")
+        raise KeyboardInterrupt
+
+    rendered = []
+    with patch("time.sleep"):
+        _builder._watch(test_console, 1, lambda x: rendered.append(x) or "", get_if_changed, 5)
+
+    assert len(calls) == 2
+    assert rendered == [1]
+
+
+@pytest.mark.parametrize("forecast_type", ["current", "daily", "hourly", "all"])
+def test_show_watch(
+    forecast_type,
+    test_console,
+    mock_current_weather_response,
+    mock_one_call_weather_response,
+    mock_location_response,
+):
+    def mock_get(url, **kwargs):
+        if LOCATION_BASE_URL in url:
+            return mock_location_response
+        if "/onecall" in url:
+            return mock_one_call_weather_response
+        return mock_current_weather_response
+
+    show = getattr(_builder, f"show_{forecast_type}")
+    with patch("httpx.Client.get", side_effect=mock_get) as mock_http_get:
+        with patch("time.sleep", side_effect=[None, KeyboardInterrupt]):
+            show(test_console, "city", "Greensboro", watch=5)
+
+    # The first refresh gets the same data so only the location and first fetch plus one
+    # refresh are requested.
+    assert mock_http_get.call_count == (2 if forecast_type == "current" else 3)
+
+
+@pytest.mark.parametrize("temp_only", [False, True])
+def test_show_all(temp_only, test_console, mock_one_call_weather_response, mock_location_response):
+    def mock_get(url, **kwargs):
+        if LOCATION_BASE_URL in url:
+            return mock_location_response
+        return mock_one_call_weather_response
+
+    with patch("httpx.Client.get", side_effect=mock_get) as mock_http_get:
+        with test_console.capture() as capture:
+            _builder.show_all(
+                test_console, "city", "Greensboro", temp_only=temp_only, terminal_width=250
+            )
+
+    out = capture.get()
+    assert "Current weather" in out
+    assert out.count("Date/Time") == 2
+    # One geocode and one one call request for all three tables.
+    assert mock_http_get.call_count == 2
+
+
+@pytest.mark.parametrize("forecast_type", ["daily", "hourly", "all"])
+@pytest.mark.parametrize("temp_only", [False, True])
+def test_show_one_call_excludes(
+    forecast_type,
+    temp_only,
+    test_console,
+    mock_one_call_weather_dict,
+    mock_location_response,
+):
+    # The response has only the parts that weren't excluded.
+    data = {
+        k: v
+        for k, v in mock_one_call_weather_dict.items()
+        if k not in _builder.ONE_CALL_PARTS or k in _builder.ONE_CALL_VIEWS[forecast_type]
+    }
+
+    def mock_get(url, **kwargs):
+        if LOCATION_BASE_URL in url:
+            return mock_location_response
+        return Response(200, request=Request("GET", url), json=data)
+
+    show = getattr(_builder, f"show_{forecast_type}")
+    with patch("httpx.Client.get", side_effect=mock_get) as mock_http_get:
+        show(test_console, "city", "Greensboro", temp_only=temp_only)
+
+    assert "&exclude=" in mock_http_get.call_args.args[0]
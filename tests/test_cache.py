@@ -0,0 +1,98 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from weather_command._cache import Cache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return Cache(tmp_path / "cache.sqlite", "test", ttl=60, max_entries=3)
+
+
+def test_get_miss(cache):
+    assert cache.get("missing") is None
+
+
+def test_set_get(cache):
+    cache.set("key", "value")
+    got = cache.get("key")
+
+    assert got.value == "value"
+    assert got.age >= 0
+
+
+def test_set_replaces(cache):
+    cache.set("key", "value")
+    cache.set("key", "new")
+
+    assert cache.get("key").value == "new"
+
+
+def test_expired(cache):
+    cache.set("key", "value")
+
+    with patch("time.time", return_value=time.time() + 61):
+        assert cache.get("key") is None
+
+
+def test_max_age(cache):
+    cache.set("key", "value")
+
+    with patch("time.time", return_value=time.time() + 10):
+        assert cache.get("key", max_age=5) is None
+        assert cache.get("key", max_age=20).value == "value"
+
+
+def test_lru_eviction(tmp_path):
+    cache = Cache(tmp_path / "cache.sqlite", "test", ttl=1000, max_entries=3)
+    now = time.time()
+    for i in range(3):
+        with patch("time.time", return_value=now + i):
+            cache.set(f"key{i}", str(i))
+
+    # Reading key0 makes key1 the least recently used entry.
+    with patch("time.time", return_value=now + 100):
+        assert cache.get("key0")
+        cache.set("key3", "3")
+
+    assert cache.get("key0") is not None
+    assert cache.get("key1") is None
+    assert cache.get("key2") is not None
+    assert cache.get("key3") is not None
+
+
+def test_delete(cache):
+    cache.set("key", "value")
+    cache.delete("key")
+
+    assert cache.get("key") is None
+
+
+def test_unwritable_path_is_a_miss(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    cache = Cache(blocker / "cache.sqlite", "test", ttl=60, max_entries=3)
+
+    cache.set("key", "value")
+    assert cache.get("key") is None
+
+
+def _write_many(path, worker):
+    cache = Cache(path, "test", ttl=60, max_entries=1000)
+    for i in range(25):
+        cache.set(f"{worker}-{i}", str(i))
+        cache.get(f"{worker}-{i}")
+
+
+def test_concurrent_processes(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        list(executor.map(_write_many, [path] * 4, range(4)))
+
+    cache = Cache(path, "test", ttl=60, max_entries=1000)
+    for worker in range(4):
+        for i in range(25):
+            assert cache.get(f"{worker}-{i}").value == str(i)
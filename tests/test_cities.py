@@ -0,0 +1,291 @@
+import asyncio
+import io
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from weather_command._cities import (
+    CityIndex,
+    CityPlace,
+    count_typos,
+    get_trigrams,
+    normalize_name,
+    read_city_places,
+)
+from weather_command._location import get_location_details, get_location_details_async
+from weather_command.main import app
+from weather_command.models.location import Location
+
+CSV = """name,state_code,country_code,lat,lon,population
+Greensboro,NC,US,36.0726,-79.792,299035
+Greensburg,PA,US,40.3015,-79.5389,14549
+Springfield,IL,US,39.8017,-89.6437,114394
+Springfield,MO,US,37.2153,-93.2982,169176
+Springfield,MO,US,37.0,-93.0,10
+Zürich,25,CH,47.3667,8.55,341730
+District 9,,ZZ,1.0,1.0,0
+Paris,11,FR,48.8534,2.3488,2138551
+,,US,1.0,1.0,0
+Nowhere,,US,north,west,0
+"""
+
+GEONAMES = (
+    "4469146\tGreensboro\tGreensboro\tGreensboro\t36.07264\t-79.79198\tP\tPPLA2\tUS\t\tNC\t081"
+    "\t\t\t299035\t272\t247\tAmerica/New_York\t2019-09-05\n"
+    "short\trow\n"
+)
+
+
+@pytest.fixture
+def index(city_index):
+    index = CityIndex(city_index)
+    index.build(read_city_places(io.StringIO(CSV), "csv"))
+    return index
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [("Zürich", "zurich"), (" New  York ", "new york"), ("Winston-Salem", "winston salem")],
+)
+def test_normalize_name(name, expected):
+    assert normalize_name(name) == expected
+
+
+def test_get_trigrams():
+    assert get_trigrams("ab") == ["  a", " ab", "ab "]
+
+
+@pytest.mark.parametrize(
+    "a, b, expected",
+    [
+        ("greensboro", "greensboro", 0),
+        ("greenboro", "greensboro", 1),
+        ("springfeild", "springfield", 1),
+        ("greensboro", "greensburg", 2),
+        ("seattle", "portland", 3),
+    ],
+)
+def test_count_typos(a, b, expected):
+    assert count_typos(a, b, 2) == min(expected, 3)
+
+
+def test_build(index, city_index):
+    assert index.build(read_city_places(io.StringIO(CSV), "csv")) == 7
+    assert index.search("nowhere") == []
+
+
+def test_search_ranks(index):
+    candidates = index.search("Springfield")
+
+    assert [x.display_name for x in candidates[:2]] == [
+        "Springfield, MO, US",
+        "Springfield, IL, US",
+    ]
+    assert candidates[0].population == 169176
+    assert candidates[0].score == 1.0
+
+
+def test_search_prefix(index):
+    assert index.search("greens")[0].display_name == "Greensboro, NC, US"
+
+
+@pytest.mark.parametrize(
+    "name, state, country, expected",
+    [
+        ("Greensboro", None, None, "Greensboro, NC, US"),
+        ("Greenboro", None, None, "Greensboro, NC, US"),
+        ("grensboro", "nc", "us", "Greensboro, NC, US"),
+        ("Springfeild", "IL", None, "Springfield, IL, US"),
+        ("zurich", None, "CH", "Zürich, 25, CH"),
+        ("Par", None, None, None),
+        ("Pari", None, None, "Paris, 11, FR"),
+        ("Greensboro", "PA", None, None),
+        ("Greensboro", None, "United States", None),
+        ("Greenborogh", None, None, None),
+        ("Greensborogh", None, None, "Greensboro, NC, US"),
+        ("District 7", None, None, None),
+        ("Seattle", None, None, None),
+    ],
+)
+def test_correct(index, name, state, country, expected):
+    candidate = index.correct(name, state=state, country=country)
+
+    assert (candidate.display_name if candidate else None) == expected
+
+
+@pytest.mark.parametrize(
+    "name, state, country, expected",
+    [
+        ("greensboro", None, None, "Greensboro, NC, US"),
+        ("Zurich", None, None, "Zürich, 25, CH"),
+        ("Springfield", None, None, "Springfield, MO, US"),
+        ("Springfield", "il", None, "Springfield, IL, US"),
+        ("Greenboro", None, None, None),
+        ("Greens", None, None, None),
+        ("Greensboro", "PA", None, None),
+    ],
+)
+def test_find(index, name, state, country, expected):
+    candidate = index.find(name, state=state, country=country)
+
+    assert (candidate.display_name if candidate else None) == expected
+
+
+def test_missing_index(city_index):
+    assert CityIndex(city_index).find("Greensboro") is None
+    assert CityIndex(city_index).correct("Greensboro") is None
+    assert not city_index.exists()
+
+
+def test_broken_index(city_index):
+    city_index.write_text("not a database")
+
+    assert CityIndex(city_index).find("Greensboro") is None
+    assert CityIndex(city_index).correct("Greensboro") is None
+    CityIndex(city_index).learn("Greensboro", None, None, Location(display_name="A", lat=1, lon=2))
+
+
+def test_read_geonames():
+    (place,) = read_city_places(io.StringIO(GEONAMES), "geonames")
+
+    assert place == CityPlace("Greensboro", "NC", "US", 36.07264, -79.79198, 299035)
+
+
+def test_learned_locations_are_kept_and_preferred(index):
+    index.learn("Paris", "TX", "US", Location(display_name="Paris, TX", lat=33.66, lon=-95.55))
+    index.learn("Paris", "TX", "US", Location(display_name="Paris, Texas", lat=33.66, lon=-95.55))
+    index.build([CityPlace("Paris", "11", "FR", 48.8534, 2.3488, 2138551)])
+
+    assert index.find("paris", state="tx").display_name == "Paris, Texas"
+    assert index.find("paris").display_name == "Paris, Texas"
+    assert index.find("paris", country="FR").display_name == "Paris, 11, FR"
+
+
+@pytest.fixture
+def not_found_response():
+    return httpx.Response(200, request=httpx.Request("GET", "http://localhost"), json=[])
+
+
+def test_found_in_index(index, test_console):
+    with patch("httpx.Client.get", side_effect=AssertionError("no requests")):
+        location = get_location_details(how="city", city_zip="greensboro", console=test_console)
+
+    assert location.display_name == "Greensboro, NC, US"
+
+
+@pytest.mark.parametrize("name, nearby", [("Parks", "Paris"), ("Salen", "Salem")])
+def test_nearby_name_is_not_rewritten(name, nearby, city_index, test_console):
+    index = CityIndex(city_index)
+    index.build([CityPlace(nearby, "", "US", 1.0, 2.0, 100_000)])
+    response = httpx.Response(
+        200,
+        request=httpx.Request("GET", "http://localhost"),
+        json=[{"display_name": f"{name}, US", "lat": 3.0, "lon": 4.0}],
+    )
+
+    with patch("httpx.Client.get", return_value=response) as mock_get:
+        location = get_location_details(how="city", city_zip=name, console=test_console)
+
+    assert mock_get.call_count == 1
+    assert location.display_name == f"{name}, US"
+    assert index.find(name).display_name == f"{name}, US"
+
+
+def test_corrected_when_not_found(index, not_found_response, test_console, capfd):
+    with patch("httpx.Client.get", return_value=not_found_response) as mock_get:
+        location = get_location_details(how="city", city_zip="Grensboro", console=test_console)
+
+    assert mock_get.call_count == 1
+    assert location.display_name == "Greensboro, NC, US"
+    assert "Grensboro wasn't found, using Greensboro, NC, US instead" in capfd.readouterr().out
+
+
+def test_not_found_and_not_corrected(index, not_found_response, test_console, capfd):
+    with pytest.raises(SystemExit):
+        with patch("httpx.Client.get", return_value=not_found_response):
+            get_location_details(how="city", city_zip="Seattle", console=test_console)
+
+    assert "Unable to get information" in capfd.readouterr().out
+
+
+def test_learn_from_geocode(city_index, mock_location_response, not_found_response, test_console):
+    with patch("httpx.Client.get", return_value=mock_location_response):
+        get_location_details(how="city", city_zip="Greensboro", state="NC", console=test_console)
+    with patch("httpx.Client.get", side_effect=AssertionError("no requests")):
+        found = get_location_details(
+            how="city", city_zip="greensboro", state="nc", console=test_console
+        )
+    with patch("httpx.Client.get", return_value=not_found_response):
+        corrected = get_location_details(
+            how="city", city_zip="Grensboro", state="nc", console=test_console
+        )
+
+    assert found.display_name == "Greensboro, NC"
+    assert corrected.display_name == "Greensboro, NC"
+
+
+def test_found_in_index_async(index):
+    async def get_location():
+        async with httpx.AsyncClient() as client:
+            return await get_location_details_async(client, how="city", city_zip="Greensboro")
+
+    with patch("httpx.AsyncClient.get", side_effect=AssertionError("no requests")):
+        location = asyncio.run(get_location())
+
+    assert (location.lat, location.lon) == (36.0726, -79.792)
+
+
+@pytest.mark.parametrize(
+    "city_zip, expected", [("Greenboro", "Greensboro, NC, US"), ("Seattle", None)]
+)
+def test_corrected_when_not_found_async(index, not_found_response, city_zip, expected):
+    async def get_location():
+        async with httpx.AsyncClient() as client:
+            return await get_location_details_async(client, how="city", city_zip=city_zip)
+
+    async def mock_get(url, **kwargs):
+        return not_found_response
+
+    with patch("httpx.AsyncClient.get", side_effect=mock_get):
+        if expected is None:
+            with pytest.raises(IndexError):
+                asyncio.run(get_location())
+        else:
+            assert asyncio.run(get_location()).display_name == expected
+
+
+def test_learn_from_geocode_async(city_index, mock_location_response):
+    async def get_location(city_zip):
+        async with httpx.AsyncClient() as client:
+            return await get_location_details_async(client, how="city", city_zip=city_zip)
+
+    async def mock_get(url, **kwargs):
+        return mock_location_response
+
+    with patch("httpx.AsyncClient.get", side_effect=mock_get):
+        asyncio.run(get_location("Greensboro"))
+
+    assert CityIndex(city_index).find("greensboro").display_name == "Greensboro, NC"
+    assert CityIndex(city_index).correct("Greensboor").display_name == "Greensboro, NC"
+
+
+def test_main_build_index_cities(test_runner, tmp_path, city_index):
+    path = tmp_path / "cities500.txt"
+    path.write_text(GEONAMES)
+
+    result = test_runner.invoke(app, ["build-index", "--cities", str(path)])
+
+    assert result.exit_code == 0
+    assert "Indexed 1 cities" in result.stdout
+    assert CityIndex(city_index).find("Greensboro").display_name == "Greensboro, NC, US"
+
+
+def test_main_build_index_cities_invalid_csv(test_runner, tmp_path):
+    path = tmp_path / "cities.csv"
+    path.write_text("town,population\nGreensboro,299035\n")
+
+    result = test_runner.invoke(app, ["build-index", "--cities", str(path)])
+
+    assert result.exit_code == 1
+    assert "missing the place_name, latitude, longitude" in result.stdout
@@ -0,0 +1,168 @@
+import math
+from array import array
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+
+from weather_command import _builder, _columns
+from weather_command._columns import (
+    convert_summary,
+    convert_temp,
+    convert_wind,
+    format_precip,
+    format_pressure,
+    format_rounded,
+    format_wind,
+    get_daily_columns,
+    get_daily_temp_columns,
+    get_history_columns,
+    get_hourly_columns,
+    get_hourly_temp_columns,
+    summarize_daily,
+)
+from weather_command.models.records import OneCallRecord, OneCallTempRecord
+
+VALUES = [0.0, 0.5, 1.5, 2.5, 3.04, 12.7, 29.99, 1013.25]
+
+
+@pytest.fixture(params=["array", "numpy"])
+def backend(request):
+    if request.param == "numpy":
+        np = pytest.importorskip("numpy")
+        with patch.object(_columns, "_np", np):
+            yield request.param
+    else:
+        with patch.object(_columns, "_np", False):
+            yield request.param
+
+
+def test_get_hourly_columns(mock_one_call_weather, backend):
+    columns = get_hourly_columns(mock_one_call_weather.hourly)
+
+    assert columns.dt == [x.dt for x in mock_one_call_weather.hourly]
+    assert list(columns.temp) == [x.temp for x in mock_one_call_weather.hourly]
+    assert list(columns.rain) == [
+        x.rain.one_hour if x.rain else 0.0 for x in mock_one_call_weather.hourly
+    ]
+    if backend == "array":
+        assert isinstance(columns.temp, array)
+
+
+def test_get_daily_columns(mock_one_call_weather_dict, backend):
+    weather = OneCallRecord.decode(mock_one_call_weather_dict)
+    columns = get_daily_columns(weather.daily)
+
+    assert list(columns.temp_min) == [x.temp.min for x in weather.daily]
+    assert list(columns.pressure) == [x.pressure for x in weather.daily]
+
+
+def test_get_temp_columns(mock_one_call_weather_dict, backend):
+    weather = OneCallRecord.decode(mock_one_call_weather_dict)
+    temp_weather = OneCallTempRecord.decode(mock_one_call_weather_dict)
+    hourly = get_hourly_columns(weather.hourly)
+    daily = get_daily_columns(weather.daily)
+
+    for columns in (
+        get_hourly_temp_columns(temp_weather.hourly),
+        get_hourly_temp_columns(weather.hourly),
+    ):
+        assert columns.dt == hourly.dt
+        assert list(columns.temp) == list(hourly.temp)
+        assert list(columns.feels_like) == list(hourly.feels_like)
+
+    daily_temp = get_daily_temp_columns(temp_weather.daily)
+    assert daily_temp.dt == daily.dt
+    assert list(daily_temp.temp_min) == list(daily.temp_min)
+    assert list(daily_temp.temp_max) == list(daily.temp_max)
+
+
+def test_get_columns_empty(backend):
+    assert len(get_hourly_columns([]).temp) == 0
+    assert len(get_daily_columns([]).temp_max) == 0
+
+
+@pytest.mark.parametrize("units", ["metric", "imperial"])
+def test_format_matches_scalar(units, backend):
+    floats = _columns._float_column(VALUES)
+    ints = _columns._int_column(round(x) for x in VALUES)
+
+    assert format_wind(floats, units) == [_builder._format_wind(x, units) for x in VALUES]
+    assert format_precip(floats, units) == [_builder._format_precip(x, units) for x in VALUES]
+    assert format_pressure(ints, units) == [
+        _builder._format_pressure(round(x), units) for x in VALUES
+    ]
+    assert format_rounded(floats) == [str(round(x)) for x in VALUES]
+
+
+def test_convert_wind_imperial(backend):
+    assert convert_wind(_columns._float_column([16.09, 0.0]), "imperial") == [10, 0]
+
+
+def test_convert_temp(backend):
+    temps = _columns._float_column([0.0, 100.0, -40.0])
+
+    assert convert_temp(temps, "metric") == [0.0, 100.0, -40.0]
+    assert convert_temp(temps, "imperial") == [32.0, 212.0, -40.0]
+
+
+def test_get_history_columns(backend):
+    columns = get_history_columns([(1, 100, 20.5, 50, None, 0.0), (2, 200, None, 60, 3.0, 1.5)])
+
+    assert list(columns.location_id) == [1, 2]
+    assert list(columns.ts) == [100, 200]
+    assert list(columns.humidity) == [50.0, 60.0]
+    assert math.isnan(columns.temp[1])
+    assert math.isnan(columns.wind_speed[0])
+
+
+def test_summarize_daily(backend):
+    hour = 60 * 60
+    day = hour * 24
+    rows = [
+        # Given out of order, the summary sorts by location and day.
+        (1, day + hour, 10.0, None, None, None),
+        *((1, i * hour, float(i + 1), 50 + i, 2.0, None) for i in range(4)),
+        # 01:00 UTC is still the previous day five hours behind UTC.
+        (2, hour, -1.0, 80, 1.0, 0.5),
+        (2, 7 * hour, -3.0, 90, 3.0, 1.5),
+    ]
+
+    summary = summarize_daily(get_history_columns(rows), {2: -5 * hour}, [50, 90])
+
+    assert summary.location_id == [1, 1, 2, 2]
+    assert summary.date == [
+        date(1970, 1, 1),
+        date(1970, 1, 2),
+        date(1969, 12, 31),
+        date(1970, 1, 1),
+    ]
+    assert summary.samples == [4, 1, 1, 1]
+    assert list(summary.values["temp_min"]) == [1.0, 10.0, -1.0, -3.0]
+    assert list(summary.values["temp_max"]) == [4.0, 10.0, -1.0, -3.0]
+    assert list(summary.values["temp_mean"]) == [2.5, 10.0, -1.0, -3.0]
+    assert list(summary.values["temp_p50"]) == [2.5, 10.0, -1.0, -3.0]
+    assert summary.values["temp_p90"][0] == pytest.approx(3.7)
+    assert math.isnan(summary.values["humidity_mean"][1])
+    assert math.isnan(summary.values["precip_max"][0])
+    assert list(summary.values["precip_max"][2:]) == [0.5, 1.5]
+
+
+def test_summarize_daily_empty(backend):
+    summary = summarize_daily(get_history_columns([]), {})
+
+    assert summary.location_id == []
+    assert len(summary.values["temp_p90"]) == 0
+
+
+def test_convert_summary(backend):
+    rows = [(1, 0, 10.0, 50, 4.47, None)]
+
+    values = convert_summary(summarize_daily(get_history_columns(rows), {}), "imperial")
+    metric = convert_summary(summarize_daily(get_history_columns(rows), {}), "metric")
+
+    assert values["temp_mean"] == [50.0]
+    assert values["humidity_max"] == [50.0]
+    assert values["wind_speed_p50"] == [10.0]
+    assert metric["wind_speed_p50"] == [4.47]
+    assert values["precip_min"] == [None]
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+from httpx import HTTPStatusError, Request, Response
+
+from weather_command.errors import (
+    RateLimitExceeded,
+    check_status_error,
+    describe_error,
+    get_retry_after,
+)
+
+
+def _response(status_code=429, headers=None):
+    return Response(status_code, request=Request("get", url="https://test.com"), headers=headers)
+
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        (None, None),
+        ({"Retry-After": "12"}, 12),
+        ({"Retry-After": "-1"}, 0),
+        ({"Retry-After": "bad"}, None),
+    ],
+)
+def test_get_retry_after(headers, expected):
+    assert get_retry_after(_response(headers=headers)) == expected
+
+
+def test_get_retry_after_date():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    retry_after = get_retry_after(
+        _response(headers={"Retry-After": format_datetime(retry_at, usegmt=True)})
+    )
+
+    assert 25 < retry_after <= 30
+
+
+def test_check_status_error_429(test_console, capfd):
+    response = _response(headers={"Retry-After": "12"})
+
+    with pytest.raises(SystemExit):
+        check_status_error(
+            HTTPStatusError("", request=response.request, response=response), test_console
+        )
+
+    out, _ = capfd.readouterr()
+    assert "rate limit" in out
+    assert "12 seconds" in out
+
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [
+        (RateLimitExceeded("limit"), "rate limit reached"),
+        (
+            HTTPStatusError(
+                "", request=Request("get", url="https://test.com"), response=_response()
+            ),
+            "rate limit reached",
+        ),
+        (
+            HTTPStatusError(
+                "", request=Request("get", url="https://test.com"), response=_response(404)
+            ),
+            "location not found",
+        ),
+        (
+            HTTPStatusError(
+                "", request=Request("get", url="https://test.com"), response=_response(500)
+            ),
+            "status code 500",
+        ),
+        (ValueError("bad"), "bad"),
+    ],
+)
+def test_describe_error(error, expected):
+    assert describe_error(error) == expected
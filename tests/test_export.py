@@ -0,0 +1,210 @@
+import csv
+import io
+import json
+from unittest.mock import patch
+
+import pytest
+from httpx import ConnectError, Response
+
+from weather_command._export import (
+    DAILY_FIELDS,
+    HOURLY_FIELDS,
+    _current_row,
+    _daily_row,
+    _hourly_row,
+    _stream_rows,
+    export_current,
+    export_daily,
+    export_hourly,
+    write_rows,
+)
+
+ROWS = [{"location": "Greensboro", "temp": 20.5, "extra": 1}, {"location": "Raleigh", "temp": 21}]
+
+
+def test_write_rows_json():
+    out = io.StringIO()
+    write_rows(out, "json", iter(ROWS), ["location", "temp"])
+
+    assert json.loads(out.getvalue()) == [
+        {"location": "Greensboro", "temp": 20.5},
+        {"location": "Raleigh", "temp": 21},
+    ]
+
+
+def test_write_rows_json_empty():
+    out = io.StringIO()
+    write_rows(out, "json", [], ["location"])
+
+    assert json.loads(out.getvalue()) == []
+
+
+def test_write_rows_ndjson():
+    out = io.StringIO()
+    write_rows(out, "ndjson", iter(ROWS), ["temp"])
+
+    assert [json.loads(x) for x in out.getvalue().splitlines()] == [{"temp": 20.5}, {"temp": 21}]
+
+
+def test_write_rows_csv():
+    out = io.StringIO()
+    write_rows(out, "csv", iter(ROWS), ["location", "temp"])
+
+    assert out.getvalue() == "location,temp\nGreensboro,20.5\nRaleigh,21\n"
+
+
+@pytest.mark.parametrize("output_format", ["json", "ndjson", "csv"])
+def test_write_rows_first_row_fails(output_format):
+    def rows():
+        raise ConnectError("failed")
+        yield ROWS[0]
+
+    out = io.StringIO()
+    with pytest.raises(ConnectError):
+        write_rows(out, output_format, rows(), ["location"])
+
+    assert out.getvalue() == ""
+
+
+@pytest.mark.parametrize("output_format", ["json", "ndjson", "csv"])
+def test_stream_rows_fails_partway(mock_one_call_weather, output_format):
+    def records():
+        yield mock_one_call_weather.timezone_offset, mock_one_call_weather.daily[0]
+        raise ConnectError("failed")
+
+    out = io.StringIO()
+    with pytest.raises(ConnectError):
+        write_rows(
+            out,
+            output_format,
+            _stream_rows(records(), lambda x, offset: _daily_row(x, offset, "metric", "A")),
+            DAILY_FIELDS,
+        )
+    output = out.getvalue()
+
+    # The rows downloaded before the failure are written whole, and a JSON array is left open
+    # so the output can't be mistaken for a complete export.
+    if output_format == "json":
+        assert output.startswith("[\n{") and output.endswith("}")
+        assert json.loads(output[1:])["location"] == "A"
+    elif output_format == "ndjson":
+        assert [json.loads(x)["location"] for x in output.splitlines()] == ["A"]
+    else:
+        assert [x["location"] for x in csv.DictReader(io.StringIO(output))] == ["A"]
+
+
+def test_write_rows_bad_format():
+    with pytest.raises(ValueError):
+        write_rows(io.StringIO(), "xml", ROWS, ["location"])
+
+
+@pytest.mark.parametrize("units", ["metric", "imperial"])
+def test_current_row(mock_current_weather, units):
+    row = _current_row(mock_current_weather, units)
+
+    assert row["location"] == mock_current_weather.name
+    assert row["temp"] == mock_current_weather.main.temp
+    assert row["dt"].endswith("-04:00")
+    if units == "imperial":
+        assert row["pressure"] < 40
+
+
+@pytest.mark.parametrize("units", ["metric", "imperial"])
+def test_daily_row(mock_one_call_weather, units):
+    row = _daily_row(
+        mock_one_call_weather.daily[0],
+        mock_one_call_weather.timezone_offset,
+        units,
+        "Greensboro, NC",
+    )
+
+    assert set(row) == set(DAILY_FIELDS)
+    assert row["temp_min"] == mock_one_call_weather.daily[0].temp.min
+    assert row["sunrise"].startswith("2021-09-28T07:")
+    if units == "imperial":
+        assert row["pressure"] < 40
+
+
+@pytest.mark.parametrize("units", ["metric", "imperial"])
+def test_hourly_row(mock_one_call_weather, units):
+    row = _hourly_row(
+        mock_one_call_weather.hourly[0],
+        mock_one_call_weather.timezone_offset,
+        units,
+        "Greensboro, NC",
+    )
+
+    assert set(row) == set(HOURLY_FIELDS)
+    assert row["location"] == "Greensboro, NC"
+    assert row["dt"] == "2021-09-28T21:00:00-04:00"
+    assert row["rain"] == 0.0
+    if units == "imperial":
+        assert row["pressure"] < 40
+
+
+@pytest.mark.parametrize("temp_only", [True, False])
+def test_export_current(temp_only, test_console, mock_current_weather_response):
+    out = io.StringIO()
+    with patch("httpx.Client.get", return_value=mock_current_weather_response):
+        export_current(
+            out, test_console, "city", "Greensboro", output_format="csv", temp_only=temp_only
+        )
+
+    rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert len(rows) == 1
+    assert ("conditions" in rows[0]) is not temp_only
+
+
+@pytest.mark.parametrize("export, count_key", [(export_daily, "daily"), (export_hourly, "hourly")])
+def test_export_one_call(
+    export,
+    count_key,
+    test_console,
+    mock_one_call_weather_dict,
+    mock_one_call_weather_response,
+    mock_location_response,
+):
+    out = io.StringIO()
+    with patch("httpx.Client.get", return_value=mock_location_response), patch(
+        "httpx.Client.send", return_value=mock_one_call_weather_response
+    ):
+        export(out, test_console, "city", "Greensboro", output_format="ndjson")
+
+    rows = [json.loads(x) for x in out.getvalue().splitlines()]
+    assert len(rows) == len(mock_one_call_weather_dict[count_key])
+    assert rows[0]["location"] == "Greensboro, NC"
+
+
+@pytest.mark.parametrize("export, count_key", [(export_daily, "daily"), (export_hourly, "hourly")])
+def test_export_one_call_streams_rows(
+    export, count_key, test_console, mock_one_call_weather_dict, mock_location_response
+):
+    body = json.dumps(mock_one_call_weather_dict).encode()
+    chunk_size = 256
+    sent = []
+
+    def chunks():
+        for i in range(0, len(body), chunk_size):
+            sent.append(i)
+            yield body[i : i + chunk_size]
+
+    class Out(io.StringIO):
+        sent_at_first_row = None
+
+        def write(self, value):
+            if self.sent_at_first_row is None and value.startswith("{"):
+                self.sent_at_first_row = len(sent)
+            return super().write(value)
+
+    def mock_send(request, **kwargs):
+        return Response(200, request=request, content=chunks())
+
+    out = Out()
+    with patch("httpx.Client.get", return_value=mock_location_response), patch(
+        "httpx.Client.send", side_effect=mock_send
+    ):
+        export(out, test_console, "city", "Greensboro", output_format="ndjson")
+
+    assert len(out.getvalue().splitlines()) == len(mock_one_call_weather_dict[count_key])
+    # The first row is written before the whole response has been received.
+    assert out.sent_at_first_row < len(sent)
@@ -0,0 +1,331 @@
+import json
+import time
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from weather_command import _builder, _history
+from weather_command._config import LOCATION_BASE_URL
+from weather_command._history import History, HistoryEntry, HistoryWriter, parse_time
+from weather_command._location import get_location_details
+from weather_command._weather import (
+    get_current_weather,
+    get_one_call_current_weather,
+    get_one_call_temp_weather,
+    stream_daily_weather,
+)
+from weather_command.main import app
+
+CURRENT_URL = "https://api.openweathermap.org/data/2.5/weather?q=greensboro&appid=test"
+ONE_CALL_URL = "https://api.openweathermap.org/data/2.5/onecall?lat=36.1056&lon=-79.7569&units=metric&appid=test"
+
+
+def entry(ts, temp, *, kind=0, fetched=0, lat=1.0, lon=2.0, name="Somewhere"):
+    return HistoryEntry(lat, lon, name, 0, [(ts, kind, fetched, temp, *[None] * 11)])
+
+
+def test_disabled_records_nothing(history_file, mock_current_weather_response, test_console):
+    with patch("httpx.Client.get", return_value=mock_current_weather_response):
+        get_current_weather(CURRENT_URL, test_console)
+    _history.flush()
+
+    assert not history_file.exists()
+
+
+def test_record_current_weather(mock_current_weather_response, test_console):
+    _history.enable()
+
+    with patch("httpx.Client.get", return_value=mock_current_weather_response):
+        get_current_weather(CURRENT_URL, test_console)
+    _history.flush()
+
+    history = _history.get_history()
+    (location,) = history.find_locations("greens")
+    (observation,) = history.query(location.id)
+
+    assert location.name == "Greensboro"
+    assert (location.lat, location.lon) == (36.0726, -79.792)
+    assert location.timezone_offset == -14400
+    assert observation.kind == "current"
+    assert observation.dt == datetime.fromtimestamp(1632345032, timezone.utc)
+    # No units in the URL means OpenWeather sent Kelvin.
+    assert observation.temp == pytest.approx(23.77)
+    assert observation.humidity == 79
+    assert observation.precip == 0.55
+    assert observation.conditions == "thunderstorm"
+
+
+def test_record_one_call_weather(
+    mock_one_call_weather_dict,
+    mock_one_call_weather_response,
+    mock_location_response,
+    test_console,
+):
+    _history.enable()
+
+    def mock_get(url, **kwargs):
+        if LOCATION_BASE_URL in url:
+            return mock_location_response
+        return mock_one_call_weather_response
+
+    with patch("httpx.Client.get", side_effect=mock_get):
+        get_location_details(how="city", city_zip="Greensboro", console=test_console)
+        get_one_call_current_weather(ONE_CALL_URL, test_console)
+    _history.flush()
+
+    history = _history.get_history()
+    (location,) = history.find_locations("greensboro, nc")
+    observations = history.query(location.id)
+    daily = history.query(location.id, kinds=["daily"])
+
+    assert location.records == len(observations)
+    assert [x.kind for x in observations].count("hourly") == len(
+        mock_one_call_weather_dict["hourly"]
+    )
+    assert len(daily) == len(mock_one_call_weather_dict["daily"])
+    assert daily[0].temp_min == mock_one_call_weather_dict["daily"][0]["temp"]["min"]
+    assert [x.dt for x in observations] == sorted(x.dt for x in observations)
+
+
+def test_temp_only_not_recorded(history_file, mock_one_call_weather_response, test_console):
+    _history.enable()
+
+    with patch("httpx.Client.get", return_value=mock_one_call_weather_response):
+        get_one_call_temp_weather(ONE_CALL_URL, test_console)
+    _history.flush()
+
+    assert not history_file.exists()
+
+
+def test_record_streamed_weather(mock_one_call_weather_dict, test_console):
+    _history.enable()
+    body = json.dumps(mock_one_call_weather_dict).encode()
+
+    with patch(
+        "httpx.Client.send",
+        side_effect=lambda request, **kwargs: httpx.Response(200, request=request, content=body),
+    ):
+        list(stream_daily_weather(ONE_CALL_URL, test_console))
+    _history.flush()
+
+    (location,) = _history.get_history().find_locations()
+    assert location.records > len(mock_one_call_weather_dict["daily"])
+
+
+def test_imperial_stored_as_metric(mock_current_weather_dict, test_console):
+    _history.enable()
+    mock_current_weather_dict["main"]["temp"] = 50.0
+    mock_current_weather_dict["wind"]["speed"] = 10.0
+    response = httpx.Response(
+        200, request=httpx.Request("GET", "https://localhost"), json=mock_current_weather_dict
+    )
+
+    with patch("httpx.Client.get", return_value=response):
+        get_current_weather(f"{CURRENT_URL}&units=imperial", test_console)
+    _history.flush()
+
+    history = _history.get_history()
+    (observation,) = history.query(history.find_locations()[0].id)
+
+    assert observation.temp == 10.0
+    assert observation.wind_speed == 4.47
+    assert _builder._history_row(observation, "imperial", False, 0)[2:9:6] == ["50", "10"]
+    assert _builder._history_row(observation, "metric", False, 0)[2:9:6] == ["10", "4"]
+
+
+def test_newer_forecast_replaces_older(tmp_path):
+    history = History(tmp_path / "history.sqlite")
+
+    history.add([entry(100, 1.0, kind=1, fetched=1)])
+    history.add([entry(100, 2.0, kind=1, fetched=2), entry(100, 3.0, kind=0, fetched=2)])
+
+    observations = history.query(history.find_locations()[0].id)
+    assert [(x.kind, x.temp) for x in observations] == [("current", 3.0), ("hourly", 2.0)]
+
+
+def test_query_range(tmp_path):
+    history = History(tmp_path / "history.sqlite")
+    history.add([entry(x, float(x)) for x in range(10)])
+    history.add([entry(5, 5.0, lat=3.0, name="Elsewhere")])
+    location = history.find_locations("somewhere")[0]
+
+    observations = history.query(location.id, since=3, until=6)
+
+    assert [x.temp for x in observations] == [3.0, 4.0, 5.0]
+    assert history.query(location.id, kinds=["daily"]) == []
+
+
+def test_find_locations_escapes_search(tmp_path):
+    history = History(tmp_path / "history.sqlite")
+    history.add([entry(1, 1.0, name="Somewhere")])
+
+    assert history.find_locations("%") == []
+    assert len(history.find_locations("WHERE")) == 1
+
+
+def test_missing_file(tmp_path):
+    history = History(tmp_path / "history.sqlite")
+
+    assert history.find_locations() == []
+    assert history.query(1) == []
+    assert not history.path.exists()
+
+
+def test_writer_batches(tmp_path):
+    history = History(tmp_path / "history.sqlite")
+    writer = HistoryWriter(history, batch_size=3, interval=60)
+
+    writer.add(entry(1, 1.0))
+    writer.add(entry(2, 2.0))
+    assert history.find_locations() == []
+
+    writer.add(entry(3, 3.0))
+    assert history.find_locations()[0].records == 3
+
+
+def test_writer_flushes_after_interval(tmp_path):
+    history = History(tmp_path / "history.sqlite")
+    writer = HistoryWriter(history, batch_size=100, interval=0.01)
+
+    writer.add(entry(1, 1.0))
+    for _ in range(100):
+        if history.find_locations():
+            break
+        time.sleep(0.01)
+
+    assert history.find_locations()[0].records == 1
+
+
+def test_writer_ignores_errors(tmp_path):
+    writer = HistoryWriter(History(tmp_path), batch_size=1)
+
+    writer.add(entry(1, 1.0))
+
+
+def test_parse_time():
+    assert parse_time("6h", now=100_000) == 100_000 - 6 * 60 * 60
+    assert parse_time("1.5D", now=200_000) == 200_000 - 1.5 * 60 * 60 * 24
+    assert parse_time("2021-09-22T15:00+00:00") == 1632322800
+    with pytest.raises(ValueError):
+        parse_time("yesterday")
+
+
+def test_main_history(
+    test_runner, mock_one_call_weather_response, mock_location_response, monkeypatch
+):
+    def mock_get(url, **kwargs):
+        if LOCATION_BASE_URL in url:
+            return mock_location_response
+        return mock_one_call_weather_response
+
+    with patch("httpx.Client.get", side_effect=mock_get):
+        shown = test_runner.invoke(app, ["--history", "city", "Greensboro", "-f", "daily"])
+    assert shown.exit_code == 0
+
+    listed = test_runner.invoke(app, ["history", "--terminal_width", "200"])
+    daily = test_runner.invoke(
+        app,
+        ["history", "greensboro", "--since", "2021-01-01", "--type", "daily", "-i"],
+        env={"COLUMNS": "250"},
+    )
+
+    assert listed.exit_code == 0
+    assert "Greensboro, NC" in listed.stdout
+    assert daily.exit_code == 0
+    assert "History for Greensboro, NC" in daily.stdout
+    assert "2021-09-28 13:00 Tuesday" in daily.stdout
+    assert "hourly" not in daily.stdout
+
+
+def test_main_history_env(test_runner, mock_current_weather_response, monkeypatch):
+    monkeypatch.setenv("WEATHER_COMMAND_HISTORY", "1")
+
+    with patch("httpx.Client.get", return_value=mock_current_weather_response):
+        test_runner.invoke(app, ["city", "Greensboro"])
+    result = test_runner.invoke(app, ["history", "Greensboro", "--since", "2021-01-01"])
+
+    assert result.exit_code == 0
+    assert "thunderstorm" in result.stdout
+
+
+def test_main_history_not_found(test_runner):
+    result = test_runner.invoke(app, ["history", "Greensboro"])
+
+    assert result.exit_code == 1
+    assert "No history for Greensboro" in result.stdout
+
+
+def test_main_history_invalid_since(test_runner):
+    result = test_runner.invoke(app, ["history", "Greensboro", "--since", "last week"])
+
+    assert result.exit_code == 2
+
+
+def test_history_columns(tmp_path):
+    history = History(tmp_path / "history.sqlite")
+    history.add([entry(x, float(x), kind=x % 2) for x in range(10)])
+    history.add([entry(5, 5.0, lat=3.0, name="Elsewhere")])
+    locations = {x.name: x.id for x in history.find_locations()}
+
+    columns = history.columns([locations["Somewhere"]], since=2, until=8, kinds=["current"])
+    both = history.columns(list(locations.values()))
+
+    assert list(columns.ts) == [2, 4, 6]
+    assert list(columns.temp) == [2.0, 4.0, 6.0]
+    assert len(both.ts) == 11
+
+
+@pytest.mark.parametrize("output_format", ["csv", "json"])
+def test_main_summary_export(output_format, test_runner, history_file):
+    History(history_file).add(
+        [entry(x * 60 * 60, float(x), kind=1) for x in range(48)]
+        + [entry(0, 100.0, kind=2, name="Somewhere, NC")]
+    )
+
+    result = test_runner.invoke(
+        app,
+        [
+            "summary",
+            "somewhere",
+            "--since",
+            "1970-01-01T00:00+00:00",
+            "-p",
+            "25",
+            "-o",
+            output_format,
+        ],
+    )
+
+    assert result.exit_code == 0
+    if output_format == "csv":
+        header, *rows = result.stdout.splitlines()
+        assert header.startswith("location,date,samples,temp_min,temp_mean,temp_max,temp_p25,")
+        assert rows[0].startswith('"Somewhere, NC",1970-01-01,24,0.0,11.5,23.0,5.75,')
+    else:
+        rows = json.loads(result.stdout)
+        assert [x["date"] for x in rows] == ["1970-01-01", "1970-01-02"]
+        assert rows[1]["temp_min"] == 24.0
+        assert rows[1]["precip_mean"] is None
+
+
+def test_main_summary_table(test_runner, history_file):
+    History(history_file).add([entry(x * 60 * 60, float(x)) for x in range(24)])
+
+    result = test_runner.invoke(
+        app,
+        ["summary", "--since", "1970-01-01T00:00+00:00", "-i", "--terminal_width", "200"],
+    )
+
+    assert result.exit_code == 0
+    assert "Daily temperature (F)" in result.stdout
+    assert "Daily precipitation (in)" in result.stdout
+    assert "│ Somewhere" in result.stdout
+    assert "P90" in result.stdout
+
+
+def test_main_summary_invalid_percentile(test_runner):
+    result = test_runner.invoke(app, ["summary", "-p", "101"])
+
+    assert result.exit_code == 2
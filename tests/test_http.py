@@ -0,0 +1,250 @@
+import asyncio
+import time
+from unittest.mock import Mock, patch
+
+import httpx
+import pytest
+
+from weather_command import _http
+from weather_command._resilience import get_retry_policy
+
+
+@pytest.fixture(autouse=True)
+def close_client():
+    _http.close()
+    yield
+    _http.close()
+
+
+def test_get_client_shared():
+    assert _http.get_client() is _http.get_client()
+
+
+def test_get_client_after_close():
+    client = _http.get_client()
+    _http.close()
+
+    assert _http.get_client() is not client
+
+
+def test_client_user_agent():
+    assert _http.get_client().headers["user-agent"] == _http.USER_AGENT
+
+
+def test_client_options_from_env(monkeypatch):
+    monkeypatch.setenv("WEATHER_COMMAND_HTTP_TIMEOUT", "2.5")
+    monkeypatch.setenv("WEATHER_COMMAND_HTTP_MAX_CONNECTIONS", "7")
+    monkeypatch.setenv("WEATHER_COMMAND_HTTP_MAX_KEEPALIVE_CONNECTIONS", "3")
+
+    options = _http._client_options()
+
+    assert options["timeout"] == httpx.Timeout(2.5)
+    assert options["limits"].max_connections == 7
+    assert options["limits"].max_keepalive_connections == 3
+
+
+def test_client_options_bad_env(monkeypatch):
+    monkeypatch.setenv("WEATHER_COMMAND_HTTP_TIMEOUT", "bad")
+
+    with pytest.raises(ValueError):
+        _http._client_options()
+
+
+@pytest.mark.parametrize("available", [True, False])
+def test_http2(available):
+    with patch("weather_command._http.find_spec", return_value=object() if available else None):
+        assert _http._client_options()["http2"] is available
+
+
+def test_get_uses_shared_client():
+    response = httpx.Response(200, request=httpx.Request("get", url="https://test.com"))
+    with patch("httpx.Client.get", return_value=response) as mock_get:
+        assert _http.get("https://test.com", params={"a": 1}) is response
+
+    mock_get.assert_called_once_with("https://test.com", params={"a": 1})
+
+
+def test_new_async_client():
+    client = _http.new_async_client()
+
+    assert isinstance(client, httpx.AsyncClient)
+    assert client.headers["user-agent"] == _http.USER_AGENT
+
+
+def _response(status_code, headers=None):
+    return httpx.Response(
+        status_code, request=httpx.Request("get", url="https://test.com"), headers=headers
+    )
+
+
+@pytest.fixture
+def rate_limits(monkeypatch):
+    monkeypatch.setenv("WEATHER_COMMAND_RATE_LIMITS", "test.com=100/s")
+
+
+def test_get_rate_limited(rate_limits):
+    with patch("weather_command._rate_limit.RateLimiter.acquire") as mock_acquire:
+        with patch("httpx.Client.get", return_value=_response(200)):
+            _http.get("https://test.com/a")
+
+    mock_acquire.assert_called_once_with("test.com")
+
+
+def test_get_retries_429():
+    responses = [_response(429, {"Retry-After": "2"}), _response(200)]
+    with patch("time.sleep") as mock_sleep:
+        with patch("httpx.Client.get", side_effect=responses) as mock_get:
+            response = _http.get("https://test.com")
+
+    assert response.status_code == 200
+    assert mock_get.call_count == 2
+    mock_sleep.assert_called_once_with(2)
+
+
+def test_get_429_penalizes_host(rate_limits):
+    with patch("weather_command._rate_limit.RateLimiter.penalize") as mock_penalize:
+        with patch("httpx.Client.get", return_value=_response(429, {"Retry-After": "3600"})):
+            _http.get("https://test.com")
+
+    mock_penalize.assert_called_once_with("test.com", 3600)
+
+
+def test_get_429_retries_exhausted():
+    with patch("time.sleep"):
+        with patch("httpx.Client.get", return_value=_response(429)) as mock_get:
+            response = _http.get("https://test.com")
+
+    assert response.status_code == 429
+    assert mock_get.call_count == get_retry_policy().retries + 1
+
+
+def test_get_429_retry_after_too_long():
+    with patch("time.sleep") as mock_sleep:
+        with patch(
+            "httpx.Client.get", return_value=_response(429, {"Retry-After": "3600"})
+        ) as mock_get:
+            response = _http.get("https://test.com")
+
+    assert response.status_code == 429
+    assert mock_get.call_count == 1
+    mock_sleep.assert_not_called()
+
+
+def test_stream_retries_and_closes():
+    failed = httpx.Response(
+        503, request=httpx.Request("get", url="https://test.com"), content=iter([b"error"])
+    )
+    assert not failed.is_closed
+    responses = [failed, _response(200)]
+    with patch("time.sleep"):
+        with patch("httpx.Client.send", side_effect=responses) as mock_send:
+            with _http.stream("https://test.com") as response:
+                assert response.status_code == 200
+
+    assert failed.is_closed
+    assert mock_send.call_count == 2
+    assert mock_send.call_args.kwargs == {"stream": True}
+
+
+def test_stream_not_hedged(monkeypatch):
+    monkeypatch.setenv("WEATHER_COMMAND_HTTP_HEDGE_AFTER", "0.01")
+    with patch("weather_command._http.hedged", wraps=_http.hedged) as mock_hedged:
+        with patch("httpx.Client.send", return_value=_response(200)):
+            with _http.stream("https://test.com"):
+                pass
+
+    assert mock_hedged.call_args.args[1] is None
+
+
+def test_async_get_retries_429():
+    responses = [_response(429, {"Retry-After": "0"}), _response(200)]
+
+    async def get():
+        async with _http.new_async_client() as client:
+            return await _http.async_get(client, "https://test.com")
+
+    with patch("httpx.AsyncClient.get", side_effect=responses) as mock_get:
+        response = asyncio.run(get())
+
+    assert response.status_code == 200
+    assert mock_get.call_count == 2
+
+
+def test_get_retries_server_error():
+    with patch("httpx.Client.get", side_effect=[_response(502), _response(200)]) as mock_get:
+        response = _http.get("https://test.com")
+
+    assert response.status_code == 200
+    assert mock_get.call_count == 2
+
+
+def test_get_server_error_retries_exhausted():
+    with patch("httpx.Client.get", return_value=_response(500)) as mock_get:
+        response = _http.get("https://test.com")
+
+    assert response.status_code == 500
+    assert mock_get.call_count == get_retry_policy().retries + 1
+
+
+def test_get_client_error_not_retried():
+    with patch("httpx.Client.get", return_value=_response(404)) as mock_get:
+        _http.get("https://test.com")
+
+    assert mock_get.call_count == 1
+
+
+def test_get_retries_transport_error():
+    side_effect = [httpx.ConnectError("failed"), _response(200)]
+    with patch("httpx.Client.get", side_effect=side_effect) as mock_get:
+        response = _http.get("https://test.com")
+
+    assert response.status_code == 200
+    assert mock_get.call_count == 2
+
+
+def test_get_transport_error_retries_exhausted():
+    with patch("httpx.Client.get", side_effect=httpx.ConnectError("failed")) as mock_get:
+        with pytest.raises(httpx.ConnectError):
+            _http.get("https://test.com")
+
+    assert mock_get.call_count == get_retry_policy().retries + 1
+
+
+def test_get_hedged(monkeypatch):
+    monkeypatch.setenv("WEATHER_COMMAND_HTTP_HEDGE_AFTER", "0.01")
+    calls = []
+
+    slow = _response(500)
+    slow.close = Mock()
+
+    def mock_get(url, **kwargs):
+        calls.append(url)
+        if len(calls) == 1:
+            time.sleep(0.5)
+            return slow
+        return _response(200)
+
+    with patch("httpx.Client.get", side_effect=mock_get):
+        response = _http.get("https://test.com")
+
+    assert response.status_code == 200
+    assert len(calls) == 2
+    for _ in range(100):
+        if slow.close.called:
+            break
+        time.sleep(0.01)
+    slow.close.assert_called_once()
+
+
+def test_async_get_retries_transport_error():
+    side_effect = [httpx.ReadTimeout("slow"), _response(503), _response(200)]
+
+    async def get():
+        async with _http.new_async_client() as client:
+            return await _http.async_get(client, "https://test.com")
+
+    with patch("httpx.AsyncClient.get", side_effect=side_effect) as mock_get:
+        response = asyncio.run(get())
+
+    assert response.status_code == 200
+    assert mock_get.call_count == 3
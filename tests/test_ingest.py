@@ -0,0 +1,172 @@
+import asyncio
+import io
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from httpx import Request, Response
+from rich.console import Console
+
+from weather_command._batch import BatchLocation
+from weather_command._config import LOCATION_BASE_URL
+from weather_command._ingest import detect_format, ingest_locations, read_locations
+
+
+@pytest.fixture
+def mock_async_get(mock_one_call_weather_response, mock_location_response):
+    async def mock_get(url, **kwargs):
+        if "Bad" in url:
+            return Response(404, request=Request("get", url=url))
+        if LOCATION_BASE_URL in url:
+            return mock_location_response
+        return mock_one_call_weather_response
+
+    return mock_get
+
+
+@pytest.fixture
+def progress():
+    return Console(file=io.StringIO(), width=200)
+
+
+def test_read_locations_csv():
+    lines = [
+        "how,city_zip,state_code,country_code\n",
+        "city,Greensboro,NC,US\n",
+        "zip,27405,,\n",
+        ",Raleigh,,\n",
+    ]
+    rows = list(read_locations(lines, "csv", state_code="VA", country_code="CA"))
+
+    assert [x.batch_location for x in rows] == [
+        BatchLocation("city", "Greensboro", "NC", "US"),
+        BatchLocation("zip", "27405", "VA", "CA"),
+        BatchLocation("city", "Raleigh", "VA", "CA"),
+    ]
+
+
+def test_read_locations_jsonl():
+    lines = [
+        '{"city_zip": "Greensboro", "state_code": "NC"}\n',
+        "\n",
+        '{"how": "zip", "city_zip": 27405}\n',
+    ]
+    rows = list(read_locations(lines, "jsonl"))
+
+    assert [x.batch_location for x in rows] == [
+        BatchLocation("city", "Greensboro", "NC", None),
+        BatchLocation("zip", "27405", None, None),
+    ]
+
+
+@pytest.mark.parametrize(
+    "line, error",
+    [
+        ("{bad", "Expecting"),
+        ("[]", "expected an object"),
+        ('{"how": "city"}', "missing city_zip"),
+        ('{"how": "bad", "city_zip": "a"}', "not a valid how"),
+    ],
+)
+def test_read_locations_errors(line, error):
+    rows = list(read_locations([line, '{"city_zip": "Greensboro"}'], "jsonl"))
+
+    assert rows[0].batch_location is None
+    assert error in rows[0].error
+    assert rows[1].batch_location == BatchLocation("city", "Greensboro")
+
+
+def test_read_locations_csv_error():
+    lines = ["city_zip\n", f"{'a' * 200_000}\n", "Greensboro\n"]
+    rows = list(read_locations(lines, "csv"))
+
+    assert rows[0].batch_location is None
+    assert "field larger than field limit" in rows[0].error
+    assert rows[1].batch_location == BatchLocation("city", "Greensboro")
+
+
+def test_read_locations_is_lazy():
+    def lines():
+        yield '{"city_zip": "Greensboro"}'
+        raise AssertionError("Read too far")
+
+    assert next(read_locations(lines(), "jsonl")).batch_location.city_zip == "Greensboro"
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        (None, "csv"),
+        (Path("a.csv"), "csv"),
+        (Path("a.JSONL"), "jsonl"),
+        (Path("a.ndjson"), "jsonl"),
+    ],
+)
+def test_detect_format(path, expected):
+    assert detect_format(path) == expected
+
+
+def test_ingest_locations(mock_async_get, mock_one_call_weather_dict, progress):
+    rows = read_locations([json.dumps({"city_zip": f"City{i}"}) for i in range(25)], "jsonl")
+    out = io.StringIO()
+    with patch("httpx.AsyncClient.get", side_effect=mock_async_get):
+        stats = asyncio.run(ingest_locations(rows, out, progress, concurrency=3))
+
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 25
+    assert stats.written == 25
+    assert stats.failed == 0
+
+    record = json.loads(lines[0])
+    assert record["query"]["how"] == "city"
+    assert record["location"]["display_name"] == "Greensboro, NC"
+    assert len(record["weather"]["hourly"]) == len(mock_one_call_weather_dict["hourly"])
+    assert "locations/sec" in progress.file.getvalue()
+
+
+def test_ingest_locations_failures(mock_async_get, progress):
+    lines = ['{"city_zip": "Good"}', "{bad", '{"city_zip": "Bad"}']
+    out = io.StringIO()
+    with patch("httpx.AsyncClient.get", side_effect=mock_async_get):
+        stats = asyncio.run(ingest_locations(read_locations(lines, "jsonl"), out, progress))
+
+    assert stats.written == 1
+    assert stats.failed == 2
+    assert "Unable to get weather data for Bad" in progress.file.getvalue()
+
+
+def test_ingest_locations_bounded(mock_one_call_weather_response, mock_location_response, progress):
+    read = 0
+    max_ahead = 0
+    fetched = 0
+
+    def lines():
+        nonlocal read, max_ahead
+        for i in range(100):
+            read += 1
+            max_ahead = max(max_ahead, read - fetched)
+            yield json.dumps({"city_zip": f"City{i}"})
+
+    async def mock_get(url, **kwargs):
+        nonlocal fetched
+        await asyncio.sleep(0)
+        if LOCATION_BASE_URL in url:
+            return mock_location_response
+        fetched += 1
+        return mock_one_call_weather_response
+
+    with patch("httpx.AsyncClient.get", side_effect=mock_get):
+        stats = asyncio.run(
+            ingest_locations(
+                read_locations(lines(), "jsonl"),
+                io.StringIO(),
+                progress,
+                concurrency=2,
+                no_cache=True,
+            )
+        )
+
+    assert stats.written == 100
+    # Only the queues and the workers can hold locations that haven't been fetched yet.
+    assert max_ahead <= 2 * 3 + 2 * 2 + 1
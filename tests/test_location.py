@@ -37,7 +37,7 @@ def test_get_location_details(how, return_type, mock_location_data, test_console
     else:
         return_json = mock_location_data[0]
     with patch(
-        "httpx.get",
+        "httpx.Client.get",
         return_value=Response(
             200, request=Request("get", url="https://test.com"), json=return_json
         ),
@@ -54,7 +54,7 @@ def test_get_location_details(how, return_type, mock_location_data, test_console
 def test_get_location_details_http_error_404(test_console, capfd):
     with pytest.raises(SystemExit):
         with patch(
-            "httpx.get",
+            "httpx.Client.get",
             return_value=Response(404, request=Request("get", url="https://test.com")),
         ):
             get_location_details(how="city", city_zip="test", console=test_console)
@@ -66,7 +66,7 @@ def test_get_location_details_http_error_404(test_console, capfd):
 def test_get_location_details_https_error(test_console):
     with pytest.raises(HTTPStatusError):
         with patch(
-            "httpx.get",
+            "httpx.Client.get",
             return_value=Response(500, request=Request("get", url="https://test.com")),
         ):
             get_location_details(how="city", city_zip="test", console=test_console)
@@ -76,7 +76,7 @@ def test_get_location_details_validation_error(test_console, capfd):
     data = {"bad": None}
     with pytest.raises(SystemExit):
         with patch(
-            "httpx.get",
+            "httpx.Client.get",
             return_value=Response(200, request=Request("get", url="https://test.com"), json=data),
         ):
             get_location_details(how="city", city_zip="test", console=test_console)
@@ -88,3 +88,48 @@ def test_get_location_details_validation_error(test_console, capfd):
 def test_get_location_details_error(test_console):
     with pytest.raises(UnknownSearchTypeError):
         get_location_details(how="bad", city_zip="test", console=test_console)
+
+
+def test_get_location_details_cached(mock_location_data, test_console):
+    with patch(
+        "httpx.Client.get",
+        return_value=Response(
+            200, request=Request("get", url="https://test.com"), json=mock_location_data
+        ),
+    ) as mock_get:
+        first = get_location_details(
+            how="zip", city_zip="27455", country="US", console=test_console
+        )
+        second = get_location_details(
+            how="zip", city_zip=" 27455 ", country="us", console=test_console
+        )
+
+    assert mock_get.call_count == 1
+    assert first == second
+
+
+def test_get_location_details_cache_keys_differ(mock_location_data, test_console):
+    with patch(
+        "httpx.Client.get",
+        return_value=Response(
+            200, request=Request("get", url="https://test.com"), json=mock_location_data
+        ),
+    ) as mock_get:
+        get_location_details(how="zip", city_zip="27455", console=test_console)
+        get_location_details(how="city", city_zip="27455", console=test_console)
+
+    assert mock_get.call_count == 2
+
+
+def test_get_location_details_cache_expired(mock_location_data, test_console, monkeypatch):
+    monkeypatch.setenv("WEATHER_COMMAND_GEOCODE_CACHE_TTL", "0")
+    with patch(
+        "httpx.Client.get",
+        return_value=Response(
+            200, request=Request("get", url="https://test.com"), json=mock_location_data
+        ),
+    ) as mock_get:
+        get_location_details(how="zip", city_zip="27455", console=test_console)
+        get_location_details(how="zip", city_zip="27455", console=test_console)
+
+    assert mock_get.call_count == 2
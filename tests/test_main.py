@@ -62,7 +62,7 @@ def test_main(
         args.append(temp_only)
 
     if forecast_type == "current" or not forecast_type:
-        with patch("httpx.get", return_value=mock_current_weather_response):
+        with patch("httpx.Client.get", return_value=mock_current_weather_response):
             result = test_runner.invoke(app, args)
     else:
 
@@ -72,7 +72,7 @@ def test_main(
 
             return mock_one_call_weather_response
 
-        with patch("httpx.get", side_effect=mock_return):
+        with patch("httpx.Client.get", side_effect=mock_return):
             result = test_runner.invoke(app, args)
 
     out = result.stdout
@@ -114,3 +114,194 @@ def test_bad_how(test_runner):
 def test_bad_forecast_type(test_runner):
     result = test_runner.invoke(app, ["city", "Greensboro", "-f", "bad"])
     assert result.exit_code > 1
+
+
+@pytest.mark.parametrize("cache_args", [["--no-cache"], ["--max-age", "0"]])
+def test_main_bypass_cache(cache_args, test_runner, mock_current_weather_response):
+    with patch("httpx.Client.get", return_value=mock_current_weather_response) as mock_get:
+        test_runner.invoke(app, ["city", "Greensboro"])
+        result = test_runner.invoke(app, ["city", "Greensboro", *cache_args])
+
+    assert result.exit_code == 0
+    assert mock_get.call_count == 2
+
+
+@pytest.mark.parametrize("max_age", ["-1", "1201"])
+def test_main_invalid_max_age(max_age, test_runner):
+    with patch("httpx.Client.get") as mock_get:
+        result = test_runner.invoke(app, ["city", "Greensboro", "--max-age", max_age])
+
+    assert result.exit_code == 2
+    mock_get.assert_not_called()
+
+
+def test_main_cached(test_runner, mock_current_weather_response):
+    with patch("httpx.Client.get", return_value=mock_current_weather_response) as mock_get:
+        test_runner.invoke(app, ["city", "Greensboro"])
+        result = test_runner.invoke(app, ["city", "Greensboro"])
+
+    assert result.exit_code == 0
+    assert "Greensboro" in result.stdout
+    assert mock_get.call_count == 1
+
+
+@pytest.mark.parametrize("forecast_type", ["current", "hourly", "daily"])
+@pytest.mark.parametrize("use_stdin", [True, False])
+def test_batch(
+    forecast_type,
+    use_stdin,
+    test_runner,
+    mock_current_weather_response,
+    mock_one_call_weather_response,
+    mock_location_response,
+):
+    async def mock_get(url, **kwargs):
+        if LOCATION_BASE_URL in url:
+            return mock_location_response
+        if "/onecall" in url:
+            return mock_one_call_weather_response
+        return mock_current_weather_response
+
+    locations = ["Greensboro,NC", "Raleigh,NC"]
+    args = ["batch", "-f", forecast_type, "--terminal_width", 180]
+    with patch("httpx.AsyncClient.get", side_effect=mock_get) as mock_async_get:
+        if use_stdin:
+            result = test_runner.invoke(app, args, input="\n".join(locations) + "\n\n")
+        else:
+            result = test_runner.invoke(app, [*args, *locations])
+
+    assert result.exit_code == 0
+    assert "Greensboro" in result.stdout
+    # Both locations resolve to the same coordinates so the one call response can be cached.
+    assert mock_async_get.call_count >= len(locations)
+
+
+def test_batch_no_locations(test_runner):
+    result = test_runner.invoke(app, ["batch"], input="")
+
+    assert result.exit_code == 1
+    assert "No locations" in result.stdout
+
+
+def test_help(test_runner):
+    result = test_runner.invoke(app, ["--help"])
+
+    assert result.exit_code == 0
+    assert "batch" in result.stdout
+
+
+@pytest.mark.parametrize("file_format", ["csv", "jsonl"])
+def test_ingest(
+    file_format,
+    tmp_path,
+    test_runner,
+    mock_one_call_weather_response,
+    mock_location_response,
+):
+    async def mock_get(url, **kwargs):
+        if LOCATION_BASE_URL in url:
+            return mock_location_response
+        return mock_one_call_weather_response
+
+    path = tmp_path / f"locations.{file_format}"
+    if file_format == "csv":
+        path.write_text("city_zip,state_code\nGreensboro,NC\nRaleigh,NC\n")
+    else:
+        path.write_text('{"city_zip": "Greensboro"}\n{"city_zip": "27405", "how": "zip"}\n')
+
+    with patch("httpx.AsyncClient.get", side_effect=mock_get):
+        result = test_runner.invoke(app, ["ingest", str(path)])
+
+    assert result.exit_code == 0
+    assert len([x for x in result.stdout.splitlines() if x.startswith('{"query"')]) == 2
+
+
+def test_ingest_stdin_failure(test_runner, mock_location_response):
+    result = test_runner.invoke(app, ["ingest", "--format", "jsonl"], input="{bad\n")
+
+    assert result.exit_code == 1
+
+
+@pytest.mark.parametrize("interval", ["0", "-1"])
+def test_ingest_invalid_progress_interval(interval, test_runner):
+    result = test_runner.invoke(
+        app, ["ingest", "--format", "jsonl", "--progress-interval", interval], input=""
+    )
+
+    assert result.exit_code == 2
+
+
+@pytest.mark.parametrize("forecast_type", ["current", "hourly", "daily"])
+@pytest.mark.parametrize("output_format", ["json", "ndjson", "csv"])
+def test_main_output(
+    forecast_type,
+    output_format,
+    test_runner,
+    mock_current_weather_response,
+    mock_one_call_weather_response,
+    mock_location_response,
+):
+    def mock_get(url, **kwargs):
+        if LOCATION_BASE_URL in url:
+            return mock_location_response
+        if "/onecall" in url:
+            return mock_one_call_weather_response
+        return mock_current_weather_response
+
+    # One call forecasts are streamed.
+    with patch("httpx.Client.get", side_effect=mock_get), patch(
+        "httpx.Client.send", return_value=mock_one_call_weather_response
+    ):
+        result = test_runner.invoke(
+            app, ["city", "Greensboro", "-f", forecast_type, "--output", output_format]
+        )
+
+    assert result.exit_code == 0
+    assert "Greensboro" in result.stdout
+    assert "┃" not in result.stdout
+    assert "Getting weather" not in result.stdout
+
+
+def test_main_all(
+    test_runner,
+    mock_current_weather_response,
+    mock_one_call_weather_response,
+    mock_location_response,
+):
+    def mock_get(url, **kwargs):
+        if LOCATION_BASE_URL in url:
+            return mock_location_response
+        if "/onecall" in url:
+            return mock_one_call_weather_response
+        return mock_current_weather_response
+
+    with patch("httpx.Client.get", side_effect=mock_get) as mock:
+        result = test_runner.invoke(
+            app, ["city", "Greensboro", "-f", "all", "--terminal_width", 180]
+        )
+
+    assert result.exit_code == 0
+    assert "Current weather" in result.stdout
+    assert mock.call_count == 2
+    assert all("/weather?" not in x.args[0] for x in mock.call_args_list)
+
+
+def test_main_all_requires_table(test_runner):
+    result = test_runner.invoke(app, ["city", "Greensboro", "-f", "all", "--output", "json"])
+
+    assert result.exit_code == 1
+    assert "-f all" in result.stdout
+
+
+def test_batch_all(test_runner):
+    result = test_runner.invoke(app, ["batch", "Greensboro", "-f", "all"])
+
+    assert result.exit_code == 1
+    assert "-f all" in result.stdout
+
+
+def test_main_watch_requires_table(test_runner):
+    result = test_runner.invoke(app, ["city", "Greensboro", "--watch", "5", "--output", "json"])
+
+    assert result.exit_code == 1
+    assert "--watch" in result.stdout
@@ -0,0 +1,281 @@
+import json
+import re
+import socket
+import threading
+import time
+from unittest.mock import patch
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import httpx
+import pytest
+
+from weather_command import _http, _metrics, _timings
+from weather_command._config import LOCATION_BASE_URL
+from weather_command._metrics import Counter, Histogram, MetricsExporter
+from weather_command._weather import get_current_weather, wait_for_revalidations
+from weather_command.main import app
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    _metrics.reset()
+    _timings.reset()
+    _http.close()
+    yield
+    _metrics.reset()
+    _timings.reset()
+    _http.close()
+
+
+def sample(text, name, **labels):
+    label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    pattern = rf"^{re.escape(name)}{re.escape('{' + label_text + '}') if labels else ''} (\S+)$"
+    match = re.search(pattern, text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_disabled_records_nothing():
+    counter = Counter("test_total", "A test.", ("a",))
+
+    counter.inc(a="x")
+
+    assert counter.samples() == []
+
+
+def test_counter():
+    _metrics.enable()
+    counter = Counter("test_total", "A test.", ("a",))
+
+    counter.inc(a="x")
+    counter.inc(2, a="x")
+    counter.inc(a='y"\n')
+
+    assert counter.render() == (
+        "# HELP test_total A test.\n"
+        "# TYPE test_total counter\n"
+        'test_total{a="x"} 3\n'
+        'test_total{a="y\\"\\n"} 1'
+    )
+
+
+def test_counter_labels_required():
+    _metrics.enable()
+
+    with pytest.raises(ValueError):
+        Counter("test_total", "A test.", ("a",)).inc(b="x")
+
+
+def test_histogram():
+    _metrics.enable()
+    histogram = Histogram("test_seconds", "A test.", ("a",), buckets=(0.1, 1.0))
+
+    histogram.observe(0.05, a="x")
+    histogram.observe(0.1, a="x")
+    histogram.observe(0.5, a="x")
+    histogram.observe(5, a="x")
+    text = histogram.render()
+
+    assert "# TYPE test_seconds histogram" in text
+    assert sample(text, "test_seconds_bucket", a="x", le="0.1") == 2
+    assert sample(text, "test_seconds_bucket", a="x", le="1") == 3
+    assert sample(text, "test_seconds_bucket", a="x", le="+Inf") == 4
+    assert sample(text, "test_seconds_count", a="x") == 4
+    assert sample(text, "test_seconds_sum", a="x") == pytest.approx(5.65)
+
+
+def test_upstream_metrics(mock_current_weather_response, test_console):
+    _metrics.enable()
+    error = httpx.Response(503, request=httpx.Request("GET", "https://api.openweathermap.org"))
+    responses = [httpx.ConnectError("failed"), error, mock_current_weather_response]
+
+    with patch("httpx.Client.get", side_effect=responses):
+        get_current_weather(
+            "https://api.openweathermap.org/data/2.5/weather?q=a&appid=test", test_console
+        )
+
+    text = _metrics.render()
+    host = "api.openweathermap.org"
+    assert (
+        sample(text, "weather_command_upstream_errors_total", host=host, error="ConnectError") == 1
+    )
+    assert sample(text, "weather_command_upstream_responses_total", host=host, status="503") == 1
+    assert sample(text, "weather_command_upstream_responses_total", host=host, status="200") == 1
+    assert sample(text, "weather_command_upstream_retries_total", host=host, reason="error") == 1
+    assert sample(text, "weather_command_upstream_retries_total", host=host, reason="status") == 1
+    assert sample(text, "weather_command_upstream_request_duration_seconds_count", host=host) == 2
+    assert sample(text, "weather_command_cache_lookups_total", cache="forecast", result="miss") == 1
+    for phase in ("weather", "decode", "validate"):
+        assert sample(text, "weather_command_phase_duration_seconds_count", phase=phase) == 1
+
+
+def test_rate_limited_retry(mock_current_weather_response, test_console):
+    _metrics.enable()
+    limited = httpx.Response(
+        429,
+        headers={"Retry-After": "0"},
+        request=httpx.Request("GET", "https://api.openweathermap.org"),
+    )
+
+    with patch("httpx.Client.get", side_effect=[limited, mock_current_weather_response]):
+        get_current_weather(
+            "https://api.openweathermap.org/data/2.5/weather?q=a&appid=test", test_console
+        )
+
+    text = _metrics.render()
+    host = "api.openweathermap.org"
+    assert sample(text, "weather_command_upstream_responses_total", host=host, status="429") == 1
+    assert (
+        sample(text, "weather_command_upstream_retries_total", host=host, reason="rate_limited")
+        == 1
+    )
+
+
+def test_cache_metrics(mock_current_weather_response, test_console, monkeypatch):
+    _metrics.enable()
+    url = "https://api.openweathermap.org/data/2.5/weather?q=a&appid=test"
+
+    with patch("httpx.Client.get", return_value=mock_current_weather_response):
+        get_current_weather(url, test_console)
+        get_current_weather(url, test_console)
+        monkeypatch.setenv("WEATHER_COMMAND_FORECAST_CACHE_TTL", "0")
+        time.sleep(0.01)
+        get_current_weather(url, test_console)
+        wait_for_revalidations(5)
+
+    text = _metrics.render()
+    for result in ("miss", "hit", "stale"):
+        assert (
+            sample(text, "weather_command_cache_lookups_total", cache="forecast", result=result)
+            == 1
+        )
+
+
+def test_write_textfile(tmp_path):
+    _metrics.enable()
+    _metrics.RETRIES.inc(host="a", reason="error")
+    path = tmp_path / "metrics" / "weather_command.prom"
+
+    _metrics.write_textfile(path)
+
+    assert (
+        sample(path.read_text(), "weather_command_upstream_retries_total", host="a", reason="error")
+        == 1
+    )
+    assert list(path.parent.iterdir()) == [path]
+
+
+def test_exporter_serves_metrics():
+    port = free_port()
+    exporter = MetricsExporter(port=port)
+    exporter.start()
+    try:
+        _metrics.RETRIES.inc(host="a", reason="error")
+        with urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            content_type = response.headers["Content-Type"]
+            text = response.read().decode()
+        with pytest.raises(HTTPError):
+            urlopen(f"http://127.0.0.1:{port}/other")
+    finally:
+        exporter.stop()
+
+    assert content_type == _metrics.CONTENT_TYPE
+    assert sample(text, "weather_command_upstream_retries_total", host="a", reason="error") == 1
+
+
+def test_exporter_writes_textfile(tmp_path):
+    path = tmp_path / "weather_command.prom"
+    exporter = MetricsExporter(textfile=path, interval=0.01)
+    exporter.start()
+    try:
+        for _ in range(100):
+            if path.exists():
+                break
+            time.sleep(0.01)
+        assert path.exists()
+        _metrics.RETRIES.inc(host="a", reason="error")
+    finally:
+        exporter.stop()
+
+    # Written once more when stopped so the last values aren't lost.
+    assert (
+        sample(path.read_text(), "weather_command_upstream_retries_total", host="a", reason="error")
+        == 1
+    )
+
+
+def test_main_metrics_textfile(
+    tmp_path, test_runner, mock_one_call_weather_response, mock_location_response
+):
+    path = tmp_path / "weather_command.prom"
+
+    def mock_get(url, **kwargs):
+        if LOCATION_BASE_URL in url:
+            return mock_location_response
+        return mock_one_call_weather_response
+
+    with patch("httpx.Client.get", side_effect=mock_get):
+        result = test_runner.invoke(
+            app, ["--metrics-textfile", str(path), "city", "Greensboro", "-f", "daily"]
+        )
+
+    assert result.exit_code == 0
+    text = path.read_text()
+    assert sample(text, "weather_command_cache_lookups_total", cache="geocode", result="miss") == 1
+    assert sample(text, "weather_command_phase_duration_seconds_count", phase="render") == 1
+    assert sample(text, "weather_command_phase_duration_seconds_count", phase="geocode") == 1
+
+
+def test_main_metrics_port_in_use(test_runner):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        s.listen()
+        result = test_runner.invoke(
+            app, ["--metrics-port", str(s.getsockname()[1]), "city", "Greensboro"]
+        )
+
+    assert result.exit_code == 2
+    assert "unable to serve metrics" in result.output
+
+
+def test_serve_metrics(mock_current_weather_response):
+    from weather_command._serve import ForecastServer, ForecastService
+
+    async def mock_get(url, **kwargs):
+        return mock_current_weather_response
+
+    _metrics.enable()
+    forecasts = ForecastService()
+    forecasts.start()
+    server = ForecastServer(("127.0.0.1", 0), forecasts)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with patch("httpx.AsyncClient.get", side_effect=mock_get):
+            with urlopen(f"{url}/current?city_zip=Greensboro") as response:
+                json.loads(response.read())
+        with pytest.raises(HTTPError):
+            urlopen(f"{url}/weekly?city_zip=Greensboro")
+        with urlopen(f"{url}/metrics") as response:
+            text = response.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+        forecasts.close()
+
+    assert sample(text, "weather_command_serve_requests_total", path="/current", status="200") == 1
+    assert sample(text, "weather_command_serve_requests_total", path="other", status="404") == 1
+    assert (
+        sample(
+            text,
+            "weather_command_upstream_request_duration_seconds_count",
+            host="api.openweathermap.org",
+        )
+        == 1
+    )
@@ -0,0 +1,155 @@
+import asyncio
+import io
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from weather_command._location import get_location_details, get_location_details_async
+from weather_command._postal import (
+    PostalIndex,
+    PostalPlace,
+    build_postal_index,
+    detect_index_format,
+    find_postal_place,
+    read_postal_places,
+)
+from weather_command.main import app
+
+CSV = """Postal_Code,Country_Code,Place_Name,State_Code,Lat,Lon
+27405,US,Greensboro,NC,36.1137,-79.7345
+27455,US,Greensboro,NC,36.1823,-79.8067
+10115,DE,Berlin,BE,52.5323,13.3846
+10115,US,Somewhere,ZZ,40.0,-75.0
+01067,DE,Dresden,SN,51.0,13.7
+01067,DE,Dresden Altstadt,SN,51.1,13.8
+SW1A 1AA,GB,London,ENG,51.501,-0.1416
+bad,US,Nowhere,ZZ,north,west
+"""
+
+GEONAMES = (
+    "US\t27405\tGreensboro\tNorth Carolina\tNC\tGuilford\t081\t\t\t36.1137\t-79.7345\t4\n"
+    "US\t27455\tGreensboro\tNorth Carolina\tNC\tGuilford\t081\t\t\t36.1823\t-79.8067\t4\n"
+    "short\trow\n"
+)
+
+
+@pytest.fixture
+def index(postal_index):
+    build_postal_index(postal_index, read_postal_places(io.StringIO(CSV), "csv"))
+    return postal_index
+
+
+def test_build_and_find(index):
+    with PostalIndex(index) as postal:
+        assert postal.count == 6
+        assert postal.find("27405", "US") == PostalPlace(
+            "27405", "US", 36.1137, -79.7345, "Greensboro, NC, 27405, US"
+        )
+        assert postal.find(" 27455 ", "us").name == "Greensboro, NC, 27455, US"
+        assert postal.find("sw1a 1aa").name == "London, ENG, SW1A1AA, GB"
+        assert postal.find("99999") is None
+        assert postal.find("27405", "CA") is None
+
+
+def test_ambiguous_without_country(index):
+    with PostalIndex(index) as postal:
+        assert postal.find("10115") is None
+        assert postal.find("10115", "DE").name == "Berlin, BE, 10115, DE"
+
+
+def test_country_name_is_not_matched(index):
+    assert find_postal_place(index, "27405", "United States") is None
+
+
+def test_repeated_code_is_averaged(index):
+    place = find_postal_place(index, "01067", "DE")
+
+    assert (place.lat, place.lon) == (51.05, 13.75)
+    assert place.name == "Dresden, SN, 01067, DE"
+
+
+def test_read_geonames():
+    places = list(read_postal_places(io.StringIO(GEONAMES), "geonames"))
+
+    assert [x.postal_code for x in places] == ["27405", "27455"]
+    assert places[0].name == "Greensboro, NC, 27405, US"
+
+
+def test_read_csv_missing_columns():
+    with pytest.raises(ValueError, match="latitude, longitude"):
+        list(read_postal_places(io.StringIO("postal_code,place_name\n27405,Greensboro\n"), "csv"))
+
+
+@pytest.mark.parametrize(
+    "name, expected", [("US.txt", "geonames"), ("codes.TSV", "geonames"), ("codes.csv", "csv")]
+)
+def test_detect_index_format(name, expected, tmp_path):
+    assert detect_index_format(tmp_path / name) == expected
+
+
+def test_invalid_index(postal_index):
+    postal_index.write_bytes(b"not an index")
+
+    with pytest.raises(ValueError):
+        PostalIndex(postal_index)
+    assert find_postal_place(postal_index, "27405") is None
+
+
+def test_zip_resolved_from_index(index, test_console):
+    with patch("httpx.Client.get", side_effect=AssertionError("no requests")):
+        location = get_location_details(
+            how="zip", city_zip="27405", country="US", console=test_console
+        )
+
+    assert location.display_name == "Greensboro, NC, 27405, US"
+    assert (location.lat, location.lon) == (36.1137, -79.7345)
+
+
+def test_zip_resolved_from_index_async(index):
+    async def get_location():
+        async with httpx.AsyncClient() as client:
+            return await get_location_details_async(client, how="zip", city_zip="27455")
+
+    with patch("httpx.AsyncClient.get", side_effect=AssertionError("no requests")):
+        location = asyncio.run(get_location())
+
+    assert location.lat == 36.1823
+
+
+def test_zip_miss_falls_back(index, mock_location_response, test_console):
+    with patch("httpx.Client.get", return_value=mock_location_response) as mock_get:
+        location = get_location_details(how="zip", city_zip="99999", console=test_console)
+
+    assert location.display_name == "Greensboro, NC"
+    assert "postalcode=99999" in mock_get.call_args.args[0]
+
+
+def test_city_not_resolved_from_index(index, mock_location_response, test_console):
+    with patch("httpx.Client.get", return_value=mock_location_response) as mock_get:
+        get_location_details(how="city", city_zip="27405", console=test_console)
+
+    assert mock_get.call_count == 1
+
+
+def test_main_build_index(test_runner, tmp_path, postal_index):
+    path = tmp_path / "US.txt"
+    path.write_text(GEONAMES)
+
+    result = test_runner.invoke(app, ["build-index", str(path)])
+
+    assert result.exit_code == 0
+    assert "Indexed 2 postal codes" in result.stdout
+    assert find_postal_place(postal_index, "27455", "US").name == "Greensboro, NC, 27455, US"
+
+
+def test_main_build_index_invalid_csv(test_runner, tmp_path):
+    path = tmp_path / "codes.csv"
+    path.write_text("zip,name\n27405,Greensboro\n")
+    output = tmp_path / "other.idx"
+
+    result = test_runner.invoke(app, ["build-index", str(path), "--file", str(output)])
+
+    assert result.exit_code == 1
+    assert "missing the latitude, longitude" in result.stdout
+    assert not output.exists()
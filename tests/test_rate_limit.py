@@ -0,0 +1,172 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from weather_command._config import get_rate_limits
+from weather_command._rate_limit import Rate, RateLimiter, get_rate_limiter
+from weather_command.errors import RateLimitExceeded
+
+
+@pytest.fixture
+def rate_limiter(tmp_path):
+    return RateLimiter(
+        tmp_path / "rate_limits.sqlite",
+        {"test.com": [Rate(2, 1.0)], "daily.com": [Rate(10, 1.0), Rate(3, 86400.0)]},
+        max_wait=5,
+    )
+
+
+def test_get_rate_limits_default(monkeypatch):
+    monkeypatch.delenv("WEATHER_COMMAND_RATE_LIMITS")
+
+    limits = get_rate_limits()
+
+    assert limits["nominatim.openstreetmap.org"] == [(1, 1.0)]
+    assert limits["api.openweathermap.org"] == [(60, 60.0), (1000, 86400.0)]
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("none", {}),
+        ("", {}),
+        ("a.com=5/s", {"a.com": [(5, 1.0)]}),
+        (
+            " a.com = 5/minute ; 100/hour , b.com=1/d",
+            {"a.com": [(5, 60.0), (100, 3600.0)], "b.com": [(1, 86400.0)]},
+        ),
+    ],
+)
+def test_get_rate_limits(value, expected, monkeypatch):
+    monkeypatch.setenv("WEATHER_COMMAND_RATE_LIMITS", value)
+
+    assert get_rate_limits() == expected
+
+
+@pytest.mark.parametrize("value", ["a.com", "a.com=5", "a.com=5/x", "a.com=a/s"])
+def test_get_rate_limits_invalid(value, monkeypatch):
+    monkeypatch.setenv("WEATHER_COMMAND_RATE_LIMITS", value)
+
+    with pytest.raises(ValueError):
+        get_rate_limits()
+
+
+def test_get_rate_limiter(monkeypatch, cache_dir):
+    monkeypatch.setenv("WEATHER_COMMAND_RATE_LIMITS", "a.com=5/s")
+
+    rate_limiter = get_rate_limiter()
+
+    assert rate_limiter.limits == {"a.com": [Rate(5, 1.0)]}
+    assert rate_limiter.path.parent == cache_dir
+
+
+def test_burst_then_wait(rate_limiter):
+    assert rate_limiter._try_acquire("test.com") == 0
+    assert rate_limiter._try_acquire("test.com") == 0
+    assert rate_limiter._try_acquire("test.com") == pytest.approx(0.5, abs=0.05)
+
+
+def test_refill(rate_limiter):
+    now = time.time()
+    with patch("time.time", return_value=now):
+        rate_limiter._try_acquire("test.com")
+        rate_limiter._try_acquire("test.com")
+    with patch("time.time", return_value=now + 0.5):
+        assert rate_limiter._try_acquire("test.com") == 0
+        assert rate_limiter._try_acquire("test.com") > 0
+
+
+def test_unlimited_host(rate_limiter):
+    for _ in range(10):
+        assert rate_limiter._try_acquire("other.com") == 0
+
+
+def test_all_limits_apply(rate_limiter):
+    for _ in range(3):
+        assert rate_limiter._try_acquire("daily.com") == 0
+
+    # The per second limit has tokens left but the per day limit does not.
+    assert rate_limiter._try_acquire("daily.com") > 60 * 60
+
+
+def test_shared_between_instances(rate_limiter):
+    other = RateLimiter(rate_limiter.path, rate_limiter.limits, max_wait=5)
+
+    rate_limiter._try_acquire("test.com")
+    other._try_acquire("test.com")
+
+    assert rate_limiter._try_acquire("test.com") > 0
+
+
+def test_acquire_waits(rate_limiter):
+    rate_limiter._try_acquire("test.com")
+    rate_limiter._try_acquire("test.com")
+
+    with patch("time.sleep") as mock_sleep:
+        with patch.object(rate_limiter, "_try_acquire", side_effect=[0.5, 0]):
+            rate_limiter.acquire("test.com")
+
+    mock_sleep.assert_called_once_with(0.5)
+
+
+def test_acquire_async_waits(rate_limiter):
+    start = time.monotonic()
+    for _ in range(3):
+        asyncio.run(rate_limiter.acquire_async("test.com"))
+
+    assert time.monotonic() - start >= 0.4
+
+
+def test_acquire_max_wait(rate_limiter):
+    for _ in range(3):
+        rate_limiter._try_acquire("daily.com")
+
+    with pytest.raises(RateLimitExceeded) as e:
+        rate_limiter.acquire("daily.com")
+
+    assert e.value.retry_after > 5
+
+
+def test_penalize(rate_limiter):
+    rate_limiter.penalize("test.com", 3)
+
+    assert rate_limiter._try_acquire("test.com") == pytest.approx(3, abs=0.05)
+
+
+def test_penalize_keeps_longer_block(rate_limiter):
+    rate_limiter.penalize("test.com", 10)
+    rate_limiter.penalize("test.com", 3)
+
+    assert rate_limiter._try_acquire("test.com") == pytest.approx(10, abs=0.05)
+
+
+def test_penalize_only_for_retry_after(monkeypatch, cache_dir):
+    monkeypatch.delenv("WEATHER_COMMAND_RATE_LIMITS")
+    rate_limiter = get_rate_limiter()
+    now = time.time()
+
+    with patch("time.time", return_value=now):
+        rate_limiter.penalize("api.openweathermap.org", 1)
+        assert rate_limiter._try_acquire("api.openweathermap.org") == pytest.approx(1)
+    with patch("time.time", return_value=now + 1):
+        assert rate_limiter._try_acquire("api.openweathermap.org") == 0
+
+
+def test_penalize_unlimited_host(rate_limiter):
+    rate_limiter.penalize("other.com", 3)
+
+    assert rate_limiter._try_acquire("other.com") == 0
+
+
+def test_broken_state_file_allows_requests(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    rate_limiter = RateLimiter(
+        blocker / "rate_limits.sqlite", {"test.com": [Rate(1, 60)]}, max_wait=1
+    )
+
+    for _ in range(3):
+        assert rate_limiter._try_acquire("test.com") == 0
+    rate_limiter.penalize("test.com", 10)
@@ -0,0 +1,135 @@
+import copy
+import timeit
+import tracemalloc
+
+import pytest
+from pydantic import BaseModel
+
+from weather_command.models.records import (
+    DecodeError,
+    OneCallRecord,
+    OneCallTempRecord,
+    Record,
+)
+from weather_command.models.weather import OneCallWeather
+
+
+def assert_matches_model(record, model):
+    if isinstance(model, list):
+        assert len(record) == len(model)
+        for record_item, model_item in zip(record, model):
+            assert_matches_model(record_item, model_item)
+    elif isinstance(model, BaseModel):
+        assert isinstance(record, Record)
+        assert set(record.__slots__) == set(model.__fields__)
+        for field in record.__slots__:
+            assert_matches_model(getattr(record, field), getattr(model, field))
+    else:
+        assert record == model
+        assert type(record) is type(model)
+
+
+def test_decode_matches_model(mock_one_call_weather_dict):
+    record = OneCallRecord.decode(mock_one_call_weather_dict)
+
+    assert_matches_model(record, OneCallWeather(**mock_one_call_weather_dict))
+
+
+def test_decode_defaults(mock_one_call_weather_dict):
+    data = copy.deepcopy(mock_one_call_weather_dict)
+    del data["minutely"]
+    del data["current"]["wind_gust"]
+    data["daily"][0]["temp"] = {}
+    data["hourly"][0].pop("rain", None)
+
+    assert_matches_model(OneCallRecord.decode(data), OneCallWeather(**data))
+
+
+def test_decode_converts_types(mock_one_call_weather_dict):
+    data = copy.deepcopy(mock_one_call_weather_dict)
+    data["hourly"][0]["pop"] = 0.2
+    data["hourly"][0]["uvi"] = 1
+
+    record = OneCallRecord.decode(data)
+
+    assert record.hourly[0].pop == 0.2
+    assert isinstance(record.hourly[0].uvi, float)
+
+
+@pytest.mark.parametrize("excluded", [("current", "minutely", "hourly"), ("daily", "hourly")])
+def test_decode_excluded(excluded, mock_one_call_weather_dict):
+    data = {k: v for k, v in mock_one_call_weather_dict.items() if k not in excluded}
+
+    assert_matches_model(OneCallRecord.decode(data), OneCallWeather(**data))
+
+
+def test_decode_temp(mock_one_call_weather_dict):
+    record = OneCallRecord.decode(mock_one_call_weather_dict)
+    temp_record = OneCallTempRecord.decode(mock_one_call_weather_dict)
+
+    assert temp_record.timezone_offset == record.timezone_offset
+    assert temp_record.current.temp == record.current.temp
+    assert temp_record.current.feels_like == record.current.feels_like
+    assert [(x.dt, x.temp, x.feels_like) for x in temp_record.hourly] == [
+        (x.dt, x.temp, x.feels_like) for x in record.hourly
+    ]
+    assert [(x.dt, x.temp) for x in temp_record.daily] == [(x.dt, x.temp) for x in record.daily]
+
+
+def test_decode_temp_skips_other_fields(mock_one_call_weather_dict):
+    data = copy.deepcopy(mock_one_call_weather_dict)
+    data["hourly"][0]["humidity"] = "bad"
+    del data["daily"][0]["weather"]
+
+    with pytest.raises(DecodeError):
+        OneCallRecord.decode(data)
+
+    assert OneCallTempRecord.decode(data).hourly[0].temp == data["hourly"][0]["temp"]
+
+
+@pytest.mark.parametrize(
+    "data",
+    [{"bad": None}, [], {"lat": "north"}],
+)
+@pytest.mark.parametrize("record", [OneCallRecord, OneCallTempRecord])
+def test_decode_error(data, record):
+    with pytest.raises(DecodeError):
+        record.decode(data)
+
+
+def test_record_eq(mock_one_call_weather_dict):
+    first = OneCallRecord.decode(mock_one_call_weather_dict)
+    second = OneCallRecord.decode(mock_one_call_weather_dict)
+
+    assert first == second
+    second.hourly[0].temp += 1
+    assert first != second
+
+
+def test_record_repr(mock_one_call_weather_dict):
+    record = OneCallRecord.decode(mock_one_call_weather_dict)
+
+    assert repr(record.daily[0].temp).startswith("TempRecord(day=")
+
+
+def test_decode_benchmark(mock_one_call_weather_dict):
+    def fast():
+        return OneCallRecord.decode(mock_one_call_weather_dict)
+
+    def pydantic():
+        return OneCallWeather(**mock_one_call_weather_dict)
+
+    fast_time = min(timeit.repeat(fast, number=20, repeat=3))
+    pydantic_time = min(timeit.repeat(pydantic, number=20, repeat=3))
+
+    assert fast_time < pydantic_time
+    assert allocated(fast) < allocated(pydantic)
+
+
+def allocated(decode):
+    tracemalloc.start()
+    try:
+        result = decode()  # noqa: F841
+        return tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
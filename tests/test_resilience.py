@@ -0,0 +1,215 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from weather_command import _resilience
+from weather_command._resilience import (
+    RetryPolicy,
+    get_retry_policy,
+    hedged,
+    hedged_async,
+    is_retryable,
+    latency_percentile,
+    record_latency,
+)
+
+
+def _response(status_code):
+    return httpx.Response(status_code, request=httpx.Request("get", url="https://test.com"))
+
+
+@pytest.fixture(autouse=True)
+def clear_latencies():
+    _resilience._latencies.clear()
+    yield
+    _resilience._latencies.clear()
+
+
+def test_get_retry_policy_defaults(monkeypatch):
+    monkeypatch.delenv("WEATHER_COMMAND_HTTP_BACKOFF")
+
+    assert get_retry_policy() == RetryPolicy(retries=2, backoff=0.5, max_backoff=10.0)
+
+
+@pytest.mark.parametrize(
+    "value, hedge_after, adaptive",
+    [("", None, False), ("0.8", 0.8, False), ("auto", None, True), ("AUTO", None, True)],
+)
+def test_get_retry_policy_hedge(value, hedge_after, adaptive, monkeypatch):
+    monkeypatch.setenv("WEATHER_COMMAND_HTTP_HEDGE_AFTER", value)
+    policy = get_retry_policy()
+
+    assert policy.hedge_after == hedge_after
+    assert policy.adaptive_hedge is adaptive
+
+
+def test_get_retry_policy_bad_hedge(monkeypatch):
+    monkeypatch.setenv("WEATHER_COMMAND_HTTP_HEDGE_AFTER", "bad")
+
+    with pytest.raises(ValueError):
+        get_retry_policy()
+
+
+@pytest.mark.parametrize("attempt", [0, 1, 2, 10])
+def test_backoff_delay(attempt):
+    policy = RetryPolicy(retries=2, backoff=0.5, max_backoff=3.0)
+
+    for _ in range(20):
+        assert 0 <= policy.backoff_delay(attempt) <= min(3.0, 0.5 * 2**attempt)
+
+
+@pytest.mark.parametrize(
+    "response, error, expected",
+    [
+        (_response(500), None, True),
+        (_response(503), None, True),
+        (_response(404), None, False),
+        (_response(200), None, False),
+        (None, httpx.ConnectError("failed"), True),
+        (None, httpx.ReadTimeout("slow"), True),
+        (None, ValueError("bad"), False),
+    ],
+)
+def test_is_retryable(response, error, expected):
+    assert is_retryable(response, error) is expected
+
+
+def test_latency_percentile():
+    assert latency_percentile("test.com", 0.95) is None
+
+    for i in range(100):
+        record_latency("test.com", i / 100)
+
+    assert latency_percentile("test.com", 0.95) == 0.95
+    assert latency_percentile("other.com", 0.95) is None
+
+
+def test_hedge_delay_adaptive():
+    policy = RetryPolicy(
+        retries=2, backoff=0.5, max_backoff=3.0, hedge_after=2.0, adaptive_hedge=True
+    )
+    assert policy.hedge_delay("test.com") == 2.0
+
+    for _ in range(50):
+        record_latency("test.com", 0.1)
+
+    assert policy.hedge_delay("test.com") == 0.1
+
+
+def test_hedged_no_delay():
+    assert hedged(lambda: "result", None, lambda: True) == "result"
+
+
+def test_hedged_fast_first():
+    calls = []
+
+    def send():
+        calls.append(1)
+        return "result"
+
+    assert hedged(send, 1.0, lambda: True) == "result"
+    assert len(calls) == 1
+
+
+def test_hedged_slow_first():
+    first = threading.Event()
+    release = threading.Event()
+
+    def send():
+        if not first.is_set():
+            first.set()
+            release.wait(5)
+            return "slow"
+        return "fast"
+
+    try:
+        assert hedged(send, 0.01, lambda: True) == "fast"
+    finally:
+        release.set()
+
+
+def test_hedged_discards_slower():
+    first = threading.Event()
+    discarded = []
+    finished = threading.Event()
+
+    def send():
+        if not first.is_set():
+            first.set()
+            time.sleep(0.1)
+            return "slow"
+        return "fast"
+
+    def discard(result):
+        discarded.append(result)
+        finished.set()
+
+    assert hedged(send, 0.01, lambda: True, discard=discard) == "fast"
+    assert finished.wait(5)
+    assert discarded == ["slow"]
+
+
+def test_hedged_no_quota():
+    def send():
+        time.sleep(0.05)
+        return "slow"
+
+    assert hedged(send, 0.01, lambda: False) == "slow"
+
+
+def test_hedged_one_fails():
+    attempts = []
+
+    def send():
+        attempts.append(1)
+        if len(attempts) == 1:
+            time.sleep(0.05)
+            raise httpx.ConnectError("failed")
+        time.sleep(0.1)
+        return "second"
+
+    assert hedged(send, 0.01, lambda: True) == "second"
+
+
+def test_hedged_both_fail():
+    def send():
+        time.sleep(0.02)
+        raise httpx.ConnectError("failed")
+
+    with pytest.raises(httpx.ConnectError):
+        hedged(send, 0.01, lambda: True)
+
+
+def test_hedged_async_slow_first():
+    attempts = []
+
+    async def send():
+        attempts.append(1)
+        if len(attempts) == 1:
+            await asyncio.sleep(5)
+            return "slow"
+        return "fast"
+
+    start = time.monotonic()
+    assert asyncio.run(hedged_async(send, 0.01, lambda: True)) == "fast"
+    assert time.monotonic() - start < 1
+
+
+def test_hedged_async_fast_first():
+    async def send():
+        return "result"
+
+    assert asyncio.run(hedged_async(send, 1.0, lambda: True)) == "result"
+    assert asyncio.run(hedged_async(send, None, lambda: True)) == "result"
+
+
+def test_hedged_async_both_fail():
+    async def send():
+        await asyncio.sleep(0.02)
+        raise httpx.ConnectError("failed")
+
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(hedged_async(send, 0.01, lambda: True))
@@ -0,0 +1,233 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+from httpx import Request, Response
+
+from weather_command._config import LOCATION_BASE_URL
+from weather_command._serve import (
+    BadRequest,
+    ForecastQuery,
+    ForecastServer,
+    ForecastService,
+    NotFound,
+    SingleFlight,
+    parse_query,
+)
+from weather_command.errors import RateLimitExceeded
+
+
+@pytest.fixture
+def server():
+    forecasts = ForecastService()
+    forecasts.start()
+    forecast_server = ForecastServer(("127.0.0.1", 0), forecasts)
+    thread = threading.Thread(target=forecast_server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{forecast_server.server_address[1]}"
+    forecast_server.shutdown()
+    forecast_server.server_close()
+    forecasts.close()
+
+
+@pytest.fixture
+def mock_upstream(
+    mock_current_weather_response, mock_one_call_weather_response, mock_location_response
+):
+    async def mock_get(url, **kwargs):
+        # Long enough for concurrent requests to overlap.
+        await asyncio.sleep(0.2)
+        if LOCATION_BASE_URL in url:
+            return mock_location_response
+        if "/onecall" in url:
+            return mock_one_call_weather_response
+        return mock_current_weather_response
+
+    with patch("httpx.AsyncClient.get", side_effect=mock_get) as mock:
+        yield mock
+
+
+def get_json(url):
+    try:
+        with urlopen(url) as response:
+            return response.status, json.loads(response.read())
+    except HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_parse_query():
+    assert parse_query("/daily?city_zip=Greensboro&state_code=NC&units=imperial") == ForecastQuery(
+        path="/daily",
+        how="city",
+        city_zip="greensboro",
+        state_code="nc",
+        country_code=None,
+        units="imperial",
+    )
+
+
+def test_parse_query_normalizes():
+    assert parse_query("/current?city_zip=New%20%20York") == parse_query(
+        "/current?city_zip=new+york&how=city&units=metric"
+    )
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/current",
+        "/current?city_zip=",
+        "/current?city_zip=a&how=bad",
+        "/current?city_zip=a&units=k",
+    ],
+)
+def test_parse_query_bad_request(path):
+    with pytest.raises(BadRequest):
+        parse_query(path)
+
+
+def test_parse_query_not_found():
+    with pytest.raises(NotFound):
+        parse_query("/weekly?city_zip=Greensboro")
+
+
+def test_single_flight():
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def run():
+        flights = SingleFlight()
+        together = await asyncio.gather(*(flights.do("a", call) for _ in range(5)))
+        other = await flights.do("b", call)
+        later = await flights.do("a", call)
+        return together, other, later
+
+    together, other, later = asyncio.run(run())
+
+    assert together == [1] * 5
+    assert other == 2
+    assert later == 3
+
+
+def test_single_flight_error():
+    async def call():
+        await asyncio.sleep(0.01)
+        raise ValueError("failed")
+
+    async def run():
+        flights = SingleFlight()
+        return await asyncio.gather(
+            *(flights.do("a", call) for _ in range(3)), return_exceptions=True
+        )
+
+    assert all(isinstance(x, ValueError) for x in asyncio.run(run()))
+
+
+@pytest.mark.parametrize(
+    "path, key", [("/current", "name"), ("/hourly", "hourly"), ("/daily", "daily")]
+)
+def test_serve(path, key, server, mock_upstream):
+    status, body = get_json(f"{server}{path}?city_zip=Greensboro&state_code=NC")
+
+    assert status == 200
+    assert key in body
+
+
+def test_serve_hourly_excludes_daily(server, mock_upstream):
+    _, body = get_json(f"{server}/hourly?city_zip=Greensboro")
+
+    assert "daily" not in body
+    assert "minutely" not in body
+
+
+def test_serve_coalesces_requests(server, mock_upstream):
+    with ThreadPoolExecutor(10) as executor:
+        results = list(
+            executor.map(lambda _: get_json(f"{server}/daily?city_zip=Greensboro"), range(10))
+        )
+
+    assert all(status == 200 for status, _ in results)
+    # One geocode and one forecast request for all ten clients.
+    assert mock_upstream.call_count == 2
+
+
+def test_serve_cached(server, mock_upstream):
+    get_json(f"{server}/current?city_zip=Greensboro")
+    get_json(f"{server}/current?city_zip=greensboro")
+
+    assert mock_upstream.call_count == 1
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [("/weekly?city_zip=a", 404), ("/current", 400), ("/current?city_zip=a&how=bad", 400)],
+)
+def test_serve_bad_requests(path, expected, server):
+    status, body = get_json(f"{server}{path}")
+
+    assert status == expected
+    assert "error" in body
+
+
+@pytest.mark.parametrize("upstream_status, expected", [(404, 404), (500, 502), (401, 502)])
+def test_serve_upstream_errors(upstream_status, expected, server):
+    async def mock_get(url, **kwargs):
+        return Response(upstream_status, request=Request("GET", url))
+
+    with patch("httpx.AsyncClient.get", side_effect=mock_get):
+        status, body = get_json(f"{server}/current?city_zip=Greensboro")
+
+    assert status == expected
+    assert "error" in body
+
+
+def test_serve_invalid_json(server):
+    async def mock_get(url, **kwargs):
+        return Response(200, request=Request("GET", url), content=b"<html>")
+
+    with patch("httpx.AsyncClient.get", side_effect=mock_get):
+        status, body = get_json(f"{server}/current?city_zip=Greensboro")
+
+    assert status == 502
+    assert body == {"error": "unexpected response"}
+
+
+def test_serve_missing_api_key(server, monkeypatch):
+    monkeypatch.delenv("OPEN_WEATHER_API_KEY")
+
+    status, body = get_json(f"{server}/current?city_zip=Greensboro")
+
+    assert status == 500
+    assert body == {"error": "the server has no OpenWeather API key"}
+
+
+def test_serve_retry_after_rounds_up(server):
+    async def mock_get(url, **kwargs):
+        raise RateLimitExceeded("rate limit reached", retry_after=0.4)
+
+    with patch("httpx.AsyncClient.get", side_effect=mock_get):
+        with pytest.raises(HTTPError) as e:
+            urlopen(f"{server}/current?city_zip=Greensboro")
+
+    assert e.value.code == 503
+    assert e.value.headers["Retry-After"] == "1"
+
+
+def test_serve_location_not_found(server):
+    async def mock_get(url, **kwargs):
+        return Response(200, request=Request("GET", url), json=[])
+
+    with patch("httpx.AsyncClient.get", side_effect=mock_get):
+        status, body = get_json(f"{server}/daily?city_zip=Nowhere")
+
+    assert status == 404
+    assert body == {"error": "location not found"}
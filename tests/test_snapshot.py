@@ -0,0 +1,269 @@
+import io
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from weather_command._batch import BatchLocation
+from weather_command._config import LOCATION_BASE_URL, SNAPSHOT_NAME_SIZE
+from weather_command._snapshot import (
+    Snapshot,
+    SnapshotCurrent,
+    SnapshotDay,
+    SnapshotEntry,
+    SnapshotHour,
+    format_snapshot,
+    print_snapshot,
+    read_snapshot_entry,
+    refresh_snapshot,
+    snapshot_key,
+    write_snapshot,
+)
+from weather_command.main import app
+
+
+def key(city_zip="Greensboro", how="city", state_code=None, country_code=None):
+    return snapshot_key(
+        how=how, city_zip=city_zip, state_code=state_code, country_code=country_code
+    )
+
+
+def make_entry(city_zip="Greensboro", *, name="Greensboro, NC", fetched=None, hours=2, days=2):
+    return SnapshotEntry(
+        key=key(city_zip),
+        name=name,
+        lat=36.1056,
+        lon=-79.7569,
+        timezone_offset=-14400,
+        fetched=time.time() if fetched is None else fetched,
+        current=SnapshotCurrent(1632878438, 19.75, 19.5, 76.0, 1015.0, 1.0, 0.0, "clear sky"),
+        hourly=[
+            SnapshotHour(1632877200 + i * 3600, 20.0 + i, 19.5, 76.0, 0.25) for i in range(hours)
+        ],
+        daily=[
+            SnapshotDay(1632848400 + i * 86400, 15.0, 25.0, 60.0, 0.5, 1.5, "light rain")
+            for i in range(days)
+        ],
+    )
+
+
+@pytest.fixture
+def mock_get(mock_one_call_weather_response, mock_location_response):
+    async def mock_get(url, **kwargs):
+        if LOCATION_BASE_URL in url:
+            return mock_location_response
+        return mock_one_call_weather_response
+
+    return mock_get
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "snapshot.bin"
+    entries = [make_entry(f"City{i}", name=f"City {i}", hours=i, days=i % 3) for i in range(20)]
+
+    write_snapshot(path, entries)
+
+    with Snapshot(path) as snapshot:
+        assert snapshot.count == 20
+        assert {x.key: x for x in snapshot.entries()} == {x.key: x for x in entries}
+        for entry in entries:
+            assert snapshot.get(entry.key) == entry
+        assert snapshot.get(key("Elsewhere")) is None
+
+
+def test_key_is_normalized():
+    assert key("  greensboro ", state_code="nc") == key("Greensboro", state_code="NC")
+    assert key("Greensboro") != key("Greensboro", how="zip")
+
+
+def test_last_entry_with_key_is_kept(tmp_path):
+    path = tmp_path / "snapshot.bin"
+
+    write_snapshot(path, [make_entry(name="Old"), make_entry(name="New")])
+
+    assert read_snapshot_entry(path, key()).name == "New"
+
+
+def test_long_name_is_cut_at_a_character(tmp_path):
+    path = tmp_path / "snapshot.bin"
+
+    write_snapshot(path, [make_entry(name="é" * SNAPSHOT_NAME_SIZE)])
+
+    assert read_snapshot_entry(path, key()).name == "é" * (SNAPSHOT_NAME_SIZE // 2)
+
+
+def test_without_current(tmp_path):
+    path = tmp_path / "snapshot.bin"
+
+    write_snapshot(path, [make_entry()._replace(current=None)])
+    entry = read_snapshot_entry(path, key())
+
+    assert entry.current is None
+    assert format_snapshot(entry) == []
+    assert len(format_snapshot(entry, forecast_type="daily")) == 3
+
+
+@pytest.mark.parametrize("content", [b"", b"WCSNAP", b"not a snapshot" * 10])
+def test_invalid_file(tmp_path, content):
+    path = tmp_path / "snapshot.bin"
+    path.write_bytes(content)
+
+    with pytest.raises(ValueError):
+        Snapshot(path)
+    assert read_snapshot_entry(path, key()) is None
+
+
+def test_truncated_file(tmp_path):
+    path = tmp_path / "snapshot.bin"
+    write_snapshot(path, [make_entry(f"City{i}") for i in range(10)])
+    path.write_bytes(path.read_bytes()[:100])
+
+    with pytest.raises(ValueError, match="truncated"):
+        Snapshot(path)
+
+
+def test_missing_file(tmp_path):
+    assert read_snapshot_entry(tmp_path / "snapshot.bin", key()) is None
+
+
+@pytest.mark.parametrize(
+    "units, temp_only, expected",
+    [
+        ("metric", False, "Greensboro, NC: 20°C, feels like 20°C, 76% humidity, clear sky"),
+        ("metric", True, "Greensboro, NC: 20°C, feels like 20°C"),
+        ("imperial", True, "Greensboro, NC: 68°F, feels like 67°F"),
+    ],
+)
+def test_format_current(units, temp_only, expected):
+    assert format_snapshot(make_entry(), units=units, temp_only=temp_only) == [expected]
+
+
+def test_format_hourly():
+    lines = format_snapshot(make_entry(), forecast_type="hourly", am_pm=True)
+
+    assert lines == [
+        "Hourly weather for Greensboro, NC",
+        "2021-09-28 09:00 PM  20°C  feels like 20°C  76% humidity  25% precip",
+        "2021-09-28 10:00 PM  21°C  feels like 20°C  76% humidity  25% precip",
+    ]
+
+
+def test_format_all():
+    lines = format_snapshot(make_entry(days=1), forecast_type="all", temp_only=True)
+
+    assert lines[0] == "Greensboro, NC: 20°C, feels like 20°C"
+    assert lines[-2:] == [
+        "Daily weather for Greensboro, NC",
+        "2021-09-28 13:00 Tuesday  low 15°C  high 25°C",
+    ]
+
+
+def test_print_snapshot_max_age(tmp_path, capsys):
+    path = tmp_path / "snapshot.bin"
+    write_snapshot(path, [make_entry(fetched=time.time() - 60)])
+
+    assert not print_snapshot(capsys, path, key(), max_age=30)  # type: ignore[arg-type]
+    assert capsys.readouterr().out == ""
+
+
+def test_refresh_snapshot(tmp_path, mock_get, mock_one_call_weather_dict):
+    path = tmp_path / "snapshot.bin"
+
+    with patch("httpx.AsyncClient.get", side_effect=mock_get):
+        failed = refresh_snapshot(path, [BatchLocation("city", "Greensboro", "NC")])
+    entry = read_snapshot_entry(path, key(state_code="NC"))
+
+    assert failed == []
+    assert entry.name == "Greensboro, NC"
+    assert entry.current.temp == pytest.approx(19.74)
+    assert entry.current.conditions == "clear sky"
+    assert len(entry.hourly) == len(mock_one_call_weather_dict["hourly"])
+    assert len(entry.daily) == len(mock_one_call_weather_dict["daily"])
+    assert entry.daily[0].temp_max == pytest.approx(
+        mock_one_call_weather_dict["daily"][0]["temp"]["max"]
+    )
+
+
+def test_refresh_snapshot_precipitation(
+    tmp_path, mock_location_response, mock_one_call_weather_dict
+):
+    path = tmp_path / "snapshot.bin"
+    mock_one_call_weather_dict["hourly"][0]["pop"] = 0.59
+    mock_one_call_weather_dict["daily"][0]["pop"] = 0.07
+    weather_response = httpx.Response(
+        200,
+        request=httpx.Request("get", url="https://test.com"),
+        json=mock_one_call_weather_dict,
+    )
+
+    async def mock_get(url, **kwargs):
+        if LOCATION_BASE_URL in url:
+            return mock_location_response
+        return weather_response
+
+    with patch("httpx.AsyncClient.get", side_effect=mock_get):
+        refresh_snapshot(path, [BatchLocation("city", "Greensboro", "NC")])
+    hourly, daily = io.StringIO(), io.StringIO()
+    print_snapshot(hourly, path, key(state_code="NC"), forecast_type="hourly")
+    print_snapshot(daily, path, key(state_code="NC"), forecast_type="daily")
+
+    assert "59% precip" in hourly.getvalue().splitlines()[1]
+    assert "7% precip" in daily.getvalue().splitlines()[1]
+
+
+def test_refresh_keeps_previous_entry_on_failure(tmp_path):
+    path = tmp_path / "snapshot.bin"
+    write_snapshot(path, [make_entry(), make_entry("Removed")])
+
+    with patch("httpx.AsyncClient.get", side_effect=httpx.ConnectError("failed")):
+        failed = refresh_snapshot(
+            path, [BatchLocation("city", "Greensboro"), BatchLocation("city", "Elsewhere")]
+        )
+
+    assert [x.city_zip for x, _ in failed] == ["Greensboro", "Elsewhere"]
+    with Snapshot(path) as snapshot:
+        assert [x.name for x in snapshot.entries()] == ["Greensboro, NC"]
+
+
+def test_main_snapshot(test_runner, mock_get):
+    with patch("httpx.AsyncClient.get", side_effect=mock_get):
+        written = test_runner.invoke(app, ["snapshot", "Greensboro,NC", "--no-cache"])
+
+    with patch("httpx.Client.get", side_effect=AssertionError("no requests")):
+        current = test_runner.invoke(app, ["--snapshot", "city", "greensboro", "-s", "nc", "-i"])
+        daily = test_runner.invoke(
+            app, ["city", "Greensboro", "-s", "NC", "--snapshot", "-f", "daily", "-t"]
+        )
+
+    assert written.exit_code == 0
+    assert current.exit_code == 0
+    assert current.stdout == "Greensboro, NC: 68°F, feels like 68°F, 76% humidity, clear sky\n"
+    assert daily.exit_code == 0
+    assert daily.stdout.splitlines()[1] == "2021-09-28 13:00 Tuesday  low 15°C  high 30°C"
+
+
+def test_main_snapshot_falls_back(test_runner, mock_current_weather_response):
+    with patch("httpx.Client.get", return_value=mock_current_weather_response):
+        result = test_runner.invoke(app, ["--snapshot", "city", "Greensboro"])
+
+    assert result.exit_code == 0
+    assert "Current weather for Greensboro" in result.stdout
+
+
+def test_main_snapshot_with_output(test_runner):
+    result = test_runner.invoke(app, ["--snapshot", "city", "Greensboro", "-o", "json"])
+
+    assert result.exit_code == 1
+    assert "--snapshot can't be used" in result.stdout
+
+
+def test_main_snapshot_command_failure(test_runner, tmp_path):
+    path = tmp_path / "other" / "snapshot.bin"
+
+    with patch("httpx.AsyncClient.get", side_effect=httpx.ConnectError("failed")):
+        result = test_runner.invoke(app, ["snapshot", "--file", str(path)], input="Greensboro\n")
+
+    assert result.exit_code == 1
+    assert "Unable to get weather data for Greensboro" in result.stdout
+    assert path.exists()
@@ -0,0 +1,111 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from weather_command._builder import build_url
+from weather_command._weather import _forecast_cache_key, get_forecast_cache
+
+# How long, in seconds, weather-command's own imports can take on top of typer and click. This is
+# deliberately generous so slow CI machines pass, eagerly importing httpx, pydantic, and rich goes
+# well over it.
+IMPORT_TIME_BUDGET = 0.1
+
+HEAVY_MODULES = ["asyncio", "dotenv", "httpx", "pydantic", "rich"]
+
+
+def run_python(code):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout, parse_import_times(result.stderr)
+
+
+def parse_import_times(output):
+    """Parses -X importtime output into {module: cumulative seconds}."""
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative) / 1_000_000
+
+    return times
+
+
+def imported(times, module):
+    return any(x == module or x.startswith(f"{module}.") for x in times)
+
+
+def test_parse_import_times():
+    output = """import time: self [us] | cumulative | imported package
+import time:       100 |        100 |   typer
+import time:       200 |       1300 | weather_command.main"""
+
+    assert parse_import_times(output) == {"typer": 0.0001, "weather_command.main": 0.0013}
+
+
+@pytest.mark.parametrize("module", HEAVY_MODULES)
+def test_import_main_is_lazy(module):
+    _, times = run_python("import weather_command.main")
+
+    assert not imported(times, module)
+
+
+def test_import_time_budget():
+    _, times = run_python("import weather_command.main")
+    own_time = times["weather_command.main"] - times.get("typer", 0) - times.get("click", 0)
+
+    assert own_time < IMPORT_TIME_BUDGET
+
+
+def test_help_is_lazy():
+    stdout, times = run_python(
+        "from weather_command.main import app; app(['--help'], standalone_mode=False)"
+    )
+
+    assert "Command line weather app" in stdout
+    for module in HEAVY_MODULES:
+        assert not imported(times, module)
+
+
+def test_cache_hit_does_not_import_httpx(mock_current_weather_dict):
+    url = build_url(forecast_type="current", how="city", city_zip="Greensboro", units="metric")
+    get_forecast_cache().set(_forecast_cache_key(url), json.dumps(mock_current_weather_dict))
+
+    stdout, times = run_python(
+        "from weather_command.main import app; app(['city', 'Greensboro'], standalone_mode=False)"
+    )
+
+    assert "Greensboro" in stdout
+    assert not imported(times, "httpx")
+
+
+def test_snapshot_read_is_lazy(cache_dir):
+    from weather_command._snapshot import (
+        SnapshotCurrent,
+        SnapshotEntry,
+        snapshot_key,
+        write_snapshot,
+    )
+
+    key = snapshot_key(how="city", city_zip="Greensboro", state_code=None, country_code=None)
+    current = SnapshotCurrent(1632878438, 19.75, 19.5, 76.0, 1015.0, 1.0, 0.0, "clear sky")
+    write_snapshot(
+        cache_dir / "snapshot.bin",
+        [SnapshotEntry(key, "Greensboro, NC", 36.1, -79.8, -14400, 0.0, current, [], [])],
+    )
+
+    stdout, times = run_python(
+        "from weather_command.main import app; app(['--snapshot', 'city', 'Greensboro'], standalone_mode=False)"
+    )
+
+    assert stdout == "Greensboro, NC: 20°C, feels like 20°C, 76% humidity, clear sky\n"
+    for module in ("asyncio", "httpx", "pydantic", "rich"):
+        assert not imported(times, module)
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from weather_command._stream import iter_members
+from weather_command.models.records import DecodeError
+
+DATA = {
+    "lat": 36.0726,
+    "timezone_offset": -14400,
+    "name": "Zürich ☀",
+    "current": {"temp": 12.5, "weather": [{"id": 800}]},
+    "hourly": [{"dt": 1, "temp": 20}, {"dt": 2, "temp": -1.25e1}, {"dt": 3, "ok": True}],
+    "daily": [],
+    "alerts": None,
+}
+
+
+def expected_members(stream):
+    for key, value in DATA.items():
+        if key in stream:
+            yield from ((key, x) for x in value)
+        else:
+            yield key, value
+
+
+def split(body, size):
+    return [body[i : i + size] for i in range(0, len(body), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 10_000])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_iter_members(size, indent):
+    body = json.dumps(DATA, indent=indent, ensure_ascii=False).encode()
+
+    got = list(iter_members(split(body, size), ("hourly", "daily")))
+
+    assert got == list(expected_members(("hourly", "daily")))
+
+
+def test_iter_members_not_streamed():
+    body = json.dumps(DATA).encode()
+
+    assert list(iter_members(split(body, 5), ())) == list(DATA.items())
+
+
+def test_iter_members_yields_before_end():
+    body = json.dumps(DATA).encode()
+    chunks = split(body, 16)
+    received = []
+
+    def chunk_iter():
+        for chunk in chunks:
+            received.append(chunk)
+            yield chunk
+
+    for key, value in iter_members(chunk_iter(), ("hourly",)):
+        if key == "hourly":
+            break
+
+    assert len(received) < len(chunks)
+
+
+def test_iter_members_number_split():
+    assert list(iter_members([b'{"a": 12', b"3}"], ())) == [("a", 123)]
+
+
+def test_iter_members_empty_object():
+    assert list(iter_members([b" {", b"} "], ())) == []
+
+
+@pytest.mark.parametrize(
+    "chunks",
+    [
+        [b"[1, 2]"],
+        [b'{"a": 1'],
+        [b'{"a": [1, 2'],
+        [b'{"a": 1} {'],
+        [b"{1: 2}"],
+        [b'{"a" 1}'],
+        [b'{"a": tru', b"}"],
+        [],
+    ],
+)
+def test_iter_members_error(chunks):
+    with pytest.raises(DecodeError):
+        list(iter_members(chunks, ("a",)))
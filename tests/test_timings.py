@@ -0,0 +1,285 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest.mock import patch
+
+import httpx
+import pytest
+from rich.console import Console
+
+from weather_command import _builder, _http, _timings
+from weather_command._config import LOCATION_BASE_URL
+from weather_command.main import app
+
+
+@pytest.fixture(autouse=True)
+def reset_timings():
+    _timings.reset()
+    _http.close()
+    yield
+    _timings.reset()
+    _http.close()
+
+
+@pytest.fixture
+def local_server():
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = b'{"ok": true}'
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def names(spans):
+    return {"/".join(x.path) for x in spans}
+
+
+def test_span_disabled():
+    with _timings.span("a") as attributes:
+        attributes["b"] = 1
+
+    assert _timings.get_spans() == []
+
+
+def test_span_nested():
+    _timings.enable()
+
+    with _timings.span("a", x=1) as attributes:
+        with _timings.span("b"):
+            pass
+        attributes["y"] = 2
+
+    b, a = _timings.get_spans()
+
+    assert a.path == ("a",)
+    assert a.parent_id is None
+    assert a.attributes == {"x": 1, "y": 2}
+    assert b.path == ("a", "b")
+    assert b.parent_id == a.id
+    assert a.duration >= b.duration
+
+
+def test_span_error():
+    _timings.enable()
+
+    with pytest.raises(ValueError):
+        with _timings.span("a"):
+            raise ValueError
+
+    assert _timings.get_spans()[0].attributes == {"error": "ValueError"}
+
+
+def test_record():
+    _timings.enable()
+
+    with _timings.span("a"):
+        _timings.record("b", 1.0, 1.5, z=3)
+
+    b, _ = _timings.get_spans()
+
+    assert b.path == ("a", "b")
+    assert b.duration == 0.5
+    assert b.attributes == {"z": 3}
+
+
+def test_spans_nest_per_task():
+    _timings.enable()
+
+    async def task(name):
+        with _timings.span(name):
+            await asyncio.sleep(0.01)
+            with _timings.span("inner"):
+                await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(task("a"), task("b"))
+
+    asyncio.run(run())
+
+    assert names(_timings.get_spans()) == {"a", "a/inner", "b", "b/inner"}
+
+
+def test_breakdown_table():
+    _timings.enable()
+
+    with _timings.span("run"):
+        for _ in range(3):
+            with _timings.span("http"):
+                pass
+        with _timings.span("render"):
+            pass
+
+    console = Console(file=StringIO(), width=100)
+    console.print(_timings.breakdown_table(_timings.get_spans()))
+    lines = console.file.getvalue().splitlines()
+    rows = [x for x in lines if "run" in x or "http" in x or "render" in x]
+
+    assert [x.split("│")[1].rstrip() for x in rows] == [" run", "   http", "   render"]
+    assert rows[1].split("│")[2].strip() == "3"
+
+
+def test_write_trace(tmp_path):
+    _timings.enable()
+    with _timings.span("run"):
+        with _timings.span("http", host="example.com"):
+            pass
+
+    trace_file = tmp_path / "traces" / "trace.jsonl"
+    _timings.write_trace(trace_file, _timings.get_spans())
+    _timings.write_trace(trace_file, _timings.get_spans())
+
+    lines = [json.loads(x) for x in trace_file.read_text().splitlines()]
+
+    assert len(lines) == 4
+    assert len({x["run_id"] for x in lines}) == 2
+    assert lines[0]["name"] == "http"
+    assert lines[0]["path"] == ["run", "http"]
+    assert lines[0]["attributes"] == {"host": "example.com"}
+    assert {"host", "pid", "start", "duration", "id", "parent_id"} <= lines[0].keys()
+
+
+def test_flush(tmp_path):
+    trace_file = tmp_path / "trace.jsonl"
+    run = _timings.start("serve", trace_file=trace_file)
+    with _timings.span("request"):
+        pass
+
+    _timings.flush()
+    flushed = trace_file.read_text().splitlines()
+    with _timings.span("request"):
+        pass
+    _timings.stop(run)
+
+    lines = [json.loads(x) for x in trace_file.read_text().splitlines()]
+
+    assert [json.loads(x)["path"] for x in flushed] == [["run", "request"]]
+    assert [x["name"] for x in lines] == ["request", "request", "run"]
+    assert len({x["run_id"] for x in lines}) == 1
+    assert _timings.get_spans() == []
+
+
+def test_watch_flushes_each_refresh(tmp_path, test_console):
+    trace_file = tmp_path / "trace.jsonl"
+    run = _timings.start("show", trace_file=trace_file)
+    updates = iter([2, None])
+
+    def get_if_changed():
+        update = next(updates, KeyboardInterrupt)
+        if update is KeyboardInterrupt:
+            raise KeyboardInterrupt
+        return update
+
+    with patch("time.sleep"):
+        _builder._watch(test_console, 1, str, get_if_changed, 5)
+
+    assert [json.loads(x)["name"] for x in trace_file.read_text().splitlines()] == ["render"]
+    assert _timings.get_spans() == []
+    run.close()
+
+
+def test_http_event_hooks(local_server):
+    _timings.enable()
+
+    _http.get(f"{local_server}/a")
+
+    spans = {x.name: x for x in _timings.get_spans()}
+
+    assert spans["http"].attributes == {"host": "127.0.0.1", "status": 200}
+    assert spans["wait"].path == ("http", "wait")
+    assert spans["transfer"].path == ("http", "transfer")
+    assert spans["transfer"].attributes == {"bytes": 12}
+    assert spans["wait"].parent_id == spans["http"].id
+
+
+def test_http_event_hooks_async(local_server):
+    _timings.enable()
+
+    async def get():
+        async with _http.new_async_client() as client:
+            return await _http.async_get(client, f"{local_server}/a")
+
+    asyncio.run(get())
+
+    assert {"http", "http/wait", "http/transfer"} <= names(_timings.get_spans())
+
+
+def test_no_event_hooks_when_disabled():
+    client = _http.get_client()
+
+    assert client.event_hooks == {"request": [], "response": []}
+
+
+def test_http_hedged_spans_nest(local_server, monkeypatch):
+    monkeypatch.setenv("WEATHER_COMMAND_HTTP_HEDGE_AFTER", "5")
+    _timings.enable()
+
+    _http.get(f"{local_server}/a")
+
+    assert {"http/wait", "http/transfer"} <= names(_timings.get_spans())
+
+
+@pytest.mark.parametrize("temp_only", [[], ["-t"]])
+def test_main_timings(
+    temp_only, test_runner, mock_one_call_weather_response, mock_location_response
+):
+    def mock_get(url, **kwargs):
+        if LOCATION_BASE_URL in url:
+            return mock_location_response
+        return mock_one_call_weather_response
+
+    with patch("httpx.Client.get", side_effect=mock_get):
+        result = test_runner.invoke(
+            app, ["--timings", "city", "Greensboro", "-f", "daily", *temp_only]
+        )
+
+    assert result.exit_code == 0
+    assert "Timings" in result.output
+    for phase in ("run", "geocode", "weather", "http", "decode", "validate", "render"):
+        assert f" {phase} " in result.output
+
+
+def test_main_trace_file(tmp_path, test_runner, mock_current_weather_response, monkeypatch):
+    trace_file = tmp_path / "trace.jsonl"
+    monkeypatch.setenv("WEATHER_COMMAND_TRACE_FILE", str(trace_file))
+
+    with patch("httpx.Client.get", return_value=mock_current_weather_response):
+        result = test_runner.invoke(app, ["city", "Greensboro"])
+
+    assert result.exit_code == 0
+    assert "Timings" not in result.output
+    spans = [json.loads(x) for x in trace_file.read_text().splitlines()]
+    run = next(x for x in spans if x["name"] == "run")
+    assert run["attributes"] == {"command": "show"}
+    assert {"/".join(x["path"]) for x in spans} >= {
+        "run/weather",
+        "run/weather/http",
+        "run/weather/decode",
+        "run/weather/validate",
+        "run/render",
+    }
+
+
+def test_main_trace_file_on_error(tmp_path, test_runner):
+    trace_file = tmp_path / "trace.jsonl"
+
+    with patch("httpx.Client.get", side_effect=httpx.ConnectError("failed")):
+        result = test_runner.invoke(app, ["--trace-file", str(trace_file), "city", "Greensboro"])
+
+    assert result.exit_code == 1
+    spans = [json.loads(x) for x in trace_file.read_text().splitlines()]
+    assert "run" in {x["name"] for x in spans}
+    assert next(x for x in spans if x["name"] == "weather")["attributes"]["error"] == "SystemExit"
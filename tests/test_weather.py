@@ -1,10 +1,22 @@
+import json
+import threading
+import time
 from unittest.mock import patch
 
 import pytest
-from httpx import HTTPStatusError, Request, Response
+from httpx import ConnectError, HTTPStatusError, Request, Response
 from rich._emoji_codes import EMOJI
 
-from weather_command._weather import WeatherIcons, get_current_weather, get_one_call_current_weather
+from weather_command._weather import (
+    WeatherIcons,
+    get_current_weather,
+    get_one_call_current_weather,
+    stream_daily_weather,
+    stream_hourly_weather,
+    wait_for_revalidations,
+    watch_weather,
+)
+from weather_command.models.weather import CurrentWeather
 
 
 @pytest.mark.parametrize(
@@ -24,7 +36,7 @@ def test_icons(icon):
 def test_current_weather_http_error_404(test_console, capfd):
     with pytest.raises(SystemExit):
         with patch(
-            "httpx.get",
+            "httpx.Client.get",
             return_value=Response(404, request=Request("get", url="https://test.com")),
         ):
             get_current_weather(url="https://test.com", console=test_console)
@@ -36,7 +48,7 @@ def test_current_weather_http_error_404(test_console, capfd):
 def test_get_current_weather_https_error(test_console):
     with pytest.raises(HTTPStatusError):
         with patch(
-            "httpx.get",
+            "httpx.Client.get",
             return_value=Response(500, request=Request("get", url="https://test.com")),
         ):
             get_current_weather(url="https://test.com", console=test_console)
@@ -46,7 +58,7 @@ def test_get_current_weather_validation_error(test_console, capfd):
     data = {"bad": None}
     with pytest.raises(SystemExit):
         with patch(
-            "httpx.get",
+            "httpx.Client.get",
             return_value=Response(200, request=Request("get", url="https://test.com"), json=data),
         ):
             get_current_weather(url="https://test.com", console=test_console)
@@ -58,7 +70,7 @@ def test_get_current_weather_validation_error(test_console, capfd):
 def test_one_call_current_weather_http_error_404(test_console, capfd):
     with pytest.raises(SystemExit):
         with patch(
-            "httpx.get",
+            "httpx.Client.get",
             return_value=Response(404, request=Request("get", url="https://test.com")),
         ):
             get_one_call_current_weather(url="https://test.com", console=test_console)
@@ -70,7 +82,7 @@ def test_one_call_current_weather_http_error_404(test_console, capfd):
 def test_get_one_callcurrent_weather_https_error(test_console):
     with pytest.raises(HTTPStatusError):
         with patch(
-            "httpx.get",
+            "httpx.Client.get",
             return_value=Response(500, request=Request("get", url="https://test.com")),
         ):
             get_one_call_current_weather(url="https://test.com", console=test_console)
@@ -80,10 +92,311 @@ def test_get_one_call_current_weather_validation_error(test_console, capfd):
     data = {"bad": None}
     with pytest.raises(SystemExit):
         with patch(
-            "httpx.get",
+            "httpx.Client.get",
             return_value=Response(200, request=Request("get", url="https://test.com"), json=data),
         ):
             get_one_call_current_weather(url="https://test.com", console=test_console)
 
     out, _ = capfd.readouterr()
     assert "Unable" in out
+
+
+@pytest.mark.parametrize(
+    "get_weather, response_fixture",
+    [
+        (get_current_weather, "mock_current_weather_response"),
+        (get_one_call_current_weather, "mock_one_call_weather_response"),
+    ],
+)
+def test_weather_cached(get_weather, response_fixture, test_console, request):
+    with patch(
+        "httpx.Client.get", return_value=request.getfixturevalue(response_fixture)
+    ) as mock_get:
+        first = get_weather(url="https://test.com?lat=1&lon=2&appid=a", console=test_console)
+        second = get_weather(url="https://test.com?lon=2&lat=1&appid=b", console=test_console)
+
+    assert mock_get.call_count == 1
+    assert first == second
+
+
+def test_weather_no_cache(mock_current_weather_response, test_console):
+    with patch("httpx.Client.get", return_value=mock_current_weather_response) as mock_get:
+        get_current_weather(url="https://test.com?q=a", console=test_console)
+        get_current_weather(url="https://test.com?q=a", console=test_console, no_cache=True)
+
+    assert mock_get.call_count == 2
+
+
+def test_weather_cache_keys_differ(mock_current_weather_response, test_console):
+    with patch("httpx.Client.get", return_value=mock_current_weather_response) as mock_get:
+        get_current_weather(url="https://test.com?q=a&units=metric", console=test_console)
+        get_current_weather(url="https://test.com?q=a&units=imperial", console=test_console)
+
+    assert mock_get.call_count == 2
+
+
+def test_weather_max_age(mock_current_weather_response, test_console):
+    with patch("httpx.Client.get", return_value=mock_current_weather_response) as mock_get:
+        get_current_weather(url="https://test.com?q=a", console=test_console)
+        with patch("time.time", return_value=time.time() + 30):
+            get_current_weather(url="https://test.com?q=a", console=test_console, max_age=60)
+            assert mock_get.call_count == 1
+            get_current_weather(url="https://test.com?q=a", console=test_console, max_age=10)
+
+    assert mock_get.call_count == 2
+
+
+def test_weather_stale_while_revalidate(
+    mock_current_weather_dict, mock_current_weather_response, test_console
+):
+    updated = {**mock_current_weather_dict, "name": "Updated"}
+    with patch("httpx.Client.get", return_value=mock_current_weather_response):
+        get_current_weather(url="https://test.com?q=a", console=test_console)
+
+    with patch(
+        "httpx.Client.get",
+        return_value=Response(200, request=Request("get", url="https://test.com"), json=updated),
+    ) as mock_get:
+        with patch("time.time", return_value=time.time() + 700):
+            stale = get_current_weather(url="https://test.com?q=a", console=test_console)
+        wait_for_revalidations()
+
+    assert stale.name == "Greensboro"
+    assert mock_get.call_count == 1
+
+    with patch("httpx.Client.get") as mock_get:
+        refreshed = get_current_weather(url="https://test.com?q=a", console=test_console)
+
+    assert refreshed.name == "Updated"
+    mock_get.assert_not_called()
+
+
+def test_weather_revalidated_once_from_threads(mock_current_weather_response, test_console):
+    with patch("httpx.Client.get", return_value=mock_current_weather_response):
+        get_current_weather(url="https://test.com?q=a", console=test_console)
+
+    def slow_get(*args, **kwargs):
+        time.sleep(0.2)
+        return mock_current_weather_response
+
+    with patch("httpx.Client.get", side_effect=slow_get) as mock_get:
+        with patch("time.time", return_value=time.time() + 700):
+            threads = [
+                threading.Thread(
+                    target=get_current_weather,
+                    kwargs={"url": "https://test.com?q=a", "console": test_console},
+                )
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        wait_for_revalidations()
+
+    assert mock_get.call_count == 1
+
+
+def test_weather_too_stale(mock_current_weather_response, test_console):
+    with patch("httpx.Client.get", return_value=mock_current_weather_response) as mock_get:
+        get_current_weather(url="https://test.com?q=a", console=test_console)
+        with patch("time.time", return_value=time.time() + 1300):
+            get_current_weather(url="https://test.com?q=a", console=test_console)
+
+    assert mock_get.call_count == 2
+
+
+def test_get_current_weather_transport_error(test_console, capfd):
+    with pytest.raises(SystemExit):
+        with patch("httpx.Client.get", side_effect=ConnectError("failed")):
+            get_current_weather(url="https://test.com", console=test_console)
+
+    out, _ = capfd.readouterr()
+    assert "request failed (ConnectError)" in out
+
+
+def test_one_call_weather_strict(mock_one_call_weather_dict, test_console, monkeypatch, capfd):
+    monkeypatch.setenv("WEATHER_COMMAND_STRICT", "1")
+    # Accepted by the records but not by the model.
+    mock_one_call_weather_dict["current"]["weather"][0]["icon"] = None
+    response = Response(
+        200, request=Request("get", url="https://test.com"), json=mock_one_call_weather_dict
+    )
+
+    with pytest.raises(SystemExit):
+        with patch("httpx.Client.get", return_value=response):
+            get_one_call_current_weather(url="https://test.com", console=test_console)
+
+    out, _ = capfd.readouterr()
+    assert "Unable" in out
+
+
+def test_watch_weather_content_hash(mock_current_weather_response):
+    get_if_changed = watch_weather("https://test.com?q=a", CurrentWeather)
+    with patch("httpx.Client.get", return_value=mock_current_weather_response) as mock_get:
+        first = get_if_changed()
+        second = get_if_changed()
+
+    assert first is not None
+    assert second is None
+    assert mock_get.call_count == 2
+
+
+def test_watch_weather_conditional(mock_current_weather_dict):
+    request = Request("get", url="https://test.com")
+    responses = [
+        Response(200, request=request, json=mock_current_weather_dict, headers={"etag": '"1"'}),
+        Response(304, request=request),
+    ]
+    get_if_changed = watch_weather("https://test.com?q=a", CurrentWeather)
+    with patch("httpx.Client.get", side_effect=responses) as mock_get:
+        assert get_if_changed() is not None
+        assert get_if_changed() is None
+
+    assert mock_get.call_args_list[0].kwargs["headers"] == {}
+    assert mock_get.call_args_list[1].kwargs["headers"] == {"if-none-match": '"1"'}
+
+
+def test_watch_weather_changed(mock_current_weather_dict, test_console):
+    request = Request("get", url="https://test.com")
+    changed = {**mock_current_weather_dict, "name": "Raleigh"}
+    responses = [
+        Response(200, request=request, json=mock_current_weather_dict),
+        Response(200, request=request, json=changed),
+    ]
+    get_if_changed = watch_weather("https://test.com?q=a", CurrentWeather)
+    with patch("httpx.Client.get", side_effect=responses):
+        get_if_changed()
+        weather = get_if_changed()
+
+    assert weather.name == "Raleigh"
+    with patch("httpx.Client.get") as mock_get:
+        cached = get_current_weather("https://test.com?q=a", test_console)
+
+    assert mock_get.call_count == 0
+    assert cached.name == "Raleigh"
+
+
+def test_watch_weather_unchanged_first_refresh(mock_current_weather_response, test_console):
+    with patch("httpx.Client.get", return_value=mock_current_weather_response):
+        get_current_weather("https://test.com?q=a", test_console)
+
+    get_if_changed = watch_weather("https://test.com?q=a", CurrentWeather)
+    with patch("httpx.Client.get", return_value=mock_current_weather_response) as mock_get:
+        assert get_if_changed() is None
+
+    assert mock_get.call_count == 1
+
+
+def test_watch_weather_unchanged_first_refresh_cached(mock_current_weather_response, test_console):
+    with patch("httpx.Client.get", return_value=mock_current_weather_response):
+        get_current_weather("https://test.com?q=a", test_console)
+        cached = get_current_weather("https://test.com?q=a", test_console)
+
+    get_if_changed = watch_weather("https://test.com?q=a", CurrentWeather)
+    with patch("httpx.Client.get", return_value=mock_current_weather_response):
+        assert get_if_changed() is None
+    assert cached.name == "Greensboro"
+
+
+def test_watch_weather_first_refresh_conditional(mock_current_weather_dict, test_console):
+    request = Request("get", url="https://test.com")
+    response = Response(
+        200, request=request, json=mock_current_weather_dict, headers={"etag": '"1"'}
+    )
+    with patch("httpx.Client.get", return_value=response):
+        get_current_weather("https://test.com?q=a", test_console)
+
+    get_if_changed = watch_weather("https://test.com?q=a", CurrentWeather)
+    with patch("httpx.Client.get", return_value=Response(304, request=request)) as mock_get:
+        assert get_if_changed() is None
+
+    assert mock_get.call_args.kwargs["headers"] == {"if-none-match": '"1"'}
+
+
+def test_watch_weather_other_url(mock_current_weather_response, test_console):
+    with patch("httpx.Client.get", return_value=mock_current_weather_response):
+        get_current_weather("https://test.com?q=b", test_console)
+
+    get_if_changed = watch_weather("https://test.com?q=a", CurrentWeather)
+    with patch("httpx.Client.get", return_value=mock_current_weather_response):
+        assert get_if_changed() is not None
+
+
+def test_watch_weather_error():
+    get_if_changed = watch_weather("https://test.com?q=a", CurrentWeather)
+    with pytest.raises(HTTPStatusError):
+        with patch(
+            "httpx.Client.get",
+            return_value=Response(500, request=Request("get", url="https://test.com")),
+        ):
+            get_if_changed()
+
+
+@pytest.mark.parametrize(
+    "stream_weather, key", [(stream_daily_weather, "daily"), (stream_hourly_weather, "hourly")]
+)
+def test_stream_weather(stream_weather, key, mock_one_call_weather_dict, test_console):
+    body = json.dumps(mock_one_call_weather_dict).encode()
+    url = "https://test.com?lat=1&lon=2"
+
+    def mock_send(request, **kwargs):
+        chunks = (body[i : i + 100] for i in range(0, len(body), 100))
+        return Response(200, request=request, content=chunks)
+
+    with patch("httpx.Client.send", side_effect=mock_send) as mock:
+        streamed = list(stream_weather(url, test_console))
+        cached = list(stream_weather(url, test_console))
+
+    expected = getattr(get_one_call_current_weather(url, test_console), key)
+    assert [x for _, x in streamed] == expected
+    assert {x for x, _ in streamed} == {mock_one_call_weather_dict["timezone_offset"]}
+    assert cached == streamed
+    assert mock.call_count == 1
+
+
+def test_stream_weather_offset_after_items(mock_one_call_weather_dict, test_console):
+    offset = mock_one_call_weather_dict.pop("timezone_offset")
+    mock_one_call_weather_dict["timezone_offset"] = offset
+    response = Response(
+        200, request=Request("get", url="https://test.com"), json=mock_one_call_weather_dict
+    )
+
+    with patch("httpx.Client.send", return_value=response):
+        streamed = list(stream_daily_weather("https://test.com", test_console))
+
+    assert len(streamed) == len(mock_one_call_weather_dict["daily"])
+    assert all(x == offset for x, _ in streamed)
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        Response(404, request=Request("get", url="https://test.com")),
+        Response(200, request=Request("get", url="https://test.com"), content=b'{"daily": ['),
+        Response(200, request=Request("get", url="https://test.com"), json={"daily": [{}]}),
+        Response(200, request=Request("get", url="https://test.com"), json={"daily": []}),
+    ],
+)
+def test_stream_weather_error(response, test_console, capfd):
+    with pytest.raises(SystemExit):
+        with patch("httpx.Client.send", return_value=response):
+            list(stream_daily_weather("https://test.com", test_console))
+
+    out, _ = capfd.readouterr()
+    assert "Unable" in out
+
+
+def test_stream_weather_strict(mock_one_call_weather_dict, test_console, monkeypatch, capfd):
+    monkeypatch.setenv("WEATHER_COMMAND_STRICT", "1")
+    mock_one_call_weather_dict["current"]["weather"][0]["icon"] = None
+    response = Response(
+        200, request=Request("get", url="https://test.com"), json=mock_one_call_weather_dict
+    )
+
+    with pytest.raises(SystemExit):
+        with patch("httpx.Client.get", return_value=response):
+            list(stream_hourly_weather("https://test.com", test_console))
+
+    out, _ = capfd.readouterr()
+    assert "Unable" in out
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import zlib
+from contextlib import closing
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+
+ARCHIVE_FILE = "responses.sqlite"
+
+_BUSY_TIMEOUT = 5.0
+
+# The body is stored decoded so these no longer describe it.
+_SKIPPED_HEADERS = {"connection", "content-encoding", "content-length", "transfer-encoding"}
+
+_archive: Archive | None = None
+
+
+class NotRecorded(httpx.TransportError):
+    """Raised when replaying a request that isn't in the archive."""
+
+
+class Archive:
+    """Raw upstream responses stored in SQLite so runs can be replayed offline.
+
+    Responses are keyed by the normalized request, the URL with its query parameters sorted and
+    the API key removed, so the same request made with a different key or parameter order is
+    found. Bodies are compressed with zlib. Replayed responses can be delayed by a fixed time or
+    by the time the original request took to simulate a real network.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        replay: bool,
+        latency: float | None = None,
+        recorded_latency: bool = False,
+    ) -> None:
+        self.path = directory / ARCHIVE_FILE
+        self.replay = replay
+        self.latency = latency
+        self.recorded_latency = recorded_latency
+
+    def record(self, request: httpx.Request, response: httpx.Response, elapsed: float) -> None:
+        """Stores the response to a request. Its body must already be read."""
+        headers = [(k, v) for k, v in response.headers.items() if k.lower() not in _SKIPPED_HEADERS]
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, status, headers, body, elapsed, recorded) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    request_key(request),
+                    response.status_code,
+                    json.dumps(headers),
+                    zlib.compress(response.content),
+                    elapsed,
+                    time.time(),
+                ),
+            )
+
+    def lookup(self, request: httpx.Request) -> tuple[httpx.Response, float]:
+        """Returns the recorded response for the request and how long to wait before using it.
+
+        Raises NotRecorded if the request isn't in the archive.
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT status, headers, body, elapsed FROM responses WHERE key = ?",
+                (request_key(request),),
+            ).fetchone()
+
+        if row is None:
+            raise NotRecorded(f"No recorded response for {request_key(request)}", request=request)
+
+        status, headers, body, elapsed = row
+        response = httpx.Response(
+            status, headers=json.loads(headers), content=zlib.decompress(body), request=request
+        )
+        if self.recorded_latency:
+            return response, elapsed
+
+        return response, self.latency or 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=_BUSY_TIMEOUT)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, status INTEGER NOT NULL, "
+            "headers TEXT NOT NULL, body BLOB NOT NULL, elapsed REAL NOT NULL, "
+            "recorded REAL NOT NULL)"
+        )
+        return conn
+
+
+def get_archive() -> Archive | None:
+    return _archive
+
+
+def request_key(request: httpx.Request) -> str:
+    url = urlsplit(str(request.url))
+    params = sorted((k, v) for k, v in parse_qsl(url.query, keep_blank_values=True) if k != "appid")
+    return f"{request.method} {urlunsplit(url._replace(query=urlencode(params), fragment=''))}"
+
+
+def use_archive(archive: Archive | None) -> None:
+    """Records or replays all requests made through _http with the archive, or stops if None.
+
+    While recording, the local caches are kept in the archive directory so anything that isn't
+    cached there is requested and recorded. While replaying, an empty temporary cache is used so
+    every request comes from the archive and runs are reproducible.
+    """
+    global _archive
+
+    _archive = archive
+    if archive is None:
+        return
+
+    if archive.replay:
+        cache_dir = tempfile.mkdtemp(prefix="weather-command-replay-")
+        atexit.register(shutil.rmtree, cache_dir, ignore_errors=True)
+    else:
+        cache_dir = str(archive.path.parent / "cache")
+
+    os.environ["WEATHER_COMMAND_CACHE_DIR"] = cache_dir
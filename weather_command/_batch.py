@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Iterable, NamedTuple
+
+import httpx
+from rich.console import Console
+from rich.table import Table
+
+from weather_command import _http
+from weather_command._builder import (
+    build_url,
+    combined_table,
+    current_weather_all_columns,
+    current_weather_all_row,
+    current_weather_temp_columns,
+    current_weather_temp_row,
+    daily_all_columns,
+    daily_all_rows,
+    daily_temp_only_columns,
+    daily_temp_only_rows,
+    hourly_all_columns,
+    hourly_all_rows,
+    hourly_temp_only_columns,
+    hourly_temp_only_rows,
+)
+from weather_command._config import DEFAULT_CONCURRENCY
+from weather_command._location import get_location_details_async
+from weather_command._timings import span
+from weather_command._weather import get_weather_async
+from weather_command.errors import describe_error
+from weather_command.models.location import Location
+from weather_command.models.weather import CurrentWeather, OneCallWeather
+
+
+class BatchLocation(NamedTuple):
+    how: str
+    city_zip: str
+    state_code: str | None = None
+    country_code: str | None = None
+
+    @property
+    def name(self) -> str:
+        return ", ".join(x for x in (self.city_zip, self.state_code, self.country_code) if x)
+
+
+class BatchResult(NamedTuple):
+    batch_location: BatchLocation
+    location: Location | None
+    weather: CurrentWeather | OneCallWeather
+
+
+def parse_batch_location(
+    value: str,
+    how: str,
+    *,
+    state_code: str | None = None,
+    country_code: str | None = None,
+) -> BatchLocation:
+    """Parses a location in the form CITY_ZIP[,STATE_CODE[,COUNTRY_CODE]].
+
+    State and country codes that are not included in the value fall back to the ones passed in.
+    """
+    parts = [x.strip() for x in value.split(",", 2)]
+    parts += [""] * (3 - len(parts))
+    city_zip, state, country = parts
+
+    return BatchLocation(
+        how=how,
+        city_zip=city_zip,
+        state_code=state or state_code,
+        country_code=country or country_code,
+    )
+
+
+def show_batch(
+    console: Console,
+    locations: Iterable[BatchLocation],
+    *,
+    forecast_type: str = "current",
+    units: str = "metric",
+    am_pm: bool = False,
+    temp_only: bool = False,
+    terminal_width: int | None = None,
+    max_age: int | None = None,
+    no_cache: bool = False,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> None:
+    if terminal_width:
+        console.width = terminal_width
+
+    batch_locations = list(locations)
+
+    with console.status("Getting weather..."):
+        results = asyncio.run(
+            get_batch_weather(
+                batch_locations,
+                forecast_type=forecast_type,
+                units=units,
+                max_age=max_age,
+                no_cache=no_cache,
+                concurrency=concurrency,
+            )
+        )
+
+    found = []
+    for batch_location, result in zip(batch_locations, results):
+        if isinstance(result, BatchResult):
+            found.append(result)
+        else:
+            console.print(
+                f"[red]Unable to get weather data for {batch_location.name}: {describe_error(result)}[/red]"
+            )
+
+    if found:
+        with span("render"):
+            console.print(_batch_table(found, forecast_type, units, am_pm, temp_only))
+
+
+async def get_batch_weather(
+    locations: list[BatchLocation],
+    *,
+    forecast_type: str = "current",
+    units: str = "metric",
+    max_age: int | None = None,
+    no_cache: bool = False,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> list[BatchResult | BaseException]:
+    """Gets the weather for all locations at the same time.
+
+    At most `concurrency` requests are in flight at once. The results are in the same order as the
+    locations and a failed location's exception is returned in its place.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with _http.new_async_client() as client:
+        return await asyncio.gather(
+            *(
+                _get_weather(
+                    client,
+                    semaphore,
+                    location,
+                    forecast_type=forecast_type,
+                    units=units,
+                    max_age=max_age,
+                    no_cache=no_cache,
+                )
+                for location in locations
+            ),
+            return_exceptions=True,
+        )
+
+
+async def _get_weather(
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    batch_location: BatchLocation,
+    *,
+    forecast_type: str,
+    units: str,
+    max_age: int | None,
+    no_cache: bool,
+) -> BatchResult:
+    if forecast_type == "current":
+        url = build_url(
+            forecast_type="current",
+            how=batch_location.how,
+            city_zip=batch_location.city_zip,
+            units=units,
+            state_code=batch_location.state_code,
+            country_code=batch_location.country_code,
+        )
+        async with semaphore:
+            current_weather = await get_weather_async(
+                client, url, CurrentWeather, max_age=max_age, no_cache=no_cache
+            )
+
+        return BatchResult(batch_location=batch_location, location=None, weather=current_weather)
+
+    async with semaphore:
+        location = await get_location_details_async(
+            client,
+            how=batch_location.how,
+            city_zip=batch_location.city_zip,
+            state=batch_location.state_code,
+            country=batch_location.country_code,
+        )
+
+    url = build_url(forecast_type=forecast_type, units=units, lon=location.lon, lat=location.lat)
+    async with semaphore:
+        weather = await get_weather_async(
+            client, url, OneCallWeather, max_age=max_age, no_cache=no_cache
+        )
+
+    return BatchResult(batch_location=batch_location, location=location, weather=weather)
+
+
+def _batch_table(
+    results: list[BatchResult], forecast_type: str, units: str, am_pm: bool, temp_only: bool
+) -> Table:
+    if forecast_type == "current":
+        current_rows: list[tuple[str, list[str]]] = []
+        for result in results:
+            assert isinstance(result.weather, CurrentWeather)
+            row = (
+                current_weather_temp_row(result.weather)
+                if temp_only
+                else current_weather_all_row(result.weather, units, am_pm)
+            )
+            current_rows.append((result.weather.name, row))
+
+        columns = (
+            current_weather_temp_columns(units) if temp_only else current_weather_all_columns(units)
+        )
+        return combined_table("Current weather", columns, current_rows)
+
+    rows: list[tuple[str, list[str]]] = []
+    for result in results:
+        assert isinstance(result.weather, OneCallWeather)
+        assert result.location is not None
+        if forecast_type == "daily":
+            location_rows = (
+                daily_temp_only_rows(result.weather, am_pm)
+                if temp_only
+                else daily_all_rows(result.weather, units, am_pm)
+            )
+        else:
+            location_rows = (
+                hourly_temp_only_rows(result.weather, am_pm)
+                if temp_only
+                else hourly_all_rows(result.weather, units, am_pm)
+            )
+        rows.extend((result.location.display_name, row) for row in location_rows)
+
+    if forecast_type == "daily":
+        columns = daily_temp_only_columns(units) if temp_only else daily_all_columns(units)
+        title = "Daily weather"
+    else:
+        columns = hourly_temp_only_columns(units) if temp_only else hourly_all_columns(units)
+        title = "Hourly weather"
+
+    return combined_table(title, columns, rows, show_lines=True)
@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+
+def encode_text(value: str, size: int) -> bytes:
+    """Encodes the text for a fixed size field, struct pads it with null bytes when it is shorter.
+
+    Text that is too long is cut at a character boundary so it doesn't end in half of a character.
+    """
+    return value.encode()[:size].decode("utf-8", "ignore").encode()
+
+
+def decode_text(value: bytes) -> str:
+    return value.rstrip(b"\0").decode()
@@ -1,19 +1,123 @@
 from __future__ import annotations
 
+import time
 from datetime import datetime, timedelta
+from typing import Callable, Iterable, Iterator, Type, TypeVar
 
-from rich.console import Console
+from rich.console import Console, Group, RenderableType
 from rich.style import Style
 from rich.table import Table
 
+from weather_command._columns import (
+    SUMMARY_FIELDS,
+    DailySummary,
+    convert_summary,
+    format_percent,
+    format_precip,
+    format_pressure,
+    format_rounded,
+    format_values,
+    format_wind,
+    get_daily_columns,
+    get_daily_temp_columns,
+    get_hourly_columns,
+    get_hourly_temp_columns,
+    hpa_to_in,
+    kph_to_mph,
+    mm_to_in,
+    mps_to_mph,
+)
 from weather_command._config import WEATHER_BASE_URL, apppend_api_key
+from weather_command._history import HistoryLocation, Observation
 from weather_command._location import get_location_details
-from weather_command._weather import WeatherIcons, get_current_weather, get_one_call_current_weather
+from weather_command._timings import flush as flush_spans
+from weather_command._timings import span
+from weather_command._weather import (
+    WeatherIcons,
+    WeatherModel,
+    get_current_weather,
+    get_one_call_current_weather,
+    get_one_call_temp_weather,
+    watch_weather,
+)
+from weather_command.errors import RateLimitExceeded
 from weather_command.models.location import Location
+from weather_command.models.records import OneCallRecord, OneCallTempRecord
 from weather_command.models.weather import CurrentWeather, OneCallWeather
 
 HEADER_ROW_STYLE = Style(color="sky_blue2", bold=True)
 
+ONE_CALL_PARTS = ("current", "minutely", "hourly", "daily", "alerts")
+
+# The parts of the one call response each forecast type reads. The rest are excluded from the
+# request so they aren't sent or parsed.
+ONE_CALL_VIEWS = {
+    "all": ("current", "hourly", "daily"),
+    "daily": ("daily",),
+    "hourly": ("hourly",),
+}
+
+T = TypeVar("T")
+
+
+def show_all(
+    console: Console,
+    how: str,
+    city_zip: str,
+    *,
+    state_code: str | None = None,
+    country_code: str | None = None,
+    units: str = "metric",
+    am_pm: bool = False,
+    temp_only: bool = False,
+    terminal_width: int | None = None,
+    max_age: int | None = None,
+    no_cache: bool = False,
+    watch: float | None = None,
+) -> None:
+    """Shows the current, hourly, and daily weather from a single one call request."""
+    if terminal_width:
+        console.width = terminal_width
+
+    with console.status("Getting weather..."):
+        location = get_location_details(
+            how=how, city_zip=city_zip, state=state_code, country=country_code, console=console
+        )
+        url = build_url(forecast_type="all", units=units, lon=location.lon, lat=location.lat)
+        if not temp_only:
+            weather = get_one_call_current_weather(url, console, max_age=max_age, no_cache=no_cache)
+        else:
+            temp_weather = get_one_call_temp_weather(
+                url, console, max_age=max_age, no_cache=no_cache
+            )
+
+    if not temp_only:
+        _show(
+            console,
+            weather,
+            lambda x: Group(
+                _one_call_current_all(x, units, am_pm, location),
+                _hourly_all(x, units, am_pm, location),
+                _daily_all(x, units, am_pm, location),
+            ),
+            url,
+            OneCallRecord,
+            watch,
+        )
+    else:
+        _show(
+            console,
+            temp_weather,
+            lambda x: Group(
+                _one_call_current_temp(x, units, location),
+                _hourly_temp_only(x, units, am_pm, location),
+                _daily_temp_only(x, units, am_pm, location),
+            ),
+            url,
+            OneCallTempRecord,
+            watch,
+        )
+
 
 def show_current(
     console: Console,
@@ -26,8 +130,11 @@ def show_current(
     am_pm: bool = False,
     temp_only: bool = False,
     terminal_width: int | None = None,
+    max_age: int | None = None,
+    no_cache: bool = False,
+    watch: float | None = None,
 ) -> None:
-    url = _build_url(
+    url = build_url(
         forecast_type="current",
         how=how,
         city_zip=city_zip,
@@ -40,12 +147,19 @@ def show_current(
         console.width = terminal_width
 
     with console.status("Getting weather..."):
-        current_weather = get_current_weather(url, console)
+        current_weather = get_current_weather(url, console, max_age=max_age, no_cache=no_cache)
 
-    if not temp_only:
-        console.print(_current_weather_all(current_weather, units, am_pm))
+    def render(current_weather: CurrentWeather) -> Table:
+        if not temp_only:
+            return _current_weather_all(current_weather, units, am_pm)
+        else:
+            return _current_weather_temp(current_weather, units)
+
+    if watch:
+        _watch(console, current_weather, render, watch_weather(url, CurrentWeather), watch)
     else:
-        console.print(_current_weather_temp(current_weather, units))
+        with span("render"):
+            console.print(render(current_weather))
 
 
 def show_daily(
@@ -59,6 +173,9 @@ def show_daily(
     am_pm: bool = False,
     temp_only: bool = False,
     terminal_width: int | None = None,
+    max_age: int | None = None,
+    no_cache: bool = False,
+    watch: float | None = None,
 ) -> None:
     if terminal_width:
         console.width = terminal_width
@@ -67,12 +184,33 @@ def show_daily(
         location = get_location_details(
             how=how, city_zip=city_zip, state=state_code, country=country_code, console=console
         )
-        url = _build_url(forecast_type="daily", units=units, lon=location.lon, lat=location.lat)
-        weather = get_one_call_current_weather(url, console)
+        url = build_url(forecast_type="daily", units=units, lon=location.lon, lat=location.lat)
         if not temp_only:
-            console.print(_daily_all(weather, units, am_pm, location))
+            weather = get_one_call_current_weather(url, console, max_age=max_age, no_cache=no_cache)
         else:
-            console.print(_daily_temp_only(weather, units, am_pm, location))
+            # Only the temperatures are decoded, the rest of each day is skipped.
+            temp_weather = get_one_call_temp_weather(
+                url, console, max_age=max_age, no_cache=no_cache
+            )
+
+    if not temp_only:
+        _show(
+            console,
+            weather,
+            lambda x: _daily_all(x, units, am_pm, location),
+            url,
+            OneCallRecord,
+            watch,
+        )
+    else:
+        _show(
+            console,
+            temp_weather,
+            lambda x: _daily_temp_only(x, units, am_pm, location),
+            url,
+            OneCallTempRecord,
+            watch,
+        )
 
 
 def show_hourly(
@@ -86,6 +224,9 @@ def show_hourly(
     am_pm: bool = False,
     temp_only: bool = False,
     terminal_width: int | None = None,
+    max_age: int | None = None,
+    no_cache: bool = False,
+    watch: float | None = None,
 ) -> None:
     if terminal_width:
         console.width = terminal_width
@@ -94,15 +235,123 @@ def show_hourly(
         location = get_location_details(
             how=how, city_zip=city_zip, state=state_code, country=country_code, console=console
         )
-        url = _build_url(forecast_type="hourly", units=units, lon=location.lon, lat=location.lat)
-        weather = get_one_call_current_weather(url, console)
+        url = build_url(forecast_type="hourly", units=units, lon=location.lon, lat=location.lat)
         if not temp_only:
-            console.print(_hourly_all(weather, units, am_pm, location))
+            weather = get_one_call_current_weather(url, console, max_age=max_age, no_cache=no_cache)
         else:
-            console.print(_hourly_temp_only(weather, units, am_pm, location))
+            temp_weather = get_one_call_temp_weather(
+                url, console, max_age=max_age, no_cache=no_cache
+            )
+
+    if not temp_only:
+        _show(
+            console,
+            weather,
+            lambda x: _hourly_all(x, units, am_pm, location),
+            url,
+            OneCallRecord,
+            watch,
+        )
+    else:
+        _show(
+            console,
+            temp_weather,
+            lambda x: _hourly_temp_only(x, units, am_pm, location),
+            url,
+            OneCallTempRecord,
+            watch,
+        )
+
+
+def show_history(
+    console: Console,
+    locations: list[HistoryLocation],
+    observations: dict[int, list[Observation]],
+    *,
+    units: str = "metric",
+    am_pm: bool = False,
+    terminal_width: int | None = None,
+) -> None:
+    """Shows a table of the saved observations and forecasts for each location."""
+    if terminal_width:
+        console.width = terminal_width
+
+    with span("render"):
+        for location in locations:
+            console.print(_history_table(location, observations.get(location.id, []), units, am_pm))
+
 
+def show_history_locations(
+    console: Console, locations: list[HistoryLocation], terminal_width: int | None = None
+) -> None:
+    if terminal_width:
+        console.width = terminal_width
 
-def _build_url(
+    table = Table(title="Locations with history", header_style=HEADER_ROW_STYLE)
+    _add_columns(
+        table, ["Location :round_pushpin:", "Latitude", "Longitude", "Records", "First", "Last"]
+    )
+    for location in locations:
+        table.add_row(
+            location.name,
+            str(location.lat),
+            str(location.lon),
+            str(location.records),
+            *(
+                _format_date_time(False, x, location.timezone_offset) if x else ""
+                for x in (location.first, location.last)
+            ),
+        )
+
+    console.print(table)
+
+
+def show_daily_summary(
+    console: Console,
+    summary: DailySummary,
+    location_names: dict[int, str],
+    statistics: list[str],
+    *,
+    units: str = "metric",
+    terminal_width: int | None = None,
+) -> None:
+    """Shows a table for each summary field with a row for each location and day."""
+    if terminal_width:
+        console.width = terminal_width
+
+    with span("render"):
+        values = convert_summary(summary, units)
+        for field in SUMMARY_FIELDS:
+            console.print(
+                combined_table(
+                    _summary_title(field, units),
+                    ["Date :date:", "Samples", *(x.capitalize() for x in statistics)],
+                    (
+                        (
+                            location_names.get(location_id, str(location_id)),
+                            [
+                                day.isoformat(),
+                                str(samples),
+                                *(
+                                    _format_summary_value(values[f"{field}_{x}"][i])
+                                    for x in statistics
+                                ),
+                            ],
+                        )
+                        for i, (location_id, day, samples) in enumerate(
+                            zip(summary.location_id, summary.date, summary.samples)
+                        )
+                    ),
+                )
+            )
+
+
+def _add_columns(table: Table, columns: list[str]) -> None:
+    for column in columns:
+        table.add_column(column)
+
+
+def build_url(
     forecast_type: str,
     units: str,
     how: str | None = None,
@@ -126,11 +375,59 @@ def _build_url(
     else:
         url = f"{WEATHER_BASE_URL}/onecall?lat={lat}&lon={lon}&units={units}"
 
+        if forecast_type in ONE_CALL_VIEWS:
+            exclude = ",".join(x for x in ONE_CALL_PARTS if x not in ONE_CALL_VIEWS[forecast_type])
+            url = f"{url}&exclude={exclude}"
+
     return apppend_api_key(url)
 
 
+def combined_table(
+    title: str,
+    columns: list[str],
+    rows: Iterable[tuple[str, list[str]]],
+    show_lines: bool = False,
+) -> Table:
+    """Builds one table for many locations with the location name as the first column."""
+    table = Table(title=title, header_style=HEADER_ROW_STYLE, show_lines=show_lines)
+    _add_columns(table, ["Location :round_pushpin:", *columns])
+
+    for location_name, row in rows:
+        table.add_row(location_name, *row)
+
+    return table
+
+
 def _current_weather_all(current_weather: CurrentWeather, units: str, am_pm: bool) -> Table:
+    table = Table(
+        title=f"Current weather for {current_weather.name}", header_style=HEADER_ROW_STYLE
+    )
+    _add_columns(table, current_weather_all_columns(units))
+    table.add_row(*current_weather_all_row(current_weather, units, am_pm))
+
+    return table
+
+
+def current_weather_all_columns(units: str) -> list[str]:
     precip_unit, _, speed_units, temp_units = _get_units(units)
+
+    return [
+        f"Temperature ({temp_units}) :thermometer:",
+        f"Feels Like ({temp_units}) :thermometer:",
+        "Humidity",
+        "Conditions",
+        f"Wind Speed ({speed_units})",
+        f"Wind Gusts ({speed_units})",
+        f"Rain 1 Hour ({precip_unit}) :cloud_with_rain:",
+        f"Rain 3 Hour ({precip_unit}) :cloud_with_rain:",
+        f"Snow 1 Hour ({precip_unit}) :snowflake:",
+        f"Snow 3 Hour ({precip_unit}) :snowflake:",
+        "Sunrise :sunrise:",
+        "Sunset :sunset:",
+    ]
+
+
+def current_weather_all_row(current_weather: CurrentWeather, units: str, am_pm: bool) -> list[str]:
     conditions = current_weather.weather[0].description
     weather_icon = WeatherIcons.get_icon(conditions)
     if weather_icon:
@@ -139,22 +436,6 @@ def _current_weather_all(current_weather: CurrentWeather, units: str, am_pm: boo
         am_pm, current_weather.sys.sunrise, current_weather.sys.sunset, current_weather.timezone
     )
 
-    table = Table(
-        title=f"Current weather for {current_weather.name}", header_style=HEADER_ROW_STYLE
-    )
-    table.add_column(f"Temperature ({temp_units}) :thermometer:")
-    table.add_column(f"Feels Like ({temp_units}) :thermometer:")
-    table.add_column("Humidity")
-    table.add_column("Conditions")
-    table.add_column(f"Wind Speed ({speed_units})")
-    table.add_column(f"Wind Gusts ({speed_units})")
-    table.add_column(f"Rain 1 Hour ({precip_unit}) :cloud_with_rain:")
-    table.add_column(f"Rain 3 Hour ({precip_unit}) :cloud_with_rain:")
-    table.add_column(f"Snow 1 Hour ({precip_unit}) :snowflake:")
-    table.add_column(f"Snow 3 Hour ({precip_unit}) :snowflake:")
-    table.add_column("Sunrise :sunrise:")
-    table.add_column("Sunset :sunset:")
-
     if current_weather.rain:
         rain_one_hour = _format_precip(current_weather.rain.one_hour, units)
         rain_three_hour = _format_precip(current_weather.rain.three_hour, units)
@@ -176,7 +457,7 @@ def _current_weather_all(current_weather: CurrentWeather, units: str, am_pm: boo
         wind = "0"
         gusts = "0"
 
-    table.add_row(
+    return [
         str(round(current_weather.main.temp)),
         str(round(current_weather.main.feels_like)),
         f"{current_weather.main.humidity}%" if current_weather.main.humidity else "0%",
@@ -189,98 +470,139 @@ def _current_weather_all(current_weather: CurrentWeather, units: str, am_pm: boo
         snow_three_hour,
         sunrise,
         sunset,
+    ]
+
+
+def _current_weather_temp(current_weather: CurrentWeather, units: str) -> Table:
+    table = Table(
+        title=f"Current weather for {current_weather.name}", header_style=HEADER_ROW_STYLE
     )
+    _add_columns(table, current_weather_temp_columns(units))
+    table.add_row(*current_weather_temp_row(current_weather))
 
     return table
 
 
-def _current_weather_temp(current_weather: CurrentWeather, units: str) -> Table:
+def current_weather_temp_columns(units: str) -> list[str]:
     _, _, _, temp_units = _get_units(units)
 
-    table = Table(
-        title=f"Current weather for {current_weather.name}", header_style=HEADER_ROW_STYLE
-    )
-    table.add_column(f"Temperature ({temp_units}) :thermometer:")
-    table.add_column(f"Feels Like ({temp_units}) :thermometer:")
-    table.add_row(
+    return [
+        f"Temperature ({temp_units}) :thermometer:",
+        f"Feels Like ({temp_units}) :thermometer:",
+    ]
+
+
+def current_weather_temp_row(current_weather: CurrentWeather) -> list[str]:
+    return [
         str(round(current_weather.main.temp)),
         str(round(current_weather.main.feels_like)),
-    )
-
-    return table
+    ]
 
 
-def _daily_all(weather: OneCallWeather, units: str, am_pm: bool, location: Location) -> Table:
-    _, pressure_units, speed_units, temp_units = _get_units(units)
+def _daily_all(
+    weather: OneCallWeather | OneCallRecord, units: str, am_pm: bool, location: Location
+) -> Table:
     table = Table(
         title=f"Hourly weather for {location.display_name}",
         header_style=HEADER_ROW_STYLE,
         show_lines=True,
     )
-    table.add_column("Date/Time :date:")
-    table.add_column(f"Low ({temp_units}) :thermometer:")
-    table.add_column(f"High ({temp_units}) :thermometer:")
-    table.add_column("Humidity")
-    table.add_column(f"Dew Point ({temp_units})")
-    table.add_column(f"Pressure {pressure_units}")
-    table.add_column("UVI")
-    table.add_column("Clouds")
-    table.add_column(f"Wind ({speed_units})")
-    table.add_column(f"Wind Gusts {speed_units}")
-    table.add_column("Sunrise :sunrise:")
-    table.add_column("Sunset :sunset:")
-
-    for daily in weather.daily:
-        dt = _format_date_time(am_pm, daily.dt, weather.timezone_offset, "daily")
-        sunrise, sunset = _format_sunrise_sunset(
-            am_pm, daily.sunrise, daily.sunset, weather.timezone_offset
-        )
-
-        wind = _format_wind(daily.wind_speed, units)
-        gusts = _format_wind(daily.wind_gust, units)
-        pressure = _format_pressure(daily.pressure, units)
+    _add_columns(table, daily_all_columns(units))
 
-        table.add_row(
-            dt,
-            str(round(daily.temp.min)),
-            str(round(daily.temp.max)),
-            f"{daily.humidity}%",
-            str(round(daily.dew_point)),
-            pressure,
-            str(daily.uvi),
-            f"{daily.clouds}%",
-            wind,
-            gusts,
-            sunrise,
-            sunset,
-        )
+    for row in daily_all_rows(weather, units, am_pm):
+        table.add_row(*row)
 
     return table
 
 
-def _daily_temp_only(weather: OneCallWeather, units: str, am_pm: bool, location: Location) -> Table:
-    _, _, _, temp_units = _get_units(units)
+def daily_all_columns(units: str) -> list[str]:
+    _, pressure_units, speed_units, temp_units = _get_units(units)
+
+    return [
+        "Date/Time :date:",
+        f"Low ({temp_units}) :thermometer:",
+        f"High ({temp_units}) :thermometer:",
+        "Humidity",
+        f"Dew Point ({temp_units})",
+        f"Pressure {pressure_units}",
+        "UVI",
+        "Clouds",
+        f"Wind ({speed_units})",
+        f"Wind Gusts {speed_units}",
+        "Sunrise :sunrise:",
+        "Sunset :sunset:",
+    ]
+
+
+def daily_all_rows(
+    weather: OneCallWeather | OneCallRecord, units: str, am_pm: bool
+) -> Iterator[list[str]]:
+    columns = get_daily_columns(weather.daily)
+    sunrise_sunset = [
+        _format_sunrise_sunset(am_pm, sunrise, sunset, weather.timezone_offset)
+        for sunrise, sunset in zip(columns.sunrise, columns.sunset)
+    ]
+
+    for row, (sunrise, sunset) in zip(
+        zip(
+            (_format_date_time(am_pm, x, weather.timezone_offset, "daily") for x in columns.dt),
+            format_rounded(columns.temp_min),
+            format_rounded(columns.temp_max),
+            format_percent(columns.humidity),
+            format_rounded(columns.dew_point),
+            format_pressure(columns.pressure, units),
+            format_values(columns.uvi),
+            format_percent(columns.clouds),
+            format_wind(columns.wind_speed, units),
+            format_wind(columns.wind_gust, units),
+        ),
+        sunrise_sunset,
+    ):
+        yield [*row, sunrise, sunset]
+
+
+def _daily_temp_only(
+    weather: OneCallWeather | OneCallRecord | OneCallTempRecord,
+    units: str,
+    am_pm: bool,
+    location: Location,
+) -> Table:
     table = Table(
         title=f"Hourly weather for {location.display_name}",
         header_style=HEADER_ROW_STYLE,
         show_lines=True,
     )
-    table.add_column("Date/Time :date:")
-    table.add_column(f"Low ({temp_units}) :thermometer:")
-    table.add_column(f"High ({temp_units}) :thermometer:")
+    _add_columns(table, daily_temp_only_columns(units))
 
-    for daily in weather.daily:
-        dt = _format_date_time(am_pm, daily.dt, weather.timezone_offset, "daily")
-
-        table.add_row(
-            dt,
-            str(round(daily.temp.min)),
-            str(round(daily.temp.max)),
-        )
+    for row in daily_temp_only_rows(weather, am_pm):
+        table.add_row(*row)
 
     return table
 
 
+def daily_temp_only_columns(units: str) -> list[str]:
+    _, _, _, temp_units = _get_units(units)
+
+    return [
+        "Date/Time :date:",
+        f"Low ({temp_units}) :thermometer:",
+        f"High ({temp_units}) :thermometer:",
+    ]
+
+
+def daily_temp_only_rows(
+    weather: OneCallWeather | OneCallRecord | OneCallTempRecord, am_pm: bool
+) -> Iterator[list[str]]:
+    columns = get_daily_temp_columns(weather.daily)
+
+    for row in zip(
+        (_format_date_time(am_pm, x, weather.timezone_offset, "daily") for x in columns.dt),
+        format_rounded(columns.temp_min),
+        format_rounded(columns.temp_max),
+    ):
+        yield list(row)
+
+
 def _format_date_time(
     am_pm: bool, dt: datetime, timezone: int, forecast_type: str | None = None
 ) -> str:
@@ -310,21 +632,25 @@ def _format_precip(precip_amount: float | None, units: str) -> str:
     if not precip_amount:
         return "0"
 
-    return str(_mm_to_in(precip_amount)) if units == "imperial" else str(precip_amount)
+    return str(mm_to_in(precip_amount)) if units == "imperial" else str(precip_amount)
 
 
 def _format_pressure(pressure: int | None, units: str) -> str:
     if not pressure:
         return "0"
 
-    return str(_hpa_to_in(pressure)) if units == "imperial" else str(pressure)
+    return str(hpa_to_in(pressure)) if units == "imperial" else str(pressure)
 
 
 def _format_wind(speed: float | None, units: str) -> str:
     if not speed:
         return "0"
 
-    return str(round(_kph_to_mph(speed))) if units == "imperial" else str(round(speed))
+    return str(round(kph_to_mph(speed))) if units == "imperial" else str(round(speed))
+
+
+def _format_summary_value(value: float | None) -> str:
+    return "" if value is None else str(round(value, 1))
 
 
 def _format_sunrise_sunset(
@@ -356,89 +682,299 @@ def _get_units(units: str) -> tuple[str, str, str, str]:
     return precip_units, pressure_units, speed_units, temp_units
 
 
-def _hourly_all(weather: OneCallWeather, units: str, am_pm: bool, location: Location) -> Table:
+def _history_columns(units: str) -> list[str]:
     precip_units, pressure_units, speed_units, temp_units = _get_units(units)
+
+    return [
+        "Date/Time :date:",
+        "Type",
+        f"Temperature ({temp_units}) :thermometer:",
+        f"Feels Like ({temp_units}) :thermometer:",
+        f"Low ({temp_units})",
+        f"High ({temp_units})",
+        "Humidity",
+        f"Pressure {pressure_units}",
+        f"Wind ({speed_units})",
+        "Clouds",
+        f"Precip ({precip_units})",
+        "Conditions",
+    ]
+
+
+def _history_row(observation: Observation, units: str, am_pm: bool, timezone: int) -> list[str]:
+    def temp(value: float | None) -> str:
+        if value is None:
+            return ""
+        return str(round(_c_to_f(value) if units == "imperial" else value))
+
+    def wind(value: float | None) -> str:
+        # Stored in metres per second, the speed OpenWeather sends for metric.
+        if not value:
+            return "0"
+        return str(round(mps_to_mph(value) if units == "imperial" else value))
+
+    def percent(value: float | None) -> str:
+        return "" if value is None else f"{value}%"
+
+    return [
+        _format_date_time(am_pm, observation.dt, timezone, observation.kind),
+        observation.kind,
+        temp(observation.temp),
+        temp(observation.feels_like),
+        temp(observation.temp_min),
+        temp(observation.temp_max),
+        percent(observation.humidity),
+        _format_pressure(observation.pressure, units),
+        wind(observation.wind_speed),
+        percent(observation.clouds),
+        _format_precip(observation.precip, units),
+        observation.conditions or "",
+    ]
+
+
+def _history_table(
+    location: HistoryLocation, observations: list[Observation], units: str, am_pm: bool
+) -> Table:
+    table = Table(title=f"History for {location.name}", header_style=HEADER_ROW_STYLE)
+    _add_columns(table, _history_columns(units))
+
+    for observation in observations:
+        table.add_row(*_history_row(observation, units, am_pm, location.timezone_offset))
+
+    return table
+
+
+def _hourly_all(
+    weather: OneCallWeather | OneCallRecord, units: str, am_pm: bool, location: Location
+) -> Table:
     table = Table(
         title=f"Hourly weather for {location.display_name}",
         header_style=HEADER_ROW_STYLE,
         show_lines=True,
     )
-    table.add_column("Date/Time :date:")
-    table.add_column(f"Temperature ({temp_units}) :thermometer:")
-    table.add_column(f"Feels Like ({temp_units}) :thermometer:")
-    table.add_column("Humidity")
-    table.add_column(f"Dew Point ({temp_units})")
-    table.add_column(f"Pressure {pressure_units}")
-    table.add_column("UVI")
-    table.add_column("Clouds")
-    table.add_column(f"Wind ({speed_units})")
-    table.add_column(f"Wind Gusts {speed_units}")
-    table.add_column(f"Rain ({precip_units}) :cloud_with_rain:")
-    table.add_column(f"Snow ({precip_units}) :snowflake:")
-
-    for hourly in weather.hourly:
-        dt = _format_date_time(am_pm, hourly.dt, weather.timezone_offset)
-        rain = _format_precip(hourly.rain.one_hour, units) if hourly.rain else "0"
-        snow = _format_precip(hourly.snow.one_hour, units) if hourly.snow else "0"
-        wind = _format_wind(hourly.wind_speed, units)
-        gusts = _format_wind(hourly.wind_gust, units)
-        pressure = _format_pressure(hourly.pressure, units)
+    _add_columns(table, hourly_all_columns(units))
 
-        table.add_row(
-            dt,
-            str(round(hourly.temp)),
-            str(round(hourly.feels_like)),
-            f"{hourly.humidity}%",
-            str(round(hourly.dew_point)),
-            pressure,
-            str(hourly.uvi),
-            f"{hourly.clouds}%",
-            wind,
-            gusts,
-            rain,
-            snow,
-        )
+    for row in hourly_all_rows(weather, units, am_pm):
+        table.add_row(*row)
 
     return table
 
 
+def hourly_all_columns(units: str) -> list[str]:
+    precip_units, pressure_units, speed_units, temp_units = _get_units(units)
+
+    return [
+        "Date/Time :date:",
+        f"Temperature ({temp_units}) :thermometer:",
+        f"Feels Like ({temp_units}) :thermometer:",
+        "Humidity",
+        f"Dew Point ({temp_units})",
+        f"Pressure {pressure_units}",
+        "UVI",
+        "Clouds",
+        f"Wind ({speed_units})",
+        f"Wind Gusts {speed_units}",
+        f"Rain ({precip_units}) :cloud_with_rain:",
+        f"Snow ({precip_units}) :snowflake:",
+    ]
+
+
+def hourly_all_rows(
+    weather: OneCallWeather | OneCallRecord, units: str, am_pm: bool
+) -> Iterator[list[str]]:
+    columns = get_hourly_columns(weather.hourly)
+
+    for row in zip(
+        (_format_date_time(am_pm, x, weather.timezone_offset) for x in columns.dt),
+        format_rounded(columns.temp),
+        format_rounded(columns.feels_like),
+        format_percent(columns.humidity),
+        format_rounded(columns.dew_point),
+        format_pressure(columns.pressure, units),
+        format_values(columns.uvi),
+        format_percent(columns.clouds),
+        format_wind(columns.wind_speed, units),
+        format_wind(columns.wind_gust, units),
+        format_precip(columns.rain, units),
+        format_precip(columns.snow, units),
+    ):
+        yield list(row)
+
+
 def _hourly_temp_only(
-    weather: OneCallWeather, units: str, am_pm: bool, location: Location
+    weather: OneCallWeather | OneCallRecord | OneCallTempRecord,
+    units: str,
+    am_pm: bool,
+    location: Location,
 ) -> Table:
-    _, _, _, temp_units = _get_units(units)
     table = Table(
         title=f"Hourly weather for {location.display_name}",
         header_style=HEADER_ROW_STYLE,
         show_lines=True,
     )
-    table.add_column("Date/Time :date:")
-    table.add_column(f"Temperature ({temp_units}) :thermometer:")
-    table.add_column(f"Feels Like ({temp_units}) :thermometer:")
+    _add_columns(table, hourly_temp_only_columns(units))
 
-    for hourly in weather.hourly:
-        dt = _format_date_time(am_pm, hourly.dt, weather.timezone_offset)
+    for row in hourly_temp_only_rows(weather, am_pm):
+        table.add_row(*row)
 
-        table.add_row(
-            dt,
-            str(round(hourly.temp)),
-            str(round(hourly.feels_like)),
-        )
+    return table
+
+
+def hourly_temp_only_columns(units: str) -> list[str]:
+    _, _, _, temp_units = _get_units(units)
+
+    return [
+        "Date/Time :date:",
+        f"Temperature ({temp_units}) :thermometer:",
+        f"Feels Like ({temp_units}) :thermometer:",
+    ]
+
+
+def hourly_temp_only_rows(
+    weather: OneCallWeather | OneCallRecord | OneCallTempRecord, am_pm: bool
+) -> Iterator[list[str]]:
+    columns = get_hourly_temp_columns(weather.hourly)
+
+    for row in zip(
+        (_format_date_time(am_pm, x, weather.timezone_offset) for x in columns.dt),
+        format_rounded(columns.temp),
+        format_rounded(columns.feels_like),
+    ):
+        yield list(row)
+
+
+def _c_to_f(value: float) -> float:
+    return value * 9 / 5 + 32
+
+
+def _one_call_current_all(
+    weather: OneCallWeather | OneCallRecord, units: str, am_pm: bool, location: Location
+) -> Table:
+    table = Table(
+        title=f"Current weather for {location.display_name}", header_style=HEADER_ROW_STYLE
+    )
+    _add_columns(table, _one_call_current_all_columns(units))
+    table.add_row(*_one_call_current_all_row(weather, units, am_pm))
 
     return table
 
 
-def _hpa_to_in(value: float) -> float:
-    return round(value / 33.863886666667, 2)
+def _one_call_current_all_columns(units: str) -> list[str]:
+    _, pressure_units, speed_units, temp_units = _get_units(units)
+
+    return [
+        f"Temperature ({temp_units}) :thermometer:",
+        f"Feels Like ({temp_units}) :thermometer:",
+        "Humidity",
+        "Conditions",
+        f"Dew Point ({temp_units})",
+        f"Pressure {pressure_units}",
+        "UVI",
+        "Clouds",
+        f"Wind Speed ({speed_units})",
+        f"Wind Gusts ({speed_units})",
+        "Sunrise :sunrise:",
+        "Sunset :sunset:",
+    ]
+
+
+def _one_call_current_all_row(
+    weather: OneCallWeather | OneCallRecord, units: str, am_pm: bool
+) -> list[str]:
+    current = weather.current
+    assert current is not None
+    conditions = current.weather[0].description if current.weather else ""
+    weather_icon = WeatherIcons.get_icon(conditions)
+    if weather_icon:
+        conditions += f" {weather_icon}"
+    sunrise, sunset = _format_sunrise_sunset(
+        am_pm, current.sunrise, current.sunset, weather.timezone_offset
+    )
+
+    return [
+        str(round(current.temp)),
+        str(round(current.feels_like)),
+        f"{current.humidity}%",
+        conditions,
+        str(round(current.dew_point)),
+        _format_pressure(current.pressure, units),
+        str(current.uvi),
+        f"{current.clouds}%",
+        _format_wind(current.wind_speed, units),
+        _format_wind(current.wind_gust, units),
+        sunrise,
+        sunset,
+    ]
+
+
+def _one_call_current_temp(
+    weather: OneCallWeather | OneCallRecord | OneCallTempRecord, units: str, location: Location
+) -> Table:
+    current = weather.current
+    assert current is not None
+    table = Table(
+        title=f"Current weather for {location.display_name}", header_style=HEADER_ROW_STYLE
+    )
+    _add_columns(table, current_weather_temp_columns(units))
+    table.add_row(str(round(current.temp)), str(round(current.feels_like)))
+
+    return table
 
 
-def _kph_to_mph(value: float) -> float:
-    return value / 1.609
+def _show(
+    console: Console,
+    weather: WeatherModel,
+    render: Callable[[WeatherModel], RenderableType],
+    url: str,
+    model: Type[WeatherModel],
+    watch: float | None,
+) -> None:
+    if watch:
+        _watch(console, weather, render, watch_weather(url, model), watch)
+    else:
+        with span("render"):
+            console.print(render(weather))
 
 
-def _mm_to_in(value: float) -> float:
-    return round(value / 25.4, 2)
+def _summary_title(field: str, units: str) -> str:
+    precip_units, _, speed_units, temp_units = _get_units(units)
+    return {
+        "temp": f"Daily temperature ({temp_units}) :thermometer:",
+        "humidity": "Daily humidity (%)",
+        "wind_speed": f"Daily wind speed ({speed_units})",
+        "precip": f"Daily precipitation ({precip_units})",
+    }[field]
 
 
 def _validate_units(units: str) -> None:
     if units not in ["metric", "imperial"]:
         raise ValueError("Units must either be metric or imperial")
+
+
+def _watch(
+    console: Console,
+    weather: T,
+    render: Callable[[T], RenderableType],
+    get_if_changed: Callable[[], T | None],
+    interval: float,
+) -> None:
+    """Keeps the weather on screen and re-renders it when it changes until interrupted."""
+    import httpx
+    from rich.live import Live
+
+    with Live(render(weather), console=console, auto_refresh=False) as live:
+        try:
+            while True:
+                time.sleep(interval)
+                try:
+                    updated = get_if_changed()
+                except (httpx.HTTPError, RateLimitExceeded, ValueError):
+                    # Keep showing the last weather, the next refresh will try again.
+                    updated = None
+
+                if updated is not None:
+                    with span("render"):
+                        live.update(render(updated), refresh=True)
+                flush_spans()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import NamedTuple
+
+# Refreshing the access time on every read would turn each cache hit into a write. Only touching
+# it when it is older than this keeps reads cheap while still giving usable LRU ordering.
+_ACCESS_RESOLUTION = 60.0
+_BUSY_TIMEOUT = 5.0
+
+
+class CacheEntry(NamedTuple):
+    value: str
+    age: float
+
+
+class Cache:
+    """A small key/value cache stored in SQLite.
+
+    SQLite handles the locking so any number of weather-command processes can read and write the
+    same file at once. Errors opening or writing the database are treated as cache misses so a
+    broken cache never stops the weather from being retrieved.
+    """
+
+    def __init__(self, path: Path, table: str, *, ttl: float, max_entries: int) -> None:
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    def get(self, key: str, *, max_age: float | None = None) -> CacheEntry | None:
+        max_age = self.ttl if max_age is None else max_age
+        now = time.time()
+        try:
+            with closing(self._connect()) as conn:
+                row = conn.execute(
+                    f"SELECT value, created, accessed FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                if not row:
+                    return None
+
+                value, created, accessed = row
+                age = now - created
+                if age > max_age:
+                    return None
+
+                if now - accessed > _ACCESS_RESOLUTION:
+                    with conn:
+                        conn.execute(
+                            f"UPDATE {self.table} SET accessed = ? WHERE key = ?", (now, key)
+                        )
+        except (sqlite3.Error, OSError):
+            return None
+
+        return CacheEntry(value=value, age=age)
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now),
+                )
+                self._evict(conn, now)
+        except (sqlite3.Error, OSError):
+            pass
+
+    def delete(self, key: str) -> None:
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+        except (sqlite3.Error, OSError):
+            pass
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=_BUSY_TIMEOUT)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_accessed ON {self.table} (accessed)")
+        return conn
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute(f"DELETE FROM {self.table} WHERE created < ?", (now - self.ttl,))
+        count = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        if count > self.max_entries:
+            conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY accessed ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
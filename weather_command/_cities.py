@@ -0,0 +1,390 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+import unicodedata
+from contextlib import closing
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Iterable, Iterator, NamedTuple
+
+from weather_command._config import (
+    CITY_INDEX_CANDIDATES,
+    CITY_INDEX_LONG_NAME,
+    CITY_INDEX_MAX_TYPOS,
+)
+from weather_command._postal import read_rows
+
+if TYPE_CHECKING:  # pragma: no cover
+    from weather_command.models.location import Location
+
+# Column numbers in the GeoNames cities files, such as cities500.txt, which are tab separated
+# without a header.
+GEONAMES_COLUMNS = {
+    "place_name": 1,
+    "latitude": 4,
+    "longitude": 5,
+    "country_code": 8,
+    "state_code": 10,
+    "population": 14,
+}
+
+_BUSY_TIMEOUT = 5.0
+_BATCH_SIZE = 10_000
+_DIGITS = re.compile(r"\d+")
+_NOT_WORD = re.compile(r"[\W_]+")
+
+
+class CityPlace(NamedTuple):
+    name: str
+    state_code: str
+    country_code: str
+    lat: float
+    lon: float
+    population: int
+
+
+class CityCandidate(NamedTuple):
+    name: str
+    display_name: str
+    lat: float
+    lon: float
+    population: int
+    learned: bool
+    score: float
+
+
+class CityIndex:
+    """Cities from a gazetteer and from past geocodes, searchable by similar names.
+
+    Each name is split into trigrams, the overlapping three letter parts of the name, so a
+    misspelled name still shares most of them with the right city. The cities sharing the most
+    trigrams, along with the names starting with the name searched for, are ranked by how many
+    trigrams they share, whether they were learned from a geocode, then population. Like the cache,
+    errors reading or writing the database are ignored so a broken index never stops the weather
+    from being retrieved.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def search(
+        self,
+        name: str,
+        *,
+        state: str | None = None,
+        country: str | None = None,
+        limit: int = 10,
+    ) -> list[CityCandidate]:
+        normalized = normalize_name(name)
+        if not normalized or not self.path.exists():
+            return []
+
+        trigrams = get_trigrams(normalized)
+        filters, params = _filters(state, country, table="c.")
+
+        try:
+            with closing(self._connect()) as conn:
+                rows = conn.execute(
+                    "SELECT id, normalized, display_name, lat, lon, population, learned "
+                    "FROM cities WHERE id IN ("
+                    "  SELECT t.city_id FROM trigrams t JOIN cities c ON c.id = t.city_id "
+                    f"  WHERE t.trigram IN ({', '.join('?' * len(trigrams))}){filters} "
+                    "  GROUP BY t.city_id ORDER BY COUNT(*) DESC LIMIT ?"
+                    ") OR id IN ("
+                    "  SELECT c.id FROM cities c "
+                    f"  WHERE c.normalized >= ? AND c.normalized < ?{filters} LIMIT ?"
+                    ")",
+                    (
+                        *trigrams,
+                        *params,
+                        CITY_INDEX_CANDIDATES,
+                        normalized,
+                        f"{normalized}\uffff",
+                        *params,
+                        CITY_INDEX_CANDIDATES,
+                    ),
+                ).fetchall()
+        except (sqlite3.Error, OSError):
+            return []
+
+        candidates = [
+            CityCandidate(
+                name=candidate,
+                display_name=display_name,
+                lat=lat,
+                lon=lon,
+                population=population,
+                learned=bool(learned),
+                score=_score(normalized, trigrams, candidate),
+            )
+            for _, candidate, display_name, lat, lon, population, learned in rows
+        ]
+        candidates.sort(key=lambda x: (round(x.score, 2), x.learned, x.population), reverse=True)
+        return candidates[:limit]
+
+    def find(
+        self, name: str, *, state: str | None = None, country: str | None = None
+    ) -> CityCandidate | None:
+        """The city with exactly the name, ignoring case, accents, and punctuation.
+
+        When several match the one learned from a geocode, then the most populated, is returned.
+        """
+        normalized = normalize_name(name)
+        if not normalized or not self.path.exists():
+            return None
+
+        filters, params = _filters(state, country)
+        try:
+            with closing(self._connect()) as conn:
+                row = conn.execute(
+                    "SELECT normalized, display_name, lat, lon, population, learned FROM cities "
+                    f"WHERE normalized = ?{filters} ORDER BY learned DESC, population DESC LIMIT 1",
+                    (normalized, *params),
+                ).fetchone()
+        except (sqlite3.Error, OSError):
+            return None
+
+        if row is None:
+            return None
+
+        candidate, display_name, lat, lon, population, learned = row
+        return CityCandidate(candidate, display_name, lat, lon, population, bool(learned), 1.0)
+
+    def correct(
+        self, name: str, *, state: str | None = None, country: str | None = None
+    ) -> CityCandidate | None:
+        """The city the name is most likely a misspelling of, if it is only a typo or two away.
+
+        A correctly spelled city that isn't in the index can be a typo away from one that is, Parks
+        and Paris, so this is only for names the geocoding service didn't find.
+        """
+        normalized = normalize_name(name)
+        allowed = _allowed_typos(normalized)
+        for candidate in self.search(name, state=state, country=country):
+            # Numbers aren't corrected, District 9 isn't a misspelling of District 7.
+            if _DIGITS.findall(candidate.name) != _DIGITS.findall(normalized):
+                continue
+            if count_typos(normalized, candidate.name, allowed) <= allowed:
+                return candidate
+
+        return None
+
+    def learn(self, name: str, state: str | None, country: str | None, location: Location) -> None:
+        """Saves a location found by the geocoding service under the name that was searched for."""
+        place = CityPlace(
+            name=name,
+            state_code=state or "",
+            country_code=country or "",
+            lat=location.lat,
+            lon=location.lon,
+            population=0,
+        )
+        try:
+            with closing(self._connect()) as conn, conn:
+                self._add(conn, [place], learned=True, display_names=[location.display_name])
+        except (sqlite3.Error, OSError):
+            pass
+
+    def build(self, places: Iterable[CityPlace]) -> int:
+        """Replaces the gazetteer cities, keeping the learned ones, and returns how many were added.
+
+        When a name is in the same state and country more than once the one with the largest
+        population is kept.
+        """
+        largest: dict[tuple[str, str, str], CityPlace] = {}
+        for place in places:
+            key = (
+                normalize_name(place.name),
+                _normalize_code(place.state_code),
+                _normalize_code(place.country_code),
+            )
+            if key[0] and (key not in largest or place.population > largest[key].population):
+                largest[key] = place
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "DELETE FROM trigrams WHERE city_id IN (SELECT id FROM cities WHERE learned = 0)"
+            )
+            conn.execute("DELETE FROM cities WHERE learned = 0")
+            batch = []
+            for place in largest.values():
+                batch.append(place)
+                if len(batch) == _BATCH_SIZE:
+                    self._add(conn, batch, learned=False)
+                    batch = []
+            self._add(conn, batch, learned=False)
+
+        return len(largest)
+
+    def _add(
+        self,
+        conn: sqlite3.Connection,
+        places: list[CityPlace],
+        *,
+        learned: bool,
+        display_names: list[str] | None = None,
+    ) -> None:
+        for i, place in enumerate(places):
+            normalized = normalize_name(place.name)
+            key = (
+                normalized,
+                _normalize_code(place.state_code),
+                _normalize_code(place.country_code),
+            )
+            display_name = (
+                display_names[i]
+                if display_names
+                else ", ".join(
+                    x for x in (place.name, place.state_code, place.country_code) if x.strip()
+                )
+            )
+            row = conn.execute(
+                "SELECT id FROM cities WHERE normalized = ? AND state_code = ? AND country_code = ? "
+                "AND learned = ?",
+                (*key, int(learned)),
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE cities SET display_name = ?, lat = ?, lon = ?, population = ? WHERE id = ?",
+                    (display_name, place.lat, place.lon, place.population, row[0]),
+                )
+                continue
+
+            city_id = conn.execute(
+                "INSERT INTO cities "
+                "(normalized, state_code, country_code, learned, display_name, lat, lon, population) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (*key, int(learned), display_name, place.lat, place.lon, place.population),
+            ).lastrowid
+            conn.executemany(
+                "INSERT OR IGNORE INTO trigrams (trigram, city_id) VALUES (?, ?)",
+                ((x, city_id) for x in get_trigrams(normalized)),
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=_BUSY_TIMEOUT)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cities ("
+            "id INTEGER PRIMARY KEY, "
+            "normalized TEXT NOT NULL, "
+            "state_code TEXT NOT NULL, "
+            "country_code TEXT NOT NULL, "
+            "learned INTEGER NOT NULL, "
+            "display_name TEXT NOT NULL, "
+            "lat REAL NOT NULL, "
+            "lon REAL NOT NULL, "
+            "population INTEGER NOT NULL, "
+            "UNIQUE (normalized, state_code, country_code, learned))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS trigrams ("
+            "trigram TEXT NOT NULL, "
+            "city_id INTEGER NOT NULL, "
+            "PRIMARY KEY (trigram, city_id)) WITHOUT ROWID"
+        )
+        return conn
+
+
+def read_city_places(f: IO[str], file_format: str) -> Iterator[CityPlace]:
+    """Reads cities from a CSV with a header, or from a GeoNames cities file.
+
+    The CSV needs place_name (or name or city), latitude, and longitude columns and can have
+    country_code, state_code, and population columns. Rows without a name or valid coordinates are
+    skipped. Raises ValueError if a required column is missing.
+    """
+    rows = read_rows(
+        f,
+        file_format,
+        geonames_columns=GEONAMES_COLUMNS,
+        required=("place_name", "latitude", "longitude"),
+    )
+    for row in rows:
+        try:
+            lat, lon = float(row["latitude"]), float(row["longitude"])
+        except ValueError:
+            continue
+
+        name = row["place_name"].strip()
+        if not name:
+            continue
+
+        population = row.get("population", "").strip()
+        yield CityPlace(
+            name=name,
+            state_code=row.get("state_code", "").strip(),
+            country_code=row.get("country_code", "").strip(),
+            lat=lat,
+            lon=lon,
+            population=int(population) if population.isdigit() else 0,
+        )
+
+
+def normalize_name(name: str) -> str:
+    """Lowercases the name and removes accents and punctuation so Zürich matches zurich."""
+    decomposed = unicodedata.normalize("NFKD", name)
+    without_accents = "".join(x for x in decomposed if not unicodedata.combining(x))
+    return " ".join(_NOT_WORD.sub(" ", without_accents.lower()).split())
+
+
+def get_trigrams(normalized: str) -> list[str]:
+    # Padding the start with two spaces and the end with one weights the start of the name, where
+    # typos are least likely, and makes short names have trigrams.
+    padded = f"  {normalized} "
+    return sorted({padded[i : i + 3] for i in range(len(padded) - 2)})
+
+
+def count_typos(a: str, b: str, limit: int) -> int:
+    """The number of letters added, removed, changed, or swapped with the next to turn a into b.
+
+    Counting stops early once it is more than limit, then limit + 1 is returned.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    previous: list[int] = []
+    current = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (a[i - 1] != b[j - 1]),
+            )
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+
+    return min(current[-1], limit + 1)
+
+
+def _allowed_typos(normalized: str) -> int:
+    if len(normalized) < 4:
+        return 0
+
+    return CITY_INDEX_MAX_TYPOS + (len(normalized) >= CITY_INDEX_LONG_NAME)
+
+
+def _filters(state: str | None, country: str | None, table: str = "") -> tuple[str, list[str]]:
+    filters = ""
+    params = []
+    for column, value in (("state_code", state), ("country_code", country)):
+        if value and value.strip():
+            filters += f" AND {table}{column} = ?"
+            params.append(_normalize_code(value))
+
+    return filters, params
+
+
+def _normalize_code(value: str | None) -> str:
+    return " ".join(value.split()).lower() if value else ""
+
+
+def _score(normalized: str, trigrams: list[str], candidate: str) -> float:
+    """How similar the names are from 0 to 1, the share of their trigrams in common."""
+    candidate_trigrams = get_trigrams(candidate)
+    shared = len(set(trigrams).intersection(candidate_trigrams))
+    return 2 * shared / (len(trigrams) + len(candidate_trigrams))
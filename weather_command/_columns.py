@@ -0,0 +1,449 @@
+from __future__ import annotations
+
+import math
+from array import array
+from datetime import date, datetime, timedelta
+from importlib import import_module
+from importlib.util import find_spec
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Sequence, Union
+
+from weather_command.models.records import (
+    DailyRecord,
+    DailyTempRecord,
+    HourlyRecord,
+    HourlyTempRecord,
+)
+from weather_command.models.weather import Daily, Hourly
+
+HPA_PER_IN = 33.863886666667
+KPH_PER_MPH = 1.609
+MM_PER_IN = 25.4
+MPS_PER_MPH = 0.44704
+
+# An array.array, or a numpy.ndarray when numpy is installed.
+Column = Any
+
+SECONDS_PER_DAY = 60 * 60 * 24
+SUMMARY_FIELDS = ("temp", "humidity", "wind_speed", "precip")
+SUMMARY_PERCENTILES = (50.0, 90.0)
+
+_EPOCH = date(1970, 1, 1)
+
+_np: Any = None
+
+
+class HourlyColumns(NamedTuple):
+    dt: List[datetime]
+    temp: Column
+    feels_like: Column
+    humidity: Column
+    dew_point: Column
+    pressure: Column
+    uvi: Column
+    clouds: Column
+    wind_speed: Column
+    wind_gust: Column
+    rain: Column
+    snow: Column
+
+
+class DailyColumns(NamedTuple):
+    dt: List[datetime]
+    sunrise: List[datetime]
+    sunset: List[datetime]
+    temp_min: Column
+    temp_max: Column
+    humidity: Column
+    dew_point: Column
+    pressure: Column
+    uvi: Column
+    clouds: Column
+    wind_speed: Column
+    wind_gust: Column
+
+
+class HourlyTempColumns(NamedTuple):
+    dt: List[datetime]
+    temp: Column
+    feels_like: Column
+
+
+class DailyTempColumns(NamedTuple):
+    dt: List[datetime]
+    temp_min: Column
+    temp_max: Column
+
+
+class HistoryColumns(NamedTuple):
+    location_id: Column
+    ts: Column
+    temp: Column
+    humidity: Column
+    wind_speed: Column
+    precip: Column
+
+
+class DailySummary(NamedTuple):
+    """One entry per location and day, with each statistic of each field in values.
+
+    The keys of values are the field and statistic, such as temp_min or precip_p90.
+    """
+
+    location_id: List[int]
+    date: List[date]
+    samples: List[int]
+    values: Dict[str, Column]
+
+
+def get_hourly_columns(hourly: Sequence[Union[Hourly, HourlyRecord]]) -> HourlyColumns:
+    """Splits the hourly forecast into one array per field so values can be converted in bulk.
+
+    Missing wind, pressure, and precipitation values are stored as 0, which is how they are
+    displayed.
+    """
+    return HourlyColumns(
+        dt=[x.dt for x in hourly],
+        temp=_float_column(x.temp for x in hourly),
+        feels_like=_float_column(x.feels_like for x in hourly),
+        humidity=_int_column(x.humidity for x in hourly),
+        dew_point=_float_column(x.dew_point for x in hourly),
+        pressure=_int_column(x.pressure or 0 for x in hourly),
+        uvi=_float_column(x.uvi for x in hourly),
+        clouds=_int_column(x.clouds for x in hourly),
+        wind_speed=_float_column(x.wind_speed or 0.0 for x in hourly),
+        wind_gust=_float_column(x.wind_gust or 0.0 for x in hourly),
+        rain=_float_column(x.rain.one_hour if x.rain else 0.0 for x in hourly),
+        snow=_float_column(x.snow.one_hour if x.snow else 0.0 for x in hourly),
+    )
+
+
+def get_daily_columns(daily: Sequence[Union[Daily, DailyRecord]]) -> DailyColumns:
+    """Splits the daily forecast into one array per field so values can be converted in bulk."""
+    return DailyColumns(
+        dt=[x.dt for x in daily],
+        sunrise=[x.sunrise for x in daily],
+        sunset=[x.sunset for x in daily],
+        temp_min=_float_column(x.temp.min for x in daily),
+        temp_max=_float_column(x.temp.max for x in daily),
+        humidity=_int_column(x.humidity for x in daily),
+        dew_point=_float_column(x.dew_point for x in daily),
+        pressure=_int_column(x.pressure or 0 for x in daily),
+        uvi=_float_column(x.uvi for x in daily),
+        clouds=_int_column(x.clouds for x in daily),
+        wind_speed=_float_column(x.wind_speed or 0.0 for x in daily),
+        wind_gust=_float_column(x.wind_gust or 0.0 for x in daily),
+    )
+
+
+def get_hourly_temp_columns(
+    hourly: Sequence[Union[Hourly, HourlyRecord, HourlyTempRecord]],
+) -> HourlyTempColumns:
+    """Only the columns shown in temperature only views."""
+    return HourlyTempColumns(
+        dt=[x.dt for x in hourly],
+        temp=_float_column(x.temp for x in hourly),
+        feels_like=_float_column(x.feels_like for x in hourly),
+    )
+
+
+def get_daily_temp_columns(
+    daily: Sequence[Union[Daily, DailyRecord, DailyTempRecord]],
+) -> DailyTempColumns:
+    """Only the columns shown in temperature only views."""
+    return DailyTempColumns(
+        dt=[x.dt for x in daily],
+        temp_min=_float_column(x.temp.min for x in daily),
+        temp_max=_float_column(x.temp.max for x in daily),
+    )
+
+
+def get_history_columns(rows: Sequence[Sequence[Any]]) -> HistoryColumns:
+    """Splits rows read from the history into one array per field.
+
+    Each row is the location id, timestamp, temperature, humidity, wind speed, and precipitation.
+    Missing values are stored as NaN so they can be left out of summaries.
+    """
+    np = _numpy()
+    if np is not None:
+        data = np.array(rows, dtype=np.float64).reshape(-1, len(HistoryColumns._fields))
+        return HistoryColumns(
+            data[:, 0].astype(np.int64),
+            data[:, 1].astype(np.int64),
+            *(data[:, i] for i in range(2, len(HistoryColumns._fields))),
+        )
+
+    columns = list(zip(*rows)) or [()] * len(HistoryColumns._fields)
+    return HistoryColumns(
+        array("q", columns[0]),
+        array("q", columns[1]),
+        *(array("d", (math.nan if x is None else x for x in c)) for c in columns[2:]),
+    )
+
+
+def summary_statistics(percentiles: Sequence[float] = SUMMARY_PERCENTILES) -> list[str]:
+    return ["min", "mean", "max", *(f"p{x:g}" for x in percentiles)]
+
+
+def summarize_daily(
+    columns: HistoryColumns,
+    offsets: Mapping[int, int],
+    percentiles: Sequence[float] = SUMMARY_PERCENTILES,
+) -> DailySummary:
+    """The min, mean, max, and percentiles of each summary field per location and day.
+
+    Days start at midnight in each location's timezone, given as offsets in seconds by location id.
+    Missing values are left out, and a day without any values for a field gets NaN. Percentiles are
+    interpolated linearly between the closest values, like numpy.percentile.
+    """
+    np = _numpy()
+    if np is None:
+        return _summarize_daily_python(columns, offsets, percentiles)
+
+    ids = np.asarray(columns.location_id, dtype=np.int64)
+    unique_ids, inverse = np.unique(ids, return_inverse=True)
+    location_offsets = np.array([offsets.get(int(x), 0) for x in unique_ids], dtype=np.int64)
+    days = (np.asarray(columns.ts, dtype=np.int64) + location_offsets[inverse]) // SECONDS_PER_DAY
+
+    # Rows are sorted so each location and day is a contiguous group.
+    order = np.lexsort((days, ids))
+    ids = ids[order]
+    days = days[order]
+    boundaries = (ids[1:] != ids[:-1]) | (days[1:] != days[:-1])
+    starts = np.flatnonzero(np.concatenate((np.ones(min(len(ids), 1), dtype=bool), boundaries)))
+    group_sizes = np.diff(np.append(starts, len(ids)))
+    groups = np.repeat(np.arange(len(starts)), group_sizes)
+
+    values: dict[str, Column] = {}
+    for field in SUMMARY_FIELDS:
+        column = np.asarray(getattr(columns, field), dtype=np.float64)[order]
+        present = ~np.isnan(column)
+        field_groups = groups[present]
+        field_values = column[present]
+        by_value = np.lexsort((field_values, field_groups))
+        field_values = field_values[by_value]
+
+        counts = np.bincount(field_groups, minlength=len(starts))
+        firsts = np.cumsum(counts) - counts
+        has_values = counts > 0
+
+        means = np.full(len(starts), np.nan)
+        if has_values.any():
+            means[has_values] = (
+                np.add.reduceat(field_values, firsts[has_values]) / counts[has_values]
+            )
+
+        values[f"{field}_min"] = _group_percentile(field_values, firsts, counts, 0.0)
+        values[f"{field}_mean"] = means
+        values[f"{field}_max"] = _group_percentile(field_values, firsts, counts, 1.0)
+        for percentile in percentiles:
+            values[f"{field}_p{percentile:g}"] = _group_percentile(
+                field_values, firsts, counts, percentile / 100
+            )
+
+    return DailySummary(
+        location_id=ids[starts].tolist(),
+        date=[_EPOCH + timedelta(days=x) for x in days[starts].tolist()],
+        samples=group_sizes.tolist(),
+        values=values,
+    )
+
+
+def convert_summary(summary: DailySummary, units: str) -> dict[str, list[float | None]]:
+    """The summary's values in units, rounded to 2 decimal places, with None for missing values."""
+    convert = {
+        "temp": convert_temp,
+        "humidity": lambda values, _: _to_list(values),
+        "wind_speed": convert_speed,
+        "precip": convert_precip,
+    }
+
+    return {
+        key: [
+            None if math.isnan(x) else round(x, 2)
+            for x in convert[key.rsplit("_", 1)[0]](values, units)
+        ]
+        for key, values in summary.values.items()
+    }
+
+
+def hpa_to_in(value: float) -> float:
+    return round(value / HPA_PER_IN, 2)
+
+
+def kph_to_mph(value: float) -> float:
+    return value / KPH_PER_MPH
+
+
+def mm_to_in(value: float) -> float:
+    return round(value / MM_PER_IN, 2)
+
+
+def mps_to_mph(value: float) -> float:
+    return value / MPS_PER_MPH
+
+
+def convert_temp(values: Column, units: str) -> list[float]:
+    """Converts temperatures in Celsius, like those in the history."""
+    return _round(_fahrenheit(values), 2) if units == "imperial" else _to_list(values)
+
+
+def convert_precip(values: Column, units: str) -> list[float]:
+    return _round(_divide(values, MM_PER_IN), 2) if units == "imperial" else _to_list(values)
+
+
+def convert_pressure(values: Column, units: str) -> list[float]:
+    return _round(_divide(values, HPA_PER_IN), 2) if units == "imperial" else _to_list(values)
+
+
+def convert_speed(values: Column, units: str) -> list[float]:
+    """Converts wind speeds in metres per second, like those in the history."""
+    return _round(_divide(values, MPS_PER_MPH), 2) if units == "imperial" else _to_list(values)
+
+
+def convert_wind(values: Column, units: str) -> list[int]:
+    """Converts wind speeds and rounds them to whole numbers for display."""
+    return _round(_divide(values, KPH_PER_MPH) if units == "imperial" else values)
+
+
+def format_percent(values: Column) -> list[str]:
+    return [f"{x}%" for x in _to_list(values)]
+
+
+def format_precip(values: Column, units: str) -> list[str]:
+    return _format_non_zero(convert_precip(values, units))
+
+
+def format_pressure(values: Column, units: str) -> list[str]:
+    return _format_non_zero(convert_pressure(values, units))
+
+
+def format_rounded(values: Column) -> list[str]:
+    return [str(x) for x in _round(values)]
+
+
+def format_values(values: Column) -> list[str]:
+    return [str(x) for x in _to_list(values)]
+
+
+def format_wind(values: Column, units: str) -> list[str]:
+    return [str(x) for x in convert_wind(values, units)]
+
+
+def numpy_available() -> bool:
+    return find_spec("numpy") is not None
+
+
+def _divide(values: Column, divisor: float) -> Column:
+    np = _numpy()
+    if np is not None:
+        return np.asarray(values, dtype=np.float64) / divisor
+
+    return array("d", (x / divisor for x in values))
+
+
+def _fahrenheit(values: Column) -> Column:
+    np = _numpy()
+    if np is not None:
+        return np.asarray(values, dtype=np.float64) * 9 / 5 + 32
+
+    return array("d", (x * 9 / 5 + 32 for x in values))
+
+
+def _float_column(values: Iterable[float]) -> Column:
+    np = _numpy()
+    if np is not None:
+        return np.fromiter(values, dtype=np.float64)
+
+    return array("d", values)
+
+
+def _format_non_zero(values: list[Any]) -> list[str]:
+    return [str(x) if x else "0" for x in values]
+
+
+def _group_percentile(values: Column, firsts: Column, counts: Column, fraction: float) -> Column:
+    # values holds each group's values in order, starting at firsts. Empty groups get NaN.
+    np = _numpy()
+    has_values = counts > 0
+    result = np.full(len(counts), np.nan)
+    position = firsts[has_values] + (counts[has_values] - 1) * fraction
+    lower = np.floor(position).astype(np.int64)
+    upper = np.ceil(position).astype(np.int64)
+    result[has_values] = values[lower] + (values[upper] - values[lower]) * (position - lower)
+    return result
+
+
+def _int_column(values: Iterable[int]) -> Column:
+    np = _numpy()
+    if np is not None:
+        return np.fromiter(values, dtype=np.int64)
+
+    return array("q", values)
+
+
+def _numpy() -> Any:
+    # numpy is optional and slow to import so it's only loaded the first time a column is built.
+    global _np
+
+    if _np is None:
+        _np = import_module("numpy") if numpy_available() else False
+
+    return _np or None
+
+
+def _round(values: Column, ndigits: int | None = None) -> list[Any]:
+    """Rounds half to even like round(), returning ints when ndigits is None."""
+    np = _numpy()
+    if np is not None:
+        if ndigits is None:
+            return np.rint(values).astype(np.int64).tolist()
+        return np.round(values, ndigits).tolist()
+
+    return [round(x, ndigits) for x in values]
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return math.nan
+
+    position = (len(values) - 1) * fraction
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def _summarize_daily_python(
+    columns: HistoryColumns, offsets: Mapping[int, int], percentiles: Sequence[float]
+) -> DailySummary:
+    groups: dict[tuple[int, int], list[int]] = {}
+    for i, (location_id, ts) in enumerate(zip(columns.location_id, columns.ts)):
+        day = (ts + offsets.get(location_id, 0)) // SECONDS_PER_DAY
+        groups.setdefault((location_id, day), []).append(i)
+
+    keys = sorted(groups)
+    values: dict[str, Column] = {}
+    for field in SUMMARY_FIELDS:
+        column = getattr(columns, field)
+        field_values = [
+            sorted(v for v in (column[i] for i in groups[key]) if not math.isnan(v)) for key in keys
+        ]
+        values[f"{field}_min"] = array("d", (_percentile(x, 0.0) for x in field_values))
+        values[f"{field}_mean"] = array(
+            "d", (math.fsum(x) / len(x) if x else math.nan for x in field_values)
+        )
+        values[f"{field}_max"] = array("d", (_percentile(x, 1.0) for x in field_values))
+        for percentile in percentiles:
+            values[f"{field}_p{percentile:g}"] = array(
+                "d", (_percentile(x, percentile / 100) for x in field_values)
+            )
+
+    return DailySummary(
+        location_id=[x for x, _ in keys],
+        date=[_EPOCH + timedelta(days=x) for _, x in keys],
+        samples=[len(groups[x]) for x in keys],
+        values=values,
+    )
+
+
+def _to_list(values: Column) -> list[Any]:
+    return values.tolist()
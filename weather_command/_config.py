@@ -1,12 +1,65 @@
 from __future__ import annotations
 
 from os import getenv
+from pathlib import Path
 
 from weather_command.errors import MissingApiKey
 
 WEATHER_BASE_URL = "https://api.openweathermap.org/data/2.5"
 LOCATION_BASE_URL = "https://nominatim.openstreetmap.org/search?format=json&limit=1"
 
+GEOCODE_CACHE_TTL = 60 * 60 * 24 * 30
+GEOCODE_CACHE_MAX_ENTRIES = 10_000
+
+# OpenWeather updates its data roughly every 10 minutes so there is no point in asking for it more
+# often than that.
+FORECAST_CACHE_TTL = 60 * 10
+FORECAST_CACHE_STALE_TTL = 60 * 10
+FORECAST_CACHE_MAX_ENTRIES = 1_000
+
+# Nominatim's usage policy allows 1 request per second and the free OpenWeather plans are limited
+# to 60 requests per minute and 1,000 one call requests per day.
+RATE_LIMITS = "nominatim.openstreetmap.org=1/s,api.openweathermap.org=60/m;1000/d"
+RATE_LIMIT_MAX_WAIT = 60.0
+RATE_LIMIT_PERIODS = {"s": 1.0, "m": 60.0, "h": 60.0 * 60, "d": 60.0 * 60 * 24}
+
+HTTP_TIMEOUT = 10.0
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+HTTP_KEEPALIVE_EXPIRY = 30.0
+HTTP_RETRIES = 2
+HTTP_BACKOFF = 0.5
+HTTP_MAX_BACKOFF = 10.0
+
+DEFAULT_CONCURRENCY = 10
+PROGRESS_INTERVAL = 5.0
+SERVE_HOST = "127.0.0.1"
+SERVE_PORT = 8080
+
+# About as often as Prometheus usually scrapes, writing the textfile more often is wasted work.
+METRICS_HOST = "127.0.0.1"
+METRICS_TEXTFILE_INTERVAL = 15.0
+
+# Rows are written to the history in one transaction once this many are waiting, or after the
+# interval so a long running watch doesn't hold them in memory.
+HISTORY_BATCH_SIZE = 500
+HISTORY_FLUSH_INTERVAL = 5.0
+
+# Names longer than this, in bytes, are cut short in the snapshot so every record is the same size.
+SNAPSHOT_NAME_SIZE = 128
+
+# Longer postal codes, in bytes, aren't indexed and names are cut short like in the snapshot.
+POSTAL_CODE_SIZE = 12
+POSTAL_NAME_SIZE = 64
+
+# A name is corrected to a city in the local city index when it is at most this many typos, a letter
+# added, removed, changed, or two swapped, away. Names at least CITY_INDEX_LONG_NAME letters long can
+# have one more, and names shorter than 4 letters have to match exactly. CITY_INDEX_CANDIDATES is how
+# many of the cities sharing the most parts of the name are ranked.
+CITY_INDEX_MAX_TYPOS = 1
+CITY_INDEX_LONG_NAME = 12
+CITY_INDEX_CANDIDATES = 200
+
 
 def apppend_api_key(url: str) -> str:
     api_key = getenv("OPEN_WEATHER_API_KEY")
@@ -16,3 +69,188 @@ def apppend_api_key(url: str) -> str:
         )
 
     return f"{url}&appid={api_key}"
+
+
+def get_cache_dir() -> Path:
+    cache_dir = getenv("WEATHER_COMMAND_CACHE_DIR")
+    if cache_dir:
+        return Path(cache_dir)
+
+    xdg_cache_home = getenv("XDG_CACHE_HOME")
+    base_dir = Path(xdg_cache_home) if xdg_cache_home else Path.home() / ".cache"
+
+    return base_dir / "weather-command"
+
+
+def get_data_dir() -> Path:
+    xdg_data_home = getenv("XDG_DATA_HOME")
+    base_dir = Path(xdg_data_home) if xdg_data_home else Path.home() / ".local" / "share"
+
+    return base_dir / "weather-command"
+
+
+def get_history_file() -> Path:
+    history_file = getenv("WEATHER_COMMAND_HISTORY_FILE")
+    if history_file:
+        return Path(history_file)
+
+    return get_data_dir() / "history.sqlite"
+
+
+def get_postal_index_file() -> Path:
+    postal_index = getenv("WEATHER_COMMAND_POSTAL_INDEX")
+    if postal_index:
+        return Path(postal_index)
+
+    return get_data_dir() / "postal.idx"
+
+
+def get_city_index_file() -> Path:
+    city_index = getenv("WEATHER_COMMAND_CITY_INDEX")
+    if city_index:
+        return Path(city_index)
+
+    return get_data_dir() / "cities.sqlite"
+
+
+def get_snapshot_file() -> Path:
+    snapshot_file = getenv("WEATHER_COMMAND_SNAPSHOT_FILE")
+    if snapshot_file:
+        return Path(snapshot_file)
+
+    return get_cache_dir() / "snapshot.bin"
+
+
+def get_history_enabled() -> bool:
+    """Saves the weather retrieved by every command in the history."""
+    return _get_bool_env("WEATHER_COMMAND_HISTORY")
+
+
+def get_geocode_cache_ttl() -> int:
+    return _get_int_env("WEATHER_COMMAND_GEOCODE_CACHE_TTL", GEOCODE_CACHE_TTL)
+
+
+def get_geocode_cache_max_entries() -> int:
+    return _get_int_env("WEATHER_COMMAND_GEOCODE_CACHE_MAX_ENTRIES", GEOCODE_CACHE_MAX_ENTRIES)
+
+
+def get_forecast_cache_ttl() -> int:
+    return _get_int_env("WEATHER_COMMAND_FORECAST_CACHE_TTL", FORECAST_CACHE_TTL)
+
+
+def get_forecast_cache_stale_ttl() -> int:
+    return _get_int_env("WEATHER_COMMAND_FORECAST_CACHE_STALE_TTL", FORECAST_CACHE_STALE_TTL)
+
+
+def get_forecast_cache_max_entries() -> int:
+    return _get_int_env("WEATHER_COMMAND_FORECAST_CACHE_MAX_ENTRIES", FORECAST_CACHE_MAX_ENTRIES)
+
+
+def get_http_timeout() -> float:
+    return _get_float_env("WEATHER_COMMAND_HTTP_TIMEOUT", HTTP_TIMEOUT)
+
+
+def get_http_max_connections() -> int:
+    return _get_int_env("WEATHER_COMMAND_HTTP_MAX_CONNECTIONS", HTTP_MAX_CONNECTIONS)
+
+
+def get_http_max_keepalive_connections() -> int:
+    return _get_int_env(
+        "WEATHER_COMMAND_HTTP_MAX_KEEPALIVE_CONNECTIONS", HTTP_MAX_KEEPALIVE_CONNECTIONS
+    )
+
+
+def get_http_keepalive_expiry() -> float:
+    return _get_float_env("WEATHER_COMMAND_HTTP_KEEPALIVE_EXPIRY", HTTP_KEEPALIVE_EXPIRY)
+
+
+def get_http_retries() -> int:
+    return _get_int_env("WEATHER_COMMAND_HTTP_RETRIES", HTTP_RETRIES)
+
+
+def get_http_backoff() -> float:
+    return _get_float_env("WEATHER_COMMAND_HTTP_BACKOFF", HTTP_BACKOFF)
+
+
+def get_http_max_backoff() -> float:
+    return _get_float_env("WEATHER_COMMAND_HTTP_MAX_BACKOFF", HTTP_MAX_BACKOFF)
+
+
+def get_http_hedge_after() -> float | str | None:
+    """Seconds to wait before sending a hedged request, "auto" to use the measured p95 latency,
+    or None to not hedge requests."""
+    value = getenv("WEATHER_COMMAND_HTTP_HEDGE_AFTER", "").strip().lower()
+    if not value:
+        return None
+
+    if value == "auto":
+        return value
+
+    return _get_float_env("WEATHER_COMMAND_HTTP_HEDGE_AFTER", 0.0)
+
+
+def get_rate_limits() -> dict[str, list[tuple[int, float]]]:
+    """Parses the rate limits in the form host=requests/period[;requests/period][,host=...].
+
+    The period is one of s, m, h, or d. Setting WEATHER_COMMAND_RATE_LIMITS to "none" turns rate
+    limiting off.
+    """
+    value = getenv("WEATHER_COMMAND_RATE_LIMITS", RATE_LIMITS).strip()
+    if value.lower() == "none":
+        return {}
+
+    limits: dict[str, list[tuple[int, float]]] = {}
+    try:
+        for host_limits in filter(None, (x.strip() for x in value.split(","))):
+            host, rates = host_limits.split("=")
+            for rate in rates.split(";"):
+                requests, period = rate.strip().split("/")
+                limits.setdefault(host.strip(), []).append(
+                    (int(requests), RATE_LIMIT_PERIODS[period.strip().lower()[:1]])
+                )
+    except (KeyError, ValueError):
+        raise ValueError(
+            f"WEATHER_COMMAND_RATE_LIMITS must be in the form host=requests/period[;requests/period][,host=...], got {value}"
+        )
+
+    return limits
+
+
+def get_rate_limit_max_wait() -> float:
+    return _get_float_env("WEATHER_COMMAND_RATE_LIMIT_MAX_WAIT", RATE_LIMIT_MAX_WAIT)
+
+
+def get_strict_validation() -> bool:
+    """Fully validates weather responses with the pydantic models instead of only decoding them."""
+    return _get_bool_env("WEATHER_COMMAND_STRICT")
+
+
+def get_trace_file() -> Path | None:
+    trace_file = getenv("WEATHER_COMMAND_TRACE_FILE")
+    return Path(trace_file) if trace_file else None
+
+
+def _get_bool_env(name: str) -> bool:
+    return getenv(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _get_float_env(name: str, default: float) -> float:
+    value = getenv(name)
+    if not value:
+        return default
+
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number, got {value}")
+
+
+def _get_int_env(name: str, default: int) -> int:
+    value = getenv(name)
+    if not value:
+        return default
+
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value}")
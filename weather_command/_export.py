@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+import csv
+import json
+from datetime import datetime, timedelta, timezone
+from itertools import chain, islice
+from typing import Any, Callable, Iterable, Iterator, TextIO, TypeVar, Union
+
+from rich.console import Console
+
+from weather_command._builder import build_url
+from weather_command._columns import (
+    SUMMARY_FIELDS,
+    DailySummary,
+    convert_summary,
+    hpa_to_in,
+    kph_to_mph,
+    mm_to_in,
+)
+from weather_command._location import get_location_details
+from weather_command._weather import (
+    get_current_weather,
+    stream_daily_weather,
+    stream_hourly_weather,
+)
+from weather_command.models.records import DailyRecord, HourlyRecord
+from weather_command.models.weather import CurrentWeather, Daily, Hourly
+
+T = TypeVar("T")
+
+CURRENT_FIELDS = [
+    "location",
+    "dt",
+    "temp",
+    "feels_like",
+    "humidity",
+    "pressure",
+    "conditions",
+    "wind_speed",
+    "wind_gust",
+    "rain_one_hour",
+    "rain_three_hour",
+    "snow_one_hour",
+    "snow_three_hour",
+    "sunrise",
+    "sunset",
+]
+DAILY_FIELDS = [
+    "location",
+    "dt",
+    "temp_min",
+    "temp_max",
+    "humidity",
+    "dew_point",
+    "pressure",
+    "uvi",
+    "clouds",
+    "wind_speed",
+    "wind_gust",
+    "sunrise",
+    "sunset",
+]
+HOURLY_FIELDS = [
+    "location",
+    "dt",
+    "temp",
+    "feels_like",
+    "humidity",
+    "dew_point",
+    "pressure",
+    "uvi",
+    "clouds",
+    "wind_speed",
+    "wind_gust",
+    "rain",
+    "snow",
+]
+CURRENT_TEMP_FIELDS = ["location", "dt", "temp", "feels_like"]
+DAILY_TEMP_FIELDS = ["location", "dt", "temp_min", "temp_max"]
+HOURLY_TEMP_FIELDS = ["location", "dt", "temp", "feels_like"]
+
+
+def export_current(
+    out: TextIO,
+    console: Console,
+    how: str,
+    city_zip: str,
+    *,
+    output_format: str,
+    state_code: str | None = None,
+    country_code: str | None = None,
+    units: str = "metric",
+    temp_only: bool = False,
+    max_age: int | None = None,
+    no_cache: bool = False,
+) -> None:
+    """Writes the current weather as JSON, NDJSON, or CSV instead of rendering a table.
+
+    The console is only used to report errors.
+    """
+    url = build_url(
+        forecast_type="current",
+        how=how,
+        city_zip=city_zip,
+        units=units,
+        state_code=state_code,
+        country_code=country_code,
+    )
+    current_weather = get_current_weather(url, console, max_age=max_age, no_cache=no_cache)
+    write_rows(
+        out,
+        output_format,
+        [_current_row(current_weather, units)],
+        CURRENT_TEMP_FIELDS if temp_only else CURRENT_FIELDS,
+    )
+
+
+def export_daily(
+    out: TextIO,
+    console: Console,
+    how: str,
+    city_zip: str,
+    *,
+    output_format: str,
+    state_code: str | None = None,
+    country_code: str | None = None,
+    units: str = "metric",
+    temp_only: bool = False,
+    max_age: int | None = None,
+    no_cache: bool = False,
+) -> None:
+    location = get_location_details(
+        how=how, city_zip=city_zip, state=state_code, country=country_code, console=console
+    )
+    url = build_url(forecast_type="daily", units=units, lon=location.lon, lat=location.lat)
+    write_rows(
+        out,
+        output_format,
+        _stream_rows(
+            stream_daily_weather(url, console, max_age=max_age, no_cache=no_cache),
+            lambda day, offset: _daily_row(day, offset, units, location.display_name),
+        ),
+        DAILY_TEMP_FIELDS if temp_only else DAILY_FIELDS,
+    )
+
+
+def export_hourly(
+    out: TextIO,
+    console: Console,
+    how: str,
+    city_zip: str,
+    *,
+    output_format: str,
+    state_code: str | None = None,
+    country_code: str | None = None,
+    units: str = "metric",
+    temp_only: bool = False,
+    max_age: int | None = None,
+    no_cache: bool = False,
+) -> None:
+    location = get_location_details(
+        how=how, city_zip=city_zip, state=state_code, country=country_code, console=console
+    )
+    url = build_url(forecast_type="hourly", units=units, lon=location.lon, lat=location.lat)
+    write_rows(
+        out,
+        output_format,
+        _stream_rows(
+            stream_hourly_weather(url, console, max_age=max_age, no_cache=no_cache),
+            lambda hour, offset: _hourly_row(hour, offset, units, location.display_name),
+        ),
+        HOURLY_TEMP_FIELDS if temp_only else HOURLY_FIELDS,
+    )
+
+
+def export_daily_summary(
+    out: TextIO,
+    summary: DailySummary,
+    location_names: dict[int, str],
+    statistics: list[str],
+    *,
+    output_format: str,
+    units: str = "metric",
+) -> None:
+    """Writes one row for each location and day with every statistic of each summary field."""
+    values = convert_summary(summary, units)
+    fields = [f"{x}_{y}" for x in SUMMARY_FIELDS for y in statistics]
+    write_rows(
+        out,
+        output_format,
+        (
+            {
+                "location": location_names.get(location_id, str(location_id)),
+                "date": day.isoformat(),
+                "samples": samples,
+                **{x: values[x][i] for x in fields},
+            }
+            for i, (location_id, day, samples) in enumerate(
+                zip(summary.location_id, summary.date, summary.samples)
+            )
+        ),
+        ["location", "date", "samples", *fields],
+    )
+
+
+def write_rows(
+    out: TextIO, output_format: str, rows: Iterable[dict[str, Any]], fields: list[str]
+) -> None:
+    """Streams rows to out as a JSON array, newline delimited JSON, or CSV.
+
+    Only the given fields are written, in that order. The first row is fetched before anything is
+    written so when getting the weather fails the output is left empty, rather than holding a CSV
+    header or the start of an array.
+    """
+    remaining = iter(rows)
+    rows = chain(list(islice(remaining, 1)), remaining)
+    if output_format == "csv":
+        writer = csv.DictWriter(out, fieldnames=fields, extrasaction="ignore", lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+    elif output_format == "ndjson":
+        for row in rows:
+            out.write(json.dumps({x: row[x] for x in fields}))
+            out.write("\n")
+    elif output_format == "json":
+        out.write("[")
+        for i, row in enumerate(rows):
+            out.write(",\n" if i else "\n")
+            out.write(json.dumps({x: row[x] for x in fields}))
+        out.write("\n]\n")
+    else:
+        raise ValueError(f"{output_format} is not a valid output format")
+
+    out.flush()
+
+
+def _current_row(current_weather: CurrentWeather, units: str) -> dict[str, Any]:
+    offset = current_weather.timezone
+    rain = current_weather.rain
+    snow = current_weather.snow
+    wind = current_weather.wind
+
+    return {
+        "location": current_weather.name,
+        "dt": _isoformat(current_weather.dt, offset),
+        "temp": current_weather.main.temp,
+        "feels_like": current_weather.main.feels_like,
+        "humidity": current_weather.main.humidity,
+        "pressure": _pressure(current_weather.main.pressure, units),
+        "conditions": current_weather.weather[0].description if current_weather.weather else None,
+        "wind_speed": _speed(wind.speed, units) if wind else None,
+        "wind_gust": _speed(wind.gust, units) if wind and wind.gust is not None else None,
+        "rain_one_hour": _precip(rain.one_hour, units) if rain else 0.0,
+        "rain_three_hour": _precip(rain.three_hour, units) if rain else 0.0,
+        "snow_one_hour": _precip(snow.one_hour, units) if snow else 0.0,
+        "snow_three_hour": _precip(snow.three_hour, units) if snow else 0.0,
+        "sunrise": _isoformat(current_weather.sys.sunrise, offset),
+        "sunset": _isoformat(current_weather.sys.sunset, offset),
+    }
+
+
+def _daily_row(
+    day: Union[Daily, DailyRecord], offset: int, units: str, location_name: str
+) -> dict[str, Any]:
+    # Records are streamed one at a time, converting each one on its own is faster than building
+    # single value columns for it.
+    return {
+        "location": location_name,
+        "dt": _isoformat(day.dt, offset),
+        "temp_min": day.temp.min,
+        "temp_max": day.temp.max,
+        "humidity": day.humidity,
+        "dew_point": day.dew_point,
+        "pressure": _pressure(day.pressure or 0, units),
+        "uvi": day.uvi,
+        "clouds": day.clouds,
+        "wind_speed": _speed(day.wind_speed or 0.0, units),
+        "wind_gust": _speed(day.wind_gust or 0.0, units),
+        "sunrise": _isoformat(day.sunrise, offset),
+        "sunset": _isoformat(day.sunset, offset),
+    }
+
+
+def _hourly_row(
+    hour: Union[Hourly, HourlyRecord], offset: int, units: str, location_name: str
+) -> dict[str, Any]:
+    return {
+        "location": location_name,
+        "dt": _isoformat(hour.dt, offset),
+        "temp": hour.temp,
+        "feels_like": hour.feels_like,
+        "humidity": hour.humidity,
+        "dew_point": hour.dew_point,
+        "pressure": _pressure(hour.pressure or 0, units),
+        "uvi": hour.uvi,
+        "clouds": hour.clouds,
+        "wind_speed": _speed(hour.wind_speed or 0.0, units),
+        "wind_gust": _speed(hour.wind_gust or 0.0, units),
+        "rain": _precip(hour.rain.one_hour if hour.rain else 0.0, units),
+        "snow": _precip(hour.snow.one_hour if hour.snow else 0.0, units),
+    }
+
+
+def _stream_rows(
+    records: Iterable[tuple[int, T]], row: Callable[[T, int], dict[str, Any]]
+) -> Iterator[dict[str, Any]]:
+    """Turns each record into a row as soon as it is downloaded so it can be written right away."""
+    for offset, record in records:
+        yield row(record, offset)
+
+
+def _isoformat(dt: datetime, offset: int) -> str:
+    """The time in the location's time zone, for example 2021-09-28T21:00:00-04:00."""
+    return dt.astimezone(timezone(timedelta(seconds=offset))).isoformat()
+
+
+def _precip(value: float, units: str) -> float:
+    return mm_to_in(value) if units == "imperial" else value
+
+
+def _pressure(value: int, units: str) -> float:
+    return hpa_to_in(value) if units == "imperial" else value
+
+
+def _speed(value: float, units: str) -> float:
+    return round(kph_to_mph(value), 2) if units == "imperial" else value
@@ -0,0 +1,555 @@
+from __future__ import annotations
+
+import atexit
+import re
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, List, NamedTuple, Optional, Sequence
+from urllib.parse import parse_qs, urlsplit
+
+from weather_command._columns import MPS_PER_MPH, HistoryColumns, get_history_columns
+from weather_command._config import (
+    HISTORY_BATCH_SIZE,
+    HISTORY_FLUSH_INTERVAL,
+    RATE_LIMIT_PERIODS,
+    get_history_enabled,
+    get_history_file,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from weather_command.models.location import Location
+
+KINDS = ("current", "hourly", "daily")
+
+FIELDS = (
+    "temp",
+    "feels_like",
+    "temp_min",
+    "temp_max",
+    "humidity",
+    "pressure",
+    "wind_speed",
+    "wind_deg",
+    "clouds",
+    "pop",
+    "precip",
+    "conditions",
+)
+
+_BUSY_TIMEOUT = 5.0
+# About 10 metres, enough to tell places apart while the coordinates of a geocoded location and of
+# the weather requested for it still match.
+_COORDINATE_DIGITS = 4
+_MAX_TIMESTAMP = 2**62
+_RELATIVE_TIME = re.compile(r"^(\d+(?:\.\d+)?)\s*([smhd])$", re.IGNORECASE)
+
+_enabled = False
+_writer: HistoryWriter | None = None
+_writer_lock = threading.Lock()
+
+
+class HistoryLocation(NamedTuple):
+    id: int
+    name: str
+    lat: float
+    lon: float
+    timezone_offset: int
+    records: int
+    first: Optional[datetime]
+    last: Optional[datetime]
+
+
+class Observation(NamedTuple):
+    """A current observation, forecast hour, or forecast day in metric units."""
+
+    location_id: int
+    dt: datetime
+    kind: str
+    fetched: datetime
+    temp: Optional[float]
+    feels_like: Optional[float]
+    temp_min: Optional[float]
+    temp_max: Optional[float]
+    humidity: Optional[int]
+    pressure: Optional[int]
+    wind_speed: Optional[float]
+    wind_deg: Optional[int]
+    clouds: Optional[int]
+    pop: Optional[float]
+    precip: Optional[float]
+    conditions: Optional[str]
+
+
+class HistoryEntry(NamedTuple):
+    """Rows waiting to be written for one location.
+
+    Each row is the timestamp, the index of the kind in KINDS, the time it was fetched, then the
+    values of FIELDS. An entry without rows only records the location's name.
+    """
+
+    lat: float
+    lon: float
+    name: Optional[str]
+    timezone_offset: Optional[int]
+    rows: List[tuple]
+
+
+class History:
+    """Observations and forecasts stored in SQLite, indexed by location and time.
+
+    Rows are kept in a WITHOUT ROWID table clustered on (location, timestamp, kind) so a range
+    query for a location reads one contiguous part of the file. A newer forecast for the same time
+    replaces the older one, so the history holds each location's latest forecast for every hour
+    and day along with its observations.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def add(self, entries: Sequence[HistoryEntry]) -> None:
+        """Writes the entries in one transaction."""
+        with closing(self._connect()) as conn, conn:
+            location_ids: dict[tuple[float, float], int] = {}
+            for entry in entries:
+                key = (entry.lat, entry.lon)
+                if key not in location_ids:
+                    location_ids[key] = self._location_id(conn, entry)
+                elif entry.name is not None or entry.timezone_offset is not None:
+                    self._update_location(conn, location_ids[key], entry)
+
+            conn.executemany(
+                f"INSERT OR REPLACE INTO observations (location_id, ts, kind, fetched, {', '.join(FIELDS)}) "
+                f"VALUES ({', '.join('?' * (len(FIELDS) + 4))})",
+                ((location_ids[(x.lat, x.lon)], *row) for x in entries for row in x.rows),
+            )
+
+    def find_locations(self, search: str | None = None) -> list[HistoryLocation]:
+        """The locations with a name containing search, or every location, with their row counts."""
+        if not self.path.exists():
+            return []
+
+        where = ""
+        params: tuple[Any, ...] = ()
+        if search:
+            where = "WHERE l.name LIKE ? ESCAPE '\\'"
+            escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params = (f"%{escaped}%",)
+
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT l.id, l.name, l.lat, l.lon, l.timezone_offset, COUNT(o.ts), MIN(o.ts), MAX(o.ts) "
+                "FROM locations l LEFT JOIN observations o ON o.location_id = l.id "
+                f"{where} GROUP BY l.id ORDER BY l.name, l.id",
+                params,
+            ).fetchall()
+
+        return [
+            HistoryLocation(
+                id,
+                name or f"{lat}, {lon}",
+                lat,
+                lon,
+                offset,
+                count,
+                _datetime(first) if first is not None else None,
+                _datetime(last) if last is not None else None,
+            )
+            for id, name, lat, lon, offset, count, first, last in rows
+        ]
+
+    def query(
+        self,
+        location_id: int,
+        *,
+        since: float | None = None,
+        until: float | None = None,
+        kinds: Sequence[str] = KINDS,
+    ) -> list[Observation]:
+        """The location's rows from since up to, but not including, until in time order."""
+        if not self.path.exists():
+            return []
+
+        with closing(self._connect()) as conn:
+            rows = self._select(
+                conn,
+                f"location_id, ts, kind, fetched, {', '.join(FIELDS)}",
+                location_id,
+                since,
+                until,
+                kinds,
+            ).fetchall()
+
+        return [
+            Observation(location, _datetime(ts), KINDS[kind], _datetime(fetched), *values)
+            for location, ts, kind, fetched, *values in rows
+        ]
+
+    def columns(
+        self,
+        location_ids: Sequence[int],
+        *,
+        since: float | None = None,
+        until: float | None = None,
+        kinds: Sequence[str] = KINDS,
+    ) -> HistoryColumns:
+        """The values summarize_daily needs from the locations' rows, as one array per field."""
+        rows: list[tuple] = []
+        if self.path.exists():
+            with closing(self._connect()) as conn:
+                for location_id in location_ids:
+                    rows.extend(
+                        self._select(
+                            conn,
+                            f"location_id, ts, {', '.join(HistoryColumns._fields[2:])}",
+                            location_id,
+                            since,
+                            until,
+                            kinds,
+                        )
+                    )
+
+        return get_history_columns(rows)
+
+    def _select(
+        self,
+        conn: sqlite3.Connection,
+        columns: str,
+        location_id: int,
+        since: float | None,
+        until: float | None,
+        kinds: Sequence[str],
+    ) -> sqlite3.Cursor:
+        # A range of the primary key, so only the location's rows in the range are read.
+        kind_ids = [KINDS.index(x) for x in kinds]
+        return conn.execute(
+            f"SELECT {columns} FROM observations WHERE location_id = ? AND ts >= ? AND ts < ? "
+            f"AND kind IN ({', '.join('?' * len(kind_ids))}) ORDER BY ts, kind",
+            (
+                location_id,
+                int(since) if since is not None else -_MAX_TIMESTAMP,
+                int(until) if until is not None else _MAX_TIMESTAMP,
+                *kind_ids,
+            ),
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=_BUSY_TIMEOUT)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS locations (id INTEGER PRIMARY KEY, lat REAL NOT NULL, "
+            "lon REAL NOT NULL, name TEXT, timezone_offset INTEGER NOT NULL DEFAULT 0, "
+            "UNIQUE (lat, lon))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS observations (location_id INTEGER NOT NULL, "
+            "ts INTEGER NOT NULL, kind INTEGER NOT NULL, fetched INTEGER NOT NULL, temp REAL, "
+            "feels_like REAL, temp_min REAL, temp_max REAL, humidity INTEGER, pressure INTEGER, "
+            "wind_speed REAL, wind_deg INTEGER, clouds INTEGER, pop REAL, precip REAL, "
+            "conditions TEXT, PRIMARY KEY (location_id, ts, kind)) WITHOUT ROWID"
+        )
+        return conn
+
+    def _location_id(self, conn: sqlite3.Connection, entry: HistoryEntry) -> int:
+        conn.execute(
+            "INSERT OR IGNORE INTO locations (lat, lon) VALUES (?, ?)", (entry.lat, entry.lon)
+        )
+        location_id = int(
+            conn.execute(
+                "SELECT id FROM locations WHERE lat = ? AND lon = ?", (entry.lat, entry.lon)
+            ).fetchone()[0]
+        )
+        self._update_location(conn, location_id, entry)
+        return location_id
+
+    def _update_location(
+        self, conn: sqlite3.Connection, location_id: int, entry: HistoryEntry
+    ) -> None:
+        if entry.name is not None:
+            conn.execute("UPDATE locations SET name = ? WHERE id = ?", (entry.name, location_id))
+        if entry.timezone_offset is not None:
+            conn.execute(
+                "UPDATE locations SET timezone_offset = ? WHERE id = ?",
+                (entry.timezone_offset, location_id),
+            )
+
+
+class HistoryWriter:
+    """Collects entries and writes them to the history in batches.
+
+    Writing every response in its own transaction would have batch runs waiting on the disk, so
+    entries are held until batch_size rows are waiting or interval seconds have passed. Errors
+    writing are ignored so a broken history never stops the weather from being shown.
+    """
+
+    def __init__(
+        self,
+        history: History,
+        *,
+        batch_size: int = HISTORY_BATCH_SIZE,
+        interval: float = HISTORY_FLUSH_INTERVAL,
+    ) -> None:
+        self.history = history
+        self.batch_size = batch_size
+        self.interval = interval
+        self._pending: list[HistoryEntry] = []
+        self._rows = 0
+        self._timer: threading.Timer | None = None
+        self._lock = threading.Lock()
+        # Held while writing so a flush from the timer and one at exit don't interleave.
+        self._write_lock = threading.Lock()
+
+    def add(self, entry: HistoryEntry) -> None:
+        with self._lock:
+            self._pending.append(entry)
+            self._rows += len(entry.rows)
+            full = self._rows >= self.batch_size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending, self._rows = self._pending, [], 0
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+
+            if not pending:
+                return
+
+            try:
+                self.history.add(pending)
+            except (sqlite3.Error, OSError):
+                pass
+
+
+def enable() -> None:
+    global _enabled
+
+    _enabled = True
+
+
+def is_enabled() -> bool:
+    return _enabled or get_history_enabled()
+
+
+def reset() -> None:
+    """Writes anything waiting and stops recording."""
+    global _enabled, _writer
+
+    flush()
+    _enabled = False
+    _writer = None
+
+
+def flush() -> None:
+    if _writer is not None:
+        _writer.flush()
+
+
+def get_history() -> History:
+    return History(get_history_file())
+
+
+def record_location(location: Location) -> None:
+    """Saves the name of a geocoded location so its one call forecasts can be found by name."""
+    writer = _get_writer()
+    if writer is not None:
+        writer.add(
+            HistoryEntry(
+                _round_coordinate(location.lat),
+                _round_coordinate(location.lon),
+                location.display_name,
+                None,
+                [],
+            )
+        )
+
+
+def record_weather(url: str, weather: Any) -> None:
+    """Saves the current weather or one call forecast retrieved from url.
+
+    Temperature only responses aren't saved, they would replace full rows with partial ones.
+    """
+    writer = _get_writer()
+    if writer is not None:
+        entry = _weather_entry(url, weather, int(time.time()))
+        if entry is not None:
+            writer.add(entry)
+
+
+def parse_time(value: str, now: float | None = None) -> float:
+    """Parses how long ago, like 6h or 2d, or an ISO 8601 date and time into a timestamp.
+
+    Dates and times without a timezone are in local time.
+    """
+    match = _RELATIVE_TIME.match(value.strip())
+    if match:
+        now = time.time() if now is None else now
+        return now - float(match.group(1)) * RATE_LIMIT_PERIODS[match.group(2).lower()]
+
+    return datetime.fromisoformat(value.strip()).timestamp()
+
+
+def _get_writer() -> HistoryWriter | None:
+    global _writer
+
+    if not is_enabled():
+        return None
+
+    with _writer_lock:
+        if _writer is None:
+            _writer = HistoryWriter(get_history())
+            atexit.register(flush)
+
+    return _writer
+
+
+def _weather_entry(url: str, weather: Any, fetched: int) -> HistoryEntry | None:
+    from weather_command.models.records import OneCallTempRecord
+    from weather_command.models.weather import CurrentWeather
+
+    query = parse_qs(urlsplit(url).query)
+    units = query.get("units", ["standard"])[0]
+
+    if isinstance(weather, OneCallTempRecord):
+        return None
+
+    if isinstance(weather, CurrentWeather):
+        main = weather.main
+        precip = sum(x.one_hour for x in (weather.rain, weather.snow) if x)
+        row = _row(
+            weather.dt,
+            "current",
+            fetched,
+            units,
+            temp=main.temp,
+            feels_like=main.feels_like,
+            temp_min=main.temp_min,
+            temp_max=main.temp_max,
+            humidity=main.humidity,
+            pressure=main.pressure,
+            wind_speed=weather.wind.speed if weather.wind else None,
+            wind_deg=weather.wind.deg if weather.wind else None,
+            clouds=weather.clouds.all if weather.clouds else None,
+            precip=precip,
+            conditions=weather.weather[0].description if weather.weather else None,
+        )
+        return HistoryEntry(
+            _round_coordinate(weather.coord.lat),
+            _round_coordinate(weather.coord.lon),
+            weather.name,
+            weather.timezone,
+            [row],
+        )
+
+    rows = []
+    if weather.current is not None:
+        current = weather.current
+        rows.append(
+            _row(
+                current.dt,
+                "current",
+                fetched,
+                units,
+                temp=current.temp,
+                feels_like=current.feels_like,
+                humidity=current.humidity,
+                pressure=current.pressure,
+                wind_speed=current.wind_speed,
+                wind_deg=current.wind_deg,
+                clouds=current.clouds,
+                conditions=_conditions(current),
+            )
+        )
+    for hour in weather.hourly:
+        rows.append(
+            _row(
+                hour.dt,
+                "hourly",
+                fetched,
+                units,
+                temp=hour.temp,
+                feels_like=hour.feels_like,
+                humidity=hour.humidity,
+                pressure=hour.pressure,
+                wind_speed=hour.wind_speed,
+                wind_deg=hour.wind_deg,
+                clouds=hour.clouds,
+                pop=hour.pop,
+                precip=sum(x.one_hour for x in (hour.rain, hour.snow) if x),
+                conditions=_conditions(hour),
+            )
+        )
+    for day in weather.daily:
+        rows.append(
+            _row(
+                day.dt,
+                "daily",
+                fetched,
+                units,
+                temp=day.temp.day,
+                feels_like=day.feels_like.day,
+                temp_min=day.temp.min,
+                temp_max=day.temp.max,
+                humidity=day.humidity,
+                pressure=day.pressure,
+                wind_speed=day.wind_speed,
+                wind_deg=day.wind_deg,
+                clouds=day.clouds,
+                pop=day.pop,
+                precip=day.rain,
+                conditions=_conditions(day),
+            )
+        )
+
+    # The coordinates requested, which are the geocoded location's, rather than the rounded ones
+    # OpenWeather sends back, so the forecast is saved under the location's name.
+    lat = float(query["lat"][0]) if "lat" in query else weather.lat
+    lon = float(query["lon"][0]) if "lon" in query else weather.lon
+    return HistoryEntry(
+        _round_coordinate(lat), _round_coordinate(lon), None, weather.timezone_offset, rows
+    )
+
+
+def _row(dt: datetime | int, kind: str, fetched: int, units: str, **values: Any) -> tuple:
+    for name in ("temp", "feels_like", "temp_min", "temp_max"):
+        if values.get(name) is not None:
+            values[name] = round(_to_celsius(values[name], units), 2)
+    if values.get("wind_speed") is not None and units == "imperial":
+        # OpenWeather sends miles per hour for imperial and metres per second otherwise.
+        values["wind_speed"] = round(values["wind_speed"] * MPS_PER_MPH, 2)
+
+    ts = dt if isinstance(dt, int) else int(dt.timestamp())
+    return (ts, KINDS.index(kind), fetched, *(values.get(x) for x in FIELDS))
+
+
+def _to_celsius(value: float, units: str) -> float:
+    if units == "metric":
+        return value
+    if units == "imperial":
+        return (value - 32) * 5 / 9
+    return value - 273.15
+
+
+def _conditions(value: Any) -> str | None:
+    weather = getattr(value, "weather", None)
+    return weather[0].description if weather else None
+
+
+def _round_coordinate(value: float) -> float:
+    return round(float(value), _COORDINATE_DIGITS)
+
+
+def _datetime(value: int) -> datetime:
+    return datetime.fromtimestamp(value, timezone.utc)
@@ -0,0 +1,346 @@
+from __future__ import annotations
+
+import asyncio
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+from importlib.util import find_spec
+from typing import Any, Iterator
+from weakref import WeakKeyDictionary
+
+import httpx
+
+from weather_command import _metrics, _timings
+from weather_command._archive import Archive, get_archive
+from weather_command._config import (
+    get_http_keepalive_expiry,
+    get_http_max_connections,
+    get_http_max_keepalive_connections,
+    get_http_timeout,
+)
+from weather_command._rate_limit import RateLimiter, get_rate_limiter
+from weather_command._resilience import (
+    RetryPolicy,
+    get_retry_policy,
+    hedged,
+    hedged_async,
+    is_retryable,
+    record_latency,
+)
+from weather_command.errors import get_retry_after
+
+USER_AGENT = "weather-command"
+
+_client: httpx.Client | None = None
+_client_lock = threading.Lock()
+
+# When each request was sent and its response headers arrived, recorded by the event hooks
+# while timings are enabled.
+_sent: WeakKeyDictionary[httpx.Request, float] = WeakKeyDictionary()
+_received: WeakKeyDictionary[httpx.Response, float] = WeakKeyDictionary()
+
+
+def get(url: str, **kwargs: Any) -> httpx.Response:
+    """Sends a GET request through the shared client.
+
+    Requests are rate limited, transport errors and 5xx responses are retried with jittered
+    exponential backoff, 429 responses are retried after the time the server asks for, and slow
+    requests can be hedged with a second identical request.
+    """
+    return _get(url, stream=False, **kwargs)
+
+
+@contextmanager
+def stream(url: str, **kwargs: Any) -> Iterator[httpx.Response]:
+    """Like get but the body is not read so it can be processed as it arrives with iter_bytes.
+
+    Requests are retried the same way as get, which only happens before the body is read. Streamed
+    requests are never hedged because the slower response would hold a connection open.
+    """
+    response = _get(url, stream=True, **kwargs)
+    try:
+        yield response
+    finally:
+        response.close()
+
+
+async def async_get(client: httpx.AsyncClient, url: str, **kwargs: Any) -> httpx.Response:
+    """Async version of get."""
+    archive = get_archive()
+    if archive is not None and archive.replay:
+        replayed, latency = archive.lookup(client.build_request("GET", url, **kwargs))
+        await asyncio.sleep(latency)
+        return replayed
+
+    host = httpx.URL(url).host
+    with _timings.span("http", host=host) as attributes:
+        response = await _async_get(client, archive, url, host, **kwargs)
+        attributes["status"] = response.status_code
+        return response
+
+
+async def _async_get(
+    client: httpx.AsyncClient, archive: Archive | None, url: str, host: str, **kwargs: Any
+) -> httpx.Response:
+    rate_limiter = get_rate_limiter()
+    policy = get_retry_policy()
+
+    async def send() -> tuple[httpx.Response, float]:
+        # Timed inside each send so a hedged request isn't given the other request's time.
+        start = time.perf_counter()
+        try:
+            response = await client.get(url, **kwargs)
+        except httpx.TransportError as e:
+            _metrics.UPSTREAM_ERRORS.inc(host=host, error=e.__class__.__name__)
+            raise
+        _record_transfer(response)
+        elapsed = time.perf_counter() - start
+        _record_response(host, response, elapsed)
+        return response, elapsed
+
+    attempt = 0
+    while True:
+        with _timings.span("rate_limit"):
+            await rate_limiter.acquire_async(host)
+        response: httpx.Response | None = None
+        try:
+            response, elapsed = await hedged_async(
+                send, policy.hedge_delay(host), lambda: rate_limiter.try_acquire(host)
+            )
+        except httpx.TransportError as e:
+            if attempt >= policy.retries:
+                raise
+            error: Exception | None = e
+        else:
+            error = None
+
+        delay = _retry_delay(response, error, attempt, policy, rate_limiter)
+        if delay is None:
+            assert response is not None
+            if archive is not None:
+                archive.record(client.build_request("GET", url, **kwargs), response, elapsed)
+            return response
+
+        _record_retry(host, response)
+        with _timings.span("backoff", attempt=attempt):
+            await asyncio.sleep(delay)
+        attempt += 1
+
+
+def get_client() -> httpx.Client:
+    """Returns the shared client so connections are reused between requests."""
+    global _client
+
+    with _client_lock:
+        if _client is None or _client.is_closed:
+            options = _client_options()
+            if _timings.is_enabled():
+                options["event_hooks"] = {"request": [_on_request], "response": [_on_response]}
+            _client = httpx.Client(**options)
+
+    return _client
+
+
+def new_async_client() -> httpx.AsyncClient:
+    """Creates an async client configured the same way as the shared client.
+
+    Async clients are tied to the event loop they are first used in so, unlike the sync client,
+    these are not shared. Use one per event loop.
+    """
+    options = _client_options()
+    if _timings.is_enabled():
+        options["event_hooks"] = {
+            "request": [_on_request_async],
+            "response": [_on_response_async],
+        }
+    return httpx.AsyncClient(**options)
+
+
+def close() -> None:
+    global _client
+
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def _get(url: str, *, stream: bool, **kwargs: Any) -> httpx.Response:
+    client = get_client()
+    archive = get_archive()
+    if archive is not None and archive.replay:
+        replayed, latency = archive.lookup(client.build_request("GET", url, **kwargs))
+        time.sleep(latency)
+        return replayed
+
+    host = httpx.URL(url).host
+    with _timings.span("http", host=host) as attributes:
+        response = _send(client, archive, url, host, stream=stream, **kwargs)
+        attributes["status"] = response.status_code
+        return response
+
+
+def _send(
+    client: httpx.Client,
+    archive: Archive | None,
+    url: str,
+    host: str,
+    *,
+    stream: bool,
+    **kwargs: Any,
+) -> httpx.Response:
+    rate_limiter = get_rate_limiter()
+    policy = get_retry_policy()
+
+    def send() -> tuple[httpx.Response, float]:
+        # Timed inside each send so a hedged request isn't given the other request's time.
+        start = time.perf_counter()
+        try:
+            if stream:
+                response = client.send(client.build_request("GET", url, **kwargs), stream=True)
+            else:
+                response = client.get(url, **kwargs)
+                _record_transfer(response)
+        except httpx.TransportError as e:
+            _metrics.UPSTREAM_ERRORS.inc(host=host, error=e.__class__.__name__)
+            raise
+        elapsed = time.perf_counter() - start
+        _record_response(host, response, elapsed)
+        return response, elapsed
+
+    attempt = 0
+    while True:
+        with _timings.span("rate_limit"):
+            rate_limiter.acquire(host)
+        response: httpx.Response | None = None
+        try:
+            response, elapsed = hedged(
+                send,
+                None if stream else policy.hedge_delay(host),
+                lambda: rate_limiter.try_acquire(host),
+                discard=_close_sent,
+            )
+        except httpx.TransportError as e:
+            if attempt >= policy.retries:
+                raise
+            error: Exception | None = e
+        else:
+            error = None
+
+        delay = _retry_delay(response, error, attempt, policy, rate_limiter)
+        if delay is None:
+            assert response is not None
+            if archive is not None:
+                # Recording needs the whole body so recorded responses aren't streamed.
+                response.read()
+                archive.record(client.build_request("GET", url, **kwargs), response, elapsed)
+            return response
+
+        if stream and response is not None:
+            response.close()
+        _record_retry(host, response)
+        with _timings.span("backoff", attempt=attempt):
+            time.sleep(delay)
+        attempt += 1
+
+
+def _client_options() -> dict[str, Any]:
+    return {
+        "headers": {"user-agent": USER_AGENT},
+        "http2": _http2_available(),
+        "limits": httpx.Limits(
+            max_connections=get_http_max_connections(),
+            max_keepalive_connections=get_http_max_keepalive_connections(),
+            keepalive_expiry=get_http_keepalive_expiry(),
+        ),
+        "timeout": httpx.Timeout(get_http_timeout()),
+    }
+
+
+def _retry_delay(
+    response: httpx.Response | None,
+    error: Exception | None,
+    attempt: int,
+    policy: RetryPolicy,
+    rate_limiter: RateLimiter,
+) -> float | None:
+    """Returns how long to wait before retrying, or None if the response should be returned."""
+    if response is not None and response.status_code == 429:
+        retry_after = get_retry_after(response)
+        if retry_after is None:
+            retry_after = policy.backoff_delay(attempt)
+
+        # Other processes sharing the quota back off as well.
+        rate_limiter.penalize(response.request.url.host, retry_after)
+
+        if attempt >= policy.retries or retry_after > rate_limiter.max_wait:
+            return None
+
+        return retry_after
+
+    if attempt >= policy.retries or not is_retryable(response, error):
+        return None
+
+    return policy.backoff_delay(attempt)
+
+
+def _on_request(request: httpx.Request) -> None:
+    _sent[request] = time.perf_counter()
+
+
+def _on_response(response: httpx.Response) -> None:
+    # Response hooks run once the headers arrive, before the body is read. httpx doesn't time
+    # DNS, connecting, and TLS separately so they are part of the wait.
+    now = time.perf_counter()
+    sent = _sent.pop(response.request, None)
+    if sent is not None:
+        _timings.record("wait", sent, now, http_version=response.http_version)
+    _received[response] = now
+
+
+async def _on_request_async(request: httpx.Request) -> None:
+    _on_request(request)
+
+
+async def _on_response_async(response: httpx.Response) -> None:
+    _on_response(response)
+
+
+def _record_response(host: str, response: httpx.Response, elapsed: float) -> None:
+    record_latency(host, elapsed)
+    _metrics.UPSTREAM_LATENCY.observe(elapsed, host=host)
+    _metrics.UPSTREAM_RESPONSES.inc(host=host, status=response.status_code)
+
+
+def _record_retry(host: str, response: httpx.Response | None) -> None:
+    if response is None:
+        reason = "error"
+    elif response.status_code == 429:
+        reason = "rate_limited"
+    else:
+        reason = "status"
+    _metrics.RETRIES.inc(host=host, reason=reason)
+
+
+def _close_sent(sent: tuple[httpx.Response, float]) -> None:
+    """Closes the response of a hedged request that finished after the other one was used."""
+    sent[0].close()
+
+
+def _record_transfer(response: httpx.Response) -> None:
+    received = _received.pop(response, None)
+    if received is not None:
+        _timings.record(
+            "transfer", received, time.perf_counter(), bytes=response.num_bytes_downloaded
+        )
+
+
+def _http2_available() -> bool:
+    # The http2 and brotli extras of httpx are installed with weather-command, this only guards
+    # against installs without them. gzip is always negotiated and brotli is negotiated
+    # automatically by httpx when the brotli package is installed.
+    return find_spec("h2") is not None
+
+
+atexit.register(close)
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import asyncio
+import csv
+import json
+import time
+from pathlib import Path
+from typing import Any, Iterable, Iterator, NamedTuple, TextIO
+
+import httpx
+from rich.console import Console
+
+from weather_command import _http
+from weather_command._batch import BatchLocation
+from weather_command._builder import build_url
+from weather_command._config import DEFAULT_CONCURRENCY, PROGRESS_INTERVAL
+from weather_command._location import get_location_details_async
+from weather_command._weather import get_weather_async
+from weather_command.errors import describe_error
+from weather_command.models.location import Location
+from weather_command.models.weather import OneCallWeather
+
+
+class IngestStats:
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.read = 0
+        self.written = 0
+        self.failed = 0
+
+    @property
+    def processed(self) -> int:
+        return self.written + self.failed
+
+    @property
+    def rate(self) -> float:
+        elapsed = time.monotonic() - self.started
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"Processed {self.processed} locations ({self.written} written, {self.failed} failed) "
+            f"at {self.rate:.1f} locations/sec"
+        )
+
+
+class IngestRow(NamedTuple):
+    line: int
+    batch_location: BatchLocation | None
+    error: str | None = None
+
+
+def read_locations(
+    lines: Iterable[str],
+    file_format: str,
+    *,
+    how: str = "city",
+    state_code: str | None = None,
+    country_code: str | None = None,
+) -> Iterator[IngestRow]:
+    """Lazily reads locations from CSV or JSON lines.
+
+    Each record needs a city_zip field and can have how, state_code, and country_code fields. Any
+    that are missing fall back to the values passed in. Records that can't be read are returned
+    with an error instead of stopping the whole file.
+    """
+    records: Iterable[dict[str, Any] | str | csv.Error]
+    if file_format == "csv":
+        records = _read_csv(lines)
+    else:
+        records = (x for x in lines if x.strip())
+
+    for line_number, record in enumerate(records, start=1):
+        try:
+            if isinstance(record, csv.Error):
+                raise ValueError(str(record))
+            if isinstance(record, str):
+                record = json.loads(record)
+                if not isinstance(record, dict):
+                    raise ValueError("expected an object")
+
+            city_zip = str(record.get("city_zip") or "").strip()
+            if not city_zip:
+                raise ValueError("missing city_zip")
+
+            record_how = record.get("how") or how
+            if record_how not in ("city", "zip"):
+                raise ValueError(f"{record_how} is not a valid how")
+
+            yield IngestRow(
+                line=line_number,
+                batch_location=BatchLocation(
+                    how=record_how,
+                    city_zip=city_zip,
+                    state_code=record.get("state_code") or state_code,
+                    country_code=record.get("country_code") or country_code,
+                ),
+            )
+        except ValueError as e:
+            yield IngestRow(line=line_number, batch_location=None, error=str(e))
+
+
+def _read_csv(lines: Iterable[str]) -> Iterator[dict[str, Any] | csv.Error]:
+    """The CSV's rows, with the error in place of a row the csv module can't read.
+
+    Rows with a NUL byte or a field over the size limit raise csv.Error, after which the reader
+    carries on from the next line.
+    """
+    reader = csv.DictReader(lines)
+    while True:
+        try:
+            yield next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield e
+
+
+def detect_format(path: Path | None) -> str:
+    if path and path.suffix.lower() in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+
+    return "csv"
+
+
+async def ingest_locations(
+    rows: Iterable[IngestRow],
+    out: TextIO,
+    progress: Console,
+    *,
+    units: str = "metric",
+    max_age: int | None = None,
+    no_cache: bool = False,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    progress_interval: float = PROGRESS_INTERVAL,
+) -> IngestStats:
+    """Streams locations through geocoding, fetching, and writing NDJSON.
+
+    The stages are connected by bounded queues so only a small, fixed number of locations are held
+    in memory at any time no matter how large the input is.
+    """
+    stats = IngestStats()
+    locations: asyncio.Queue[IngestRow | None] = asyncio.Queue(maxsize=concurrency * 2)
+    located: asyncio.Queue[tuple[BatchLocation, Location] | None] = asyncio.Queue(
+        maxsize=concurrency * 2
+    )
+    fetched: asyncio.Queue[tuple[BatchLocation, Location, OneCallWeather] | None] = asyncio.Queue(
+        maxsize=concurrency * 2
+    )
+
+    async def read() -> None:
+        for row in rows:
+            stats.read += 1
+            if row.batch_location is None:
+                stats.failed += 1
+                progress.print(f"[red]Line {row.line}: {row.error}[/red]")
+                continue
+            await locations.put(row)
+
+        for _ in range(concurrency):
+            await locations.put(None)
+
+    async def geocode(client: httpx.AsyncClient) -> None:
+        while True:
+            row = await locations.get()
+            if row is None:
+                return
+
+            assert row.batch_location is not None
+            try:
+                location = await get_location_details_async(
+                    client,
+                    how=row.batch_location.how,
+                    city_zip=row.batch_location.city_zip,
+                    state=row.batch_location.state_code,
+                    country=row.batch_location.country_code,
+                )
+            except Exception as e:
+                _report_failure(progress, stats, row.batch_location, e)
+                continue
+
+            await located.put((row.batch_location, location))
+
+    async def fetch(client: httpx.AsyncClient) -> None:
+        while True:
+            item = await located.get()
+            if item is None:
+                return
+
+            batch_location, location = item
+            url = build_url(
+                forecast_type="onecall", units=units, lon=location.lon, lat=location.lat
+            )
+            try:
+                weather = await get_weather_async(
+                    client, url, OneCallWeather, max_age=max_age, no_cache=no_cache
+                )
+            except Exception as e:
+                _report_failure(progress, stats, batch_location, e)
+                continue
+
+            await fetched.put((batch_location, location, weather))
+
+    async def write() -> None:
+        while True:
+            item = await fetched.get()
+            if item is None:
+                out.flush()
+                return
+
+            out.write(_to_ndjson(*item))
+            out.write("\n")
+            stats.written += 1
+
+    async def report() -> None:
+        while True:
+            await asyncio.sleep(progress_interval)
+            progress.print(stats.summary())
+
+    async def run_stage(workers: list[Any], next_queue: asyncio.Queue, consumers: int) -> None:
+        await asyncio.gather(*workers)
+        for _ in range(consumers):
+            await next_queue.put(None)
+
+    async with _http.new_async_client() as client:
+        reporter = asyncio.ensure_future(report())
+        try:
+            await asyncio.gather(
+                read(),
+                run_stage([geocode(client) for _ in range(concurrency)], located, concurrency),
+                run_stage([fetch(client) for _ in range(concurrency)], fetched, 1),
+                write(),
+            )
+        finally:
+            reporter.cancel()
+
+    progress.print(stats.summary())
+    return stats
+
+
+def _report_failure(
+    progress: Console, stats: IngestStats, batch_location: BatchLocation, error: Exception
+) -> None:
+    stats.failed += 1
+    progress.print(
+        f"[red]Unable to get weather data for {batch_location.name}: {describe_error(error)}[/red]"
+    )
+
+
+def _to_ndjson(batch_location: BatchLocation, location: Location, weather: OneCallWeather) -> str:
+    query = json.dumps(batch_location._asdict())
+    return f'{{"query": {query}, "location": {location.json()}, "weather": {weather.json()}}}'
@@ -1,15 +1,35 @@
 from __future__ import annotations
 
+import json
 import sys
+from typing import TYPE_CHECKING
 
-import httpx
 from pydantic.error_wrappers import ValidationError
-from rich.console import Console
 
-from weather_command._config import LOCATION_BASE_URL
-from weather_command.errors import UnknownSearchTypeError, check_status_error
+from weather_command import _history, _metrics
+from weather_command._cache import Cache
+from weather_command._config import (
+    LOCATION_BASE_URL,
+    get_cache_dir,
+    get_city_index_file,
+    get_geocode_cache_max_entries,
+    get_geocode_cache_ttl,
+    get_postal_index_file,
+)
+from weather_command._timings import span
+from weather_command.errors import (
+    RateLimitExceeded,
+    UnknownSearchTypeError,
+    check_status_error,
+    print_rate_limit_error,
+    print_request_error,
+)
 from weather_command.models.location import Location
 
+if TYPE_CHECKING:  # pragma: no cover
+    import httpx
+    from rich.console import Console
+
 
 def get_location_details(
     *,
@@ -19,12 +39,208 @@ def get_location_details(
     country: str | None = None,
     console: Console,
 ) -> Location:
-    if how not in ["city", "zip"]:
-        raise UnknownSearchTypeError(f"{type} is not a valid type")
+    _validate_how(how)
+
+    with span("geocode") as attributes:
+        location = _find_indexed_location(how, city_zip, state, country)
+        attributes["indexed"] = location is not None
+        if location is None:
+            cache = get_geocode_cache()
+            cache_key = _geocode_cache_key(how=how, city_zip=city_zip, state=state, country=country)
+            cached = _get_cached_location(cache, cache_key)
+            attributes["cached"] = cached is not None
+            location = cached or _fetch_location(
+                cache, cache_key, how, city_zip, state, country, console
+            )
+
+    _history.record_location(location)
+    return location
+
+
+def _fetch_location(
+    cache: Cache,
+    cache_key: str,
+    how: str,
+    city_zip: str,
+    state: str | None,
+    country: str | None,
+    console: Console,
+) -> Location:
+    # Only imported when the location isn't cached, see _weather._fetch_weather.
+    import httpx
+
+    from weather_command import _http
+
+    try:
+        response = _http.get(_build_location_url(how, city_zip, state, country))
+        location = _parse_location_response(response)
+        cache.set(cache_key, location.json())
+        _learn_location(how, city_zip, state, country, location)
+        return location
+    except IndexError:
+        # Nothing was found, the name may be misspelled.
+        corrected = _find_corrected_location(how, city_zip, state, country)
+        if corrected is None:
+            console.print("[red]Unable to get information for the specified location.[/red]")
+            sys.exit(1)
+
+        console.print(
+            f"[yellow]{city_zip} wasn't found, using {corrected.display_name} instead[/yellow]"
+        )
+        return corrected
+    except httpx.HTTPStatusError as e:
+        check_status_error(e, console)
+    except RateLimitExceeded as e:
+        print_rate_limit_error(e, console)
+    except httpx.TransportError as e:
+        print_request_error(e, console)
+    except ValidationError:
+        console.print("[red]Unable to get information for the specified location.[/red]")
+        sys.exit(1)
+
+    # Shouldn't be possible to reach this. Here as a fail safe.
+    console.print("[red]Unable to get weather data[/red]")  # pragma: no cover
+    sys.exit(1)  # pragma: no cover
+
+
+async def get_location_details_async(
+    client: httpx.AsyncClient,
+    *,
+    how: str,
+    city_zip: str,
+    state: str | None = None,
+    country: str | None = None,
+) -> Location:
+    """Async version of get_location_details.
+
+    Errors are raised instead of exiting so one bad location doesn't stop the others.
+    """
+    _validate_how(how)
+
+    with span("geocode") as attributes:
+        location = _find_indexed_location(how, city_zip, state, country)
+        attributes["indexed"] = location is not None
+        if location is None:
+            cache = get_geocode_cache()
+            cache_key = _geocode_cache_key(how=how, city_zip=city_zip, state=state, country=country)
+            location = _get_cached_location(cache, cache_key)
+            attributes["cached"] = location is not None
+            if location is None:
+                from weather_command import _http
+
+                response = await _http.async_get(
+                    client, _build_location_url(how, city_zip, state, country)
+                )
+                try:
+                    location = _parse_location_response(response)
+                except IndexError:
+                    # The corrected city's name is what is shown for the location.
+                    location = _find_corrected_location(how, city_zip, state, country)
+                    if location is None:
+                        raise
+                else:
+                    cache.set(cache_key, location.json())
+                    _learn_location(how, city_zip, state, country, location)
+
+    _history.record_location(location)
+    return location
+
+
+def get_geocode_cache() -> Cache:
+    return Cache(
+        get_cache_dir() / "cache.sqlite",
+        "geocode",
+        ttl=get_geocode_cache_ttl(),
+        max_entries=get_geocode_cache_max_entries(),
+    )
 
+
+def _find_indexed_location(
+    how: str, city_zip: str, state: str | None, country: str | None
+) -> Location | None:
+    """Looks the location up in the local postal code or city index, if there is one."""
+    if how == "zip":
+        path = get_postal_index_file()
+        if not path.exists():
+            return None
+
+        from weather_command._postal import find_postal_place
+
+        with span("index"):
+            place = find_postal_place(path, city_zip, country)
+        _metrics.CACHE_LOOKUPS.inc(cache="postal", result="hit" if place else "miss")
+        if place is None:
+            return None
+
+        return Location(display_name=place.name, lat=place.lat, lon=place.lon)
+
+    path = get_city_index_file()
+    if not path.exists():
+        return None
+
+    from weather_command._cities import CityIndex
+
+    # Only an exact match is used, a name that is close to an indexed city could be a different
+    # place that isn't in the index.
+    with span("index"):
+        candidate = CityIndex(path).find(city_zip, state=state, country=country)
+    _metrics.CACHE_LOOKUPS.inc(cache="city", result="hit" if candidate else "miss")
+    if candidate is None:
+        return None
+
+    return Location(display_name=candidate.display_name, lat=candidate.lat, lon=candidate.lon)
+
+
+def _find_corrected_location(
+    how: str, city_zip: str, state: str | None, country: str | None
+) -> Location | None:
+    """The indexed city the name is a misspelling of, for when the geocoding service found nothing."""
+    path = get_city_index_file()
+    if how != "city" or not path.exists():
+        return None
+
+    from weather_command._cities import CityIndex
+
+    with span("index"):
+        candidate = CityIndex(path).correct(city_zip, state=state, country=country)
+    if candidate is None:
+        return None
+
+    return Location(display_name=candidate.display_name, lat=candidate.lat, lon=candidate.lon)
+
+
+def _learn_location(
+    how: str, city_zip: str, state: str | None, country: str | None, location: Location
+) -> None:
+    # Cities found by the geocoding service are added to the city index so the same name can be
+    # found without it next time, and misspellings of it corrected.
+    if how == "city":
+        from weather_command._cities import CityIndex
+
+        CityIndex(get_city_index_file()).learn(city_zip, state, country, location)
+
+
+def _get_cached_location(cache: Cache, cache_key: str) -> Location | None:
+    with span("cache"):
+        cached = cache.get(cache_key)
+        _metrics.CACHE_LOOKUPS.inc(cache="geocode", result="hit" if cached else "miss")
+        if not cached:
+            return None
+
+    with span("validate"):
+        return Location.parse_raw(cached.value)
+
+
+def _geocode_cache_key(*, how: str, city_zip: str, state: str | None, country: str | None) -> str:
+    return json.dumps(
+        [how, *(" ".join(x.split()).lower() if x else "" for x in (city_zip, state, country))]
+    )
+
+
+def _build_location_url(how: str, city_zip: str, state: str | None, country: str | None) -> str:
     if how == "city":
         base_url = f"{LOCATION_BASE_URL}&city={city_zip}"
-    elif how == "zip":
+    else:
         base_url = f"{LOCATION_BASE_URL}&postalcode={city_zip}"
 
     if state:
@@ -33,21 +249,21 @@ def get_location_details(
     if country:
         base_url = f"{base_url}&country={country}"
 
-    response = httpx.get(base_url, headers={"user-agent": "weather-command"})
-    try:
-        response.raise_for_status()
+    return base_url
+
+
+def _parse_location_response(response: httpx.Response) -> Location:
+    response.raise_for_status()
+    with span("decode"):
         response_json = response.json()
 
+    with span("validate"):
         if isinstance(response_json, list):
             return Location(**response_json[0])
 
         return Location(**response_json)
-    except httpx.HTTPStatusError as e:
-        check_status_error(e, console)
-    except ValidationError:
-        console.print("[red]Unable to get information for the specified location.[/red]")
-        sys.exit(1)
 
-    # Shouldn't be possible to reach this. Here as a fail safe.
-    console.print("[red]Unable to get weather data[/red]")  # pragma: no cover
-    sys.exit(1)  # pragma: no cover
+
+def _validate_how(how: str) -> None:
+    if how not in ["city", "zip"]:
+        raise UnknownSearchTypeError(f"{type} is not a valid type")
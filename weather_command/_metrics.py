@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import math
+import os
+import tempfile
+import threading
+from bisect import bisect_left
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Sequence
+
+from weather_command import _timings
+from weather_command._config import METRICS_HOST, METRICS_TEXTFILE_INTERVAL
+
+if TYPE_CHECKING:  # pragma: no cover
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+PHASE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Only these phases are kept as metrics, the rest of the spans overlap with the request metrics.
+PHASES = ("geocode", "weather", "decode", "validate", "render")
+
+_enabled = False
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, Any]) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} needs the labels {', '.join(self.labelnames)}")
+        return tuple(str(labels[x]) for x in self.labelnames)
+
+    def clear(self) -> None:
+        raise NotImplementedError  # pragma: no cover
+
+    def samples(self) -> list[tuple[str, tuple[tuple[str, str], ...], float]]:
+        raise NotImplementedError  # pragma: no cover
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for name, labels, value in self.samples():
+            label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+            name = f"{name}{{{label_text}}}" if labels else name
+            lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if not _enabled:
+            return
+
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def samples(self) -> list[tuple[str, tuple[tuple[str, str], ...], float]]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [(self.name, tuple(zip(self.labelnames, k)), v) for k, v in values]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        *,
+        buckets: Sequence[float],
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set, the count in each bucket (not cumulative, the last is +Inf) and the sum.
+        self._values: dict[tuple[str, ...], tuple[list[int], float]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        if not _enabled:
+            return
+
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def samples(self) -> list[tuple[str, tuple[tuple[str, str], ...], float]]:
+        with self._lock:
+            values = sorted((k, (list(c), s)) for k, (c, s) in self._values.items())
+
+        samples = []
+        for key, (counts, total) in values:
+            labels = tuple(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                bucket_labels = (*labels, ("le", _format_value(bound)))
+                samples.append((f"{self.name}_bucket", bucket_labels, float(cumulative)))
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, float(cumulative)))
+
+        return samples
+
+
+UPSTREAM_LATENCY = Histogram(
+    "weather_command_upstream_request_duration_seconds",
+    "Time taken by each request to OpenWeather or the geocoding service. Retries are timed separately.",
+    ("host",),
+    buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_RESPONSES = Counter(
+    "weather_command_upstream_responses_total",
+    "Responses from OpenWeather and the geocoding service by status code.",
+    ("host", "status"),
+)
+UPSTREAM_ERRORS = Counter(
+    "weather_command_upstream_errors_total",
+    "Requests that failed without a response, such as timeouts and connection errors.",
+    ("host", "error"),
+)
+RETRIES = Counter(
+    "weather_command_upstream_retries_total",
+    "Requests that were retried, by why they were retried.",
+    ("host", "reason"),
+)
+CACHE_LOOKUPS = Counter(
+    "weather_command_cache_lookups_total",
+    "Cache lookups by whether the data was found fresh (hit), found but stale, or not found (miss).",
+    ("cache", "result"),
+)
+PHASE_DURATION = Histogram(
+    "weather_command_phase_duration_seconds",
+    "Time taken by each phase of getting and showing the weather.",
+    ("phase",),
+    buckets=PHASE_BUCKETS,
+)
+SERVE_REQUESTS = Counter(
+    "weather_command_serve_requests_total",
+    "Requests answered by the serve command by path and status code.",
+    ("path", "status"),
+)
+
+METRICS: tuple[_Metric, ...] = (
+    UPSTREAM_LATENCY,
+    UPSTREAM_RESPONSES,
+    UPSTREAM_ERRORS,
+    RETRIES,
+    CACHE_LOOKUPS,
+    PHASE_DURATION,
+    SERVE_REQUESTS,
+)
+
+
+def enable() -> None:
+    """Starts recording metrics, including the phase timings from _timings."""
+    global _enabled
+
+    if not _enabled:
+        _enabled = True
+        _timings.add_observer(_observe_span)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset() -> None:
+    """Stops recording and clears the recorded values."""
+    global _enabled
+
+    _enabled = False
+    _timings.remove_observer(_observe_span)
+    for metric in METRICS:
+        metric.clear()
+
+
+def render() -> str:
+    """The metrics in the Prometheus text format."""
+    return "".join(f"{x.render()}\n" for x in METRICS)
+
+
+def write_textfile(path: Path) -> None:
+    """Writes the metrics for the node exporter's textfile collector.
+
+    The file is replaced in one step so the collector never reads a partly written file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(render())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def send_metrics(handler: BaseHTTPRequestHandler) -> None:
+    body = render().encode()
+    handler.send_response(200)
+    handler.send_header("Content-Type", CONTENT_TYPE)
+    handler.send_header("Content-Length", str(len(body)))
+    handler.end_headers()
+    handler.wfile.write(body)
+
+
+class MetricsExporter:
+    """Serves the metrics on a port and/or writes them to a textfile while the command runs."""
+
+    def __init__(
+        self,
+        *,
+        port: int | None = None,
+        host: str = METRICS_HOST,
+        textfile: Path | None = None,
+        interval: float = METRICS_TEXTFILE_INTERVAL,
+    ) -> None:
+        self.textfile = textfile
+        self.interval = interval
+        self.server: ThreadingHTTPServer | None = None
+        if port is not None:
+            self.server = _metrics_server(host, port)
+        self._stopped = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        enable()
+        if self.server is not None:
+            self._threads.append(
+                threading.Thread(
+                    target=self.server.serve_forever, name="weather-command-metrics", daemon=True
+                )
+            )
+        if self.textfile is not None:
+            self._threads.append(
+                threading.Thread(
+                    target=self._write_periodically, name="weather-command-textfile", daemon=True
+                )
+            )
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        """Stops serving and writes the textfile one last time."""
+        self._stopped.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        for thread in self._threads:
+            thread.join()
+        if self.textfile is not None:
+            write_textfile(self.textfile)
+
+    def _write_periodically(self) -> None:
+        assert self.textfile is not None
+        while not self._stopped.wait(self.interval):
+            write_textfile(self.textfile)
+
+
+def _metrics_server(host: str, port: int) -> ThreadingHTTPServer:
+    # Only imported when serving metrics, it isn't needed to record them.
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+
+            send_metrics(self)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+    server.daemon_threads = True
+    return server
+
+
+def _observe_span(span: _timings.Span) -> None:
+    if span.name in PHASES:
+        PHASE_DURATION.observe(span.duration, phase=span.name)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == int(value):
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value)
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import csv
+import mmap
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import IO, Iterable, Iterator, NamedTuple, Sequence
+
+from weather_command._binary import decode_text, encode_text
+from weather_command._config import POSTAL_CODE_SIZE, POSTAL_NAME_SIZE
+
+# The index is a header followed by fixed size records sorted by postal code then country, so a
+# lookup is a binary search over the mapped file.
+MAGIC = b"WCPOST\r\n"
+VERSION = 1
+
+HEADER = struct.Struct("<8sHHI")
+RECORD = struct.Struct(f"<{POSTAL_CODE_SIZE}s2sff{POSTAL_NAME_SIZE}s")
+
+# Column numbers in the GeoNames postal code dump, which is tab separated without a header.
+GEONAMES_COLUMNS = {
+    "country_code": 0,
+    "postal_code": 1,
+    "place_name": 2,
+    "state_code": 4,
+    "latitude": 9,
+    "longitude": 10,
+}
+CSV_ALIASES = {
+    "city": "place_name",
+    "country": "country_code",
+    "lat": "latitude",
+    "lon": "longitude",
+    "name": "place_name",
+    "postcode": "postal_code",
+    "state": "state_code",
+    "zip": "postal_code",
+}
+
+
+class PostalPlace(NamedTuple):
+    postal_code: str
+    country_code: str
+    lat: float
+    lon: float
+    name: str
+
+
+class PostalIndex:
+    """A postal code index mapped into memory, close it or use it as a context manager when done.
+
+    Raises OSError if the file can't be read and ValueError if it isn't an index.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header = HEADER.unpack_from(self._mm) if len(self._mm) >= HEADER.size else None
+        if header is None or header[:2] != (MAGIC, VERSION):
+            self._mm.close()
+            raise ValueError(f"{path} is not a version {VERSION} weather-command postal index")
+
+        self.count = header[3]
+        if len(self._mm) < HEADER.size + self.count * RECORD.size:
+            self._mm.close()
+            raise ValueError(f"{path} is truncated")
+
+    def __enter__(self) -> PostalIndex:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def find(self, postal_code: str, country_code: str | None = None) -> PostalPlace | None:
+        """The place with the postal code, in the country if one is given.
+
+        Without a country the postal code has to be unique, a code used in several countries is
+        left for the geocoding service to decide between.
+        """
+        code = _normalize_code(postal_code)
+        country = _normalize_country(country_code)
+        if not code or len(code) > POSTAL_CODE_SIZE or country == b"":
+            return None
+
+        key = _pad(code) + (country or b"")
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            position = HEADER.size + mid * RECORD.size
+            if self._mm[position : position + len(key)] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        matches = []
+        for i in range(lo, min(lo + 2, self.count)):
+            record = RECORD.unpack_from(self._mm, HEADER.size + i * RECORD.size)
+            if record[0] + (record[1] if country else b"") != key:
+                break
+            matches.append(record)
+
+        if len(matches) != 1:
+            return None
+
+        found_code, found_country, lat, lon, name = matches[0]
+        # Rounded so the float32 noise doesn't end up in the weather URLs and cache keys.
+        return PostalPlace(
+            decode_text(found_code),
+            decode_text(found_country),
+            round(lat, 4),
+            round(lon, 4),
+            decode_text(name),
+        )
+
+
+def find_postal_place(
+    path: Path, postal_code: str, country_code: str | None = None
+) -> PostalPlace | None:
+    """The place with the postal code, or None if it or the index file is missing or unreadable."""
+    try:
+        with PostalIndex(path) as index:
+            return index.find(postal_code, country_code)
+    except (OSError, ValueError):
+        return None
+
+
+def read_postal_places(f: IO[str], file_format: str) -> Iterator[PostalPlace]:
+    """Reads places from a CSV with a header, or from the GeoNames tab separated dump.
+
+    The CSV needs postal_code, latitude, and longitude columns and can have country_code,
+    place_name, and state_code columns. Rows without a valid postal code or coordinates are skipped.
+    Raises ValueError if a required column is missing.
+    """
+    rows = read_rows(
+        f,
+        file_format,
+        geonames_columns=GEONAMES_COLUMNS,
+        required=("postal_code", "latitude", "longitude"),
+    )
+    for row in rows:
+        code = _normalize_code(row["postal_code"])
+        country = _normalize_country(row.get("country_code")) or b""
+        try:
+            lat, lon = float(row["latitude"]), float(row["longitude"])
+        except ValueError:
+            continue
+
+        if not code or len(code) > POSTAL_CODE_SIZE:
+            continue
+
+        name = ", ".join(
+            x
+            for x in (
+                row.get("place_name", "").strip(),
+                row.get("state_code", "").strip(),
+                code.decode(),
+                country.decode(),
+            )
+            if x
+        )
+        yield PostalPlace(code.decode(), country.decode(), lat, lon, name)
+
+
+def build_postal_index(path: Path, places: Iterable[PostalPlace]) -> int:
+    """Writes the index and returns how many postal codes are in it.
+
+    A postal code listed more than once in a country, such as one shared by several villages, is
+    indexed once at the middle of the places, using the first place's name.
+    """
+    grouped: dict[tuple[bytes, bytes], tuple[float, float, int, str]] = {}
+    for place in places:
+        key = (_pad(place.postal_code.encode()), place.country_code.encode())
+        lat, lon, count, name = grouped.get(key, (0.0, 0.0, 0, place.name))
+        grouped[key] = (lat + place.lat, lon + place.lon, count + 1, name)
+
+    records = [
+        RECORD.pack(code, country, lat / count, lon / count, encode_text(name, POSTAL_NAME_SIZE))
+        for (code, country), (lat, lon, count, name) in sorted(grouped.items())
+    ]
+    content = b"".join([HEADER.pack(MAGIC, VERSION, 0, len(records)), *records])
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+    return len(records)
+
+
+def read_rows(
+    f: IO[str],
+    file_format: str,
+    *,
+    geonames_columns: dict[str, int],
+    required: Sequence[str],
+) -> Iterator[dict[str, str]]:
+    """Reads a GeoNames dump, using the column numbers, or a CSV with a header as dicts.
+
+    CSV column names are lowercased and common alternatives, like lat for latitude, are renamed.
+    Raises ValueError if one of the required columns is missing.
+    """
+    if file_format == "geonames":
+        last_column = max(geonames_columns.values())
+        for values in csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE):
+            if len(values) > last_column:
+                yield {k: values[i] for k, i in geonames_columns.items()}
+        return
+
+    reader = csv.DictReader(f)
+    fields = {
+        CSV_ALIASES.get(x.strip().lower(), x.strip().lower()): x for x in reader.fieldnames or []
+    }
+    missing = [x for x in required if x not in fields]
+    if missing:
+        raise ValueError(f"The CSV is missing the {', '.join(missing)} column(s)")
+
+    for row in reader:
+        yield {k: row.get(v) or "" for k, v in fields.items()}
+
+
+def detect_index_format(path: Path) -> str:
+    return "geonames" if path.suffix.lower() in (".txt", ".tsv") else "csv"
+
+
+def _normalize_code(postal_code: str) -> bytes:
+    return "".join(postal_code.split()).upper().encode()
+
+
+def _normalize_country(country_code: str | None) -> bytes | None:
+    """The two letter country code, None if there isn't one, or empty if it isn't two letters."""
+    if not country_code or not country_code.strip():
+        return None
+
+    country = country_code.strip().upper()
+    return country.encode() if len(country) == 2 and country.isalpha() else b""
+
+
+def _pad(code: bytes) -> bytes:
+    return code.ljust(POSTAL_CODE_SIZE, b"\0")
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import NamedTuple
+
+from weather_command._config import get_cache_dir, get_rate_limit_max_wait, get_rate_limits
+from weather_command.errors import RateLimitExceeded
+
+_BUSY_TIMEOUT = 5.0
+
+
+class Rate(NamedTuple):
+    requests: int
+    period: float
+
+
+class RateLimiter:
+    """Per host token buckets shared by all weather-command processes.
+
+    Each host can have several limits, for example per minute and per day, and a request is only
+    allowed when every one of them has a token available. The bucket state is kept in SQLite so
+    processes running at the same time share the same quota.
+    """
+
+    def __init__(self, path: Path, limits: dict[str, list[Rate]], *, max_wait: float) -> None:
+        self.path = path
+        self.limits = limits
+        self.max_wait = max_wait
+
+    def acquire(self, host: str) -> None:
+        waited = 0.0
+        while True:
+            wait = self._try_acquire(host)
+            if not wait:
+                return
+
+            waited = self._check_wait(host, waited, wait)
+            time.sleep(wait)
+
+    async def acquire_async(self, host: str) -> None:
+        waited = 0.0
+        while True:
+            wait = self._try_acquire(host)
+            if not wait:
+                return
+
+            waited = self._check_wait(host, waited, wait)
+            await asyncio.sleep(wait)
+
+    def try_acquire(self, host: str) -> bool:
+        """Takes a token only if one is available right now."""
+        return not self._try_acquire(host)
+
+    def penalize(self, host: str, seconds: float) -> None:
+        """Stops all requests to the host for the number of seconds, for example after a 429.
+
+        The buckets aren't emptied, doing so would also wait for the long limits, like the per day
+        one, to refill a token.
+        """
+        if not self.limits.get(host):
+            return
+
+        until = time.time() + seconds
+        try:
+            with closing(self._connect()) as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute("SELECT until FROM blocks WHERE host = ?", (host,)).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO blocks (host, until) VALUES (?, ?)",
+                    (host, max(until, row[0]) if row else until),
+                )
+                conn.execute("COMMIT")
+        except (sqlite3.Error, OSError):
+            pass
+
+    def _check_wait(self, host: str, waited: float, wait: float) -> float:
+        waited += wait
+        if waited > self.max_wait:
+            raise RateLimitExceeded(f"The rate limit for {host} has been reached", retry_after=wait)
+
+        return waited
+
+    def _try_acquire(self, host: str) -> float:
+        """Takes a token from each of the host's buckets.
+
+        Returns 0 if the tokens were taken, otherwise the number of seconds until they will be
+        available.
+        """
+        rates = self.limits.get(host)
+        if not rates:
+            return 0.0
+
+        now = time.time()
+        try:
+            with closing(self._connect()) as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                buckets = []
+                for rate in rates:
+                    row = conn.execute(
+                        "SELECT tokens, updated FROM buckets WHERE host = ? AND period = ?",
+                        (host, rate.period),
+                    ).fetchone()
+                    tokens, updated = row if row else (float(rate.requests), now)
+                    per_second = rate.requests / rate.period
+                    tokens = min(
+                        float(rate.requests), tokens + max(0.0, now - updated) * per_second
+                    )
+                    updated = max(updated, now)
+                    wait = (updated - now) + max(0.0, 1 - tokens) / per_second
+                    buckets.append((rate, tokens, updated, wait))
+
+                row = conn.execute("SELECT until FROM blocks WHERE host = ?", (host,)).fetchone()
+                blocked = row[0] - now if row else 0.0
+                wait = max(blocked, *(x[3] for x in buckets))
+                if wait <= 0:
+                    for rate, tokens, updated, _ in buckets:
+                        conn.execute(
+                            "INSERT OR REPLACE INTO buckets (host, period, tokens, updated) VALUES (?, ?, ?, ?)",
+                            (host, rate.period, tokens - 1, updated),
+                        )
+                conn.execute("COMMIT")
+        except (sqlite3.Error, OSError):
+            # A broken state file shouldn't stop requests from being made.
+            return 0.0
+
+        return max(wait, 0.0)
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=_BUSY_TIMEOUT, isolation_level=None)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets "
+            "(host TEXT, period REAL, tokens REAL, updated REAL, PRIMARY KEY (host, period))"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS blocks (host TEXT PRIMARY KEY, until REAL)")
+        return conn
+
+
+def get_rate_limiter() -> RateLimiter:
+    return RateLimiter(
+        get_cache_dir() / "rate_limits.sqlite",
+        {host: [Rate(*x) for x in rates] for host, rates in get_rate_limits().items()},
+        max_wait=get_rate_limit_max_wait(),
+    )
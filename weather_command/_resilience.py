@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextvars import copy_context
+from functools import partial
+from typing import Awaitable, Callable, Deque, NamedTuple, TypeVar
+
+import httpx
+
+from weather_command._config import (
+    get_http_backoff,
+    get_http_hedge_after,
+    get_http_max_backoff,
+    get_http_retries,
+)
+
+T = TypeVar("T")
+
+LATENCY_SAMPLES = 100
+MIN_LATENCY_SAMPLES = 20
+
+_latencies: dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=LATENCY_SAMPLES))
+_latencies_lock = threading.Lock()
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+class RetryPolicy(NamedTuple):
+    retries: int
+    backoff: float
+    max_backoff: float
+    hedge_after: float | None = None
+    adaptive_hedge: bool = False
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter so retries from many clients don't line up."""
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+    def hedge_delay(self, host: str) -> float | None:
+        """How long to wait for a response before sending a second, hedged, request.
+
+        With an adaptive policy this is the 95th percentile latency seen for the host once there
+        are enough samples, falling back to the configured delay until then.
+        """
+        if self.adaptive_hedge:
+            p95 = latency_percentile(host, 0.95)
+            if p95 is not None:
+                return p95
+
+        return self.hedge_after
+
+
+def get_retry_policy() -> RetryPolicy:
+    hedge_after = get_http_hedge_after()
+    return RetryPolicy(
+        retries=get_http_retries(),
+        backoff=get_http_backoff(),
+        max_backoff=get_http_max_backoff(),
+        hedge_after=hedge_after if isinstance(hedge_after, float) else None,
+        adaptive_hedge=hedge_after == "auto",
+    )
+
+
+def is_retryable(response: httpx.Response | None, error: Exception | None) -> bool:
+    if error is not None:
+        return isinstance(error, httpx.TransportError)
+
+    return response is not None and response.status_code >= 500
+
+
+def latency_percentile(host: str, percentile: float) -> float | None:
+    with _latencies_lock:
+        samples = sorted(_latencies[host])
+
+    if len(samples) < MIN_LATENCY_SAMPLES:
+        return None
+
+    return samples[min(len(samples) - 1, int(len(samples) * percentile))]
+
+
+def record_latency(host: str, seconds: float) -> None:
+    with _latencies_lock:
+        _latencies[host].append(seconds)
+
+
+def hedged(
+    send: Callable[[], T],
+    delay: float | None,
+    can_hedge: Callable[[], bool],
+    *,
+    discard: Callable[[T], None] | None = None,
+) -> T:
+    """Sends a request and, if it hasn't finished after the delay, a second identical one.
+
+    Whichever succeeds first is returned. A second request is only sent if can_hedge returns True,
+    which lets the caller check that there is rate limit quota to spare. The other request is left
+    to finish and, if it succeeds, discard is called with its result so it can be closed.
+    """
+    if delay is None:
+        return send()
+
+    first = _get_executor().submit(_in_current_context(send))
+    done, _ = wait([first], timeout=delay)
+    if done or not can_hedge():
+        return first.result()
+
+    futures: set[Future] = {first, _get_executor().submit(_in_current_context(send))}
+    pending = futures
+    error: BaseException | None = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            error = future.exception()
+            if error is None:
+                if discard is not None:
+                    for other in futures - {future}:
+                        other.add_done_callback(partial(_discard, discard))
+                return future.result()
+
+    assert error is not None
+    raise error
+
+
+async def hedged_async(
+    send: Callable[[], Awaitable[T]], delay: float | None, can_hedge: Callable[[], bool]
+) -> T:
+    """Async version of hedged. The slower request is cancelled once one succeeds."""
+    if delay is None:
+        return await send()
+
+    first = asyncio.ensure_future(send())
+    done, _ = await asyncio.wait({first}, timeout=delay)
+    if done or not can_hedge():
+        return await first
+
+    pending = {first, asyncio.ensure_future(send())}
+    error: BaseException | None = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                error = task.exception()
+                if error is None:
+                    return task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+    assert error is not None
+    raise error
+
+
+def _discard(discard: Callable[[T], None], future: Future) -> None:
+    if future.exception() is None:
+        discard(future.result())
+
+
+def _in_current_context(func: Callable[[], T]) -> Callable[[], T]:
+    """Wraps func to run in a copy of the current context so timing spans nest in the thread."""
+    context = copy_context()
+    return lambda: context.run(func)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(thread_name_prefix="weather-command-hedge")
+
+    return _executor
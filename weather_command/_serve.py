@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, NamedTuple, TypeVar
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+from pydantic.error_wrappers import ValidationError
+from rich.console import Console
+
+from weather_command import _http, _metrics, _timings
+from weather_command._builder import build_url
+from weather_command._location import get_location_details_async
+from weather_command._weather import get_weather_async
+from weather_command.errors import MissingApiKey, RateLimitExceeded, describe_error
+from weather_command.models.weather import CurrentWeather, OneCallWeather
+
+T = TypeVar("T")
+
+REQUEST_TIMEOUT = 60.0
+
+PATHS = ("/current", "/hourly", "/daily")
+
+# The parts of the one call response that are left out of each endpoint.
+_EXCLUDE = {
+    "/hourly": {"minutely", "daily"},
+    "/daily": {"minutely", "hourly"},
+}
+
+
+class BadRequest(Exception):
+    pass
+
+
+class NotFound(Exception):
+    pass
+
+
+class ForecastQuery(NamedTuple):
+    path: str
+    how: str
+    city_zip: str
+    state_code: str | None
+    country_code: str | None
+    units: str
+
+
+class SingleFlight(Generic[T]):
+    """Collapses identical calls that are in flight at the same time into one.
+
+    The first caller for a key starts the call and everyone else asking for the same key while it
+    is running waits for that result. Must only be used from one event loop.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(call())
+            self._calls[key] = future
+            future.add_done_callback(lambda _: self._calls.pop(key, None))
+
+        # Shielded so a client that goes away doesn't cancel the call for everyone else.
+        return await asyncio.shield(future)
+
+
+class ForecastService:
+    """Gets forecasts for the server's request threads.
+
+    All upstream requests run on one event loop with one client so every request shares the same
+    connection pool, and identical requests that arrive together are only sent upstream once.
+    """
+
+    def __init__(self, *, max_age: int | None = None) -> None:
+        self.max_age = max_age
+        self.loop = asyncio.new_event_loop()
+        self.client = _http.new_async_client()
+        self.flights: SingleFlight[bytes] = SingleFlight()
+        self._thread = threading.Thread(
+            target=self.loop.run_forever, name="weather-command-serve", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def close(self) -> None:
+        asyncio.run_coroutine_threadsafe(self.client.aclose(), self.loop).result(REQUEST_TIMEOUT)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(REQUEST_TIMEOUT)
+        self.loop.close()
+
+    def get(self, query: ForecastQuery) -> bytes:
+        """Returns the forecast as JSON. Called from the request threads."""
+        future = asyncio.run_coroutine_threadsafe(
+            self.flights.do(query, lambda: self._get(query)), self.loop
+        )
+        return future.result(REQUEST_TIMEOUT)
+
+    async def _get(self, query: ForecastQuery) -> bytes:
+        if query.path == "/current":
+            url = build_url(
+                forecast_type="current",
+                how=query.how,
+                city_zip=query.city_zip,
+                units=query.units,
+                state_code=query.state_code,
+                country_code=query.country_code,
+            )
+            current_weather = await get_weather_async(
+                self.client, url, CurrentWeather, max_age=self.max_age
+            )
+            return current_weather.json().encode()
+
+        location = await get_location_details_async(
+            self.client,
+            how=query.how,
+            city_zip=query.city_zip,
+            state=query.state_code,
+            country=query.country_code,
+        )
+        url = build_url(
+            forecast_type="onecall", units=query.units, lon=location.lon, lat=location.lat
+        )
+        weather = await get_weather_async(self.client, url, OneCallWeather, max_age=self.max_age)
+        return weather.json(exclude=_EXCLUDE[query.path]).encode()
+
+
+class ForecastRequestHandler(BaseHTTPRequestHandler):
+    server: ForecastServer
+
+    def do_GET(self) -> None:
+        if urlsplit(self.path).path == "/metrics":
+            _metrics.send_metrics(self)
+            return
+
+        try:
+            query = parse_query(self.path)
+            body = self.server.forecasts.get(query)
+        except BadRequest as e:
+            self._send_error(400, str(e))
+        except NotFound as e:
+            self._send_error(404, str(e))
+        except IndexError:
+            # The geocoding service returns an empty list when nothing matches.
+            self._send_error(404, "location not found")
+        except FutureTimeoutError:
+            self._send_error(504, "timed out getting the forecast")
+        except RateLimitExceeded as e:
+            headers = {"Retry-After": str(math.ceil(e.retry_after))} if e.retry_after else {}
+            self._send_error(503, describe_error(e), headers)
+        except httpx.HTTPStatusError as e:
+            status = 404 if e.response.status_code == 404 else 502
+            self._send_error(status, describe_error(e))
+        except (httpx.HTTPError, ValidationError) as e:
+            self._send_error(502, describe_error(e))
+        except ValueError:
+            # The response wasn't valid JSON.
+            self._send_error(502, "unexpected response")
+        except MissingApiKey:
+            self._send_error(500, "the server has no OpenWeather API key")
+        else:
+            self._send(200, body)
+        finally:
+            # Spans are output per request so a server left running doesn't keep them all.
+            _timings.flush()
+
+    def _send_error(self, status: int, message: str, headers: dict[str, str] | None = None) -> None:
+        self._send(status, json.dumps({"error": message}).encode(), headers)
+
+    def _send(self, status: int, body: bytes, headers: dict[str, str] | None = None) -> None:
+        path = urlsplit(self.path).path
+        # Unknown paths are grouped so clients can't create any number of label values.
+        _metrics.SERVE_REQUESTS.inc(path=path if path in PATHS else "other", status=status)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ForecastServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], forecasts: ForecastService) -> None:
+        super().__init__(address, ForecastRequestHandler)
+        self.forecasts = forecasts
+
+
+def parse_query(path: str) -> ForecastQuery:
+    """Parses a request like /daily?city_zip=Greensboro&state_code=NC&units=imperial."""
+    url = urlsplit(path)
+    if url.path not in PATHS:
+        raise NotFound(f"{url.path} not found, use /current, /hourly, or /daily")
+
+    params: dict[str, Any] = {k: v[-1].strip() for k, v in parse_qs(url.query).items()}
+    city_zip = " ".join(params.get("city_zip", "").split())
+    if not city_zip:
+        raise BadRequest("city_zip is required")
+
+    how = params.get("how") or "city"
+    if how not in ("city", "zip"):
+        raise BadRequest("how must be city or zip")
+
+    units = params.get("units") or "metric"
+    if units not in ("metric", "imperial"):
+        raise BadRequest("units must be metric or imperial")
+
+    # Normalized so requests that only differ by case are coalesced and cached together.
+    return ForecastQuery(
+        path=url.path,
+        how=how,
+        city_zip=city_zip.lower(),
+        state_code=params.get("state_code", "").lower() or None,
+        country_code=params.get("country_code", "").lower() or None,
+        units=units,
+    )
+
+
+def serve(console: Console, host: str, port: int, *, max_age: int | None = None) -> None:
+    # The server is long running so its metrics are always available at /metrics.
+    _metrics.enable()
+    forecasts = ForecastService(max_age=max_age)
+    forecasts.start()
+    try:
+        with ForecastServer((host, port), forecasts) as server:
+            console.print(f"Serving forecasts on http://{host}:{server.server_address[1]}")
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+    finally:
+        forecasts.close()
@@ -0,0 +1,464 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import time
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Iterable, List, NamedTuple, Optional
+
+from weather_command._binary import decode_text, encode_text
+from weather_command._config import DEFAULT_CONCURRENCY, SNAPSHOT_NAME_SIZE
+
+if TYPE_CHECKING:  # pragma: no cover
+    from weather_command._batch import BatchLocation
+    from weather_command.models.location import Location
+    from weather_command.models.weather import OneCallWeather
+
+# The snapshot is little endian: a header, then an index entry for each location sorted by key with
+# the offset of its record, then the records. Every record is metric and made of fixed size parts so
+# reading one location is a binary search over the index and a few struct unpacks, with no JSON
+# decoding or validation.
+MAGIC = b"WCSNAP\r\n"
+VERSION = 1
+
+KEY_SIZE = hashlib.sha1().digest_size
+CONDITIONS_SIZE = 32
+
+HEADER = struct.Struct("<8sHHId")
+INDEX = struct.Struct(f"<{KEY_SIZE}sIHH")
+LOCATION = struct.Struct(f"<ddid{SNAPSHOT_NAME_SIZE}s")
+CURRENT = struct.Struct(f"<qffffff{CONDITIONS_SIZE}s")
+HOUR = struct.Struct("<qffff")
+DAY = struct.Struct(f"<qfffff{CONDITIONS_SIZE}s")
+
+
+class SnapshotCurrent(NamedTuple):
+    dt: int
+    temp: float
+    feels_like: float
+    humidity: float
+    pressure: float
+    wind_speed: float
+    uvi: float
+    conditions: str
+
+
+class SnapshotHour(NamedTuple):
+    dt: int
+    temp: float
+    feels_like: float
+    humidity: float
+    pop: float
+
+
+class SnapshotDay(NamedTuple):
+    dt: int
+    temp_min: float
+    temp_max: float
+    humidity: float
+    pop: float
+    rain: float
+    conditions: str
+
+
+class SnapshotEntry(NamedTuple):
+    key: bytes
+    name: str
+    lat: float
+    lon: float
+    timezone_offset: int
+    fetched: float
+    current: Optional[SnapshotCurrent]
+    hourly: List[SnapshotHour]
+    daily: List[SnapshotDay]
+
+
+class Snapshot:
+    """A snapshot file mapped into memory, close it or use it as a context manager when done.
+
+    Raises OSError if the file can't be read and ValueError if it isn't a snapshot.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            # The mapping stays valid after the file is closed, and after a writer replaces it.
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header = HEADER.unpack_from(self._mm) if len(self._mm) >= HEADER.size else None
+        if header is None or header[:2] != (MAGIC, VERSION):
+            self._mm.close()
+            raise ValueError(f"{path} is not a version {VERSION} weather-command snapshot")
+
+        _, _, _, self.count, self.written = header
+        if len(self._mm) < HEADER.size + self.count * INDEX.size:
+            self._mm.close()
+            raise ValueError(f"{path} is truncated")
+
+    def __enter__(self) -> Snapshot:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def get(self, key: bytes) -> SnapshotEntry | None:
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            position = HEADER.size + mid * INDEX.size
+            if self._mm[position : position + KEY_SIZE] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        if lo == self.count:
+            return None
+
+        found_key, offset, hours, days = INDEX.unpack_from(self._mm, HEADER.size + lo * INDEX.size)
+        return self._read(found_key, offset, hours, days) if found_key == key else None
+
+    def entries(self) -> Iterable[SnapshotEntry]:
+        for i in range(self.count):
+            yield self._read(*INDEX.unpack_from(self._mm, HEADER.size + i * INDEX.size))
+
+    def _read(self, key: bytes, offset: int, hours: int, days: int) -> SnapshotEntry:
+        mm = self._mm
+        lat, lon, timezone_offset, fetched, name = LOCATION.unpack_from(mm, offset)
+        offset += LOCATION.size
+
+        values = CURRENT.unpack_from(mm, offset)
+        # A zero time marks a location without current weather.
+        current = (
+            SnapshotCurrent._make((*values[:-1], decode_text(values[-1]))) if values[0] else None
+        )
+        offset += CURRENT.size
+
+        hourly = []
+        for _ in range(hours):
+            hourly.append(SnapshotHour(*HOUR.unpack_from(mm, offset)))
+            offset += HOUR.size
+
+        daily = []
+        for _ in range(days):
+            values = DAY.unpack_from(mm, offset)
+            daily.append(SnapshotDay._make((*values[:-1], decode_text(values[-1]))))
+            offset += DAY.size
+
+        return SnapshotEntry(
+            key, decode_text(name), lat, lon, timezone_offset, fetched, current, hourly, daily
+        )
+
+
+def snapshot_key(
+    *, how: str, city_zip: str, state_code: str | None, country_code: str | None
+) -> bytes:
+    """The key a location is stored under, normalized the same way as the geocode cache keys."""
+    value = json.dumps(
+        [
+            how,
+            *(
+                " ".join(x.split()).lower() if x else ""
+                for x in (city_zip, state_code, country_code)
+            ),
+        ]
+    )
+    return hashlib.sha1(value.encode()).digest()
+
+
+def read_snapshot_entry(path: Path, key: bytes) -> SnapshotEntry | None:
+    """The location's entry, or None if it or the snapshot file is missing or unreadable."""
+    try:
+        with Snapshot(path) as snapshot:
+            return snapshot.get(key)
+    except (OSError, ValueError):
+        return None
+
+
+def write_snapshot(path: Path, entries: Iterable[SnapshotEntry]) -> None:
+    """Writes the entries, replacing the file in one step so readers never see a partial file.
+
+    When there are entries with the same key the last one is kept.
+    """
+    by_key = {x.key: x for x in entries}
+    keys = sorted(by_key)
+
+    index = []
+    records = []
+    offset = HEADER.size + len(keys) * INDEX.size
+    for key in keys:
+        entry = by_key[key]
+        record = _pack_entry(entry)
+        index.append(INDEX.pack(key, offset, len(entry.hourly), len(entry.daily)))
+        records.append(record)
+        offset += len(record)
+
+    content = b"".join([HEADER.pack(MAGIC, VERSION, 0, len(keys), time.time()), *index, *records])
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def snapshot_entry(
+    key: bytes, location: Location, weather: OneCallWeather, fetched: float
+) -> SnapshotEntry:
+    """Converts the one call weather for a location, requested in metric units, to an entry."""
+    current = weather.current
+    return SnapshotEntry(
+        key=key,
+        name=location.display_name,
+        lat=weather.lat,
+        lon=weather.lon,
+        timezone_offset=weather.timezone_offset,
+        fetched=fetched,
+        current=(
+            SnapshotCurrent(
+                dt=current.dt,
+                temp=current.temp,
+                feels_like=current.feels_like,
+                humidity=current.humidity,
+                pressure=current.pressure,
+                wind_speed=current.wind_speed,
+                uvi=current.uvi,
+                conditions=_conditions(current.weather),
+            )
+            if current
+            else None
+        ),
+        hourly=[
+            SnapshotHour(
+                dt=int(x.dt.timestamp()),
+                temp=x.temp,
+                feels_like=x.feels_like,
+                humidity=x.humidity,
+                pop=x.pop,
+            )
+            for x in weather.hourly
+        ],
+        daily=[
+            SnapshotDay(
+                dt=int(x.dt.timestamp()),
+                temp_min=x.temp.min,
+                temp_max=x.temp.max,
+                humidity=x.humidity,
+                pop=x.pop,
+                rain=x.rain,
+                conditions=_conditions(x.weather),
+            )
+            for x in weather.daily
+        ],
+    )
+
+
+def refresh_snapshot(
+    path: Path,
+    locations: list[BatchLocation],
+    *,
+    max_age: int | None = None,
+    no_cache: bool = False,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> list[tuple[BatchLocation, BaseException]]:
+    """Gets the weather for the locations and rewrites the snapshot with them.
+
+    Locations that fail keep their previous entry, if there is one, so a brief outage doesn't
+    empty a status bar. Returns the locations that failed along with why.
+    """
+    # Only imported when writing, the reader has to stay free of httpx and pydantic.
+    import asyncio
+
+    from weather_command._batch import BatchResult, get_batch_weather
+
+    results = asyncio.run(
+        get_batch_weather(
+            locations,
+            forecast_type="all",
+            units="metric",
+            max_age=max_age,
+            no_cache=no_cache,
+            concurrency=concurrency,
+        )
+    )
+    fetched = time.time()
+
+    keys = [
+        snapshot_key(
+            how=x.how,
+            city_zip=x.city_zip,
+            state_code=x.state_code,
+            country_code=x.country_code,
+        )
+        for x in locations
+    ]
+    entries = []
+    failed = []
+    previous = _read_entries(path)
+    for batch_location, key, result in zip(locations, keys, results):
+        if isinstance(result, BatchResult):
+            assert result.location is not None
+            entries.append(snapshot_entry(key, result.location, result.weather, fetched))  # type: ignore[arg-type]
+        else:
+            failed.append((batch_location, result))
+            if key in previous:
+                entries.append(previous[key])
+
+    write_snapshot(path, entries)
+    return failed
+
+
+def print_snapshot(
+    out: IO[str],
+    path: Path,
+    key: bytes,
+    *,
+    forecast_type: str = "current",
+    units: str = "metric",
+    am_pm: bool = False,
+    temp_only: bool = False,
+    max_age: int | None = None,
+) -> bool:
+    """Writes the weather for the location from the snapshot as plain lines of text.
+
+    Returns False, without writing anything, if the location isn't in the snapshot, its weather is
+    older than max_age seconds, or the snapshot doesn't have the forecast type.
+    """
+    entry = read_snapshot_entry(path, key)
+    if entry is None or (max_age is not None and time.time() - entry.fetched > max_age):
+        return False
+
+    lines = format_snapshot(
+        entry, forecast_type=forecast_type, units=units, am_pm=am_pm, temp_only=temp_only
+    )
+    if not lines:
+        return False
+
+    out.write("".join(f"{x}\n" for x in lines))
+    return True
+
+
+def format_snapshot(
+    entry: SnapshotEntry,
+    *,
+    forecast_type: str = "current",
+    units: str = "metric",
+    am_pm: bool = False,
+    temp_only: bool = False,
+) -> list[str]:
+    """The lines shown for the forecast type, empty if the entry doesn't have it."""
+    show_current = forecast_type in ("current", "all")
+    show_hourly = forecast_type in ("hourly", "all")
+    show_daily = forecast_type in ("daily", "all")
+    if (
+        (show_current and entry.current is None)
+        or (show_hourly and not entry.hourly)
+        or (show_daily and not entry.daily)
+    ):
+        return []
+
+    lines = []
+    if show_current:
+        assert entry.current is not None
+        lines.append(f"{entry.name}: {_current_text(entry.current, units, temp_only)}")
+
+    if show_hourly:
+        if lines:
+            lines.append("")
+        lines.append(f"Hourly weather for {entry.name}")
+        for hour in entry.hourly:
+            text = (
+                f"{_format_time(hour.dt, entry.timezone_offset, am_pm, '%Y-%m-%d %H:%M')}  "
+                f"{_format_temp(hour.temp, units)}  feels like {_format_temp(hour.feels_like, units)}"
+            )
+            if not temp_only:
+                text = f"{text}  {round(hour.humidity)}% humidity  {_format_pop(hour.pop)}"
+            lines.append(text)
+
+    if show_daily:
+        if lines:
+            lines.append("")
+        lines.append(f"Daily weather for {entry.name}")
+        for day in entry.daily:
+            text = (
+                f"{_format_time(day.dt, entry.timezone_offset, am_pm, '%Y-%m-%d %H:%M %A')}  "
+                f"low {_format_temp(day.temp_min, units)}  high {_format_temp(day.temp_max, units)}"
+            )
+            if not temp_only:
+                text = f"{text}  {round(day.humidity)}% humidity  {_format_pop(day.pop)}  {day.conditions}"
+            lines.append(text)
+
+    return lines
+
+
+def _current_text(current: SnapshotCurrent, units: str, temp_only: bool) -> str:
+    text = (
+        f"{_format_temp(current.temp, units)}, feels like {_format_temp(current.feels_like, units)}"
+    )
+    if temp_only:
+        return text
+
+    return f"{text}, {round(current.humidity)}% humidity, {current.conditions}"
+
+
+def _read_entries(path: Path) -> dict[bytes, SnapshotEntry]:
+    try:
+        with Snapshot(path) as snapshot:
+            return {x.key: x for x in snapshot.entries()}
+    except (OSError, ValueError):
+        return {}
+
+
+def _pack_entry(entry: SnapshotEntry) -> bytes:
+    current = entry.current
+    parts = [
+        LOCATION.pack(
+            entry.lat,
+            entry.lon,
+            entry.timezone_offset,
+            entry.fetched,
+            encode_text(entry.name, SNAPSHOT_NAME_SIZE),
+        ),
+        (
+            CURRENT.pack(*current[:-1], encode_text(current.conditions, CONDITIONS_SIZE))
+            if current
+            else CURRENT.pack(0, *[0.0] * 6, b"")
+        ),
+    ]
+    parts.extend(HOUR.pack(*x) for x in entry.hourly)
+    parts.extend(DAY.pack(*x[:-1], encode_text(x.conditions, CONDITIONS_SIZE)) for x in entry.daily)
+
+    return b"".join(parts)
+
+
+def _conditions(weather: list) -> str:
+    return weather[0].description if weather else ""
+
+
+def _format_temp(celsius: float, units: str) -> str:
+    # The same conversion as _columns.convert_temp, repeated so reading doesn't import pydantic.
+    if units == "imperial":
+        return f"{round(celsius * 9 / 5 + 32)}°F"
+
+    return f"{round(celsius)}°C"
+
+
+def _format_pop(pop: float) -> str:
+    return f"{round(pop * 100)}% precip"
+
+
+def _format_time(dt: int, timezone_offset: int, am_pm: bool, date_format: str) -> str:
+    if am_pm:
+        date_format = date_format.replace("%H", "%I").replace("%M", "%M %p")
+
+    return time.strftime(date_format, time.gmtime(dt + timezone_offset))
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import codecs
+import json
+from typing import Any, Container, Iterable, Iterator
+
+from weather_command.models.records import DecodeError
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",]}:"
+
+# Where the parser is in the top level object.
+_START = 0
+_KEY = 1
+_COLON = 2
+_VALUE = 3
+_ARRAY = 4
+_END = 5
+
+
+def iter_members(chunks: Iterable[bytes], stream: Container[str]) -> Iterator[tuple[str, Any]]:
+    """Incrementally parses a JSON object as its bytes arrive.
+
+    Yields a (key, value) pair for each member of the top level object as soon as the value is
+    complete. Arrays under the keys in stream are not built as a whole, instead a (key, item) pair
+    is yielded for each item in the array as soon as that item is complete, so the first items
+    can be used while the rest are still downloading.
+
+    Raises DecodeError if the data isn't a JSON object or ends before the object does.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    scanner = json.JSONDecoder()
+    chunk_iter = iter(chunks)
+    buffer = ""
+    pos = 0
+    state = _START
+    key = ""
+    finished = False
+
+    while True:
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= len(buffer):
+                break
+
+            char = buffer[pos]
+            if state == _START:
+                if char != "{":
+                    raise DecodeError("Expected a JSON object")
+                pos += 1
+                state = _KEY
+            elif state == _KEY:
+                if char == "}":
+                    pos += 1
+                    state = _END
+                elif char == ",":
+                    pos += 1
+                else:
+                    value, end = _scan(scanner, buffer, pos, finished)
+                    if end is None:
+                        break
+                    if not isinstance(value, str):
+                        raise DecodeError(f"Expected a key at position {pos}")
+                    key = value
+                    pos = end
+                    state = _COLON
+            elif state == _COLON:
+                if char != ":":
+                    raise DecodeError(f"Expected ':' at position {pos}")
+                pos += 1
+                state = _VALUE
+            elif state == _VALUE and char == "[" and key in stream:
+                pos += 1
+                state = _ARRAY
+            elif state == _VALUE:
+                value, end = _scan(scanner, buffer, pos, finished)
+                if end is None:
+                    break
+                yield key, value
+                pos = end
+                state = _KEY
+            elif state == _ARRAY:
+                if char == "]":
+                    pos += 1
+                    state = _KEY
+                elif char == ",":
+                    pos += 1
+                else:
+                    value, end = _scan(scanner, buffer, pos, finished)
+                    if end is None:
+                        break
+                    yield key, value
+                    pos = end
+            else:
+                raise DecodeError(f"Unexpected data after the end of the object at position {pos}")
+
+        if finished:
+            break
+
+        # Only the part that hasn't been parsed yet is kept.
+        buffer = buffer[pos:]
+        pos = 0
+        chunk = next(chunk_iter, None)
+        if chunk is None:
+            buffer += decoder.decode(b"", final=True)
+            finished = True
+        else:
+            buffer += decoder.decode(chunk)
+
+    if state != _END:
+        raise DecodeError("The JSON object ended early")
+
+
+def _scan(
+    scanner: json.JSONDecoder, buffer: str, pos: int, finished: bool
+) -> tuple[Any, int | None]:
+    """Decodes the value at pos, or returns None for the end if more data is needed."""
+    try:
+        value, end = scanner.raw_decode(buffer, pos)
+    except json.JSONDecodeError as e:
+        if finished:
+            raise DecodeError(str(e)) from e
+        return None, None
+
+    # A number that isn't followed by a delimiter yet might continue in the next chunk, for
+    # example 12 could be the start of 12.5.
+    if not finished and (end >= len(buffer) or buffer[end] not in _DELIMITERS):
+        return None, None
+
+    return value, end
@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from itertools import count
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Iterator
+
+if TYPE_CHECKING:  # pragma: no cover
+    from rich.table import Table
+
+
+@dataclass(frozen=True)
+class Span:
+    id: int
+    parent_id: int | None
+    name: str
+    path: tuple[str, ...]
+    start: float
+    duration: float
+    attributes: dict[str, Any]
+
+
+_enabled = False
+_spans: list[Span] = []
+# Where flush sends the spans, set by start.
+_print_breakdown = False
+_trace_file: Path | None = None
+_run_id = ""
+# Called with every span even when the spans aren't being kept, used for the metrics.
+_observers: list[Callable[[Span], None]] = []
+_lock = threading.Lock()
+_ids = count(1)
+
+# The id and path of the span that new spans are nested under. A context variable is used so
+# concurrent requests in batch and ingest each nest under their own spans.
+_current: ContextVar[tuple[int | None, tuple[str, ...]]] = ContextVar(
+    "weather_command_span", default=(None, ())
+)
+
+
+def enable() -> None:
+    global _enabled
+
+    _enabled = True
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def add_observer(observer: Callable[[Span], None]) -> None:
+    _observers.append(observer)
+
+
+def remove_observer(observer: Callable[[Span], None]) -> None:
+    if observer in _observers:
+        _observers.remove(observer)
+
+
+def reset() -> None:
+    """Stops recording and removes the recorded spans."""
+    global _enabled, _print_breakdown, _trace_file
+
+    _enabled = False
+    _print_breakdown = False
+    _trace_file = None
+    with _lock:
+        _spans.clear()
+
+
+def get_spans() -> list[Span]:
+    with _lock:
+        return list(_spans)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[dict[str, Any]]:
+    """Times the block as a span nested under the span it runs in.
+
+    Attributes can be added to the yielded dict until the block ends. Nothing is recorded unless
+    timings are enabled or there is an observer so this is cheap enough to leave in place around
+    each phase of a run.
+    """
+    if not _enabled and not _observers:
+        yield attributes
+        return
+
+    parent_id, parent_path = _current.get()
+    span_id = next(_ids)
+    path = (*parent_path, name)
+    token = _current.set((span_id, path))
+    start = time.time()
+    perf_start = time.perf_counter()
+    try:
+        yield attributes
+    except BaseException as e:
+        attributes["error"] = e.__class__.__name__
+        raise
+    finally:
+        duration = time.perf_counter() - perf_start
+        _current.reset(token)
+        _add(Span(span_id, parent_id, name, path, start, duration, attributes))
+
+
+def record(name: str, perf_start: float, perf_end: float, **attributes: Any) -> None:
+    """Adds a span that was timed elsewhere with time.perf_counter, such as in an httpx hook."""
+    if not _enabled and not _observers:
+        return
+
+    parent_id, parent_path = _current.get()
+    start = time.time() - (time.perf_counter() - perf_start)
+    _add(
+        Span(
+            next(_ids),
+            parent_id,
+            name,
+            (*parent_path, name),
+            start,
+            perf_end - perf_start,
+            attributes,
+        )
+    )
+
+
+def start(
+    command: str | None, *, print_breakdown: bool = False, trace_file: Path | None = None
+) -> ExitStack:
+    """Enables timings and starts the span covering the whole run. Close the stack to end it.
+
+    Each flush prints the breakdown on stderr and appends the spans to trace_file.
+    """
+    global _print_breakdown, _trace_file, _run_id
+
+    _print_breakdown = print_breakdown
+    _trace_file = trace_file
+    _run_id = uuid.uuid4().hex
+    enable()
+    run = ExitStack()
+    run.enter_context(span("run", command=command))
+    return run
+
+
+def stop(run: ExitStack) -> None:
+    """Ends the run span and flushes the spans that haven't been flushed yet."""
+    run.close()
+    flush()
+
+
+def flush() -> None:
+    """Prints and writes the spans recorded since the last flush, then forgets them.
+
+    Long running commands flush after each request or refresh so they don't keep every span and
+    their traces are written as they go rather than only when they exit.
+    """
+    with _lock:
+        spans = list(_spans)
+        _spans.clear()
+
+    if not spans:
+        return
+
+    if _trace_file:
+        write_trace(_trace_file, spans, run_id=_run_id)
+
+    if _print_breakdown:
+        from rich.console import Console
+
+        Console(stderr=True).print(breakdown_table(spans))
+
+
+def breakdown_table(spans: list[Span]) -> Table:
+    """A table of the time spent in each phase, nested by where the phase happened.
+
+    Spans at the same place in the tree, like each request in a batch, are combined into one row.
+    """
+    from rich.table import Table
+
+    rows: dict[tuple[str, ...], list[Span]] = {}
+    for s in sorted(spans, key=lambda x: x.start):
+        rows.setdefault(s.path, []).append(s)
+
+    table = Table(title="Timings", header_style="bold")
+    table.add_column("Phase")
+    table.add_column("Calls", justify="right")
+    table.add_column("Total (ms)", justify="right")
+    table.add_column("Mean (ms)", justify="right")
+    table.add_column("Max (ms)", justify="right")
+
+    for path in sorted(rows, key=lambda x: _sort_key(x, rows)):
+        durations = [x.duration * 1000 for x in rows[path]]
+        table.add_row(
+            f"{'  ' * (len(path) - 1)}{path[-1]}",
+            str(len(durations)),
+            f"{sum(durations):.1f}",
+            f"{sum(durations) / len(durations):.1f}",
+            f"{max(durations):.1f}",
+        )
+
+    return table
+
+
+def write_trace(path: Path, spans: list[Span], *, run_id: str | None = None) -> None:
+    """Appends the spans as JSON lines so the traces from many runs and machines can be combined.
+
+    All of the lines are written at once so runs appending to the same file don't interleave.
+    """
+    run_id = run_id or uuid.uuid4().hex
+    host = socket.gethostname()
+    pid = os.getpid()
+    lines = [
+        json.dumps({"run_id": run_id, "host": host, "pid": pid, **asdict(x)}, default=str)
+        for x in spans
+    ]
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("".join(f"{x}\n" for x in lines))
+
+
+def _add(span: Span) -> None:
+    if _enabled:
+        with _lock:
+            _spans.append(span)
+
+    for observer in _observers:
+        observer(span)
+
+
+def _sort_key(path: tuple[str, ...], rows: dict[tuple[str, ...], list[Span]]) -> list[float]:
+    # Each row sorts under its parent by when that phase first started.
+    return [
+        rows[path[: i + 1]][0].start if path[: i + 1] in rows else 0.0 for i in range(len(path))
+    ]
@@ -1,44 +1,193 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import sys
+import threading
+import time
 from enum import Enum
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Mapping, NamedTuple, Type, TypeVar
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
-import httpx
 from pydantic.error_wrappers import ValidationError
-from rich.console import Console
 
-from weather_command.errors import check_status_error
+from weather_command import _history, _metrics
+from weather_command._cache import Cache
+from weather_command._config import (
+    get_cache_dir,
+    get_forecast_cache_max_entries,
+    get_forecast_cache_stale_ttl,
+    get_forecast_cache_ttl,
+    get_strict_validation,
+)
+from weather_command._stream import iter_members
+from weather_command._timings import record as record_span
+from weather_command._timings import span
+from weather_command.errors import (
+    RateLimitExceeded,
+    check_status_error,
+    print_rate_limit_error,
+    print_request_error,
+)
+from weather_command.models.records import (
+    DailyRecord,
+    DecodeError,
+    HourlyRecord,
+    OneCallRecord,
+    OneCallTempRecord,
+)
 from weather_command.models.weather import CurrentWeather, OneCallWeather
 
+if TYPE_CHECKING:  # pragma: no cover
+    import httpx
+    from rich.console import Console
 
-def get_current_weather(url: str, console: Console) -> CurrentWeather:
-    response = httpx.get(url)
-    try:
-        response.raise_for_status()
-        return CurrentWeather(**response.json())
-    except httpx.HTTPStatusError as e:
-        check_status_error(e, console)
-    except ValidationError:
-        _print_validation_error(console)
+WeatherModel = TypeVar(
+    "WeatherModel", CurrentWeather, OneCallWeather, OneCallRecord, OneCallTempRecord
+)
+T = TypeVar("T")
 
-    # Shouldn't be possible to reach this. Here as a fail safe.
-    console.print("[red]Unable to get weather data[/red]")  # pragma: no cover
-    sys.exit(1)  # pragma: no cover
 
+class _Response(NamedTuple):
+    cache_key: str
+    text: str
+    headers: dict[str, str]
+
+
+_revalidations: dict[str, threading.Thread] = {}
+_revalidations_lock = threading.Lock()
+# The body, and conditional request headers, of the weather most recently returned so watching it
+# doesn't start by fetching, parsing, and drawing the same data again.
+_last_response: _Response | None = None
+
+
+def get_current_weather(
+    url: str, console: Console, *, max_age: int | None = None, no_cache: bool = False
+) -> CurrentWeather:
+    return _get_weather(url, console, CurrentWeather, max_age=max_age, no_cache=no_cache)
+
+
+def get_one_call_current_weather(
+    url: str, console: Console, *, max_age: int | None = None, no_cache: bool = False
+) -> OneCallRecord:
+    return _get_weather(url, console, OneCallRecord, max_age=max_age, no_cache=no_cache)
+
+
+def get_one_call_temp_weather(
+    url: str, console: Console, *, max_age: int | None = None, no_cache: bool = False
+) -> OneCallTempRecord:
+    """Like get_one_call_current_weather but only decodes the temperatures."""
+    return _get_weather(url, console, OneCallTempRecord, max_age=max_age, no_cache=no_cache)
+
+
+async def get_weather_async(
+    client: httpx.AsyncClient,
+    url: str,
+    model: Type[WeatherModel],
+    *,
+    max_age: int | None = None,
+    no_cache: bool = False,
+) -> WeatherModel:
+    """Async version of get_current_weather and get_one_call_current_weather.
+
+    Errors are raised instead of exiting so one bad location doesn't stop the others.
+    """
+    with span("weather", model=model.__name__) as attributes:
+        cache = get_forecast_cache()
+        cache_key = _forecast_cache_key(url)
+        cached = _get_cached_weather(
+            url, model, cache, cache_key, max_age=max_age, no_cache=no_cache
+        )
+        attributes["cached"] = cached is not None
+        if cached:
+            return cached
+
+        from weather_command import _http
+
+        response = await _http.async_get(client, url)
+        weather = _parse_weather_response(response, model)
+        cache.set(cache_key, response.text)
+        _history.record_weather(url, weather)
+        return weather
+
+
+def stream_daily_weather(
+    url: str, console: Console, *, max_age: int | None = None, no_cache: bool = False
+) -> Iterator[tuple[int, DailyRecord]]:
+    """Yields the location's timezone offset and each day of the forecast as it is downloaded.
+
+    The response is parsed as it arrives so each day can be used before the rest of the response
+    has been received.
+    """
+    return _stream_weather(
+        url, console, "daily", DailyRecord.decode, max_age=max_age, no_cache=no_cache
+    )
+
+
+def stream_hourly_weather(
+    url: str, console: Console, *, max_age: int | None = None, no_cache: bool = False
+) -> Iterator[tuple[int, HourlyRecord]]:
+    """Yields the location's timezone offset and each hour of the forecast as it is downloaded."""
+    return _stream_weather(
+        url, console, "hourly", HourlyRecord.decode, max_age=max_age, no_cache=no_cache
+    )
+
+
+def get_forecast_cache() -> Cache:
+    return Cache(
+        get_cache_dir() / "cache.sqlite",
+        "forecast",
+        ttl=get_forecast_cache_ttl() + get_forecast_cache_stale_ttl(),
+        max_entries=get_forecast_cache_max_entries(),
+    )
+
+
+def wait_for_revalidations(timeout: float | None = None) -> None:
+    with _revalidations_lock:
+        threads = list(_revalidations.values())
+    for thread in threads:
+        thread.join(timeout)
+
+
+def watch_weather(url: str, model: Type[WeatherModel]) -> Callable[[], WeatherModel | None]:
+    """Returns a function that gets the weather only when it has changed since the last call.
+
+    Requests are sent with If-None-Match and If-Modified-Since when the previous response had an
+    ETag or Last-Modified header, and a 304 response means nothing changed. Because OpenWeather
+    doesn't send these headers a hash of the body is compared as well so unchanged data isn't
+    parsed again. Changed data is stored in the cache. Errors are raised instead of exiting.
+    """
+    from weather_command import _http
+
+    cache = get_forecast_cache()
+    cache_key = _forecast_cache_key(url)
+    headers: dict[str, str] = {}
+    digest: str | None = None
+    # Usually the weather was just retrieved to draw it the first time.
+    if _last_response is not None and _last_response.cache_key == cache_key:
+        headers.update(_last_response.headers)
+        digest = _digest(_last_response.text)
+
+    def get_if_changed() -> WeatherModel | None:
+        nonlocal digest
+
+        response = _http.get(url, headers=dict(headers))
+        if response.status_code == 304:
+            return None
 
-def get_one_call_current_weather(url: str, console: Console) -> OneCallWeather:
-    response = httpx.get(url)
-    try:
         response.raise_for_status()
-        return OneCallWeather(**response.json())
-    except httpx.HTTPStatusError as e:
-        check_status_error(e, console)
-    except ValidationError:
-        _print_validation_error(console)
+        headers.update(_conditional_headers(response.headers))
+        response_digest = _digest(response.text)
+        if response_digest == digest:
+            return None
 
-    # Shouldn't be possible to reach this. Here as a fail safe.
-    console.print("[red]Unable to get weather data[/red]")  # pragma: no cover
-    sys.exit(1)  # pragma: no cover
+        weather = _parse_weather_response(response, model)
+        cache.set(cache_key, response.text)
+        _history.record_weather(url, weather)
+        digest = response_digest
+        return weather
+
+    return get_if_changed
 
 
 class WeatherIcons(Enum):
@@ -66,6 +215,270 @@ class WeatherIcons(Enum):
             return None
 
 
+def _conditional_headers(response_headers: Mapping[str, str]) -> dict[str, str]:
+    return {
+        conditional: response_headers[validator]
+        for validator, conditional in (
+            ("etag", "if-none-match"),
+            ("last-modified", "if-modified-since"),
+        )
+        if validator in response_headers
+    }
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _parse_weather_response(response: httpx.Response, model: Type[WeatherModel]) -> WeatherModel:
+    response.raise_for_status()
+    with span("decode", bytes=len(response.content)):
+        data = response.json()
+
+    return _decode_weather(data, model)
+
+
+def _decode_weather(data: Any, model: Type[WeatherModel]) -> WeatherModel:
+    with span("validate"):
+        if issubclass(model, (OneCallRecord, OneCallTempRecord)):
+            if get_strict_validation():
+                OneCallWeather(**data)
+
+            return model.decode(data)
+
+        return model(**data)
+
+
 def _print_validation_error(console: Console) -> None:
     console.print("[red]Unable to get the weather data for the specified location[/red]")
     sys.exit(1)
+
+
+def _get_weather(
+    url: str,
+    console: Console,
+    model: Type[WeatherModel],
+    *,
+    max_age: int | None = None,
+    no_cache: bool = False,
+) -> WeatherModel:
+    with span("weather", model=model.__name__) as attributes:
+        cache = get_forecast_cache()
+        cache_key = _forecast_cache_key(url)
+        cached = _get_cached_weather(
+            url, model, cache, cache_key, max_age=max_age, no_cache=no_cache
+        )
+        attributes["cached"] = cached is not None
+        if cached:
+            return cached
+
+        return _fetch_weather(url, console, model, cache, cache_key)
+
+
+def _fetch_weather(
+    url: str, console: Console, model: Type[WeatherModel], cache: Cache, cache_key: str
+) -> WeatherModel:
+    # httpx is slow to import and isn't needed when the weather is cached, so it is only imported
+    # once a request has to be made.
+    import httpx
+
+    from weather_command import _http
+
+    global _last_response
+
+    try:
+        response = _http.get(url)
+        weather = _parse_weather_response(response, model)
+        cache.set(cache_key, response.text)
+        _history.record_weather(url, weather)
+        _last_response = _Response(cache_key, response.text, _conditional_headers(response.headers))
+        return weather
+    except httpx.HTTPStatusError as e:
+        check_status_error(e, console)
+    except RateLimitExceeded as e:
+        print_rate_limit_error(e, console)
+    except httpx.TransportError as e:
+        print_request_error(e, console)
+    except (DecodeError, ValidationError):
+        _print_validation_error(console)
+
+    # Shouldn't be possible to reach this. Here as a fail safe.
+    console.print("[red]Unable to get weather data[/red]")  # pragma: no cover
+    sys.exit(1)  # pragma: no cover
+
+
+def _stream_weather(
+    url: str,
+    console: Console,
+    series: str,
+    decode: Callable[[dict[str, Any]], T],
+    *,
+    max_age: int | None,
+    no_cache: bool,
+) -> Iterator[tuple[int, T]]:
+    cache = get_forecast_cache()
+    cache_key = _forecast_cache_key(url)
+    weather = _get_cached_weather(
+        url, OneCallRecord, cache, cache_key, max_age=max_age, no_cache=no_cache
+    )
+    if weather is None and get_strict_validation():
+        # The whole response has to be validated before any of it can be used.
+        weather = _fetch_weather(url, console, OneCallRecord, cache, cache_key)
+
+    if weather is not None:
+        for record in getattr(weather, series):
+            yield weather.timezone_offset, record
+        return
+
+    import httpx
+
+    from weather_command import _http
+
+    # A span can't be held open across the yields, the caller's spans would nest under it, so the
+    # stream is timed as a whole and recorded at the end.
+    start = time.perf_counter()
+    try:
+        with _http.stream(url) as response:
+            response.raise_for_status()
+            body = bytearray()
+
+            def chunks() -> Iterator[bytes]:
+                for chunk in response.iter_bytes():
+                    body.extend(chunk)
+                    yield chunk
+
+            offset: int | None = None
+            # OpenWeather sends the offset first, this is only in case that changes.
+            pending: list[T] = []
+            for key, value in iter_members(chunks(), (series,)):
+                if key == "timezone_offset":
+                    offset = int(value)
+                    for record in pending:
+                        yield offset, record
+                    pending.clear()
+                elif key == series:
+                    record = _decode_item(decode, value)
+                    if offset is None:
+                        pending.append(record)
+                    else:
+                        yield offset, record
+
+            if offset is None:
+                raise DecodeError("The response doesn't have a timezone_offset")
+
+            text = body.decode(response.encoding or "utf-8")
+            cache.set(cache_key, text)
+            if _history.is_enabled():
+                _record_streamed_history(url, text)
+            record_span("weather", start, time.perf_counter(), model=series, streamed=True)
+            return
+    except httpx.HTTPStatusError as e:
+        check_status_error(e, console)
+    except RateLimitExceeded as e:
+        print_rate_limit_error(e, console)
+    except httpx.TransportError as e:
+        print_request_error(e, console)
+    except DecodeError:
+        _print_validation_error(console)
+
+    # Shouldn't be possible to reach this. Here as a fail safe.
+    console.print("[red]Unable to get weather data[/red]")  # pragma: no cover
+    sys.exit(1)  # pragma: no cover
+
+
+def _record_streamed_history(url: str, text: str) -> None:
+    # Only the streamed series was decoded, the history needs all of the response.
+    try:
+        _history.record_weather(url, OneCallRecord.decode(json.loads(text)))
+    except ValueError:
+        # The records that were shown decoded, only a part that isn't shown is broken.
+        pass
+
+
+def _decode_item(decode: Callable[[dict[str, Any]], T], value: Any) -> T:
+    try:
+        return decode(value)
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        raise DecodeError(f"Unable to decode the one call response: {e!r}") from e
+
+
+def _get_cached_weather(
+    url: str,
+    model: Type[WeatherModel],
+    cache: Cache,
+    cache_key: str,
+    *,
+    max_age: int | None,
+    no_cache: bool,
+) -> WeatherModel | None:
+    global _last_response
+
+    if no_cache:
+        return None
+
+    with span("cache"):
+        cached = cache.get(cache_key)
+    if not cached:
+        _metrics.CACHE_LOOKUPS.inc(cache="forecast", result="miss")
+        return None
+
+    fresh = cached.age <= (get_forecast_cache_ttl() if max_age is None else max_age)
+    # Slightly stale data is returned right away and refreshed in the background unless the
+    # caller asked for a specific maximum age.
+    if not fresh and max_age is not None:
+        _metrics.CACHE_LOOKUPS.inc(cache="forecast", result="miss")
+        return None
+
+    try:
+        with span("decode"):
+            data = json.loads(cached.value)
+        weather = _decode_weather(data, model)
+    except (TypeError, ValueError):
+        cache.delete(cache_key)
+        _metrics.CACHE_LOOKUPS.inc(cache="forecast", result="miss")
+        return None
+
+    if not fresh:
+        _revalidate(url, model, cache, cache_key)
+
+    _last_response = _Response(cache_key, cached.value, {})
+    _metrics.CACHE_LOOKUPS.inc(cache="forecast", result="hit" if fresh else "stale")
+    return weather
+
+
+def _forecast_cache_key(url: str) -> str:
+    parsed_url = urlsplit(url)
+    params = sorted(
+        (k, v) for k, v in parse_qsl(parsed_url.query, keep_blank_values=True) if k != "appid"
+    )
+    return urlunsplit(parsed_url._replace(query=urlencode(params), fragment=""))
+
+
+def _revalidate(url: str, model: Type[WeatherModel], cache: Cache, cache_key: str) -> None:
+    def refresh() -> None:
+        import httpx
+
+        from weather_command import _http
+
+        try:
+            response = _http.get(url)
+            weather = _parse_weather_response(response, model)
+            cache.set(cache_key, response.text)
+            _history.record_weather(url, weather)
+        except (httpx.HTTPError, RateLimitExceeded, ValidationError, ValueError):
+            # The stale data was already returned. The next call will try again.
+            pass
+        finally:
+            with _revalidations_lock:
+                _revalidations.pop(cache_key, None)
+
+    # The server calls this from several threads, the lock keeps two of them from both starting a
+    # refresh of the same data.
+    with _revalidations_lock:
+        if cache_key in _revalidations:
+            return
+
+        # Not a daemon thread so a short lived process waits for the refresh before exiting.
+        thread = threading.Thread(target=refresh, name="weather-command-revalidate")
+        _revalidations[cache_key] = thread
+        thread.start()
@@ -1,15 +1,25 @@
 from __future__ import annotations
 
 import sys
+from datetime import datetime, timezone
+from math import ceil
+from typing import TYPE_CHECKING
 
-from httpx import HTTPStatusError
-from rich.console import Console
+if TYPE_CHECKING:  # pragma: no cover
+    from httpx import HTTPStatusError, Response, TransportError
+    from rich.console import Console
 
 
 class MissingApiKey(Exception):
     pass
 
 
+class RateLimitExceeded(Exception):
+    def __init__(self, message: str, *, retry_after: float | None = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
 class UnknownSearchTypeError(Exception):
     pass
 
@@ -18,4 +28,75 @@ def check_status_error(error: HTTPStatusError, console: Console) -> None:
     if error.response.status_code == 404:
         console.print("[red]Unable to find weather data for the specified location[/red]")
         sys.exit(1)
+    if error.response.status_code == 429:
+        print_rate_limit_error(
+            RateLimitExceeded(
+                f"The rate limit for {error.request.url.host} has been reached",
+                retry_after=get_retry_after(error.response),
+            ),
+            console,
+        )
     raise error
+
+
+def get_retry_after(response: Response) -> float | None:
+    """Gets the number of seconds to wait from a response's Retry-After header."""
+    retry_after = response.headers.get("retry-after")
+    if not retry_after:
+        return None
+
+    try:
+        return max(float(retry_after), 0.0)
+    except ValueError:
+        pass
+
+    from email.utils import parsedate_to_datetime
+
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def print_request_error(error: TransportError, console: Console) -> None:
+    console.print(
+        f"[red]Unable to get weather data, the request failed ({error.__class__.__name__})[/red]"
+    )
+    sys.exit(1)
+
+
+def print_rate_limit_error(error: RateLimitExceeded, console: Console) -> None:
+    message = str(error)
+    if error.retry_after is not None:
+        message = f"{message}, try again in {ceil(error.retry_after)} seconds"
+    console.print(f"[red]{message}[/red]")
+    sys.exit(1)
+
+
+def describe_error(error: BaseException) -> str:
+    """A short description of why getting the weather failed, for when one failure shouldn't exit."""
+    from httpx import HTTPError, HTTPStatusError
+    from pydantic.error_wrappers import ValidationError
+
+    if isinstance(error, HTTPStatusError):
+        if error.response.status_code == 404:
+            return "location not found"
+        if error.response.status_code == 429:
+            return "rate limit reached"
+        return f"status code {error.response.status_code}"
+
+    if isinstance(error, RateLimitExceeded):
+        return "rate limit reached"
+
+    if isinstance(error, (ValidationError, IndexError)):
+        return "unexpected response"
+
+    if isinstance(error, HTTPError):
+        return f"request failed ({error.__class__.__name__})"
+
+    return str(error) or error.__class__.__name__
@@ -1,22 +1,82 @@
+import sys
 from enum import Enum
-from typing import Optional
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional
 
-from dotenv import load_dotenv
-from rich.console import Console
-from typer import Argument, Option, Typer
+import click
+from typer import Argument, BadParameter, Context, Option, Typer
+from typer.core import TyperGroup
 
-from weather_command._builder import show_current, show_daily, show_hourly
+from weather_command._config import (
+    DEFAULT_CONCURRENCY,
+    PROGRESS_INTERVAL,
+    SERVE_HOST,
+    SERVE_PORT,
+    get_city_index_file,
+    get_forecast_cache_stale_ttl,
+    get_forecast_cache_ttl,
+    get_history_enabled,
+    get_postal_index_file,
+    get_snapshot_file,
+    get_trace_file,
+)
 
-load_dotenv()
+if TYPE_CHECKING:  # pragma: no cover
+    from rich.console import Console
 
-app = Typer()
-console = Console()
+DEFAULT_COMMAND = "show"
+
+
+class _DefaultCommandGroup(TyperGroup):
+    """Runs the show command when the first argument isn't the name of another command.
+
+    This keeps `weather-command city seattle` working alongside the other commands.
+    """
+
+    def parse_args(self, ctx: click.Context, args: List[str]) -> List[str]:
+        group_options = {x: param for param in self.get_params(ctx) for x in param.opts}
+        # Skip past options given before the command, such as --replay DIR.
+        i = 0
+        while i < len(args) and args[i].split("=", 1)[0] in group_options:
+            param = group_options[args[i].split("=", 1)[0]]
+            takes_value = isinstance(param, click.Option) and not param.is_flag
+            i += 2 if takes_value and "=" not in args[i] else 1
+
+        if i < len(args) and args[i] not in self.commands:
+            args.insert(i, DEFAULT_COMMAND)
+
+        return super().parse_args(ctx, args)
+
+
+app = Typer(
+    cls=_DefaultCommandGroup,
+    help=f"Command line weather app. If no command is given the {DEFAULT_COMMAND} command is run.",
+)
+
+_console: Optional["Console"] = None
 
 
 class ForecastType(str, Enum):
     CURRENT = "current"
     DAILY = "daily"
     HOURLY = "hourly"
+    ALL = "all"
+
+
+class FileFormat(str, Enum):
+    CSV = "csv"
+    JSONL = "jsonl"
+
+
+class IndexFormat(str, Enum):
+    CSV = "csv"
+    GEONAMES = "geonames"
+
+
+class HistoryType(str, Enum):
+    CURRENT = "current"
+    HOURLY = "hourly"
+    DAILY = "daily"
 
 
 class How(str, Enum):
@@ -24,7 +84,166 @@ class How(str, Enum):
     ZIP = "zip"
 
 
-@app.command()
+class OutputFormat(str, Enum):
+    TABLE = "table"
+    JSON = "json"
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+def get_console() -> "Console":
+    # rich, along with httpx and pydantic, is only imported once a command runs so that --help
+    # and shell completion start quickly.
+    global _console
+
+    if _console is None:
+        from rich.console import Console
+
+        _console = Console()
+
+    return _console
+
+
+def _validate_replay_latency(value: Optional[str]) -> Optional[str]:
+    if value is None or value == "recorded":
+        return value
+
+    try:
+        if float(value) >= 0:
+            return value
+    except ValueError:
+        pass
+
+    raise BadParameter("must be a number of seconds or 'recorded'")
+
+
+def _validate_history_time(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return value
+
+    from weather_command._history import parse_time
+
+    try:
+        parse_time(value)
+    except ValueError:
+        raise BadParameter("must be a date and time like 2021-09-22T15:00 or how long ago like 6h")
+
+    return value
+
+
+def _validate_max_age(value: Optional[int]) -> Optional[int]:
+    # Older data has already been removed from the cache, so a larger age can't be honored.
+    limit = get_forecast_cache_ttl() + get_forecast_cache_stale_ttl()
+    if value is not None and value > limit:
+        raise BadParameter(f"can't be more than {limit} seconds, how long weather data is cached")
+
+    return value
+
+
+def _validate_percentiles(value: Optional[List[float]]) -> Optional[List[float]]:
+    if value and not all(0 <= x <= 100 for x in value):
+        raise BadParameter("must be between 0 and 100")
+
+    return value
+
+
+@app.callback()
+def _setup(
+    ctx: Context,
+    record: Optional[Path] = Option(
+        None,
+        "--record",
+        file_okay=False,
+        help="Save every response from OpenWeather and the geocoding service in an archive in this directory so the run can be replayed later with --replay.",
+    ),
+    replay: Optional[Path] = Option(
+        None,
+        "--replay",
+        exists=True,
+        file_okay=False,
+        help="Use the responses saved with --record in this directory instead of making requests.",
+    ),
+    replay_latency: Optional[str] = Option(
+        None,
+        "--replay-latency",
+        callback=_validate_replay_latency,
+        help="How long, in seconds, to wait before each replayed response to simulate the network, or 'recorded' to wait as long as the original request took.",
+    ),
+    timings: bool = Option(
+        False,
+        "--timings",
+        help="Print how long each part of the run, such as geocoding, getting the weather, decoding, and rendering, took on stderr.",
+    ),
+    trace_file: Optional[Path] = Option(
+        None,
+        "--trace-file",
+        dir_okay=False,
+        help="Append the timing of each part of the run to this file as JSON lines. Defaults to the WEATHER_COMMAND_TRACE_FILE environment variable.",
+    ),
+    metrics_port: Optional[int] = Option(
+        None,
+        "--metrics-port",
+        min=0,
+        max=65535,
+        help="Serve metrics in the Prometheus text format at http://127.0.0.1:METRICS_PORT/metrics while the command runs.",
+    ),
+    metrics_textfile: Optional[Path] = Option(
+        None,
+        "--metrics-textfile",
+        dir_okay=False,
+        help="Write metrics in the Prometheus text format to this file while the command runs, for the node exporter's textfile collector.",
+    ),
+    save_history: bool = Option(
+        False,
+        "--history",
+        help="Save the weather retrieved in the history so it can be shown later with the history command. Defaults to the WEATHER_COMMAND_HISTORY environment variable.",
+    ),
+) -> None:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    trace_file = trace_file or get_trace_file()
+    if timings or trace_file:
+        from weather_command import _timings
+
+        run = _timings.start(ctx.invoked_subcommand, print_breakdown=timings, trace_file=trace_file)
+        ctx.call_on_close(lambda: _timings.stop(run))
+
+    if metrics_port is not None or metrics_textfile:
+        from weather_command._metrics import MetricsExporter
+
+        try:
+            exporter = MetricsExporter(port=metrics_port, textfile=metrics_textfile)
+        except OSError as e:
+            raise BadParameter(f"unable to serve metrics: {e}", param_hint="--metrics-port")
+
+        exporter.start()
+        ctx.call_on_close(exporter.stop)
+
+    if save_history or get_history_enabled():
+        from weather_command import _history
+
+        _history.enable()
+        ctx.call_on_close(_history.flush)
+
+    if record and replay:
+        raise BadParameter("--record and --replay can't be used together")
+
+    if record or replay:
+        from weather_command._archive import Archive, use_archive
+
+        use_archive(
+            Archive(
+                record or replay,  # type: ignore[arg-type]
+                replay=replay is not None,
+                latency=None if replay_latency in (None, "recorded") else float(replay_latency),  # type: ignore[arg-type]
+                recorded_latency=replay_latency == "recorded",
+            )
+        )
+
+
+@app.command(DEFAULT_COMMAND)
 def main(
     how: How = Argument(
         "city",
@@ -58,7 +277,7 @@ def main(
         ForecastType.CURRENT,
         "--forecast-type",
         "-f",
-        help="The type of forecast to display.",
+        help="The type of forecast to display. all shows the current, hourly, and daily weather from a single request.",
     ),
     temp_only: bool = Option(
         False, "--temp-only", "-t", help="If this flag is set only tempatures will be displayed."
@@ -66,9 +285,87 @@ def main(
     terminal_width: Optional[int] = Option(
         None, "--terminal_width", help="Allows for overriding the default terminal width."
     ),
+    max_age: Optional[int] = Option(
+        None,
+        "--max-age",
+        min=0,
+        callback=_validate_max_age,
+        help="The maximum age, in seconds, of cached weather data that can be used. By default data up to 10 minutes old is used and slightly older data is used while it is refreshed in the background.",
+    ),
+    no_cache: bool = Option(
+        False, "--no-cache", help="If this flag is set cached weather data will not be used."
+    ),
+    output_format: OutputFormat = Option(
+        "table",
+        "--output",
+        "-o",
+        help="How to output the weather. json, ndjson, and csv write the data to stdout without any formatting.",
+    ),
+    watch: Optional[float] = Option(
+        None,
+        "--watch",
+        min=1,
+        help="Keep showing the weather and check for updates every WATCH seconds. The table is only redrawn when the weather changes. Press Ctrl+C to stop.",
+    ),
+    use_snapshot: bool = Option(
+        False,
+        "--snapshot",
+        help="Print the weather as plain text from the file written by the snapshot command, without any requests. If the location isn't in the snapshot, or it is older than --max-age, the weather is requested as usual.",
+    ),
 ) -> None:
+    """Get the weather for a location."""
     units = "imperial" if imperial else "metric"
 
+    if use_snapshot and (watch or output_format != OutputFormat.TABLE):
+        get_console().print("[red]--snapshot can't be used with --watch or --output[/red]")
+        raise SystemExit(1)
+
+    if use_snapshot:
+        # Checked before anything else is imported, reading the snapshot only needs the stdlib.
+        from weather_command._snapshot import print_snapshot, snapshot_key
+
+        key = snapshot_key(
+            how=how.value, city_zip=city_zip, state_code=state_code, country_code=country_code
+        )
+        if print_snapshot(
+            sys.stdout,
+            get_snapshot_file(),
+            key,
+            forecast_type=forecast_type.value,
+            units=units,
+            am_pm=am_pm,
+            temp_only=temp_only,
+            max_age=max_age,
+        ):
+            return
+
+    if watch and output_format != OutputFormat.TABLE:
+        get_console().print("[red]--watch can only be used with table output[/red]")
+        raise SystemExit(1)
+
+    if forecast_type == ForecastType.ALL and output_format != OutputFormat.TABLE:
+        get_console().print("[red]-f all can only be used with table output[/red]")
+        raise SystemExit(1)
+
+    if output_format != OutputFormat.TABLE:
+        _export(
+            how=how,
+            city_zip=city_zip,
+            output_format=output_format,
+            forecast_type=forecast_type,
+            units=units,
+            state_code=state_code,
+            country_code=country_code,
+            temp_only=temp_only,
+            max_age=max_age,
+            no_cache=no_cache,
+        )
+        return
+
+    from weather_command._builder import show_all, show_current, show_daily, show_hourly
+
+    console = get_console()
+
     if forecast_type == "current":
         show_current(
             console=console,
@@ -80,6 +377,9 @@ def main(
             am_pm=am_pm,
             temp_only=temp_only,
             terminal_width=terminal_width,
+            max_age=max_age,
+            no_cache=no_cache,
+            watch=watch,
         )
     elif forecast_type == "daily":
         show_daily(
@@ -92,6 +392,9 @@ def main(
             am_pm=am_pm,
             temp_only=temp_only,
             terminal_width=terminal_width,
+            max_age=max_age,
+            no_cache=no_cache,
+            watch=watch,
         )
     elif forecast_type == "hourly":
         show_hourly(
@@ -104,7 +407,597 @@ def main(
             am_pm=am_pm,
             temp_only=temp_only,
             terminal_width=terminal_width,
+            max_age=max_age,
+            no_cache=no_cache,
+            watch=watch,
         )
+    elif forecast_type == "all":
+        show_all(
+            console=console,
+            how=how,
+            city_zip=city_zip,
+            units=units,
+            state_code=state_code,
+            country_code=country_code,
+            am_pm=am_pm,
+            temp_only=temp_only,
+            terminal_width=terminal_width,
+            max_age=max_age,
+            no_cache=no_cache,
+            watch=watch,
+        )
+
+
+def _export(
+    *,
+    how: How,
+    city_zip: str,
+    output_format: OutputFormat,
+    forecast_type: ForecastType,
+    units: str,
+    state_code: Optional[str],
+    country_code: Optional[str],
+    temp_only: bool,
+    max_age: Optional[int],
+    no_cache: bool,
+) -> None:
+    from rich.console import Console
+
+    from weather_command._export import export_current, export_daily, export_hourly
+
+    export = {
+        ForecastType.CURRENT: export_current,
+        ForecastType.DAILY: export_daily,
+        ForecastType.HOURLY: export_hourly,
+    }[forecast_type]
+    export(
+        sys.stdout,
+        # Errors go to stderr so they don't end up in the data.
+        Console(stderr=True),
+        how,
+        city_zip,
+        output_format=output_format.value,
+        state_code=state_code,
+        country_code=country_code,
+        units=units,
+        temp_only=temp_only,
+        max_age=max_age,
+        no_cache=no_cache,
+    )
+
+
+@app.command()
+def batch(
+    locations: Optional[List[str]] = Argument(
+        None,
+        help="The locations for which the weather should be retrieved in the form CITY_ZIP[,STATE_CODE[,COUNTRY_CODE]]. If no locations are given they are read from stdin, one per line.",
+    ),
+    how: How = Option("city", "--how", help="How to get the weather."),
+    state_code: Optional[str] = Option(
+        None,
+        "--state-code",
+        "-s",
+        help="The name of the state used for locations that don't include one.",
+    ),
+    country_code: Optional[str] = Option(
+        None,
+        "--country-code",
+        "-c",
+        help="The country code used for locations that don't include one.",
+    ),
+    imperial: bool = Option(
+        False,
+        "--imperial",
+        "-i",
+        help="If this flag is used the units will be imperial, otherwise units will be metric.",
+    ),
+    am_pm: bool = Option(
+        False,
+        "--am-pm",
+        help="If this flag is set the times will be displayed in 12 hour format, otherwise times will be 24 hour format.",
+    ),
+    forecast_type: ForecastType = Option(
+        ForecastType.CURRENT,
+        "--forecast-type",
+        "-f",
+        help="The type of forecast to display.",
+    ),
+    temp_only: bool = Option(
+        False, "--temp-only", "-t", help="If this flag is set only tempatures will be displayed."
+    ),
+    terminal_width: Optional[int] = Option(
+        None, "--terminal_width", help="Allows for overriding the default terminal width."
+    ),
+    max_age: Optional[int] = Option(
+        None,
+        "--max-age",
+        min=0,
+        callback=_validate_max_age,
+        help="The maximum age, in seconds, of cached weather data that can be used.",
+    ),
+    no_cache: bool = Option(
+        False, "--no-cache", help="If this flag is set cached weather data will not be used."
+    ),
+    concurrency: int = Option(
+        DEFAULT_CONCURRENCY,
+        "--concurrency",
+        min=1,
+        help="The maximum number of requests made at the same time.",
+    ),
+) -> None:
+    """Get the weather for many locations at once."""
+    from weather_command._batch import parse_batch_location, show_batch
+
+    console = get_console()
+    if forecast_type == ForecastType.ALL:
+        console.print("[red]-f all can't be used with the batch command[/red]")
+        raise SystemExit(1)
+
+    values = locations or [x.strip() for x in sys.stdin if x.strip()]
+    if not values:
+        console.print("[red]No locations were given[/red]")
+        raise SystemExit(1)
+
+    show_batch(
+        console,
+        (
+            parse_batch_location(x, how.value, state_code=state_code, country_code=country_code)
+            for x in values
+        ),
+        forecast_type=forecast_type,
+        units="imperial" if imperial else "metric",
+        am_pm=am_pm,
+        temp_only=temp_only,
+        terminal_width=terminal_width,
+        max_age=max_age,
+        no_cache=no_cache,
+        concurrency=concurrency,
+    )
+
+
+@app.command()
+def snapshot(
+    locations: Optional[List[str]] = Argument(
+        None,
+        help="The locations to save in the form CITY_ZIP[,STATE_CODE[,COUNTRY_CODE]]. If no locations are given they are read from stdin, one per line.",
+    ),
+    how: How = Option("city", "--how", help="How to get the weather."),
+    state_code: Optional[str] = Option(
+        None,
+        "--state-code",
+        "-s",
+        help="The name of the state used for locations that don't include one.",
+    ),
+    country_code: Optional[str] = Option(
+        None,
+        "--country-code",
+        "-c",
+        help="The country code used for locations that don't include one.",
+    ),
+    snapshot_file: Optional[Path] = Option(
+        None,
+        "--file",
+        dir_okay=False,
+        help="Where to write the snapshot. Defaults to the WEATHER_COMMAND_SNAPSHOT_FILE environment variable, or snapshot.bin in the cache directory.",
+    ),
+    watch: Optional[float] = Option(
+        None,
+        "--watch",
+        min=1,
+        help="Keep refreshing the snapshot every WATCH seconds. Press Ctrl+C to stop.",
+    ),
+    max_age: Optional[int] = Option(
+        None,
+        "--max-age",
+        min=0,
+        callback=_validate_max_age,
+        help="The maximum age, in seconds, of cached weather data that can be used.",
+    ),
+    no_cache: bool = Option(
+        False, "--no-cache", help="If this flag is set cached weather data will not be used."
+    ),
+    concurrency: int = Option(
+        DEFAULT_CONCURRENCY,
+        "--concurrency",
+        min=1,
+        help="The maximum number of requests made at the same time.",
+    ),
+) -> None:
+    """Save the current, hourly, and daily weather for locations in a file that show --snapshot reads instantly."""
+    import time
+
+    from weather_command._batch import parse_batch_location
+    from weather_command._snapshot import refresh_snapshot
+    from weather_command.errors import describe_error
+
+    console = get_console()
+    values = locations or [x.strip() for x in sys.stdin if x.strip()]
+    if not values:
+        console.print("[red]No locations were given[/red]")
+        raise SystemExit(1)
+
+    batch_locations = [
+        parse_batch_location(x, how.value, state_code=state_code, country_code=country_code)
+        for x in values
+    ]
+    path = snapshot_file or get_snapshot_file()
+
+    try:
+        while True:
+            failed = refresh_snapshot(
+                path,
+                batch_locations,
+                max_age=max_age,
+                no_cache=no_cache,
+                concurrency=concurrency,
+            )
+            for batch_location, error in failed:
+                console.print(
+                    f"[red]Unable to get weather data for {batch_location.name}: {describe_error(error)}[/red]"
+                )
+
+            if not watch:
+                break
+            time.sleep(watch)
+    except KeyboardInterrupt:
+        return
+
+    if failed:
+        raise SystemExit(1)
+
+
+@app.command("build-index")
+def build_index(
+    path: Path = Argument(
+        ...,
+        exists=True,
+        dir_okay=False,
+        help="A CSV of postal codes with postal_code, latitude, and longitude columns, and optional country_code, place_name, and state_code columns, or a GeoNames postal code dump. With --cities, a CSV of cities with place_name, latitude, and longitude columns, and optional country_code, state_code, and population columns, or a GeoNames cities file.",
+    ),
+    cities: bool = Option(
+        False,
+        "--cities",
+        help="Build the city index, used to find cities without the geocoding service and to correct misspelled names it doesn't find, instead of the postal code index.",
+    ),
+    index_format: Optional[IndexFormat] = Option(
+        None,
+        "--format",
+        help="The format of the file. By default .txt and .tsv files are read as GeoNames files and anything else as csv.",
+    ),
+    index_file: Optional[Path] = Option(
+        None,
+        "--file",
+        dir_okay=False,
+        help="Where to write the index. Defaults to the WEATHER_COMMAND_POSTAL_INDEX or WEATHER_COMMAND_CITY_INDEX environment variable, or postal.idx or cities.sqlite in the data directory.",
+    ),
+) -> None:
+    """Build a local postal code or city index so locations can be found without the geocoding service."""
+    from weather_command._postal import detect_index_format
+
+    console = get_console()
+    file_format = index_format.value if index_format else detect_index_format(path)
+    with path.open(newline="", encoding="utf-8") as f:
+        try:
+            if cities:
+                from weather_command._cities import CityIndex, read_city_places
+
+                output = index_file or get_city_index_file()
+                count = CityIndex(output).build(read_city_places(f, file_format))
+                console.print(f"Indexed {count:,} cities in {output}")
+            else:
+                from weather_command._postal import build_postal_index, read_postal_places
+
+                output = index_file or get_postal_index_file()
+                count = build_postal_index(output, read_postal_places(f, file_format))
+                console.print(f"Indexed {count:,} postal codes in {output}")
+        except ValueError as e:
+            console.print(f"[red]{e}[/red]")
+            raise SystemExit(1)
+
+
+@app.command()
+def ingest(
+    path: Optional[Path] = Argument(
+        None,
+        exists=True,
+        dir_okay=False,
+        help="A CSV or JSON lines file of locations with a city_zip field and optional how, state_code, and country_code fields. If not given the locations are read from stdin.",
+    ),
+    file_format: Optional[FileFormat] = Option(
+        None,
+        "--format",
+        help="The format of the locations. By default this is determined from the file extension, falling back to csv.",
+    ),
+    how: How = Option("city", "--how", help="How to get the weather for records without a how."),
+    state_code: Optional[str] = Option(
+        None,
+        "--state-code",
+        "-s",
+        help="The name of the state used for records that don't include one.",
+    ),
+    country_code: Optional[str] = Option(
+        None,
+        "--country-code",
+        "-c",
+        help="The country code used for records that don't include one.",
+    ),
+    imperial: bool = Option(
+        False,
+        "--imperial",
+        "-i",
+        help="If this flag is used the units will be imperial, otherwise units will be metric.",
+    ),
+    max_age: Optional[int] = Option(
+        None,
+        "--max-age",
+        min=0,
+        callback=_validate_max_age,
+        help="The maximum age, in seconds, of cached weather data that can be used.",
+    ),
+    no_cache: bool = Option(
+        False, "--no-cache", help="If this flag is set cached weather data will not be used."
+    ),
+    concurrency: int = Option(
+        DEFAULT_CONCURRENCY,
+        "--concurrency",
+        min=1,
+        help="The maximum number of requests made at the same time.",
+    ),
+    progress_interval: float = Option(
+        PROGRESS_INTERVAL,
+        "--progress-interval",
+        min=0.1,
+        help="How often, in seconds, progress is reported on stderr.",
+    ),
+) -> None:
+    """Stream weather for a large file of locations to stdout as newline delimited JSON."""
+    import asyncio
+    from contextlib import ExitStack
+
+    from rich.console import Console
+
+    from weather_command._ingest import detect_format, ingest_locations, read_locations
+
+    file_format_value = file_format.value if file_format else detect_format(path)
+    with ExitStack() as stack:
+        f = stack.enter_context(path.open(newline="")) if path else sys.stdin
+        rows = read_locations(
+            f,
+            file_format_value,
+            how=how.value,
+            state_code=state_code,
+            country_code=country_code,
+        )
+        stats = asyncio.run(
+            ingest_locations(
+                rows,
+                sys.stdout,
+                Console(stderr=True),
+                units="imperial" if imperial else "metric",
+                max_age=max_age,
+                no_cache=no_cache,
+                concurrency=concurrency,
+                progress_interval=progress_interval,
+            )
+        )
+
+    if stats.failed:
+        raise SystemExit(1)
+
+
+@app.command()
+def history(
+    location: Optional[str] = Argument(
+        None,
+        help="Part of the name of the location to show. If not given the locations with history are listed.",
+    ),
+    since: Optional[str] = Option(
+        "1d",
+        "--since",
+        callback=_validate_history_time,
+        help="Only show weather from this time on, either a date and time like 2021-09-22T15:00 or how long ago like 6h or 2d.",
+    ),
+    until: Optional[str] = Option(
+        None,
+        "--until",
+        callback=_validate_history_time,
+        help="Only show weather from before this time, in the same form as --since.",
+    ),
+    history_types: Optional[List[HistoryType]] = Option(
+        None,
+        "--type",
+        help="The type of weather to show, can be given more than once. By default current observations and hourly and daily forecasts are all shown.",
+    ),
+    imperial: bool = Option(
+        False,
+        "--imperial",
+        "-i",
+        help="If this flag is used the units will be imperial, otherwise units will be metric.",
+    ),
+    am_pm: bool = Option(
+        False,
+        "--am-pm",
+        help="If this flag is set the times will be displayed in 12 hour format, otherwise times will be 24 hour format.",
+    ),
+    terminal_width: Optional[int] = Option(
+        None, "--terminal_width", help="Allows for overriding the default terminal width."
+    ),
+) -> None:
+    """Show the weather saved with --history or WEATHER_COMMAND_HISTORY."""
+    import sqlite3
+
+    from weather_command._builder import show_history, show_history_locations
+    from weather_command._history import KINDS, flush, get_history, parse_time
+
+    console = get_console()
+    # Anything this run saved is written first so it can be shown.
+    flush()
+    store = get_history()
+    try:
+        locations = store.find_locations(location)
+        if not locations:
+            console.print(
+                f"[red]No history for {location}[/red]" if location else "[red]No history[/red]"
+            )
+            raise SystemExit(1)
+
+        if location is None:
+            show_history_locations(console, locations, terminal_width)
+            return
+
+        observations = {
+            x.id: store.query(
+                x.id,
+                since=parse_time(since) if since else None,
+                until=parse_time(until) if until else None,
+                kinds=[x.value for x in history_types] if history_types else KINDS,
+            )
+            for x in locations
+        }
+    except sqlite3.Error as e:
+        console.print(f"[red]Unable to read the history: {e}[/red]")
+        raise SystemExit(1)
+
+    show_history(
+        console,
+        locations,
+        observations,
+        units="imperial" if imperial else "metric",
+        am_pm=am_pm,
+        terminal_width=terminal_width,
+    )
+
+
+@app.command()
+def summary(
+    location: Optional[str] = Argument(
+        None,
+        help="Part of the name of the locations to summarize. If not given every location with history is summarized.",
+    ),
+    since: Optional[str] = Option(
+        "30d",
+        "--since",
+        callback=_validate_history_time,
+        help="Only summarize weather from this time on, either a date and time like 2021-09-22T15:00 or how long ago like 6h or 2d.",
+    ),
+    until: Optional[str] = Option(
+        None,
+        "--until",
+        callback=_validate_history_time,
+        help="Only summarize weather from before this time, in the same form as --since.",
+    ),
+    history_types: Optional[List[HistoryType]] = Option(
+        None,
+        "--type",
+        help="The type of weather to summarize, can be given more than once. By default current observations and hourly forecasts are summarized.",
+    ),
+    percentiles: Optional[List[float]] = Option(
+        None,
+        "--percentile",
+        "-p",
+        callback=_validate_percentiles,
+        help="A percentile, from 0 to 100, to include along with the min, mean, and max. Can be given more than once. [default: 50, 90]",
+    ),
+    imperial: bool = Option(
+        False,
+        "--imperial",
+        "-i",
+        help="If this flag is used the units will be imperial, otherwise units will be metric.",
+    ),
+    output_format: OutputFormat = Option(
+        "table",
+        "--output",
+        "-o",
+        help="How to output the summary. json, ndjson, and csv write the data to stdout without any formatting.",
+    ),
+    terminal_width: Optional[int] = Option(
+        None, "--terminal_width", help="Allows for overriding the default terminal width."
+    ),
+) -> None:
+    """Summarize the saved weather for each location and day with the min, mean, max, and percentiles of the temperature, humidity, wind speed, and precipitation."""
+    import sqlite3
+
+    from weather_command._columns import (
+        SUMMARY_PERCENTILES,
+        summarize_daily,
+        summary_statistics,
+    )
+    from weather_command._history import flush, get_history, parse_time
+
+    console = get_console()
+    flush()
+    store = get_history()
+    try:
+        locations = store.find_locations(location)
+        if not locations:
+            console.print(
+                f"[red]No history for {location}[/red]" if location else "[red]No history[/red]"
+            )
+            raise SystemExit(1)
+
+        columns = store.columns(
+            [x.id for x in locations],
+            since=parse_time(since) if since else None,
+            until=parse_time(until) if until else None,
+            kinds=[x.value for x in history_types] if history_types else ["current", "hourly"],
+        )
+    except sqlite3.Error as e:
+        console.print(f"[red]Unable to read the history: {e}[/red]")
+        raise SystemExit(1)
+
+    percentiles = list(dict.fromkeys(percentiles or SUMMARY_PERCENTILES))
+    daily_summary = summarize_daily(
+        columns, {x.id: x.timezone_offset for x in locations}, percentiles
+    )
+    location_names = {x.id: x.name for x in locations}
+    statistics = summary_statistics(percentiles)
+    units = "imperial" if imperial else "metric"
+
+    if output_format != OutputFormat.TABLE:
+        from weather_command._export import export_daily_summary
+
+        export_daily_summary(
+            sys.stdout,
+            daily_summary,
+            location_names,
+            statistics,
+            output_format=output_format.value,
+            units=units,
+        )
+        return
+
+    from weather_command._builder import show_daily_summary
+
+    show_daily_summary(
+        console,
+        daily_summary,
+        location_names,
+        statistics,
+        units=units,
+        terminal_width=terminal_width,
+    )
+
+
+@app.command()
+def serve(
+    host: str = Option(SERVE_HOST, "--host", help="The address to listen on."),
+    port: int = Option(SERVE_PORT, "--port", help="The port to listen on."),
+    max_age: Optional[int] = Option(
+        None,
+        "--max-age",
+        min=0,
+        callback=_validate_max_age,
+        help="The maximum age, in seconds, of cached weather data that can be used.",
+    ),
+) -> None:
+    """Serve forecasts as JSON over HTTP from /current, /hourly, and /daily.
+
+    All clients share one connection pool and cache, and identical requests made at the same time
+    are only sent to OpenWeather once.
+    """
+    from weather_command._serve import serve as serve_forecasts
+
+    serve_forecasts(get_console(), host, port, max_age=max_age)
 
 
 if __name__ == "__main__":
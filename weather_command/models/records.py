@@ -0,0 +1,416 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, List, Optional
+
+
+class DecodeError(ValueError):
+    pass
+
+
+class Record:
+    __slots__: tuple[str, ...] = ()
+
+    def __eq__(self, other: object) -> bool:
+        return type(self) is type(other) and all(
+            getattr(self, x) == getattr(other, x) for x in self.__slots__
+        )
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{x}={getattr(self, x)!r}" for x in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class WeatherRecord(Record):
+    __slots__ = ("id", "main", "description", "icon")
+
+    id: int
+    main: str
+    description: str
+    icon: str
+
+    @classmethod
+    def decode(cls, data: dict[str, Any]) -> WeatherRecord:
+        record = cls.__new__(cls)
+        record.id = int(data["id"])
+        record.main = str(data["main"])
+        record.description = str(data["description"])
+        record.icon = str(data["icon"])
+        return record
+
+
+class PrecipAmountRecord(Record):
+    __slots__ = ("one_hour", "three_hour")
+
+    one_hour: float
+    three_hour: float
+
+    @classmethod
+    def decode(cls, data: dict[str, Any]) -> PrecipAmountRecord:
+        record = cls.__new__(cls)
+        record.one_hour = float(data.get("1h", 0.0))
+        record.three_hour = float(data.get("3h", 0.0))
+        return record
+
+
+class MinutelyRecord(Record):
+    __slots__ = ("dt", "precipitation")
+
+    dt: datetime
+    precipitation: float
+
+    @classmethod
+    def decode(cls, data: dict[str, Any]) -> MinutelyRecord:
+        record = cls.__new__(cls)
+        record.dt = _datetime(data["dt"])
+        record.precipitation = float(data["precipitation"])
+        return record
+
+
+class HourlyRecord(Record):
+    __slots__ = (
+        "dt",
+        "temp",
+        "feels_like",
+        "pressure",
+        "humidity",
+        "dew_point",
+        "uvi",
+        "clouds",
+        "visibility",
+        "wind_speed",
+        "wind_gust",
+        "wind_deg",
+        "rain",
+        "snow",
+        "pop",
+    )
+
+    dt: datetime
+    temp: float
+    feels_like: float
+    pressure: int
+    humidity: int
+    dew_point: float
+    uvi: float
+    clouds: int
+    visibility: int
+    wind_speed: float
+    wind_gust: float
+    wind_deg: int
+    rain: Optional[PrecipAmountRecord]
+    snow: Optional[PrecipAmountRecord]
+    pop: float
+
+    @classmethod
+    def decode(cls, data: dict[str, Any]) -> HourlyRecord:
+        record = cls.__new__(cls)
+        record.dt = _datetime(data["dt"])
+        record.temp = float(data["temp"])
+        record.feels_like = float(data["feels_like"])
+        record.pressure = int(data["pressure"])
+        record.humidity = int(data["humidity"])
+        record.dew_point = float(data["dew_point"])
+        record.uvi = float(data["uvi"])
+        record.clouds = int(data["clouds"])
+        record.visibility = int(data["visibility"])
+        record.wind_speed = float(data["wind_speed"])
+        record.wind_gust = float(data["wind_gust"])
+        record.wind_deg = int(data["wind_deg"])
+        record.rain = _precip(data.get("rain"))
+        record.snow = _precip(data.get("snow"))
+        record.pop = float(data["pop"])
+        return record
+
+
+class OneCallCurrentRecord(Record):
+    __slots__ = (
+        "dt",
+        "sunrise",
+        "sunset",
+        "temp",
+        "feels_like",
+        "pressure",
+        "humidity",
+        "dew_point",
+        "uvi",
+        "clouds",
+        "visibility",
+        "wind_speed",
+        "wind_deg",
+        "wind_gust",
+        "weather",
+    )
+
+    dt: int
+    sunrise: datetime
+    sunset: datetime
+    temp: float
+    feels_like: float
+    pressure: int
+    humidity: int
+    dew_point: float
+    uvi: float
+    clouds: int
+    visibility: int
+    wind_speed: float
+    wind_deg: int
+    wind_gust: float
+    weather: List[WeatherRecord]
+
+    @classmethod
+    def decode(cls, data: dict[str, Any]) -> OneCallCurrentRecord:
+        record = cls.__new__(cls)
+        record.dt = int(data["dt"])
+        record.sunrise = _datetime(data["sunrise"])
+        record.sunset = _datetime(data["sunset"])
+        record.temp = float(data["temp"])
+        record.feels_like = float(data["feels_like"])
+        record.pressure = int(data["pressure"])
+        record.humidity = int(data["humidity"])
+        record.dew_point = float(data["dew_point"])
+        record.uvi = float(data["uvi"])
+        record.clouds = int(data["clouds"])
+        record.visibility = int(data["visibility"])
+        record.wind_speed = float(data.get("wind_speed", 0.0))
+        record.wind_deg = int(data.get("wind_deg", 0))
+        record.wind_gust = float(data.get("wind_gust", 0.0))
+        record.weather = [WeatherRecord.decode(x) for x in data["weather"]]
+        return record
+
+
+class TempRecord(Record):
+    __slots__ = ("day", "min", "max", "night", "eve", "morn")
+
+    day: float
+    min: float
+    max: float
+    night: float
+    eve: float
+    morn: float
+
+    @classmethod
+    def decode(cls, data: dict[str, Any]) -> TempRecord:
+        record = cls.__new__(cls)
+        record.day = float(data.get("day", 0.0))
+        record.min = float(data.get("min", 0.0))
+        record.max = float(data.get("max", 0.0))
+        record.night = float(data.get("night", 0.0))
+        record.eve = float(data.get("eve", 0.0))
+        record.morn = float(data.get("morn", 0.0))
+        return record
+
+
+class DailyRecord(Record):
+    __slots__ = (
+        "dt",
+        "sunrise",
+        "sunset",
+        "moonrise",
+        "moonset",
+        "moon_phase",
+        "temp",
+        "feels_like",
+        "pressure",
+        "humidity",
+        "dew_point",
+        "wind_speed",
+        "wind_deg",
+        "wind_gust",
+        "weather",
+        "clouds",
+        "pop",
+        "rain",
+        "uvi",
+    )
+
+    dt: datetime
+    sunrise: datetime
+    sunset: datetime
+    moonrise: datetime
+    moonset: datetime
+    moon_phase: float
+    temp: TempRecord
+    feels_like: TempRecord
+    pressure: int
+    humidity: int
+    dew_point: float
+    wind_speed: float
+    wind_deg: int
+    wind_gust: float
+    weather: List[WeatherRecord]
+    clouds: int
+    pop: float
+    rain: float
+    uvi: float
+
+    @classmethod
+    def decode(cls, data: dict[str, Any]) -> DailyRecord:
+        record = cls.__new__(cls)
+        record.dt = _datetime(data["dt"])
+        record.sunrise = _datetime(data["sunrise"])
+        record.sunset = _datetime(data["sunset"])
+        record.moonrise = _datetime(data["moonrise"])
+        record.moonset = _datetime(data["moonset"])
+        record.moon_phase = float(data["moon_phase"])
+        record.temp = TempRecord.decode(data["temp"])
+        record.feels_like = TempRecord.decode(data["feels_like"])
+        record.pressure = int(data["pressure"])
+        record.humidity = int(data["humidity"])
+        record.dew_point = float(data["dew_point"])
+        record.wind_speed = float(data.get("wind_speed", 0.0))
+        record.wind_deg = int(data.get("wind_deg", 0))
+        record.wind_gust = float(data.get("wind_gust", 0.0))
+        record.weather = [WeatherRecord.decode(x) for x in data["weather"]]
+        record.clouds = int(data["clouds"])
+        record.pop = float(data["pop"])
+        record.rain = float(data.get("rain", 0.0))
+        record.uvi = float(data["uvi"])
+        return record
+
+
+class OneCallRecord(Record):
+    """A lightweight version of OneCallWeather with the same attributes.
+
+    Building the pydantic models for a one call response creates well over a hundred validated
+    objects. Records use __slots__ and are built straight from the decoded JSON, only converting
+    values to the types the models would give them. Parts left out of the request with exclude
+    are None or empty.
+    """
+
+    __slots__ = (
+        "lat",
+        "lon",
+        "timezone",
+        "timezone_offset",
+        "current",
+        "minutely",
+        "hourly",
+        "daily",
+    )
+
+    lat: float
+    lon: float
+    timezone: str
+    timezone_offset: int
+    current: Optional[OneCallCurrentRecord]
+    minutely: Optional[List[MinutelyRecord]]
+    hourly: List[HourlyRecord]
+    daily: List[DailyRecord]
+
+    @classmethod
+    def decode(cls, data: dict[str, Any]) -> OneCallRecord:
+        """Builds the record from a decoded one call response.
+
+        Raises DecodeError if a required field is missing or a value can't be converted.
+        """
+        try:
+            record = cls.__new__(cls)
+            record.lat = float(data["lat"])
+            record.lon = float(data["lon"])
+            record.timezone = str(data["timezone"])
+            record.timezone_offset = int(data["timezone_offset"])
+            current = data.get("current")
+            record.current = None if current is None else OneCallCurrentRecord.decode(current)
+            minutely = data.get("minutely")
+            record.minutely = (
+                None if minutely is None else [MinutelyRecord.decode(x) for x in minutely]
+            )
+            record.hourly = [HourlyRecord.decode(x) for x in data.get("hourly", [])]
+            record.daily = [DailyRecord.decode(x) for x in data.get("daily", [])]
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            raise DecodeError(f"Unable to decode the one call response: {e!r}") from e
+
+        return record
+
+
+class CurrentTempRecord(Record):
+    __slots__ = ("temp", "feels_like")
+
+    temp: float
+    feels_like: float
+
+    @classmethod
+    def decode(cls, data: dict[str, Any]) -> CurrentTempRecord:
+        record = cls.__new__(cls)
+        record.temp = float(data["temp"])
+        record.feels_like = float(data["feels_like"])
+        return record
+
+
+class HourlyTempRecord(Record):
+    __slots__ = ("dt", "temp", "feels_like")
+
+    dt: datetime
+    temp: float
+    feels_like: float
+
+    @classmethod
+    def decode(cls, data: dict[str, Any]) -> HourlyTempRecord:
+        record = cls.__new__(cls)
+        record.dt = _datetime(data["dt"])
+        record.temp = float(data["temp"])
+        record.feels_like = float(data["feels_like"])
+        return record
+
+
+class DailyTempRecord(Record):
+    __slots__ = ("dt", "temp")
+
+    dt: datetime
+    temp: TempRecord
+
+    @classmethod
+    def decode(cls, data: dict[str, Any]) -> DailyTempRecord:
+        record = cls.__new__(cls)
+        record.dt = _datetime(data["dt"])
+        record.temp = TempRecord.decode(data["temp"])
+        return record
+
+
+class OneCallTempRecord(Record):
+    """The parts of a one call response that temperature only views read.
+
+    Every other field and sub-object, such as the weather conditions, wind, and precipitation, is
+    skipped without being converted.
+    """
+
+    __slots__ = ("lat", "lon", "timezone", "timezone_offset", "current", "hourly", "daily")
+
+    lat: float
+    lon: float
+    timezone: str
+    timezone_offset: int
+    current: Optional[CurrentTempRecord]
+    hourly: List[HourlyTempRecord]
+    daily: List[DailyTempRecord]
+
+    @classmethod
+    def decode(cls, data: dict[str, Any]) -> OneCallTempRecord:
+        """Builds the record from a decoded one call response.
+
+        Raises DecodeError if a required field is missing or a value can't be converted.
+        """
+        try:
+            record = cls.__new__(cls)
+            record.lat = float(data["lat"])
+            record.lon = float(data["lon"])
+            record.timezone = str(data["timezone"])
+            record.timezone_offset = int(data["timezone_offset"])
+            current = data.get("current")
+            record.current = None if current is None else CurrentTempRecord.decode(current)
+            record.hourly = [HourlyTempRecord.decode(x) for x in data.get("hourly", [])]
+            record.daily = [DailyTempRecord.decode(x) for x in data.get("daily", [])]
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            raise DecodeError(f"Unable to decode the one call response: {e!r}") from e
+
+        return record
+
+
+def _datetime(value: Any) -> datetime:
+    # The same conversion pydantic uses for unix timestamps.
+    return datetime.fromtimestamp(value, timezone.utc)
+
+
+def _precip(value: dict[str, Any] | None) -> PrecipAmountRecord | None:
+    return None if value is None else PrecipAmountRecord.decode(value)
@@ -87,7 +87,7 @@ class Hourly(CamelBase):
     wind_deg: int
     rain: Optional[PrecipAmount] = None
     snow: Optional[PrecipAmount] = None
-    pop: int
+    pop: float
 
 
 class OneCallCurrent(CamelBase):
@@ -134,7 +134,7 @@ class Daily(CamelBase):
     wind_gust: float = 0.0
     weather: List[Weather]
     clouds: int
-    pop: int
+    pop: float
     rain: float = 0.0
     uvi: float
 
@@ -153,7 +153,7 @@ class OneCallWeather(CamelBase):
     lon: float
     timezone: str
     timezone_offset: int
-    current: OneCallCurrent
+    current: Optional[OneCallCurrent] = None
     minutely: Optional[List[Minutely]] = None
-    hourly: List[Hourly]
-    daily: List[Daily]
+    hourly: List[Hourly] = []
+    daily: List[Daily] = []